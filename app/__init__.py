@@ -14,9 +14,33 @@ def create_app(config_class=Config):
     from . import db
     db.init_app(app)
     
+    from .utils import sessions, password_pool, async_db
+    sessions.init_app(app)
+    password_pool.init_app(app)
+    async_db.init_app(app)
+    
+    from .utils import chart_cache, chart_pool
+    chart_cache.init_app(app)
+    chart_pool.init_app(app)
+    
+    from .utils import query_stats, metrics, http_cache
+    query_stats.init_app(app)
+    metrics.init_app(app)
+    http_cache.init_app(app)
+    
     from .routes import register_routes
     register_routes(app)
     
+    # After the routes - the warm-up builds chart URLs
+    from .utils import report_cache
+    report_cache.init_app(app)
+    
+    from .services import analytics_service
+    analytics_service.init_app(app)
+    
+    from .cli import register_cli
+    register_cli(app)
+    
     register_error_handlers(app)
     
     return app
@@ -0,0 +1,132 @@
+"""Flask CLI commands (run with `flask --app run <command>`)."""
+from datetime import datetime
+import click
+
+
+def register_cli(app):
+    """Hooks up our custom `flask` commands."""
+
+    @app.cli.command('import-schedule')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'file_format', type=click.Choice(['csv', 'json']), default=None,
+                  help='File format (guessed from the content if omitted).')
+    @click.option('--apply', 'apply_changes', is_flag=True, help='Write the flights (default is a dry run).')
+    @click.option('--allow-partial', is_flag=True, help='Write the valid rows even if some rows fail.')
+    @click.option('--manager', 'manager_id', default=None, help='Manager ID to log as the editor.')
+    def import_schedule_command(path, file_format, apply_changes, allow_partial, manager_id):
+        """Bulk-imports a seasonal schedule from a CSV/JSON file."""
+        from app.services import schedule_service
+
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        report = schedule_service.import_schedule(
+            content,
+            file_format=file_format,
+            dry_run=not apply_changes,
+            manager_id=manager_id,
+            allow_partial=allow_partial
+        )
+
+        for flight in report['flights']:
+            click.echo(f"  line {flight['line']:>4}  {flight['flight_id']}  "
+                       f"{flight['origin_port']}→{flight['dest_port']}  {flight['departure']:%Y-%m-%d %H:%M}  "
+                       f"{flight['airplane_id']}  pilots={','.join(flight['pilot_ids'])}  "
+                       f"attendants={','.join(flight['attendant_ids'])}")
+        for error in report['errors']:
+            click.echo(f"  line {error.get('line') or '-':>4}  ERROR: {error['error']}", err=True)
+
+        click.echo(f"{len(report['flights'])} flight(s) planned, {len(report['errors'])} error(s), "
+                   f"{report['created']} created{' (dry run)' if report['dry_run'] else ''}.")
+
+    @app.cli.command('plan-crew')
+    @click.option('--start', type=click.DateTime(formats=['%Y-%m-%d', '%Y-%m-%d %H:%M']), default=None,
+                  help='Start of the planning horizon (default: now).')
+    @click.option('--days', type=int, default=7, show_default=True, help='Length of the horizon in days.')
+    @click.option('--apply', 'apply_changes', is_flag=True, help='Write the assignments (default is a dry run).')
+    def plan_crew_command(start, days, apply_changes):
+        """Assigns pilots/attendants to every under-staffed flight in the horizon."""
+        from app.services import crew_planning_service
+
+        started = datetime.now()
+        plan = crew_planning_service.plan_crew(start=start, days=days)
+        elapsed = (datetime.now() - started).total_seconds()
+
+        for assignment in plan['assignments']:
+            click.echo(f"  {assignment['flight_id']}  pilots={','.join(assignment['pilot_ids'])}  "
+                       f"attendants={','.join(assignment['attendant_ids'])}")
+        for miss in plan['unfilled']:
+            click.echo(f"  {miss['flight_id']}  {miss['departure']:%Y-%m-%d %H:%M}  ERROR: {miss['error']}", err=True)
+
+        created = crew_planning_service.apply_crew_plan(plan) if apply_changes else 0
+        click.echo(f"{len(plan['assignments'])}/{plan['flights']} flight(s) staffed in {elapsed:.2f}s, "
+                   f"{plan['repositioned']} repositioning(s), "
+                   f"{created} written{'' if apply_changes else ' (dry run)'}.")
+
+    @app.cli.command('plan-fleet')
+    @click.option('--start', type=click.DateTime(formats=['%Y-%m-%d', '%Y-%m-%d %H:%M']), default=None,
+                  help='Start of the planning horizon (default: now).')
+    @click.option('--days', type=int, default=7, show_default=True, help='Length of the horizon in days.')
+    @click.option('--added', 'added_flight', default=None, help='Only patch the plan around this new flight.')
+    @click.option('--cancelled', 'cancelled_flight', default=None, help='Only patch the plan around this cancelled flight.')
+    @click.option('--apply', 'apply_changes', is_flag=True, help='Write the plane changes (default is a dry run).')
+    def plan_fleet_command(start, days, added_flight, cancelled_flight, apply_changes):
+        """Assigns planes to flights so each plane's rotation connects in place and time."""
+        from app.services import fleet_planning_service
+
+        started = datetime.now()
+        if added_flight or cancelled_flight:
+            plan = fleet_planning_service.replan_after_change(
+                added_flight or cancelled_flight, 'added' if added_flight else 'cancelled', days=days)
+        else:
+            plan = fleet_planning_service.plan_fleet(start=start, days=days)
+        elapsed = (datetime.now() - started).total_seconds()
+
+        if plan.get('error'):
+            raise click.ClickException(plan['error'])
+        for flight_id, airplane_id in sorted(plan['changes'].items()):
+            click.echo(f"  {flight_id}  -> {airplane_id}")
+        for miss in plan['unassigned']:
+            click.echo(f"  {miss['flight_id']}  {miss['departure']:%Y-%m-%d %H:%M}  ERROR: {miss['error']}", err=True)
+        for conflict in plan.get('conflicts', []):
+            click.echo(f"  {conflict['airplane_id']} ends at {conflict['ends_at']} but its next flight leaves "
+                       f"from {conflict['next_leaves_from']}", err=True)
+
+        moved = fleet_planning_service.apply_fleet_plan(plan) if apply_changes else 0
+        click.echo(f"{len(plan['changes'])} flight(s) re-tailed, {len(plan['unassigned'])} without a plane, "
+                   f"planned in {elapsed:.2f}s, {moved} written{'' if apply_changes else ' (dry run)'}.")
+
+    @app.cli.command('backfill-report-facts')
+    @click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='First departure date to rebuild (default: everything).')
+    @click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Rebuild departures before this date (default: everything).')
+    @click.option('--batch-days', type=int, default=31, show_default=True, help='Days of flights per commit.')
+    def backfill_report_facts_command(start, end, batch_days):
+        """Rebuilds the report fact tables from the flights/orders/crew tables."""
+        from app.services import report_fact_service
+
+        started = datetime.now()
+        batches = report_fact_service.backfill(start=start.date() if start else None,
+                                               end=end.date() if end else None,
+                                               batch_days=batch_days)
+        elapsed = (datetime.now() - started).total_seconds()
+        click.echo(f"Report facts rebuilt in {batches} batch(es) in {elapsed:.2f}s.")
+
+    @app.cli.command('prune-sessions')
+    @click.option('--batch-size', type=int, default=500, show_default=True, help='Rows deleted per statement.')
+    def prune_sessions_command(batch_size):
+        """Deletes expired server-side sessions (the web workers also do this every SESSION_CLEANUP_SECONDS)."""
+        from app.utils import sessions
+
+        deleted = sessions.prune_expired(batch_size)
+        click.echo(f"{deleted} expired session(s) deleted.")
+
+    @app.cli.command('bump-reference-version')
+    def bump_reference_version_command():
+        """Run after reloading airports or routes, so cached home and search pages are refetched."""
+        from app.utils import http_cache
+
+        if not http_cache.reference_changed():
+            raise click.ClickException("Reference version not bumped - see the log")
+        click.echo("Reference pages will be rebuilt on their next request.")
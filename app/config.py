@@ -1,5 +1,6 @@
 """Configuration settings - pulls from env vars with sensible defaults."""
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,9 +19,97 @@ class Config:
     DB_NAME = os.environ.get('DB_NAME', 'flytau')
     DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
     DB_POOL_NAME = 'flytau_pool'
+    # Extra connections opened under load, how long a request waits for one, and when
+    # idle connections are replaced (keep it under MySQL's wait_timeout)
+    DB_POOL_MAX_OVERFLOW = int(os.environ.get('DB_POOL_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # seconds
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds, 0 = never
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+    DB_STATEMENT_CACHE_SIZE = int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 64))  # prepared statements per connection
+    DB_RECONNECT_SECONDS = float(os.environ.get('DB_RECONNECT_SECONDS', 5))  # first retry if MySQL is down at boot
     
-    SESSION_TYPE = 'filesystem'
+    # Optional read replica - plain reads and the reports go there, writes stay on DB_HOST.
+    # User/password/port default to the primary's.
+    DB_REPLICA_HOST = os.environ.get('DB_REPLICA_HOST', '')
+    DB_REPLICA_PORT = int(os.environ.get('DB_REPLICA_PORT') or 0) or None
+    DB_REPLICA_USER = os.environ.get('DB_REPLICA_USER')
+    DB_REPLICA_PASSWORD = os.environ.get('DB_REPLICA_PASSWORD')
+    DB_REPLICA_POOL_SIZE = int(os.environ.get('DB_REPLICA_POOL_SIZE') or 0) or None
+    DB_REPLICA_MAX_LAG = int(os.environ.get('DB_REPLICA_MAX_LAG', 5))  # seconds behind before we stop using it
+    DB_REPLICA_CHECK_SECONDS = float(os.environ.get('DB_REPLICA_CHECK_SECONDS', 5))  # how often the lag is checked
+    DB_REPLICA_STICKY_SECONDS = float(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))  # primary-only after a write
+    
+    # Sessions (app/utils/sessions.py): 'hybrid' keeps small ones in the signed cookie and
+    # moves bigger ones to the WebSessions table; 'cookie' and 'sql' force one or the other
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'hybrid')
+    SESSION_COOKIE_MAX_BYTES = int(os.environ.get('SESSION_COOKIE_MAX_BYTES', 3000))
+    SESSION_CLEANUP_SECONDS = int(os.environ.get('SESSION_CLEANUP_SECONDS', 900))  # expired-row pruning, 0 = off
+    SESSION_CLEANUP_BATCH = int(os.environ.get('SESSION_CLEANUP_BATCH', 500))  # rows per DELETE
     PERMANENT_SESSION_LIFETIME = 3600  # 1 hour
+    
+    # Report charts: 'svg' (no extra dependencies) or 'png' (matplotlib)
+    CHART_RENDERER = os.environ.get('CHART_RENDERER', 'svg')
+    
+    # Rendered report charts - the directory is shared by every gunicorn worker on the box
+    CHART_CACHE_DIR = os.environ.get('CHART_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'flytau_charts')
+    CHART_CACHE_MEMORY_ITEMS = int(os.environ.get('CHART_CACHE_MEMORY_ITEMS', 64))
+    CHART_CACHE_DISK_ITEMS = int(os.environ.get('CHART_CACHE_DISK_ITEMS', 2000))
+    
+    # Charts are drawn in a process pool (per web worker); 0 workers draws them inline
+    CHART_POOL_WORKERS = int(os.environ.get('CHART_POOL_WORKERS', 2))
+    CHART_POOL_QUEUE_SIZE = int(os.environ.get('CHART_POOL_QUEUE_SIZE', 16))
+    CHART_RENDER_WAIT = float(os.environ.get('CHART_RENDER_WAIT', 2))  # seconds the image request blocks
+    CHART_RENDER_TIMEOUT = float(os.environ.get('CHART_RENDER_TIMEOUT', 30))
+    
+    # Largest timetable file the bulk schedule import accepts (bytes)
+    SCHEDULE_IMPORT_MAX_BYTES = int(os.environ.get('SCHEDULE_IMPORT_MAX_BYTES', 5 * 1024 * 1024))
+    # Longest span a recurring row may repeat over (days from departure_date to repeat_until)
+    SCHEDULE_IMPORT_MAX_DAYS = int(os.environ.get('SCHEDULE_IMPORT_MAX_DAYS', 366))
+    
+    # Rows per page in the occupancy report's flight table
+    REPORT_PAGE_SIZE = int(os.environ.get('REPORT_PAGE_SIZE', 50))
+    
+    # Report results are cached per worker until the facts change (or the TTL runs out);
+    # the generation file in REPORT_CACHE_DIR tells every worker on the box about changes
+    # (other hosts only through the TTL, unless REPORT_CACHE_DIR is shared)
+    REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'flytau_reports')
+    REPORT_CACHE_TTL = int(os.environ.get('REPORT_CACHE_TTL', 300))  # seconds, 0 turns the cache off
+    REPORT_CACHE_MAX_ITEMS = int(os.environ.get('REPORT_CACHE_MAX_ITEMS', 128))
+    REPORT_CACHE_WARM = os.environ.get('REPORT_CACHE_WARM', '1') == '1'  # fill it in the background at startup
+    
+    # Per-request query stats: slow-query log threshold, N+1 flag (same statement this many
+    # times in one request) and how many requests the manager query panel keeps per worker
+    QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', '1') == '1'
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 5))
+    QUERY_STATS_HISTORY = int(os.environ.get('QUERY_STATS_HISTORY', 50))
+    
+    # Passwords: bcrypt cost (hashes made with another cost are redone at login) and the
+    # per-worker hashing pool - threads, extra waiting logins, seconds a login waits for a slot
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 8))
+    PASSWORD_HASH_ADMISSION_TIMEOUT = float(os.environ.get('PASSWORD_HASH_ADMISSION_TIMEOUT', 2))
+    
+    # Async views (search, flight details, seat map): how many of their queries run at once per web worker.
+    # Each holds a pooled connection while it runs, so keep it under DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW
+    ASYNC_DB_WORKERS = int(os.environ.get('ASYNC_DB_WORKERS', 8))
+    
+    # Conditional GETs (ETag / Last-Modified, 304) for flight, seat-map and reference pages,
+    # and how long a reverse proxy may serve them to anonymous visitors without asking again.
+    # HTTP_CACHE_BUILD goes into every ETag (default: newest template mtime) - set it to the release
+    HTTP_CACHE_ENABLED = os.environ.get('HTTP_CACHE_ENABLED', '1') == '1'
+    HTTP_CACHE_FLIGHT_SECONDS = int(os.environ.get('HTTP_CACHE_FLIGHT_SECONDS', 10))
+    HTTP_CACHE_REFERENCE_SECONDS = int(os.environ.get('HTTP_CACHE_REFERENCE_SECONDS', 300))
+    HTTP_CACHE_BUILD = os.environ.get('HTTP_CACHE_BUILD', '')
+    
+    # Prometheus metrics at /metrics. With a token the scraper sends it as a Bearer header;
+    # without one only direct local connections (not through nginx) are let in
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+    
+    # Pivot report: seconds between reloads of the in-memory analytics snapshot (0 = load on first use)
+    ANALYTICS_REFRESH_SECONDS = int(os.environ.get('ANALYTICS_REFRESH_SECONDS', 600))
 
 
 class DevelopmentConfig(Config):
@@ -43,6 +132,10 @@ class TestingConfig(Config):
     """For running tests - uses a separate database."""
     TESTING = True
     DB_NAME = os.environ.get('TEST_DB_NAME', 'flytau_test')
+    CHART_POOL_WORKERS = 0
+    REPORT_CACHE_WARM = False
+    ANALYTICS_REFRESH_SECONDS = 0
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 4))  # fast hashes for test accounts
 
 
 # Configuration dictionary for easy access
@@ -1,20 +1,46 @@
-"""Handles all the MySQL connection pooling and query execution stuff."""
+"""Handles all the MySQL connection pooling and query execution stuff.
+
+With DB_REPLICA_HOST set there's a second pool to a read replica. execute_query and
+stream_query send plain SELECTs there, and everything else to the primary: writes, anything
+inside transaction(), locking reads, and every read for the rest of a request (and for
+DB_REPLICA_STICKY_SECONDS after, per session) once it has written - so people see their
+own changes. A replica that's down or lagging more than DB_REPLICA_MAX_LAG seconds
+is skipped until it catches up.
+"""
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
 import mysql.connector
-from mysql.connector import pooling
-from flask import current_app, g
+from mysql.connector import errorcode
+from flask import current_app, g, session, has_request_context
+from app.utils import metrics, query_stats
+from app.utils.db_pool import ConnectionPool, PoolTimeout
 
 
 _connection_pool = None
 _db_available = False
+_reconnect_thread = None
+_replica_pool = None
+# Last verdict on the replica: usable?, its lag in seconds, when it was checked (monotonic)
+_replica = {'healthy': False, 'lag': None, 'checked_at': float('-inf')}
+_replica_check_lock = threading.Lock()
+
+RECONNECT_MAX_SECONDS = 60
+READ_STATEMENTS = ('SELECT', 'WITH', 'SHOW', 'EXPLAIN')
+LOCKING_READS = ('FOR UPDATE', 'FOR SHARE', 'LOCK IN SHARE MODE')
+
+
+class TransactionRolledBack(mysql.connector.errors.DatabaseError):
+    """A transaction() block ended normally but was marked rollback-only, so nothing was saved."""
 
 
 def init_app(app):
     """Sets up the connection pool when Flask starts up."""
     global _connection_pool, _db_available
     
-    pool_config = {
-        'pool_name': app.config['DB_POOL_NAME'],
-        'pool_size': app.config['DB_POOL_SIZE'],
+    connect_args = {
         'host': app.config['DB_HOST'],
         'port': app.config['DB_PORT'],
         'user': app.config['DB_USER'],
@@ -25,86 +51,423 @@ def init_app(app):
         'autocommit': False
     }
     
+    pool_options = {
+        'max_overflow': app.config.get('DB_POOL_MAX_OVERFLOW', 5),
+        'timeout': app.config.get('DB_POOL_TIMEOUT', 10),
+        'recycle': app.config.get('DB_POOL_RECYCLE', 1800),
+        'pre_ping': app.config.get('DB_POOL_PRE_PING', True),
+        'statement_cache_size': app.config.get('DB_STATEMENT_CACHE_SIZE', 64),
+    }
+    _connection_pool = ConnectionPool(connect_args, size=app.config['DB_POOL_SIZE'], **pool_options)
+    _init_replica(app, connect_args, pool_options)
+    
     try:
-        _connection_pool = pooling.MySQLConnectionPool(**pool_config)
+        _connection_pool.prefill()
         _db_available = True
         app.logger.info("Database connection pool created successfully")
     except mysql.connector.Error as err:
         _db_available = False
         app.logger.warning(f"Database not available at startup: {err}")
-        app.logger.warning("App will start but DB operations will fail until DB is available")
+        app.logger.warning("App will start and keep retrying the connection in the background")
         # Don't raise - let the app start without DB
+        _start_reconnect(app)
     
     app.teardown_appcontext(close_db)
 
 
+def _start_reconnect(app):
+    """Keeps trying to fill the pool (backing off up to a minute) until MySQL answers."""
+    global _reconnect_thread
+    if _reconnect_thread is not None and _reconnect_thread.is_alive():
+        return
+    
+    def retry():
+        global _db_available
+        delay = app.config.get('DB_RECONNECT_SECONDS', 5)
+        while not _db_available:
+            time.sleep(delay)
+            try:
+                _connection_pool.prefill()
+            except mysql.connector.Error as err:
+                app.logger.info(f"Database still unavailable: {err}")
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+                continue
+            _db_available = True
+            app.logger.info("Database is back - connection pool filled")
+    
+    _reconnect_thread = threading.Thread(target=retry, name=f"{app.config.get('DB_POOL_NAME', 'flytau_pool')}-reconnect", daemon=True)
+    _reconnect_thread.start()
+
+
+def _init_replica(app, connect_args, pool_options):
+    """Second pool for the read replica, if one is configured. Connects lazily."""
+    global _replica_pool
+    _replica_pool = None
+    if not app.config.get('DB_REPLICA_HOST'):
+        return
+    replica_args = dict(
+        connect_args,
+        host=app.config['DB_REPLICA_HOST'],
+        port=app.config.get('DB_REPLICA_PORT') or connect_args['port'],
+        user=app.config.get('DB_REPLICA_USER') or connect_args['user'],
+        password=app.config.get('DB_REPLICA_PASSWORD') or connect_args['password'],
+    )
+    size = app.config.get('DB_REPLICA_POOL_SIZE') or app.config['DB_POOL_SIZE']
+    _replica_pool = ConnectionPool(replica_args, size=size, **pool_options)
+    _replica.update(healthy=False, lag=None, checked_at=float('-inf'))
+    app.logger.info(f"Reads go to the replica at {replica_args['host']}:{replica_args['port']}")
+
+
 def is_db_available():
     """Quick check to see if the DB is up and running."""
     return _db_available
 
+
+def pool_stats():
+    """Connection pool numbers (open, idle, checked out, waits, timeouts...) for this worker."""
+    if _connection_pool is None:
+        return {}
+    stats = {'available': _db_available, **_connection_pool.stats()}
+    if _replica_pool is not None:
+        stats['replica'] = {'healthy': _replica['healthy'], 'lag': _replica['lag'], **_replica_pool.stats()}
+    return stats
+
+
+def _checkout(pool, name):
+    """pool.get_connection(), with the wait (and any timeout) recorded in the metrics."""
+    started = time.perf_counter()
+    try:
+        conn = pool.get_connection()
+    except PoolTimeout:
+        metrics.pool_timeout(name)
+        raise
+    metrics.pool_checkout(name, time.perf_counter() - started, pool.stats())
+    return conn
+
+
 def get_db():
     """Grabs a connection from the pool (reuses the same one for each request)."""
+    global _db_available
     if 'db' not in g:
         if _connection_pool is None:
             raise RuntimeError("Database not initialized. Call init_app first.")
-        g.db = _connection_pool.get_connection()
+        # Waits up to DB_POOL_TIMEOUT for a free connection (PoolTimeout after that)
+        g.db = _checkout(_connection_pool, 'primary')
+        _db_available = True
     return g.db
 
 
-def close_db(error=None):
-    """Puts the connection back in the pool when the request is done."""
-    db = g.pop('db', None)
-    if db is not None:
-        if error:
-            db.rollback()
-        db.close()
+def get_read_db():
+    """
+    Connection for a plain read: the replica if there is one and it's caught up, otherwise
+    the primary (same one get_db() gives this request).
+    """
+    if 'db_read' in g:
+        return g.db_read
+    if not _replica_usable():
+        return get_db()
+    try:
+        g.db_read = _checkout(_replica_pool, 'replica')
+    except mysql.connector.Error as err:
+        _replica.update(healthy=False, checked_at=time.monotonic())
+        current_app.logger.warning(f"Replica unavailable, reading from the primary: {err}")
+        return get_db()
+    return g.db_read
 
 
-def execute_query(query, params=None, fetch_one=False, fetch_all=True, commit=False):
-    """Runs SQL and returns results as dicts. Pass commit=True for INSERT/UPDATE/DELETE."""
-    conn = get_db()
+def _replica_usable():
+    if _replica_pool is None:
+        return False
+    interval = current_app.config.get('DB_REPLICA_CHECK_SECONDS', 5)
+    # One request re-checks the lag now and then; the rest go by the last verdict
+    if time.monotonic() - _replica['checked_at'] >= interval and _replica_check_lock.acquire(blocking=False):
+        try:
+            _check_replica()
+        finally:
+            _replica_check_lock.release()
+    return _replica['healthy']
+
+
+def _check_replica():
+    """Measures replication lag and decides whether the replica can take reads."""
+    _replica['checked_at'] = time.monotonic()
+    max_lag = current_app.config.get('DB_REPLICA_MAX_LAG', 5)
+    try:
+        conn = _replica_pool.get_connection()
+        try:
+            lag = _replication_lag(conn)
+        finally:
+            conn.close()
+    except mysql.connector.Error as err:
+        if _replica['healthy']:
+            current_app.logger.warning(f"Replica unavailable, reading from the primary: {err}")
+        _replica.update(healthy=False, lag=None)
+        return
+    healthy = lag is not None and lag <= max_lag
+    if _replica['healthy'] and not healthy:
+        behind = "isn't replicating" if lag is None else f"is {lag}s behind"
+        current_app.logger.warning(f"Replica {behind} - reading from the primary")
+    _replica.update(healthy=healthy, lag=lag)
+
+
+def _replication_lag(conn):
+    """
+    Seconds the replica is behind, 0 if it isn't replicating from anything (a read-only
+    copy) or we can't tell, None if replication has stopped.
+    """
     cursor = conn.cursor(dictionary=True)
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except mysql.connector.Error as err:
+            if err.errno in (errorcode.ER_SPECIFIC_ACCESS_DENIED_ERROR, errorcode.ER_ACCESS_DENIED_ERROR):
+                return 0  # No REPLICATION CLIENT grant - trust it
+            cursor.execute("SHOW SLAVE STATUS")  # MySQL before 8.0.22
+        status = cursor.fetchone()
+    finally:
+        cursor.close()
+    if not status:
+        return 0
+    lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+    return None if lag is None else int(lag)
+
+
+def _is_plain_read(query):
+    statement = query.lstrip().upper()
+    return statement.startswith(READ_STATEMENTS) and not any(lock in statement for lock in LOCKING_READS)
+
+
+def _wrote_recently():
+    """This request (or, for a few seconds, this session) has written - read from the primary."""
+    if g.get('db_wrote'):
+        return True
+    return has_request_context() and session.get('db_primary_until', 0) > time.time()
+
+
+def _mark_write():
+    g.db_wrote = True
+    if _replica_pool is not None and has_request_context():
+        sticky = current_app.config.get('DB_REPLICA_STICKY_SECONDS', 5)
+        session['db_primary_until'] = time.time() + sticky
+
+
+def _connection_for(query, commit=False, primary=False):
+    """Primary for writes, transactions and read-your-writes; replica for everything else."""
+    # The session store always uses the primary and doesn't count as a write: its reads run
+    # before the session is loaded and its writes after the request is done
+    if primary:
+        return get_db()
+    if commit or in_transaction() or not _is_plain_read(query):
+        _mark_write()
+        return get_db()
+    if _replica_pool is None or _wrote_recently():
+        return get_db()
+    return get_read_db()
+
+
+def close_db(error=None):
+    """Puts the connections back in their pools when the request is done."""
+    for key, pool, name in (('db', _connection_pool, 'primary'), ('db_read', _replica_pool, 'replica')):
+        db = g.pop(key, None)
+        if db is not None:
+            if error:
+                db.rollback()
+            db.close()
+            metrics.pool_state(name, pool.stats())
+
+
+def execute_query(query, params=None, fetch_one=False, fetch_all=True, commit=False,
+                  prepared=False, row_factory=None, primary=False):
+    """
+    Runs SQL and returns results as dicts. Pass commit=True for INSERT/UPDATE/DELETE.
+    Hot lookups can opt in to the fast path: prepared=True reuses a server-side prepared
+    statement on this connection (parsed once, then only the parameters are sent), and
+    row_factory=tuple_rows / namedtuple_rows skips building a dict per row.
+    primary=True skips the replica routing (see _connection_for).
+    """
+    conn = _connection_for(query, commit, primary)
+    statements = getattr(conn, 'statements', None) if prepared else None
+    if statements is not None:
+        cursor, query = statements.cursor(conn, query)
+    else:
+        cursor = conn.cursor(dictionary=row_factory is None)
     
+    started = time.perf_counter()
     try:
         cursor.execute(query, params or ())
         
         if commit:
-            conn.commit()
+            if not in_transaction():
+                conn.commit()
             return cursor.lastrowid if cursor.lastrowid else cursor.rowcount
         
-        if fetch_one:
-            return cursor.fetchone()
-        elif fetch_all:
-            return cursor.fetchall()
+        if statements is None and row_factory is None:
+            if fetch_one:
+                return cursor.fetchone()
+            elif fetch_all:
+                return cursor.fetchall()
+            return None
         
-        return None
+        # Fast path: always drain the result (a cached cursor gets reused) and build rows ourselves
+        rows = cursor.fetchall() if cursor.with_rows else []
+        make_row = (row_factory or dict_rows)(tuple(cursor.column_names))
+        if make_row is not None:
+            rows = [make_row(row) for row in rows]
+        if fetch_one:
+            return rows[0] if rows else None
+        return rows if fetch_all else None
     except mysql.connector.Error as err:
-        conn.rollback()
+        if statements is not None:
+            statements.discard(query)
+        # Inside transaction() the block decides what gets rolled back
+        if not in_transaction():
+            conn.rollback()
         raise
     finally:
+        query_stats.record(query, started)
+        # Prepared cursors stay open in the connection's statement cache
+        if statements is None:
+            cursor.close()
+
+
+def dict_rows(columns):
+    """Row factory: {column: value} - what execute_query returns by default."""
+    return lambda row: dict(zip(columns, row))
+
+
+def tuple_rows(columns):
+    """Row factory: the plain tuples off the cursor - cheapest, for existence checks and single values."""
+    return None
+
+
+@lru_cache(maxsize=256)
+def _row_type(columns):
+    return namedtuple('Row', columns, rename=True)
+
+
+def namedtuple_rows(columns):
+    """Row factory: namedtuples (row.FlightId / row[0]) - attribute access without a dict per row."""
+    return _row_type(columns)._make
+
+
+def stream_query(query, params=None, batch_size=500):
+    """
+    Like execute_query for a big SELECT, but yields the rows (as dicts) instead of
+    returning a list. The cursor is unbuffered, so rows come off the socket batch_size
+    at a time and memory stays flat however many there are.
+    Don't run other queries on this request's connection until the generator is done.
+    """
+    conn = _connection_for(query)
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    
+    started = time.perf_counter()
+    try:
+        cursor.execute(query, params or ())
+        # Only the execute is timed - the rest is as slow as whoever reads the stream
+        query_stats.record(query, started)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    except mysql.connector.Error as err:
+        # Inside transaction() the block decides what gets rolled back
+        if not in_transaction():
+            conn.rollback()
+        raise
+    finally:
+        # Stopped early (client went away) - the unread rows have to come off the
+        # connection before it can run anything else or go back to the pool
+        if conn.unread_result:
+            conn.consume_results()
         cursor.close()
 
 
 def execute_many(query, data_list, commit=True):
     """Runs the same query with a bunch of different parameter sets - great for bulk inserts."""
+    _mark_write()
     conn = get_db()
     cursor = conn.cursor()
     
+    started = time.perf_counter()
     try:
         cursor.executemany(query, data_list)
-        if commit:
+        if commit and not in_transaction():
             conn.commit()
         return cursor.rowcount
     except mysql.connector.Error as err:
-        conn.rollback()
+        # Inside transaction() the block decides what gets rolled back
+        if not in_transaction():
+            conn.rollback()
+        raise
+    finally:
+        query_stats.record(query, started)
+        cursor.close()
+
+
+def in_transaction():
+    """True inside a `with transaction():` block for this request."""
+    return g.get('db_tx_depth', 0) > 0
+
+
+@contextmanager
+def transaction():
+    """
+    Unit of work for a business operation: every statement inside commits once at the end,
+    or all of it rolls back if the block raises. commit=True / commit() inside the block
+    are deferred to that single commit. Blocks nest - an inner one is a savepoint, so its
+    failure undoes only its own writes if the outer block catches the exception.
+    A block left rollback-only (rollback() inside it, or a savepoint lost to a deadlock)
+    is rolled back and raises TransactionRolledBack, so callers can't mistake it for success.
+    """
+    conn = get_db()
+    depth = g.get('db_tx_depth', 0)
+    savepoint = f"flytau_sp_{depth}" if depth else None
+    if savepoint:
+        _run_statement(conn, f"SAVEPOINT {savepoint}")
+    else:
+        g.db_tx_rollback_only = False
+    g.db_tx_depth = depth + 1
+    try:
+        yield conn
+    except BaseException:
+        g.db_tx_depth = depth
+        if savepoint:
+            try:
+                _run_statement(conn, f"ROLLBACK TO SAVEPOINT {savepoint}")
+            except mysql.connector.Error:
+                # A deadlock already rolled back the whole transaction (savepoint included)
+                g.db_tx_rollback_only = True
+        else:
+            conn.rollback()
         raise
+    g.db_tx_depth = depth
+    if savepoint:
+        _run_statement(conn, f"RELEASE SAVEPOINT {savepoint}")
+    elif g.pop('db_tx_rollback_only', False):
+        conn.rollback()
+        raise TransactionRolledBack("The transaction was rolled back - nothing was saved")
+    else:
+        conn.commit()
+
+
+def _run_statement(conn, sql):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql)
     finally:
         cursor.close()
 
 
 def commit():
-    get_db().commit()
+    """Commits now - or, inside transaction(), leaves it to the end of the block."""
+    if not in_transaction():
+        get_db().commit()
 
 
 def rollback():
-    get_db().rollback()
+    """Rolls back now - inside transaction(), the whole unit of work rolls back at the end instead."""
+    if in_transaction():
+        g.db_tx_rollback_only = True
+    else:
+        get_db().rollback()
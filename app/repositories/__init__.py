@@ -7,3 +7,4 @@ from . import flight_repository
 from . import order_repository
 from . import aircraft_repository
 from . import crew_repository
+from . import report_fact_repository
@@ -10,7 +10,7 @@ def get_airplane_by_id(airplane_id):
         FROM Airplanes
         WHERE AirplaneId = %s
     """
-    result = execute_query(sql, (airplane_id,), fetch_one=True)
+    result = execute_query(sql, (airplane_id,), fetch_one=True, prepared=True)
     if result:
         result = dict(result)
         # Read seat configurations directly from INT columns
@@ -0,0 +1,32 @@
+"""SQL for CacheVersions - version counters behind the flight and reference page ETags.
+
+A scope is what a page is built from: 'flight:<FlightId>' or 'reference' (airports and
+routes). Its Version goes up every time that data changes; UpdatedAt (UTC) is the
+page's Last-Modified.
+"""
+from app.db import execute_query
+
+
+def get_version(scope):
+    """
+    Version and UpdatedAt of a scope, or None if it has never been bumped.
+    Read from the primary: a lagging replica would hand out the old version and
+    visitors would get a 304 for a page that has already changed.
+    """
+    sql = """
+        SELECT Version, UpdatedAt
+        FROM CacheVersions
+        WHERE Scope = %s
+    """
+    return execute_query(sql, (scope,), fetch_one=True, prepared=True, primary=True)
+
+
+def bump_versions(scopes):
+    """Adds one to each scope's version (creating it at 1)."""
+    values = ', '.join(['(%s, 1, UTC_TIMESTAMP())'] * len(scopes))
+    sql = f"""
+        INSERT INTO CacheVersions (Scope, Version, UpdatedAt)
+        VALUES {values}
+        ON DUPLICATE KEY UPDATE Version = Version + 1, UpdatedAt = VALUES(UpdatedAt)
+    """
+    execute_query(sql, tuple(scopes), commit=True)
@@ -1,5 +1,5 @@
 """All the SQL queries for pilots and flight attendants."""
-from app.db import execute_query
+from app.db import execute_query, execute_many, commit as db_commit
 
 
 def get_pilot_by_id(pilot_id):
@@ -256,6 +256,155 @@ def delete_all_crew_from_flight(flight_id, airplane_id):
     delete_all_attendants_from_flight(flight_id, airplane_id)
 
 
+def get_crew_assignments_in_window(start_datetime, end_datetime):
+    """Gets every pilot/attendant booking on non-cancelled flights departing inside the window."""
+    sql = """
+        SELECT pf.Pilot_Id AS CrewId, 'pilot' AS Role, f.FlightId, f.OriginPort, f.DestPort,
+               f.DepartureDate, f.DepartureHour, f.Duration
+        FROM Pilot_has_Flights pf
+        JOIN Flights f ON pf.Flights_FlightId = f.FlightId
+        WHERE f.Status != 'cancelled'
+          AND f.DepartureDate BETWEEN %s AND %s
+        UNION ALL
+        SELECT faf.FlightAttendant_Id, 'attendant', f.FlightId, f.OriginPort, f.DestPort,
+               f.DepartureDate, f.DepartureHour, f.Duration
+        FROM FlightAttendant_has_Flights faf
+        JOIN Flights f ON faf.Flights_FlightId = f.FlightId
+        WHERE f.Status != 'cancelled'
+          AND f.DepartureDate BETWEEN %s AND %s
+    """
+    start_date, end_date = start_datetime.date(), end_datetime.date()
+    results = execute_query(sql, (start_date, end_date, start_date, end_date))
+    return results if results else []
+
+
+def get_crew_locations_before(at_datetime):
+    """Where every crew member is at a given time. Returns {'pilot': {...}, 'attendant': {...}}."""
+    sql = """
+        SELECT CrewId, Role, DestPort
+        FROM (
+            SELECT pf.Pilot_Id AS CrewId, 'pilot' AS Role, f.DestPort,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY pf.Pilot_Id
+                       ORDER BY DATE_ADD(TIMESTAMP(f.DepartureDate, f.DepartureHour), INTERVAL f.Duration MINUTE) DESC
+                   ) AS rn
+            FROM Pilot_has_Flights pf
+            JOIN Flights f ON pf.Flights_FlightId = f.FlightId
+            WHERE f.Status IN ('active', 'full', 'done')
+              AND DATE_ADD(TIMESTAMP(f.DepartureDate, f.DepartureHour), INTERVAL f.Duration MINUTE) <= %s
+            UNION ALL
+            SELECT faf.FlightAttendant_Id, 'attendant', f.DestPort,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY faf.FlightAttendant_Id
+                       ORDER BY DATE_ADD(TIMESTAMP(f.DepartureDate, f.DepartureHour), INTERVAL f.Duration MINUTE) DESC
+                   )
+            FROM FlightAttendant_has_Flights faf
+            JOIN Flights f ON faf.Flights_FlightId = f.FlightId
+            WHERE f.Status IN ('active', 'full', 'done')
+              AND DATE_ADD(TIMESTAMP(f.DepartureDate, f.DepartureHour), INTERVAL f.Duration MINUTE) <= %s
+        ) AS last_flights
+        WHERE rn = 1
+    """
+    results = execute_query(sql, (at_datetime, at_datetime)) or []
+    locations = {'pilot': {}, 'attendant': {}}
+    for row in results:
+        locations[row['Role']][row['CrewId']] = row['DestPort']
+    return locations
+
+
+def assign_crew_bulk(pilot_assignments, attendant_assignments, commit=True):
+    """Inserts many (crew_id, flight_id) pairs with one executemany per crew table."""
+    if pilot_assignments:
+        execute_many("""
+            INSERT INTO Pilot_has_Flights (Pilot_Id, Flights_FlightId)
+            VALUES (%s, %s)
+        """, list(pilot_assignments), commit=commit)
+    if attendant_assignments:
+        execute_many("""
+            INSERT INTO FlightAttendant_has_Flights (FlightAttendant_Id, Flights_FlightId)
+            VALUES (%s, %s)
+        """, list(attendant_assignments), commit=commit)
+
+
+def replace_flight_crew(flight_id, pilot_ids, attendant_ids, commit=True):
+    """
+    Makes a flight's crew exactly the given pilots/attendants. Only the difference is written -
+    one multi-row DELETE and one multi-row INSERT per crew table at most.
+    """
+    sql = """
+        SELECT Pilot_Id AS CrewId, 'pilot' AS Role FROM Pilot_has_Flights WHERE Flights_FlightId = %s
+        UNION ALL
+        SELECT FlightAttendant_Id, 'attendant' FROM FlightAttendant_has_Flights WHERE Flights_FlightId = %s
+    """
+    current = {'pilot': set(), 'attendant': set()}
+    for row in execute_query(sql, (flight_id, flight_id)) or []:
+        current[row['Role']].add(row['CrewId'])
+
+    tables = (
+        ('Pilot_has_Flights', 'Pilot_Id', current['pilot'], pilot_ids),
+        ('FlightAttendant_has_Flights', 'FlightAttendant_Id', current['attendant'], attendant_ids),
+    )
+    for table, column, existing, wanted in tables:
+        wanted = list(dict.fromkeys(wanted))
+        to_remove = [crew_id for crew_id in existing if crew_id not in wanted]
+        to_add = [crew_id for crew_id in wanted if crew_id not in existing]
+
+        if to_remove:
+            placeholders = ', '.join(['%s'] * len(to_remove))
+            execute_query(f"DELETE FROM {table} WHERE Flights_FlightId = %s AND {column} IN ({placeholders})",
+                          (flight_id, *to_remove), fetch_all=False)
+        if to_add:
+            values = ', '.join(['(%s, %s)'] * len(to_add))
+            params = [value for crew_id in to_add for value in (crew_id, flight_id)]
+            execute_query(f"INSERT INTO {table} ({column}, Flights_FlightId) VALUES {values}",
+                          tuple(params), fetch_all=False)
+
+    if commit:
+        db_commit()
+
+
+def get_flights_needing_crew(start_datetime, end_datetime):
+    """Flights departing in the window along with how much crew they already have and their plane size."""
+    sql = """
+        SELECT f.FlightId, f.Airplanes_AirplaneId, f.OriginPort, f.DestPort,
+               f.DepartureDate, f.DepartureHour, f.Duration,
+               COALESCE(a.BusinessRows, 0) * COALESCE(a.BusinessCols, 0) AS BusinessSeats,
+               (SELECT COUNT(*) FROM Pilot_has_Flights pf
+                 WHERE pf.Flights_FlightId = f.FlightId) AS PilotCount,
+               (SELECT COUNT(*) FROM FlightAttendant_has_Flights faf
+                 WHERE faf.Flights_FlightId = f.FlightId) AS AttendantCount
+        FROM Flights f
+        JOIN Airplanes a ON f.Airplanes_AirplaneId = a.AirplaneId
+        WHERE f.Status IN ('active', 'full')
+          AND f.DepartureDate BETWEEN %s AND %s
+        ORDER BY f.DepartureDate, f.DepartureHour
+    """
+    results = execute_query(sql, (start_datetime.date(), end_datetime.date()))
+    return results if results else []
+
+
+def get_crew_flight_minutes():
+    """Total minutes flown per crew member (active + done flights, same basis as the flight hours report)."""
+    sql = """
+        SELECT pf.Pilot_Id AS CrewId, 'pilot' AS Role, SUM(f.Duration) AS Minutes
+        FROM Pilot_has_Flights pf
+        JOIN Flights f ON pf.Flights_FlightId = f.FlightId
+        WHERE f.Status IN ('active', 'done')
+        GROUP BY pf.Pilot_Id
+        UNION ALL
+        SELECT faf.FlightAttendant_Id, 'attendant', SUM(f.Duration)
+        FROM FlightAttendant_has_Flights faf
+        JOIN Flights f ON faf.Flights_FlightId = f.FlightId
+        WHERE f.Status IN ('active', 'done')
+        GROUP BY faf.FlightAttendant_Id
+    """
+    results = execute_query(sql) or []
+    minutes = {'pilot': {}, 'attendant': {}}
+    for row in results:
+        minutes[row['Role']][row['CrewId']] = int(row['Minutes'] or 0)
+    return minutes
+
+
 def count_pilots():
     """Count total pilots."""
     sql = "SELECT COUNT(*) AS count FROM Pilot"
@@ -1,5 +1,7 @@
 """All the SQL queries for flights, airports, and routes."""
-from app.db import execute_query
+import mysql.connector
+from mysql.connector import errorcode
+from app.db import execute_query, execute_many, transaction
 from app.repositories.aircraft_repository import get_airplane_by_id, generate_seat_map
 import random
 import string
@@ -111,7 +113,7 @@ def get_flight_by_id(flight_id, airplane_id=None):
             JOIN Airplanes a ON f.Airplanes_AirplaneId = a.AirplaneId
             WHERE f.FlightId = %s AND f.Airplanes_AirplaneId = %s
         """
-        return execute_query(sql, (flight_id, airplane_id), fetch_one=True)
+        return execute_query(sql, (flight_id, airplane_id), fetch_one=True, prepared=True)
     else:
         # If airplane_id not provided, get the first match
         sql = """
@@ -124,7 +126,7 @@ def get_flight_by_id(flight_id, airplane_id=None):
             JOIN Airplanes a ON f.Airplanes_AirplaneId = a.AirplaneId
             WHERE f.FlightId = %s
         """
-        return execute_query(sql, (flight_id,), fetch_one=True)
+        return execute_query(sql, (flight_id,), fetch_one=True, prepared=True)
 
 
 def get_all_flights(status_filter=None):
@@ -149,8 +151,8 @@ def get_all_flights(status_filter=None):
 
 
 def create_flight(flight_id, airplane_id, departure_date, departure_hour,
-                  origin_port, dest_port, duration, status, economy_price, business_price):
-    """Create a new flight."""
+                  origin_port, dest_port, duration, status, economy_price, business_price, commit=True):
+    """Create a new flight. Pass commit=False to leave it in the caller's transaction."""
     sql = """
         INSERT INTO Flights (FlightId, Airplanes_AirplaneId, DepartureDate, DepartureHour,
                             OriginPort, DestPort, Duration, Status, EconomyPrice, BusinessPrice)
@@ -158,7 +160,7 @@ def create_flight(flight_id, airplane_id, departure_date, departure_hour,
     """
     return execute_query(sql, (flight_id, airplane_id, departure_date, departure_hour,
                                origin_port, dest_port, duration, status, 
-                               economy_price, business_price), commit=True)
+                               economy_price, business_price), fetch_all=False, commit=commit)
 
 
 def update_flight_status(flight_id, new_status):
@@ -193,7 +195,7 @@ def update_flight(flight_id, airplane_id, updates):
     return execute_query(sql, tuple(params), commit=True)
 
 
-def update_flight_comprehensive(flight_id, airplane_id, updates):
+def update_flight_comprehensive(flight_id, airplane_id, updates, commit=True):
     """Comprehensive flight update supporting all editable fields."""
     allowed_fields = {
         'status': 'Status',
@@ -219,12 +221,45 @@ def update_flight_comprehensive(flight_id, airplane_id, updates):
     
     params.extend([flight_id, airplane_id])
     sql = f"UPDATE Flights SET {', '.join(set_clauses)} WHERE FlightId = %s AND Airplanes_AirplaneId = %s"
-    return execute_query(sql, tuple(params), commit=True)
+    return execute_query(sql, tuple(params), fetch_all=False, commit=commit)
+
+
+# Every table with a foreign key to Flights.FlightId, in the order they get re-pointed
+# when the DB can't cascade the key change itself (Tickets hang off orders, not Flights)
+FLIGHT_CHILD_TABLES = (
+    ('orders', 'Flights_FlightId'),
+    ('Pilot_has_Flights', 'Flights_FlightId'),
+    ('FlightAttendant_has_Flights', 'Flights_FlightId'),
+    ('Managers_edits_Flights', 'Flights_FlightId'),
+)
+
+_flight_keys_cascade = None
+
+
+def flight_keys_cascade():
+    """True if every FK to Flights has ON UPDATE CASCADE (sql/02_cascade_flight_keys.sql). Checked once."""
+    global _flight_keys_cascade
+    if _flight_keys_cascade is None:
+        sql = """
+            SELECT COUNT(*) AS missing
+            FROM information_schema.REFERENTIAL_CONSTRAINTS
+            WHERE CONSTRAINT_SCHEMA = DATABASE()
+              AND REFERENCED_TABLE_NAME = 'Flights'
+              AND UPDATE_RULE <> 'CASCADE'
+        """
+        result = execute_query(sql, fetch_one=True)
+        _flight_keys_cascade = bool(result) and result['missing'] == 0
+    return _flight_keys_cascade
 
 
 def update_flight_with_new_ids(original_flight_id, original_airplane_id, 
                                new_flight_id, new_airplane_id, updates):
-    """Update a flight with potentially changed IDs. Updates FK references first."""
+    """
+    Update a flight with potentially changed IDs - all in one transaction (a savepoint
+    when the caller already has one open).
+    With cascading FKs it's a single UPDATE; otherwise the flight is copied under the new ID,
+    the child tables are re-pointed and the old row is removed.
+    """
     ids_changing = (original_flight_id != new_flight_id or 
                     original_airplane_id != new_airplane_id)
     
@@ -232,104 +267,210 @@ def update_flight_with_new_ids(original_flight_id, original_airplane_id,
     if not ids_changing:
         return update_flight_comprehensive(original_flight_id, original_airplane_id, updates)
     
-    # Check if the new flight ID already exists
-    check_sql = """
-        SELECT FlightId FROM Flights 
-        WHERE FlightId = %s
-    """
-    existing = execute_query(check_sql, (new_flight_id,), fetch_one=True)
-    if existing:
-        raise ValueError(f"Flight {new_flight_id} already exists")
+    try:
+        with transaction():
+            # Lock the flight first (and fail fast if a booking is holding it) so nobody
+            # adds an order for the old ID while we move everything over
+            sql = """
+                SELECT FlightId, Airplanes_AirplaneId, DepartureDate, DepartureHour,
+                       OriginPort, DestPort, Duration, Status, EconomyPrice, BusinessPrice
+                FROM Flights
+                WHERE FlightId = %s
+                FOR UPDATE NOWAIT
+            """
+            original = execute_query(sql, (original_flight_id,), fetch_one=True)
+            if not original:
+                return False
+
+            if new_flight_id != original_flight_id:
+                existing = execute_query("SELECT FlightId FROM Flights WHERE FlightId = %s",
+                                         (new_flight_id,), fetch_one=True)
+                if existing:
+                    raise ValueError(f"Flight {new_flight_id} already exists")
+
+            values = (
+                new_flight_id, new_airplane_id,
+                updates.get('departure_date', original['DepartureDate']),
+                updates.get('departure_hour', original['DepartureHour']),
+                updates.get('origin_port', original['OriginPort']),
+                updates.get('dest_port', original['DestPort']),
+                updates.get('duration', original['Duration']),
+                updates.get('status', original['Status']),
+                updates.get('economy_price', original['EconomyPrice']),
+                updates.get('business_price', original['BusinessPrice']),
+            )
+
+            if new_flight_id == original_flight_id or flight_keys_cascade():
+                # The FKs carry the new ID over to orders/crew/edit log in the same statement
+                execute_query("""
+                    UPDATE Flights 
+                    SET FlightId = %s, Airplanes_AirplaneId = %s,
+                        DepartureDate = %s, DepartureHour = %s,
+                        OriginPort = %s, DestPort = %s,
+                        Duration = %s, Status = %s,
+                        EconomyPrice = %s, BusinessPrice = %s
+                    WHERE FlightId = %s
+                """, values + (original_flight_id,), fetch_all=False)
+            else:
+                # No cascades: new parent row first, then children, then drop the old parent
+                execute_query("""
+                    INSERT INTO Flights (FlightId, Airplanes_AirplaneId, DepartureDate, DepartureHour,
+                                         OriginPort, DestPort, Duration, Status, EconomyPrice, BusinessPrice)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, values, fetch_all=False)
+                for table, column in FLIGHT_CHILD_TABLES:
+                    execute_query(f"UPDATE {table} SET {column} = %s WHERE {column} = %s",
+                                  (new_flight_id, original_flight_id), fetch_all=False)
+                execute_query("DELETE FROM Flights WHERE FlightId = %s", (original_flight_id,), fetch_all=False)
+    except mysql.connector.Error as err:
+        if err.errno == errorcode.ER_LOCK_NOWAIT:
+            raise ValueError(f"Flight {original_flight_id} is being booked right now - try again in a moment")
+        if err.errno == errorcode.ER_DUP_ENTRY:
+            raise ValueError(f"Flight {new_flight_id} already exists")
+        raise
     
-    # Get the original flight data
+    return True
+
+
+def get_flights_in_window(start_datetime, end_datetime):
+    """Gets every non-cancelled flight departing inside the window (used for in-memory conflict checks)."""
     sql = """
-        SELECT FlightId, Airplanes_AirplaneId, DepartureDate, DepartureHour,
-               OriginPort, DestPort, Duration, Status, EconomyPrice, BusinessPrice
+        SELECT FlightId, Airplanes_AirplaneId, OriginPort, DestPort,
+               DepartureDate, DepartureHour, Duration, Status
         FROM Flights
-        WHERE FlightId = %s
+        WHERE Status != 'cancelled'
+          AND DepartureDate BETWEEN %s AND %s
+        ORDER BY DepartureDate, DepartureHour
     """
-    original = execute_query(sql, (original_flight_id,), fetch_one=True)
-    
-    if not original:
-        return False
-    
-    # Step 1: Update all foreign key references FIRST (before changing the flight)
-    # This must be done before we can change the flight's primary key
-    
-    # Update orders (Tickets are linked via orders, so no direct Tickets update needed)
-    update_orders_sql = """
-        UPDATE orders 
-        SET Flights_FlightId = %s
-        WHERE Flights_FlightId = %s
+    results = execute_query(sql, (start_datetime.date(), end_datetime.date()))
+    return results if results else []
+
+
+def get_airplane_locations_before(at_datetime):
+    """Where every airplane is parked at a given time - one query instead of one per plane."""
+    sql = """
+        SELECT AirplaneId, DestPort
+        FROM (
+            SELECT f.Airplanes_AirplaneId AS AirplaneId, f.DestPort,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY f.Airplanes_AirplaneId
+                       ORDER BY DATE_ADD(TIMESTAMP(f.DepartureDate, f.DepartureHour), INTERVAL f.Duration MINUTE) DESC
+                   ) AS rn
+            FROM Flights f
+            WHERE f.Status IN ('active', 'full', 'done')
+              AND DATE_ADD(TIMESTAMP(f.DepartureDate, f.DepartureHour), INTERVAL f.Duration MINUTE) <= %s
+        ) AS last_flights
+        WHERE rn = 1
     """
-    execute_query(update_orders_sql, (
-        new_flight_id,
-        original_flight_id
-    ), commit=True)
-    
-    # Update pilot assignments
-    update_pilots_sql = """
-        UPDATE Pilot_has_Flights 
-        SET Flights_FlightId = %s
-        WHERE Flights_FlightId = %s
+    results = execute_query(sql, (at_datetime,))
+    return {row['AirplaneId']: row['DestPort'] for row in results} if results else {}
+
+
+def get_flights_for_rotation(start_datetime, end_datetime, include_flight_id=None):
+    """Flights departing in the window with their plane and how many seats are sold (sold seats pin the plane)."""
+    sql = """
+        SELECT f.FlightId, f.Airplanes_AirplaneId, f.OriginPort, f.DestPort,
+               f.DepartureDate, f.DepartureHour, f.Duration, f.Status,
+               (SELECT COUNT(*) FROM orders o
+                  JOIN Tickets t ON t.orders_UniqueOrderCode = o.UniqueOrderCode
+                 WHERE o.Flights_FlightId = f.FlightId
+                   AND o.Status NOT IN ('cancelled', 'customer_canceled', 'system_canceled')) AS SoldSeats
+        FROM Flights f
+        WHERE f.DepartureDate BETWEEN %s AND %s
+          AND (f.Status IN ('active', 'full') OR f.FlightId = %s)
+        ORDER BY f.DepartureDate, f.DepartureHour
     """
-    execute_query(update_pilots_sql, (
-        new_flight_id,
-        original_flight_id
-    ), commit=True)
-    
-    # Update flight attendant assignments
-    update_attendants_sql = """
-        UPDATE FlightAttendant_has_Flights 
-        SET Flights_FlightId = %s
-        WHERE Flights_FlightId = %s
+    results = execute_query(sql, (start_datetime.date(), end_datetime.date(), include_flight_id))
+    return results if results else []
+
+
+def get_airplane_positions_before(at_datetime):
+    """For every plane: where its last flight leaving before the given time lands, and when."""
+    sql = """
+        SELECT AirplaneId, DestPort, ArrivalTime
+        FROM (
+            SELECT f.Airplanes_AirplaneId AS AirplaneId, f.DestPort,
+                   DATE_ADD(TIMESTAMP(f.DepartureDate, f.DepartureHour), INTERVAL f.Duration MINUTE) AS ArrivalTime,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY f.Airplanes_AirplaneId
+                       ORDER BY TIMESTAMP(f.DepartureDate, f.DepartureHour) DESC
+                   ) AS rn
+            FROM Flights f
+            WHERE f.Status IN ('active', 'full', 'done')
+              AND TIMESTAMP(f.DepartureDate, f.DepartureHour) < %s
+        ) AS last_flights
+        WHERE rn = 1
     """
-    execute_query(update_attendants_sql, (
-        new_flight_id,
-        original_flight_id
-    ), commit=True)
-    
-    # Update manager edits log
-    update_manager_edits_sql = """
-        UPDATE Managers_edits_Flights 
-        SET Flights_FlightId = %s
-        WHERE Flights_FlightId = %s
+    results = execute_query(sql, (at_datetime,)) or []
+    return {row['AirplaneId']: {'location': row['DestPort'], 'free_from': row['ArrivalTime']} for row in results}
+
+
+def get_airplane_next_origins_after(at_datetime):
+    """For every plane: the airport its first flight leaving at/after the given time departs from."""
+    sql = """
+        SELECT AirplaneId, OriginPort
+        FROM (
+            SELECT f.Airplanes_AirplaneId AS AirplaneId, f.OriginPort,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY f.Airplanes_AirplaneId
+                       ORDER BY TIMESTAMP(f.DepartureDate, f.DepartureHour)
+                   ) AS rn
+            FROM Flights f
+            WHERE f.Status IN ('active', 'full')
+              AND TIMESTAMP(f.DepartureDate, f.DepartureHour) >= %s
+        ) AS next_flights
+        WHERE rn = 1
     """
-    execute_query(update_manager_edits_sql, (
-        new_flight_id,
-        original_flight_id
-    ), commit=True)
-    
-    # Step 2: Now update the flight record itself (including the primary key)
-    # Prepare new values
-    new_departure_date = updates.get('departure_date', original['DepartureDate'])
-    new_departure_hour = updates.get('departure_hour', original['DepartureHour'])
-    new_origin = updates.get('origin_port', original['OriginPort'])
-    new_dest = updates.get('dest_port', original['DestPort'])
-    new_duration = updates.get('duration', original['Duration'])
-    new_status = updates.get('status', original['Status'])
-    new_economy = updates.get('economy_price', original['EconomyPrice'])
-    new_business = updates.get('business_price', original['BusinessPrice'])
-    
-    update_flight_sql = """
-        UPDATE Flights 
-        SET FlightId = %s, Airplanes_AirplaneId = %s,
-            DepartureDate = %s, DepartureHour = %s,
-            OriginPort = %s, DestPort = %s,
-            Duration = %s, Status = %s,
-            EconomyPrice = %s, BusinessPrice = %s
-        WHERE FlightId = %s
+    results = execute_query(sql, (at_datetime,)) or []
+    return {row['AirplaneId']: row['OriginPort'] for row in results}
+
+
+def update_flight_airplanes_bulk(assignments, commit=True):
+    """Moves many flights onto new planes in one round trip. assignments is {flight_id: airplane_id}."""
+    sql = "UPDATE Flights SET Airplanes_AirplaneId = %s WHERE FlightId = %s"
+    rows = [(airplane_id, flight_id) for flight_id, airplane_id in assignments.items()]
+    if not rows:
+        return 0
+    return execute_many(sql, rows, commit=commit)
+
+
+def get_existing_flight_ids(flight_ids):
+    """Returns which of the given flight IDs are already taken."""
+    flight_ids = list(flight_ids)
+    if not flight_ids:
+        return set()
+    placeholders = ', '.join(['%s'] * len(flight_ids))
+    sql = f"SELECT FlightId FROM Flights WHERE FlightId IN ({placeholders})"
+    results = execute_query(sql, tuple(flight_ids))
+    return {row['FlightId'] for row in results} if results else set()
+
+
+def create_flights_bulk(flights, commit=True):
+    """Inserts many flights in one round trip. Each item is a dict shaped like create_flight's args."""
+    sql = """
+        INSERT INTO Flights (FlightId, Airplanes_AirplaneId, DepartureDate, DepartureHour,
+                            OriginPort, DestPort, Duration, Status, EconomyPrice, BusinessPrice)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
     """
-    execute_query(update_flight_sql, (
-        new_flight_id, new_airplane_id,
-        new_departure_date, new_departure_hour,
-        new_origin, new_dest,
-        new_duration, new_status,
-        new_economy, new_business,
-        original_flight_id
-    ), commit=True)
-    
-    return True
+    rows = [(f['flight_id'], f['airplane_id'], f['departure_date'], f['departure_hour'],
+             f['origin_port'], f['dest_port'], f['duration'], f.get('status', 'active'),
+             f['economy_price'], f.get('business_price')) for f in flights]
+    if not rows:
+        return 0
+    return execute_many(sql, rows, commit=commit)
+
+
+def log_manager_edits_bulk(manager_id, flight_ids, commit=True):
+    """Records a manager edit for many flights at once."""
+    sql = """
+        INSERT IGNORE INTO Managers_edits_Flights
+        (Managers_ManagerId, Flights_FlightId)
+        VALUES (%s, %s)
+    """
+    rows = [(manager_id, flight_id) for flight_id in flight_ids]
+    if not rows:
+        return 0
+    return execute_many(sql, rows, commit=commit)
 
 
 def count_flights():
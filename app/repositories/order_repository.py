@@ -1,12 +1,11 @@
 """All the SQL queries for orders and tickets."""
-from app.db import execute_query
+from app.db import execute_query, tuple_rows
 import random
 import string
 
 
-def is_seat_taken_for_flight(flight_id, row_num, seat, exclude_order_code=None):
-    """Checks if a seat is already booked. Can ignore a specific order (useful for updates)."""
-    sql = """
+# Prepared statements are reused only for the identical SQL string, so both variants are built once
+_SEAT_TAKEN_SQL = """
         SELECT 1
         FROM Tickets t
         JOIN orders o ON t.orders_UniqueOrderCode = o.UniqueOrderCode
@@ -15,21 +14,28 @@ def is_seat_taken_for_flight(flight_id, row_num, seat, exclude_order_code=None):
           AND t.Seat = %s
           AND o.Status != 'cancelled'
     """
-    params = [flight_id, row_num, seat]
-    
+_SEAT_TAKEN_EXCLUDING_ORDER_SQL = _SEAT_TAKEN_SQL + " AND o.UniqueOrderCode != %s"
+
+
+def is_seat_taken_for_flight(flight_id, row_num, seat, exclude_order_code=None):
+    """Checks if a seat is already booked. Can ignore a specific order (useful for updates)."""
     if exclude_order_code:
-        sql += " AND o.UniqueOrderCode != %s"
-        params.append(exclude_order_code)
+        sql = _SEAT_TAKEN_EXCLUDING_ORDER_SQL
+        params = (flight_id, row_num, seat, exclude_order_code)
+    else:
+        sql = _SEAT_TAKEN_SQL
+        params = (flight_id, row_num, seat)
     
-    result = execute_query(sql, tuple(params), fetch_one=True)
+    # Called once per seat while booking - prepared, and no dict for a row we never read
+    result = execute_query(sql, params, fetch_one=True, prepared=True, row_factory=tuple_rows)
     return result is not None
 
 
 def get_flight_id_for_order(order_code):
     """Gets the flight ID that an order is for."""
     sql = "SELECT Flights_FlightId FROM orders WHERE UniqueOrderCode = %s"
-    result = execute_query(sql, (order_code,), fetch_one=True)
-    return result['Flights_FlightId'] if result else None
+    result = execute_query(sql, (order_code,), fetch_one=True, prepared=True, row_factory=tuple_rows)
+    return result[0] if result else None
 
 
 # ============ BOOKING CODE GENERATION ============
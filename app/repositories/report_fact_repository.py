@@ -0,0 +1,374 @@
+"""SQL for the report fact tables (FactFlights, FactFlightRevenue, FactCrewHours).
+
+Every fact row belongs to one flight, so refreshing a flight is "delete its rows, re-derive
+them from Flights/orders/Tickets/crew". The same statements with a date range (or no
+filter at all) do the backfill.
+"""
+from datetime import timedelta
+from app.db import execute_query, stream_query
+
+
+FACT_TABLES = ('FactFlights', 'FactFlightRevenue', 'FactCrewHours')
+
+# Flights longer than this (6 hours) count as long flights for crew hours
+LONG_FLIGHT_MINUTES = 360
+
+# Statuses that count as a cancelled order in the monthly cancellation numbers
+CANCELLED_ORDER_STATUSES = ('customer_canceled', 'system_canceled')
+
+
+def _scope(flight_ids=None, start=None, end=None, column='f.FlightId', date_column='f.DepartureDate'):
+    """WHERE clause + params limiting a statement to some flights or a departure-date range."""
+    if flight_ids is not None:
+        placeholders = ', '.join(['%s'] * len(flight_ids))
+        return f"{column} IN ({placeholders})", list(flight_ids)
+    clauses, params = [], []
+    if start is not None:
+        clauses.append(f"{date_column} >= %s")
+        params.append(start)
+    if end is not None:
+        clauses.append(f"{date_column} < %s")
+        params.append(end)
+    return (' AND '.join(clauses) or '1 = 1'), params
+
+
+def delete_facts(flight_ids=None, start=None, end=None, commit=True):
+    """Removes fact rows for the given flights (or departure-date range, or everything)."""
+    for table in FACT_TABLES:
+        where, params = _scope(flight_ids, start, end, column='FlightId', date_column='DepartureDate')
+        execute_query(f"DELETE FROM {table} WHERE {where}", tuple(params), fetch_all=False, commit=commit)
+
+
+def insert_flight_facts(flight_ids=None, start=None, end=None, commit=True):
+    """Occupancy + order counts per flight."""
+    where, params = _scope(flight_ids, start, end)
+    sql = f"""
+        INSERT INTO FactFlights
+            (FlightId, DepartureDate, OriginPort, DestPort, AirplaneId, Manufacturer, AirplaneSize,
+             Status, Duration, SoldSeats, TotalSeats, OrdersTotal, OrdersCancelled)
+        SELECT
+            f.FlightId, f.DepartureDate, f.OriginPort, f.DestPort, f.Airplanes_AirplaneId, a.Manufacturer,
+            CASE WHEN a.BusinessRows > 0 THEN 'Large' ELSE 'Small' END,
+            f.Status, f.Duration,
+            IFNULL(sold.SoldSeats, 0),
+            IFNULL(a.BusinessRows * a.BusinessCols, 0) + IFNULL(a.CouchRows * a.CouchCols, 0),
+            IFNULL(ord.OrdersTotal, 0),
+            IFNULL(ord.OrdersCancelled, 0)
+        FROM Flights f
+        JOIN Airplanes a ON f.Airplanes_AirplaneId = a.AirplaneId
+        LEFT JOIN (
+            SELECT o.Flights_FlightId, COUNT(t.TicketId) AS SoldSeats
+            FROM orders o
+            JOIN Tickets t ON o.UniqueOrderCode = t.orders_UniqueOrderCode
+            WHERE o.Status = 'confirmed'
+            GROUP BY o.Flights_FlightId
+        ) sold ON sold.Flights_FlightId = f.FlightId
+        LEFT JOIN (
+            SELECT o.Flights_FlightId,
+                   COUNT(*) AS OrdersTotal,
+                   SUM(o.Status IN (%s, %s)) AS OrdersCancelled
+            FROM orders o
+            GROUP BY o.Flights_FlightId
+        ) ord ON ord.Flights_FlightId = f.FlightId
+        WHERE {where}
+    """
+    execute_query(sql, tuple(list(CANCELLED_ORDER_STATUSES) + params), fetch_all=False, commit=commit)
+
+
+def insert_revenue_facts(flight_ids=None, start=None, end=None, commit=True):
+    """
+    Revenue per flight and cabin class, same rules as sql/reports/revenue_by_aircraft.sql:
+    confirmed tickets at full price, 'cancelled' orders at the 5% fee, cancelled flights earn nothing.
+    """
+    where, params = _scope(flight_ids, start, end)
+    sql = f"""
+        INSERT INTO FactFlightRevenue
+            (FlightId, CabinClass, DepartureDate, AirplaneSize, Manufacturer, Revenue)
+        SELECT
+            f.FlightId, t.Class, f.DepartureDate,
+            CASE WHEN a.BusinessRows > 0 THEN 'Large' ELSE 'Small' END,
+            a.Manufacturer,
+            SUM(
+                CASE t.Class WHEN 'business' THEN f.BusinessPrice WHEN 'economy' THEN f.EconomyPrice END
+                * CASE WHEN o.Status = 'confirmed' THEN 1 ELSE 0.05 END
+            )
+        FROM Flights f
+        JOIN Airplanes a ON f.Airplanes_AirplaneId = a.AirplaneId
+        JOIN orders o ON f.FlightId = o.Flights_FlightId
+        JOIN Tickets t ON o.UniqueOrderCode = t.orders_UniqueOrderCode
+        WHERE f.Status IN ('active', 'done')
+          AND o.Status IN ('confirmed', 'cancelled')
+          AND t.Class IS NOT NULL
+          AND {where}
+        GROUP BY f.FlightId, t.Class, f.DepartureDate, a.BusinessRows, a.Manufacturer
+    """
+    execute_query(sql, tuple(params), fetch_all=False, commit=commit)
+
+
+def insert_crew_hour_facts(flight_ids=None, start=None, end=None, commit=True):
+    """
+    Crew-hours ledger: one row per crew member per active or done flight, with the
+    flight's class (short is up to 6 hours) and its length in minutes.
+    """
+    where, params = _scope(flight_ids, start, end)
+    sql = f"""
+        INSERT INTO FactCrewHours (FlightId, Role, EmployeeId, DepartureDate, FlightClass, Minutes)
+        SELECT f.FlightId, 'Pilot', phf.Pilot_Id, f.DepartureDate,
+               CASE WHEN f.Duration > {LONG_FLIGHT_MINUTES} THEN 'long' ELSE 'short' END, f.Duration
+        FROM Flights f
+        JOIN Pilot_has_Flights phf ON phf.Flights_FlightId = f.FlightId
+        WHERE f.Status IN ('active', 'done') AND f.Duration IS NOT NULL AND {where}
+        UNION ALL
+        SELECT f.FlightId, 'Flight Attendant', fahf.FlightAttendant_Id, f.DepartureDate,
+               CASE WHEN f.Duration > {LONG_FLIGHT_MINUTES} THEN 'long' ELSE 'short' END, f.Duration
+        FROM Flights f
+        JOIN FlightAttendant_has_Flights fahf ON fahf.Flights_FlightId = f.FlightId
+        WHERE f.Status IN ('active', 'done') AND f.Duration IS NOT NULL AND {where}
+    """
+    execute_query(sql, tuple(params + params), fetch_all=False, commit=commit)
+
+
+def rebuild_facts(flight_ids=None, start=None, end=None, commit=True):
+    """Re-derives every fact row in scope. Run it inside db.transaction() to batch it with other writes."""
+    delete_facts(flight_ids, start, end, commit=False)
+    insert_flight_facts(flight_ids, start, end, commit=False)
+    insert_revenue_facts(flight_ids, start, end, commit=False)
+    insert_crew_hour_facts(flight_ids, start, end, commit=commit)
+
+
+def get_departure_date_range():
+    """Earliest and latest departure date in Flights - the backfill walks this range."""
+    sql = "SELECT MIN(DepartureDate) AS first_date, MAX(DepartureDate) AS last_date FROM Flights"
+    return execute_query(sql, fetch_one=True) or {}
+
+
+def get_undated_flight_ids():
+    rows = execute_query("SELECT FlightId FROM Flights WHERE DepartureDate IS NULL") or []
+    return [row['FlightId'] for row in rows]
+
+
+# ---------------------------------------------------------------------------
+# Report reads
+#
+# Every read takes the same optional filters dict:
+#   start / end      - departure dates (inclusive), compared against the bare DepartureDate
+#                      column so MySQL can range-scan its index
+#   origin / destination / airplane_id - matched on FactFlights (aliased ff)
+# and stream=True to get a row generator (for the exports) instead of a list.
+# ---------------------------------------------------------------------------
+
+def _run(sql, params, stream=False):
+    return stream_query(sql, tuple(params)) if stream else execute_query(sql, tuple(params))
+
+
+def _filter_clause(filters=None, date_column='ff.DepartureDate'):
+    """WHERE conditions + params for the report filters."""
+    filters = filters or {}
+    clauses, params = [], []
+    if filters.get('start'):
+        clauses.append(f"{date_column} >= %s")
+        params.append(filters['start'])
+    if filters.get('end'):
+        # end is inclusive for the user; < next day keeps the predicate sargable
+        clauses.append(f"{date_column} < %s")
+        params.append(filters['end'] + timedelta(days=1))
+    if filters.get('origin'):
+        clauses.append("ff.OriginPort = %s")
+        params.append(filters['origin'])
+    if filters.get('destination'):
+        clauses.append("ff.DestPort = %s")
+        params.append(filters['destination'])
+    if filters.get('airplane_id'):
+        clauses.append("ff.AirplaneId = %s")
+        params.append(filters['airplane_id'])
+    return (' AND '.join(clauses) or '1 = 1'), params
+
+
+def get_occupancy_page(filters=None, after=None, limit=50, stream=False):
+    """
+    One page of per-flight occupancy, newest first (the occupancy report's table).
+    `after` is the (DepartureDate, FlightId) of the last row on the previous page - seeking
+    past it instead of using OFFSET keeps every page as cheap as the first.
+    Flights without a departure date have no place in the ordering and are left out.
+    limit=None returns every matching flight (the export).
+    """
+    where, params = _filter_clause(filters)
+    if after is not None:
+        after_date, after_flight = after
+        # The extra `<=` gives MySQL a plain range on the DepartureDate index to start from
+        where += " AND ff.DepartureDate <= %s AND (ff.DepartureDate < %s OR ff.FlightId < %s)"
+        params += [after_date, after_date, after_flight]
+    sql = f"""
+        SELECT
+            ff.FlightId,
+            ff.DepartureDate,
+            CONCAT(ff.OriginPort, ' → ', ff.DestPort) AS route,
+            ff.Manufacturer,
+            ff.SoldSeats AS sold_seats,
+            ff.TotalSeats AS total_seats,
+            ROUND(ff.SoldSeats * 100.0 / NULLIF(ff.TotalSeats, 0), 1) AS occupancy_pct
+        FROM FactFlights ff
+        WHERE ff.DepartureDate IS NOT NULL AND {where}
+        ORDER BY ff.DepartureDate DESC, ff.FlightId DESC
+    """
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return _run(sql, params, stream)
+
+
+def get_average_occupancy(filters=None):
+    """Average occupancy and the number of flights behind it."""
+    where, params = _filter_clause(filters)
+    sql = f"""
+        SELECT AVG(ff.SoldSeats * 100.0 / NULLIF(ff.TotalSeats, 0)) AS AverageOccupancyRate,
+               COUNT(*) AS FlightCount
+        FROM FactFlights ff
+        WHERE {where}
+    """
+    return execute_query(sql, tuple(params))
+
+
+def get_revenue_by_aircraft(filters=None, stream=False):
+    where, params = _filter_clause(filters, date_column='r.DepartureDate')
+    sql = f"""
+        SELECT r.AirplaneSize, r.Manufacturer, r.CabinClass, SUM(r.Revenue) AS TotalRevenue
+        FROM FactFlightRevenue r
+        JOIN FactFlights ff ON ff.FlightId = r.FlightId
+        WHERE {where}
+        GROUP BY r.AirplaneSize, r.Manufacturer, r.CabinClass
+    """
+    return _run(sql, params, stream)
+
+
+def get_flight_hours_per_employee(filters=None, stream=False):
+    """
+    Short/long hours per crew member in one conditional-aggregation pass over the ledger.
+    Names are joined on afterwards, once per employee rather than once per flight.
+    """
+    where, params = _filter_clause(filters, date_column='h.DepartureDate')
+    # Without route/aircraft filters the ledger's own DepartureDate is enough - skip the join
+    join = "JOIN FactFlights ff ON ff.FlightId = h.FlightId" if 'ff.' in where else ""
+    sql = f"""
+        SELECT
+            totals.EmployeeId AS EmployeeID,
+            COALESCE(CONCAT(p.FirstName, ' ', p.SecondName),
+                     CONCAT(fa.FirstName, ' ', fa.SecondName)) AS FullName,
+            totals.Role,
+            ROUND(totals.ShortMinutes / 60, 2) AS CumulativeShortHours,
+            ROUND(totals.LongMinutes / 60, 2) AS CumulativeLongHours
+        FROM (
+            SELECT h.Role, h.EmployeeId,
+                   SUM(CASE WHEN h.FlightClass = 'short' THEN h.Minutes ELSE 0 END) AS ShortMinutes,
+                   SUM(CASE WHEN h.FlightClass = 'long' THEN h.Minutes ELSE 0 END) AS LongMinutes
+            FROM FactCrewHours h
+            {join}
+            WHERE {where}
+            GROUP BY h.Role, h.EmployeeId
+        ) totals
+        LEFT JOIN Pilot p ON totals.Role = 'Pilot' AND p.Id = totals.EmployeeId
+        LEFT JOIN FlightAttendant fa ON totals.Role = 'Flight Attendant' AND fa.Id = totals.EmployeeId
+    """
+    return _run(sql, params, stream)
+
+
+def get_crew_hours(role, employee_ids):
+    """
+    {employee_id: {'short_minutes', 'long_minutes'}} from the ledger for some pilots or
+    attendants - a covering-index lookup, cheap enough for the crew pickers.
+    """
+    employee_ids = [str(employee_id) for employee_id in employee_ids]
+    if not employee_ids:
+        return {}
+    placeholders = ', '.join(['%s'] * len(employee_ids))
+    sql = f"""
+        SELECT EmployeeId,
+               SUM(CASE WHEN FlightClass = 'short' THEN Minutes ELSE 0 END) AS short_minutes,
+               SUM(CASE WHEN FlightClass = 'long' THEN Minutes ELSE 0 END) AS long_minutes
+        FROM FactCrewHours
+        WHERE Role = %s AND EmployeeId IN ({placeholders})
+        GROUP BY EmployeeId
+    """
+    rows = execute_query(sql, tuple([role] + employee_ids)) or []
+    return {row['EmployeeId']: {'short_minutes': int(row['short_minutes'] or 0),
+                                'long_minutes': int(row['long_minutes'] or 0)} for row in rows}
+
+
+def get_monthly_cancellation_rate(filters=None, stream=False):
+    """Cancelled share of orders per calendar month (year + month), oldest first."""
+    where, params = _filter_clause(filters)
+    sql = f"""
+        SELECT
+            ff.DepartureMonth AS OrderMonth,
+            ROUND(SUM(ff.OrdersCancelled) * 100.0 / SUM(ff.OrdersTotal), 2) AS CancellationRatePercent
+        FROM FactFlights ff
+        WHERE ff.OrdersTotal > 0 AND ff.DepartureMonth IS NOT NULL AND {where}
+        GROUP BY ff.DepartureMonth
+        ORDER BY ff.DepartureMonth
+    """
+    return _run(sql, params, stream)
+
+
+def get_monthly_aircraft_activity(filters=None, stream=False):
+    """
+    Flights performed/cancelled per plane and calendar month, with the route it flew most.
+    One pass: legs are counted per (plane, month, route), ROW_NUMBER ranks the routes inside
+    each plane-month, and the outer GROUP BY folds them back into one row per plane-month.
+    Ties go to the alphabetically first route so the answer is stable.
+    """
+    where, params = _filter_clause(filters)
+    sql = f"""
+        WITH route_legs AS (
+            SELECT
+                ff.AirplaneId,
+                ff.DepartureMonth,
+                CONCAT(ff.OriginPort, '-', ff.DestPort) AS Route,
+                SUM(ff.Status = 'active') AS Performed,
+                SUM(ff.Status = 'cancelled') AS Cancelled,
+                ROW_NUMBER() OVER (
+                    PARTITION BY ff.AirplaneId, ff.DepartureMonth
+                    ORDER BY COUNT(*) DESC, ff.OriginPort, ff.DestPort
+                ) AS RouteRank
+            FROM FactFlights ff
+            WHERE ff.DepartureMonth IS NOT NULL AND {where}
+            GROUP BY ff.AirplaneId, ff.DepartureMonth, ff.OriginPort, ff.DestPort
+        )
+        SELECT
+            AirplaneId,
+            DepartureMonth AS FlightMonth,
+            SUM(Performed) AS FlightsPerformed,
+            SUM(Cancelled) AS FlightsCancelled,
+            ROUND(SUM(Performed) / 30.0 * 100, 2) AS UtilizationRatePercent,
+            MAX(CASE WHEN RouteRank = 1 THEN Route END) AS DominantRoute
+        FROM route_legs
+        GROUP BY AirplaneId, DepartureMonth
+        ORDER BY AirplaneId, DepartureMonth
+    """
+    return _run(sql, params, stream)
+
+
+# ---------------------------------------------------------------------------
+# Analytics snapshot loads (analytics_service keeps these in memory)
+# ---------------------------------------------------------------------------
+
+def stream_flight_snapshot():
+    """Every flight fact row, streamed - one row per flight."""
+    sql = """
+        SELECT DepartureDate, OriginPort, DestPort,
+               CONCAT(OriginPort, ' → ', DestPort) AS Route,
+               AirplaneId, Manufacturer, AirplaneSize, Status, SoldSeats, TotalSeats
+        FROM FactFlights
+    """
+    return stream_query(sql)
+
+
+def stream_revenue_snapshot():
+    """Every revenue fact row with its flight's route and plane, streamed - one row per flight and class."""
+    sql = """
+        SELECT r.DepartureDate, ff.OriginPort, ff.DestPort,
+               CONCAT(ff.OriginPort, ' → ', ff.DestPort) AS Route,
+               ff.AirplaneId, r.Manufacturer, r.AirplaneSize, r.CabinClass, r.Revenue
+        FROM FactFlightRevenue r
+        JOIN FactFlights ff ON ff.FlightId = r.FlightId
+    """
+    return stream_query(sql)
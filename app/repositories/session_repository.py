@@ -0,0 +1,42 @@
+"""SQL for server-side sessions (WebSessions) - the ones too big for the session cookie.
+
+Everything here runs on the primary (primary=True): a session written by one request has
+to be there for the next, whichever worker or replica it lands on.
+"""
+from app.db import execute_query
+
+
+def get_session(session_id, now):
+    """Stored data and expiry for a session that hasn't expired, or None."""
+    sql = """
+        SELECT Data, ExpiresAt
+        FROM WebSessions
+        WHERE SessionId = %s AND ExpiresAt > %s
+    """
+    return execute_query(sql, (session_id, now), fetch_one=True, prepared=True, primary=True)
+
+
+def save_session(session_id, data, expires_at):
+    """Creates or replaces a session's data."""
+    sql = """
+        INSERT INTO WebSessions (SessionId, Data, ExpiresAt)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE Data = VALUES(Data), ExpiresAt = VALUES(ExpiresAt)
+    """
+    execute_query(sql, (session_id, data, expires_at), commit=True, primary=True)
+
+
+def touch_session(session_id, expires_at):
+    """Pushes an unchanged session's expiry out without rewriting its data."""
+    sql = "UPDATE WebSessions SET ExpiresAt = %s WHERE SessionId = %s"
+    execute_query(sql, (expires_at, session_id), commit=True, primary=True)
+
+
+def delete_session(session_id):
+    execute_query("DELETE FROM WebSessions WHERE SessionId = %s", (session_id,), commit=True, primary=True)
+
+
+def delete_expired_sessions(now, batch_size):
+    """Deletes up to batch_size expired sessions. Returns how many went."""
+    sql = "DELETE FROM WebSessions WHERE ExpiresAt <= %s LIMIT %s"
+    return execute_query(sql, (now, batch_size), commit=True, primary=True)
@@ -121,6 +121,18 @@ def find_manager_by_id(manager_id):
     return result
 
 
+def update_customer_password(email, password_hash):
+    """Replaces a registered customer's password hash."""
+    sql = "UPDATE RegisteredCustomer SET Password = %s WHERE UniqueMail = %s"
+    execute_query(sql, (password_hash, email), commit=True)
+
+
+def update_manager_password(manager_id, password_hash):
+    """Replaces a manager's password hash."""
+    sql = "UPDATE Managers SET Password = %s WHERE ManagerId = %s"
+    execute_query(sql, (password_hash, manager_id), commit=True)
+
+
 def get_all_managers():
     """Gets a list of all managers."""
     sql = """
@@ -17,6 +17,7 @@ def register_routes(app):
     from .order_routes import register_order_routes
     from .admin_routes import register_admin_routes
     from .report_routes import register_report_routes
+    from app.utils import http_cache
     
     # Register each module's routes
     register_auth_routes(app)
@@ -27,6 +28,7 @@ def register_routes(app):
     
     # Register home route
     @app.route('/')
+    @http_cache.reference_page
     def index():
         from flask import render_template
         from datetime import date
@@ -1,9 +1,11 @@
 """Manager-only routes - dashboard, adding/editing flights, cancellation pages."""
 import json
 from datetime import datetime, timedelta
-from flask import render_template, request, redirect, url_for, flash, session
+from flask import render_template, request, redirect, url_for, flash, session, jsonify, abort
+from app import db
 from app.services import admin_service, flight_service
 from app.repositories import flight_repository, crew_repository
+from app.utils import metrics, query_stats
 from app.utils.decorators import manager_required
 
 
@@ -18,6 +20,27 @@ def register_admin_routes(app):
         stats = admin_service.get_dashboard_stats()
         return render_template('admin/dashboard.html', stats=stats)
     
+    @app.route('/admin/system/db-pool')
+    @manager_required
+    def admin_db_pool():
+        """This worker's connection pool stats as JSON (open/idle/checked out, waits, timeouts)."""
+        return jsonify(db.pool_stats())
+    
+    @app.route('/metrics')
+    def metrics_endpoint():
+        """Prometheus scrape target - every gunicorn worker's metrics added up."""
+        if not metrics.scrape_allowed():
+            abort(404)
+        body, content_type = metrics.render()
+        return body, 200, {'Content-Type': content_type}
+    
+    @app.route('/admin/system/queries')
+    @manager_required
+    def admin_query_stats():
+        """Query counts, DB time, slowest statements and N+1 suspects for this worker's last requests."""
+        return render_template('admin/query_stats.html', requests=query_stats.recent(),
+                               slow_ms=app.config.get('SLOW_QUERY_MS', query_stats.DEFAULT_SLOW_QUERY_MS))
+    
     @app.route('/admin/flights')
     @manager_required
     def admin_flights():
@@ -150,9 +173,9 @@ def register_admin_routes(app):
                 return redirect(url_for('add_flight_step2'))
             
             # Validate crew requirements
-            is_large = aircraft['size'] == 'large'
-            required_pilots = 3 if is_large else 2
-            required_attendants = 6 if is_large else 3
+            requirements = admin_service.get_crew_requirements(aircraft['size'])
+            required_pilots = requirements['pilots']
+            required_attendants = requirements['attendants']
             
             if len(pilot_ids) != required_pilots:
                 flash(f'Please select exactly {required_pilots} pilots.', 'error')
@@ -324,6 +347,50 @@ def register_admin_routes(app):
                                seat_counts=seat_counts,
                                suggested_prices=suggested_prices)
     
+    @app.route('/admin/flights/import', methods=['GET', 'POST'])
+    @manager_required
+    def import_schedule():
+        """Bulk schedule import - upload a CSV/JSON timetable, preview, then apply."""
+        from app.services import schedule_service
+        
+        if request.method == 'POST':
+            # Check the size before touching request.files so a huge upload is never parsed
+            # (uploads without a Content-Length can't be checked up front, so they're refused too)
+            max_bytes = app.config.get('SCHEDULE_IMPORT_MAX_BYTES', 5 * 1024 * 1024)
+            if request.content_length is None or request.content_length > max_bytes:
+                flash(f'The file is too large - the limit is {max_bytes // 1024} KB.', 'error')
+                return render_template('admin/import_schedule.html', report=None)
+            
+            upload = request.files.get('schedule_file')
+            if not upload or not upload.filename:
+                flash('Please choose a CSV or JSON file.', 'error')
+                return render_template('admin/import_schedule.html', report=None)
+            
+            file_format = 'json' if upload.filename.lower().endswith('.json') else 'csv'
+            dry_run = request.form.get('apply') != '1'
+            
+            try:
+                report = schedule_service.import_schedule(
+                    upload.read(),
+                    file_format=file_format,
+                    dry_run=dry_run,
+                    manager_id=session.get('user_id'),
+                    allow_partial=request.form.get('allow_partial') == '1',
+                    max_days=app.config.get('SCHEDULE_IMPORT_MAX_DAYS', schedule_service.MAX_REPEAT_DAYS)
+                )
+            except Exception as e:
+                flash(f'Error importing schedule - nothing was written: {str(e)}', 'error')
+                return render_template('admin/import_schedule.html', report=None)
+            
+            if report['created']:
+                flash(f"{report['created']} flights created.", 'success')
+            elif not dry_run and report['errors']:
+                flash('Nothing was written - fix the errors below or allow a partial import.', 'warning')
+            
+            return render_template('admin/import_schedule.html', report=report)
+        
+        return render_template('admin/import_schedule.html', report=None)
+    
     @app.route('/admin/flights/<flight_id>/cancel', methods=['GET', 'POST'])
     @manager_required
     def cancel_flight(flight_id):
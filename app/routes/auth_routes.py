@@ -2,6 +2,16 @@
 from flask import render_template, request, redirect, url_for, flash, session
 from app.services import auth_service
 from app.utils.decorators import guest_only
+from app.utils.password_pool import PasswordPoolBusy
+
+
+BUSY_MESSAGE = 'Lots of people are signing in right now - please try again in a moment.'
+
+
+def _busy(template):
+    """The bcrypt pool turned the request away: ask for a retry (503 + Retry-After)."""
+    flash(BUSY_MESSAGE, 'warning')
+    return render_template(template), 503, {'Retry-After': '2'}
 
 
 def register_auth_routes(app):
@@ -47,6 +57,8 @@ def register_auth_routes(app):
             except ValueError as e:
                 flash(str(e), 'error')
                 return render_template('auth/register.html')
+            except PasswordPoolBusy:
+                return _busy('auth/register.html')
         
         return render_template('auth/register.html')
     
@@ -62,7 +74,10 @@ def register_auth_routes(app):
                 flash('Email and password are required.', 'error')
                 return render_template('auth/login.html')
             
-            user = auth_service.login_customer(email, password)
+            try:
+                user = auth_service.login_customer(email, password)
+            except PasswordPoolBusy:
+                return _busy('auth/login.html')
             if user:
                 session['user_id'] = user['id']
                 session['user_type'] = 'customer'
@@ -91,7 +106,10 @@ def register_auth_routes(app):
                 flash('Employee code and password are required.', 'error')
                 return render_template('auth/manager_login.html')
             
-            user = auth_service.login_manager(employee_code, password)
+            try:
+                user = auth_service.login_manager(employee_code, password)
+            except PasswordPoolBusy:
+                return _busy('auth/manager_login.html')
             if user:
                 session['user_id'] = user['id']
                 session['user_type'] = 'manager'
@@ -1,14 +1,55 @@
-"""Routes for searching flights and picking seats - the customer-facing booking flow."""
+"""Routes for searching flights and picking seats - the customer-facing booking flow.
+
+Search results, flight details, the seat picker and the seat-map API are async views:
+their independent queries run side by side (see app/utils/async_db.py).
+"""
+import asyncio
 from datetime import date
-from flask import render_template, request, redirect, url_for, flash, session
+from flask import render_template, request, redirect, url_for, flash, session, jsonify
 from app.services import flight_service
+from app.utils import async_db, http_cache
 from app.utils.decorators import customer_or_guest
 
 
+def _hhmm(value):
+    """DepartureHour comes back from MySQL as a timedelta; the API sends it as HH:MM."""
+    if hasattr(value, 'total_seconds'):
+        minutes = int(value.total_seconds()) // 60
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+    return str(value)[:5] if value else None
+
+
+def _seat_map_json(flight, seat_map):
+    """JSON body for the seat-map API."""
+    def section(name):
+        rows = (seat_map or {}).get(name)
+        if not rows:
+            return None
+        return [{'row': row, 'seats': seats} for row, seats in rows['rows'].items()]
+    
+    return {
+        'flight_id': flight['FlightId'],
+        'airplane_id': flight['Airplanes_AirplaneId'],
+        'status': flight['Status'],
+        'origin': flight['OriginPort'],
+        'destination': flight['DestPort'],
+        'departure_date': flight['DepartureDate'].isoformat() if flight.get('DepartureDate') else None,
+        'departure_time': _hhmm(flight.get('DepartureHour')),
+        'arrival_time': flight.get('ArrivalHour'),
+        'prices': {
+            'economy': float(flight.get('EconomyPrice') or 0),
+            'business': float(flight.get('BusinessPrice') or 0),
+        },
+        'availability': flight.get('seat_availability') or {},
+        'seat_map': {'business': section('business'), 'economy': section('economy')},
+    }
+
+
 def register_flight_routes(app):
     """Hooks up all the flight-related URLs."""
     
     @app.route('/flights')
+    @http_cache.reference_page
     def flights():
         """Flight search page with form."""
         # Get available airports for dropdowns
@@ -25,7 +66,7 @@ def register_flight_routes(app):
         return redirect(url_for('flights'))
     
     @app.route('/flights/results')
-    def flight_search_results():
+    async def flight_search_results():
         """Search results page."""
         departure_date = request.args.get('date', '')
         origin = request.args.get('origin', '')
@@ -41,16 +82,16 @@ def register_flight_routes(app):
             flash('Origin and destination cannot be the same.', 'warning')
             return redirect(url_for('flights'))
         
-        # Search for flights (includes direct and indirect)
-        results = flight_service.search_available_flights(
-            departure_date=departure_date if departure_date else None,
-            origin=origin,
-            destination=destination,
-            include_indirect=True
+        # Search for flights (includes direct and indirect), and the airports for the search form
+        results, airports = await asyncio.gather(
+            flight_service.search_available_flights_async(
+                departure_date=departure_date if departure_date else None,
+                origin=origin,
+                destination=destination,
+                include_indirect=True
+            ),
+            async_db.run(flight_service.get_all_airports)
         )
-        
-        # Get airports for the search form
-        airports = flight_service.get_all_airports()
         today = date.today().strftime('%Y-%m-%d')
         
         return render_template('flights/results.html',
@@ -63,7 +104,8 @@ def register_flight_routes(app):
                                today=today)
     
     @app.route('/flights/<flight_id>')
-    def flight_detail(flight_id):
+    @http_cache.flight_page
+    async def flight_detail(flight_id):
         """Flight detail page."""
         # Check if user is a manager (view-only mode)
         is_manager = session.get('role') == 'manager'
@@ -71,7 +113,7 @@ def register_flight_routes(app):
         airplane_id = request.args.get('airplane_id')
         passengers = request.args.get('passengers', '1')
         
-        flight = flight_service.get_flight_details(flight_id, airplane_id)
+        flight = await flight_service.get_flight_details_async(flight_id, airplane_id)
         
         if not flight:
             flash('Flight not found.', 'error')
@@ -79,11 +121,8 @@ def register_flight_routes(app):
                 return redirect(url_for('admin_dashboard'))
             return redirect(url_for('flights'))
         
-        # Get seat availability counts
-        seat_counts = flight_service.get_seat_availability(
-            flight_id, 
-            flight.get('Airplanes_AirplaneId') or airplane_id
-        )
+        # Seat availability counts came along with the flight
+        seat_counts = flight['seat_availability']
         
         return render_template('flights/detail.html',
                                flight=flight,
@@ -93,7 +132,8 @@ def register_flight_routes(app):
     
     @app.route('/flights/<flight_id>/seats', methods=['GET', 'POST'])
     @customer_or_guest
-    def seat_selection(flight_id):
+    @http_cache.flight_page
+    async def seat_selection(flight_id):
         """Seat selection page."""
         airplane_id = request.args.get('airplane_id')
         
@@ -102,7 +142,11 @@ def register_flight_routes(app):
             flash('Managers are not allowed to purchase tickets.', 'error')
             return redirect(url_for('flight_detail', flight_id=flight_id, airplane_id=airplane_id))
         
-        flight = flight_service.get_flight_details(flight_id, airplane_id)
+        # Posting only needs the flight; showing the picker also needs the seat map
+        if request.method == 'POST':
+            flight, seat_map = await flight_service.get_flight_details_async(flight_id, airplane_id), None
+        else:
+            flight, seat_map = await flight_service.get_seat_page_async(flight_id, airplane_id)
         if not flight:
             flash('Flight not found.', 'error')
             return redirect(url_for('flights'))
@@ -129,9 +173,15 @@ def register_flight_routes(app):
             
             return redirect(url_for('checkout'))
         
-        # Build seat map for the flight
-        seat_map = flight_service.build_seat_map(flight_id, actual_airplane_id)
-        
         return render_template('flights/seat_selection.html',
                                flight=flight,
                                seat_map=seat_map)
+    
+    @app.route('/api/flights/<flight_id>/seat-map')
+    @http_cache.flight_page
+    async def seat_map_api(flight_id):
+        """Seat map, seat counts and prices for a flight as JSON."""
+        flight, seat_map = await flight_service.get_seat_page_async(flight_id, request.args.get('airplane_id'))
+        if not flight:
+            return jsonify({'error': 'Flight not found'}), 404
+        return jsonify(_seat_map_json(flight, seat_map))
@@ -1,13 +1,75 @@
 """Routes for the analytics reports (manager-only section)."""
 from datetime import datetime
-from flask import render_template, request
-from app.services import report_service
+from flask import (current_app, render_template, request, abort, make_response, flash,
+                   Response, stream_with_context)
+from app.services import report_service, analytics_service
+from app.utils.chart_pool import chart_pool
 from app.utils.decorators import manager_required
+from app.utils.report_export import EXPORT_FORMATS, export_chunks
+
+
+# Chart URLs are content-addressed, so a given URL's image never changes
+CHART_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+CHART_MIMETYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+CHART_RETRY_SECONDS = 1
+
+# Table columns per report - shared by the report pages and the CSV/JSONL exports
+REPORT_COLUMNS = {
+    'occupancy': [
+        {'key': 'FlightId', 'label': 'Flight Number'},
+        {'key': 'DepartureDate', 'label': 'Date', 'type': 'date'},
+        {'key': 'route', 'label': 'Route'},
+        {'key': 'Manufacturer', 'label': 'Aircraft'},
+        {'key': 'sold_seats', 'label': 'Sold Seats', 'type': 'number'},
+        {'key': 'total_seats', 'label': 'Total Seats', 'type': 'number'},
+        {'key': 'occupancy_pct', 'label': 'Occupancy %', 'type': 'percent'},
+    ],
+    'revenue': [
+        {'key': 'AirplaneSize', 'label': 'Size'},
+        {'key': 'Manufacturer', 'label': 'Manufacturer'},
+        {'key': 'CabinClass', 'label': 'Cabin Class'},
+        {'key': 'TotalRevenue', 'label': 'Total Revenue', 'type': 'currency'},
+    ],
+    'flight-hours': [
+        {'key': 'EmployeeID', 'label': 'Employee ID'},
+        {'key': 'FullName', 'label': 'Name'},
+        {'key': 'Role', 'label': 'Role'},
+        {'key': 'CumulativeShortHours', 'label': 'Short Flight Hours', 'type': 'number'},
+        {'key': 'CumulativeLongHours', 'label': 'Long Flight Hours', 'type': 'number'},
+    ],
+    'cancellation-rate': [
+        {'key': 'OrderMonth', 'label': 'Month', 'type': 'month'},
+        {'key': 'CancellationRatePercent', 'label': 'Cancellation Rate', 'type': 'percent'},
+    ],
+    'aircraft-activity': [
+        {'key': 'AirplaneId', 'label': 'Aircraft ID'},
+        {'key': 'FlightMonth', 'label': 'Month', 'type': 'month'},
+        {'key': 'FlightsPerformed', 'label': 'Flights Performed', 'type': 'number'},
+        {'key': 'FlightsCancelled', 'label': 'Flights Cancelled', 'type': 'number'},
+        {'key': 'UtilizationRatePercent', 'label': 'Utilization %', 'type': 'percent'},
+        {'key': 'DominantRoute', 'label': 'Most Common Route'},
+    ],
+}
 
 
 def register_report_routes(app):
     """Hooks up the report URLs for managers."""
     
+    def _report_filters(report_id):
+        """
+        Reads the date/route/aircraft filters from the query string. Returns the filters
+        for the service and the extra template context the filter form and export links need.
+        """
+        filters, error = report_service.parse_filters(request.args)
+        if error:
+            flash(error, 'warning')
+        # Raw values so the form (and the next-page link) echo back what was typed
+        filter_args = {field: request.args[field] for field in report_service.FILTER_FIELDS
+                       if request.args.get(field)}
+        return filters, {'report_id': report_id, 'filter_args': filter_args,
+                         'exportable': report_id in REPORT_COLUMNS,
+                         **report_service.get_filter_options()}
+    
     @app.route('/admin/reports')
     @manager_required
     def reports_index():
@@ -37,30 +99,80 @@ def register_report_routes(app):
                 'id': 'aircraft-activity',
                 'name': 'Monthly Aircraft Activity',
                 'description': 'Monthly flight activity summary per aircraft including utilization and routes.'
+            },
+            {
+                'id': 'pivot',
+                'name': 'Pivot Explorer',
+                'description': 'Revenue, occupancy and flight counts sliced by any two dimensions.'
             }
         ]
         
         return render_template('reports/index.html', reports=reports)
     
+    @app.route('/admin/reports/charts/<key>.<ext>')
+    @manager_required
+    def report_chart(key, ext):
+        """
+        Serves a chart image with its hash as the ETag. If it's still being drawn we wait
+        a moment, then answer 202 so the page polls again instead of tying up this worker.
+        """
+        if ext not in CHART_MIMETYPES:
+            abort(404)
+        try:
+            data = chart_pool.result(key, ext, current_app.config.get('CHART_RENDER_WAIT', 2))
+        except LookupError:
+            abort(404)
+        except TimeoutError:
+            abort(504)
+        if data is None:
+            response = make_response('', 202)
+            response.headers['Retry-After'] = str(CHART_RETRY_SECONDS)
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+        response = make_response(data)
+        response.mimetype = CHART_MIMETYPES[ext]
+        response.set_etag(key)
+        response.headers['Cache-Control'] = CHART_CACHE_CONTROL
+        return response.make_conditional(request)
+    
+    def _refresh_requested():
+        """The "Refresh now" link adds ?refresh=1 to skip the report cache."""
+        return request.args.get('refresh') == '1'
+    
+    @app.route('/admin/reports/<report_id>/export.<file_format>')
+    @manager_required
+    def report_export(report_id, file_format):
+        """
+        Downloads a report's full table (same filters as the page) as CSV or JSON Lines.
+        Rows are streamed straight from an unbuffered cursor to the client, so a huge
+        export never sits in memory.
+        """
+        if report_id not in REPORT_COLUMNS or file_format not in EXPORT_FORMATS:
+            abort(404)
+        filters, _ = report_service.parse_filters(request.args)
+        rows = report_service.stream_report(report_id, filters)
+        chunks = export_chunks(file_format, REPORT_COLUMNS[report_id], rows)
+        
+        filename = f"flytau-{report_id}-{datetime.now():%Y%m%d}.{file_format}"
+        # stream_with_context keeps the request (and its DB connection) open while we stream
+        response = Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[file_format])
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    
     @app.route('/admin/reports/occupancy')
     @manager_required
     def report_occupancy():
         """Average occupancy report for flights."""
-        result = report_service.get_average_occupancy()
+        filters, filter_context = _report_filters('occupancy')
+        page_size = current_app.config.get('REPORT_PAGE_SIZE', report_service.DEFAULT_PAGE_SIZE)
+        result = report_service.run_report('occupancy', filters, refresh=_refresh_requested(),
+                                           after=request.args.get('after'), page_size=page_size)
         data = result.get('data', [])
         summary = result.get('summary', {})
         chart = result.get('chart')
         
-        # Define columns for the table
-        columns = [
-            {'key': 'FlightId', 'label': 'Flight Number'},
-            {'key': 'DepartureDate', 'label': 'Date', 'type': 'date'},
-            {'key': 'route', 'label': 'Route'},
-            {'key': 'Manufacturer', 'label': 'Aircraft'},
-            {'key': 'sold_seats', 'label': 'Sold Seats', 'type': 'number'},
-            {'key': 'total_seats', 'label': 'Total Seats', 'type': 'number'},
-            {'key': 'occupancy_pct', 'label': 'Occupancy %', 'type': 'percent'},
-        ]
+        columns = REPORT_COLUMNS['occupancy']
         
         # Build summary items for display
         summary_items = []
@@ -69,6 +181,11 @@ def register_report_routes(app):
                 'label': 'Overall Average Occupancy',
                 'value': f"{summary['average_occupancy']:.1f}%"
             })
+        if summary.get('flight_count') is not None:
+            summary_items.append({
+                'label': 'Flights',
+                'value': str(summary['flight_count'])
+            })
         
         return render_template('reports/report_result.html',
                                report_title='Average Flight Occupancy',
@@ -77,24 +194,23 @@ def register_report_routes(app):
                                data=data,
                                summary=summary_items if summary_items else None,
                                chart=chart,
-                               now=datetime.now())
+                               next_cursor=result.get('next_cursor'),
+                               paged=bool(request.args.get('after')),
+                               now=datetime.now(),
+                               generated_at=result.get('generated_at'),
+                               **filter_context)
     
     @app.route('/admin/reports/revenue')
     @manager_required
     def report_revenue():
         """Revenue breakdown by aircraft manufacturer, size, and class."""
-        result = report_service.get_revenue_by_aircraft()
+        filters, filter_context = _report_filters('revenue')
+        result = report_service.run_report('revenue', filters, refresh=_refresh_requested())
         data = result.get('data', [])
         summary = result.get('summary', {})
         chart = result.get('chart')
         
-        # Define columns for the table
-        columns = [
-            {'key': 'AirplaneSize', 'label': 'Size'},
-            {'key': 'Manufacturer', 'label': 'Manufacturer'},
-            {'key': 'CabinClass', 'label': 'Cabin Class'},
-            {'key': 'TotalRevenue', 'label': 'Total Revenue', 'type': 'currency'},
-        ]
+        columns = REPORT_COLUMNS['revenue']
         
         # Build summary items
         summary_items = []
@@ -111,25 +227,21 @@ def register_report_routes(app):
                                data=data,
                                summary=summary_items if summary_items else None,
                                chart=chart,
-                               now=datetime.now())
+                               now=datetime.now(),
+                               generated_at=result.get('generated_at'),
+                               **filter_context)
     
     @app.route('/admin/reports/flight-hours')
     @manager_required
     def report_flight_hours():
         """Flight hours per employee split by short/long flights."""
-        result = report_service.get_flight_hours_per_employee()
+        filters, filter_context = _report_filters('flight-hours')
+        result = report_service.run_report('flight-hours', filters, refresh=_refresh_requested())
         data = result.get('data', [])
         summary = result.get('summary', {})
         chart = result.get('chart')
         
-        # Define columns for the table
-        columns = [
-            {'key': 'EmployeeID', 'label': 'Employee ID'},
-            {'key': 'FullName', 'label': 'Name'},
-            {'key': 'Role', 'label': 'Role'},
-            {'key': 'CumulativeShortHours', 'label': 'Short Flight Hours', 'type': 'number'},
-            {'key': 'CumulativeLongHours', 'label': 'Long Flight Hours', 'type': 'number'},
-        ]
+        columns = REPORT_COLUMNS['flight-hours']
         
         # Build summary items
         summary_items = []
@@ -151,22 +263,21 @@ def register_report_routes(app):
                                data=data,
                                summary=summary_items if summary_items else None,
                                chart=chart,
-                               now=datetime.now())
+                               now=datetime.now(),
+                               generated_at=result.get('generated_at'),
+                               **filter_context)
     
     @app.route('/admin/reports/cancellation-rate')
     @manager_required
     def report_cancellation_rate():
         """Monthly order cancellation rate."""
-        result = report_service.get_monthly_cancellation_rate()
+        filters, filter_context = _report_filters('cancellation-rate')
+        result = report_service.run_report('cancellation-rate', filters, refresh=_refresh_requested())
         data = result.get('data', [])
         summary = result.get('summary', {})
         chart = result.get('chart')
         
-        # Define columns for the table
-        columns = [
-            {'key': 'OrderMonth', 'label': 'Month', 'type': 'month'},
-            {'key': 'CancellationRatePercent', 'label': 'Cancellation Rate', 'type': 'percent'},
-        ]
+        columns = REPORT_COLUMNS['cancellation-rate']
         
         # Build summary items
         summary_items = []
@@ -183,26 +294,21 @@ def register_report_routes(app):
                                data=data,
                                summary=summary_items if summary_items else None,
                                chart=chart,
-                               now=datetime.now())
+                               now=datetime.now(),
+                               generated_at=result.get('generated_at'),
+                               **filter_context)
     
     @app.route('/admin/reports/aircraft-activity')
     @manager_required
     def report_aircraft_activity():
         """Monthly activity summary per aircraft."""
-        result = report_service.get_monthly_aircraft_activity()
+        filters, filter_context = _report_filters('aircraft-activity')
+        result = report_service.run_report('aircraft-activity', filters, refresh=_refresh_requested())
         data = result.get('data', [])
         summary = result.get('summary', {})
         chart = result.get('chart')
         
-        # Define columns for the table
-        columns = [
-            {'key': 'AirplaneId', 'label': 'Aircraft ID'},
-            {'key': 'FlightMonth', 'label': 'Month', 'type': 'month'},
-            {'key': 'FlightsPerformed', 'label': 'Flights Performed', 'type': 'number'},
-            {'key': 'FlightsCancelled', 'label': 'Flights Cancelled', 'type': 'number'},
-            {'key': 'UtilizationRatePercent', 'label': 'Utilization %', 'type': 'percent'},
-            {'key': 'DominantRoute', 'label': 'Most Common Route'},
-        ]
+        columns = REPORT_COLUMNS['aircraft-activity']
         
         # Build summary items
         summary_items = []
@@ -224,4 +330,56 @@ def register_report_routes(app):
                                data=data,
                                summary=summary_items if summary_items else None,
                                chart=chart,
-                               now=datetime.now())
+                               now=datetime.now(),
+                               generated_at=result.get('generated_at'),
+                               **filter_context)
+    
+    @app.route('/admin/reports/pivot')
+    @manager_required
+    def report_pivot():
+        """
+        Ad-hoc slicing: pick a measure and one or two dimensions and get the table back from
+        the in-memory analytics snapshot. ?refresh=1 reloads the snapshot first.
+        """
+        filters, filter_context = _report_filters('pivot')
+        measure = request.args.get('measure', 'revenue')
+        rows = request.args.get('rows', 'route')
+        cols = request.args.get('cols') or None
+        # Keep the pivot choices in the filter form, pager and refresh links
+        filter_context['filter_args'].update(
+            {key: value for key, value in (('measure', measure), ('rows', rows), ('cols', cols)) if value})
+        
+        result = {}
+        try:
+            result = report_service.get_pivot_report(filters, measure, rows, cols, refresh=_refresh_requested())
+        except ValueError as err:
+            flash(str(err), 'warning')
+        except ImportError:
+            flash('The pivot report needs NumPy installed on the server.', 'error')
+        summary = result.get('summary')
+        
+        summary_items = []
+        if summary and summary['total'] is not None:
+            if summary['type'] == 'currency':
+                value = f"${summary['total']:,.2f}"
+            elif summary['type'] == 'percent':
+                value = f"{summary['total']:.1f}%"
+            else:
+                value = f"{summary['total']:,.0f}"
+            summary_items.append({'label': f"Total {summary['label']}", 'value': value})
+        if summary:
+            summary_items.append({'label': 'Rows Scanned', 'value': f"{summary['matched_rows']:,}"})
+            summary_items.append({'label': 'Query Time', 'value': f"{summary['elapsed_ms']:.1f} ms"})
+        
+        return render_template('reports/report_result.html',
+                               report_title='Pivot Explorer',
+                               report_description='Revenue, occupancy and flight counts by any two dimensions',
+                               columns=result.get('columns', []),
+                               data=result.get('data', []),
+                               summary=summary_items if summary_items else None,
+                               chart=result.get('chart'),
+                               now=datetime.now(),
+                               generated_at=result.get('generated_at'),
+                               pivot_measures=analytics_service.MEASURES,
+                               pivot_dimensions=analytics_service.DIMENSIONS,
+                               **filter_context)
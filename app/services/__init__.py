@@ -7,3 +7,7 @@ from . import flight_service
 from . import order_service
 from . import admin_service
 from . import report_service
+from . import schedule_service
+from . import crew_planning_service
+from . import fleet_planning_service
+from . import report_fact_service
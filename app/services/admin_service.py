@@ -1,17 +1,25 @@
 """All the manager-side stuff - creating flights, assigning crew, dashboard stats."""
 from datetime import datetime, timedelta
 from decimal import Decimal
+from app import db
 from app.repositories import (
     flight_repository, 
     aircraft_repository, 
     crew_repository,
     order_repository
 )
+from app.services import report_fact_service
 
 
 FLIGHT_CANCELLATION_CUTOFF_HOURS = 72
 LONG_FLIGHT_THRESHOLD_MINUTES = 360  # 6 hours
 
+# How many pilots/attendants each airplane size needs
+CREW_REQUIREMENTS = {
+    'large': {'pilots': 3, 'attendants': 6},
+    'small': {'pilots': 2, 'attendants': 3},
+}
+
 
 def get_route(origin, destination):
     """Gets the route details between two airports."""
@@ -24,6 +32,7 @@ def update_expired_flight_statuses():
     raw_flights = flight_repository.get_all_flights()
     
     now = datetime.now()
+    landed = []
     
     for f in raw_flights:
         status = f.get('Status', '').lower()
@@ -70,10 +79,13 @@ def update_expired_flight_statuses():
             if now > landing_time:
                 flight_id = f.get('FlightId')
                 flight_repository.update_flight_status(flight_id, 'done')
+                landed.append(flight_id)
                 
         except (ValueError, TypeError):
             # Skip flights with invalid date/time data
             continue
+    
+    report_fact_service.flight_changed(*landed)
 
 
 def get_dashboard_stats():
@@ -180,6 +192,11 @@ def is_long_flight(duration_minutes):
     return duration_minutes > LONG_FLIGHT_THRESHOLD_MINUTES
 
 
+def get_crew_requirements(airplane_size):
+    """How many pilots and attendants a plane of this size needs."""
+    return CREW_REQUIREMENTS['large' if airplane_size == 'large' else 'small']
+
+
 def get_airplane_by_id(airplane_id):
     """Looks up an airplane by its ID."""
     return aircraft_repository.get_airplane_by_id(airplane_id)
@@ -235,7 +252,7 @@ def get_available_pilots(departure_datetime, arrival_datetime, origin_airport=No
         require_long_flight_cert=for_long_flight
     )
     
-    return pilots if pilots else []
+    return report_fact_service.add_crew_hours(pilots or [], 'Pilot')
 
 
 def get_available_attendants(departure_datetime, arrival_datetime, origin_airport=None, for_long_flight=False):
@@ -253,55 +270,42 @@ def get_available_attendants(departure_datetime, arrival_datetime, origin_airpor
         require_long_flight_cert=for_long_flight
     )
     
-    return attendants if attendants else []
+    return report_fact_service.add_crew_hours(attendants or [], 'Flight Attendant')
 
 
 def create_flight(airplane_id, origin, destination, departure_date, departure_hour,
                   duration, economy_price, business_price, pilot_ids, attendant_ids,
                   manager_id=None, flight_id=None):
     """Creates a new flight with all its crew assignments. Returns the flight ID."""
-    # Generate flight ID if not provided
-    if not flight_id:
-        flight_id = flight_repository.generate_flight_number()
-    
-    # Create flight record
-    flight_repository.create_flight(
-        flight_id=flight_id,
-        airplane_id=airplane_id,
-        departure_date=departure_date,
-        departure_hour=departure_hour,
-        origin_port=origin,
-        dest_port=destination,
-        duration=duration,
-        status='active',
-        economy_price=economy_price,
-        business_price=business_price
-    )
-    
-    # Create pilot assignments
-    for pilot_id in pilot_ids:
-        crew_repository.assign_pilot_to_flight(
-            pilot_id=pilot_id,
-            flight_id=flight_id,
-            airplane_id=airplane_id
-        )
-    
-    # Create attendant assignments
-    for attendant_id in attendant_ids:
-        crew_repository.assign_attendant_to_flight(
-            attendant_id=attendant_id,
+    # Flight, crew and audit row go in together - one commit
+    with db.transaction():
+        # Generate flight ID if not provided (inside, so it's checked against the primary)
+        if not flight_id:
+            flight_id = flight_repository.generate_flight_number()
+        
+        flight_repository.create_flight(
             flight_id=flight_id,
-            airplane_id=airplane_id
+            airplane_id=airplane_id,
+            departure_date=departure_date,
+            departure_hour=departure_hour,
+            origin_port=origin,
+            dest_port=destination,
+            duration=duration,
+            status='active',
+            economy_price=economy_price,
+            business_price=business_price
         )
+        crew_repository.replace_flight_crew(flight_id, pilot_ids, attendant_ids)
+        
+        # Log manager action (if manager_id provided)
+        if manager_id:
+            log_manager_edit(manager_id, flight_id, airplane_id, 'created')
     
-    # Log manager action (if manager_id provided)
-    if manager_id:
-        log_manager_edit(manager_id, flight_id, airplane_id, 'created')
-    
+    report_fact_service.flight_changed(flight_id)
     return flight_id
 
 
-def log_manager_edit(manager_id, flight_id, airplane_id, action):
+def log_manager_edit(manager_id, flight_id, airplane_id, action, commit=True):
     """Records that a manager made changes to a flight (for audit trail)."""
     from app.db import execute_query
     sql = """
@@ -309,7 +313,7 @@ def log_manager_edit(manager_id, flight_id, airplane_id, action):
         (Managers_ManagerId, Flights_FlightId)
         VALUES (%s, %s)
     """
-    execute_query(sql, (manager_id, flight_id), commit=True)
+    execute_query(sql, (manager_id, flight_id), fetch_all=False, commit=commit)
 
 
 def can_cancel_flight(flight):
@@ -437,25 +441,29 @@ def get_flight_cancellation_info(flight_id, airplane_id):
 
 def cancel_flight(flight_id, manager_id=None):
     """Cancels a flight and refunds all the affected orders."""
-    # Update flight status
-    flight_repository.update_flight_status(flight_id, 'cancelled')
-    
-    # Get all active orders for this flight
-    orders = order_repository.get_active_orders_for_flight(flight_id)
-    
-    # Credit each order (set TotalCost to 0, status to system_canceled)
-    for order in orders:
-        order_repository.update_order_status(
-            order['UniqueOrderCode'],
-            status='system_canceled',
-            total_cost=0
-        )
-        # Delete tickets for the order
-        order_repository.delete_tickets_for_order(order['UniqueOrderCode'])
+    # The flight and every refund go together - a failure half way leaves nothing cancelled
+    with db.transaction():
+        # Update flight status
+        flight_repository.update_flight_status(flight_id, 'cancelled')
+        
+        # Get all active orders for this flight
+        orders = order_repository.get_active_orders_for_flight(flight_id)
+        
+        # Credit each order (set TotalCost to 0, status to system_canceled)
+        for order in orders:
+            order_repository.update_order_status(
+                order['UniqueOrderCode'],
+                status='system_canceled',
+                total_cost=0
+            )
+            # Delete tickets for the order
+            order_repository.delete_tickets_for_order(order['UniqueOrderCode'])
+        
+        # Log manager action
+        if manager_id:
+            log_manager_edit(manager_id, flight_id, None, 'cancelled')
     
-    # Log manager action
-    if manager_id:
-        log_manager_edit(manager_id, flight_id, airplane_id, 'cancelled')
+    report_fact_service.flight_changed(flight_id)
 
 
 def get_flight_crew(flight_id, airplane_id):
@@ -561,33 +569,29 @@ def update_flight_comprehensive(original_flight_id, original_airplane_id,
         'duration': new_duration
     }
     
-    if flight_id_changed or airplane_changed:
-        # Complex case: need to recreate flight with new identifiers
-        flight_repository.update_flight_with_new_ids(
-            original_flight_id, original_airplane_id,
-            new_flight_id, new_airplane_id,
-            updates
-        )
-        
-        # Crew needs to be reassigned to new flight/airplane combo
-        crew_repository.delete_all_crew_from_flight(original_flight_id, original_airplane_id)
-    else:
-        # Simple case: just update the existing flight
-        flight_repository.update_flight_comprehensive(original_flight_id, original_airplane_id, updates)
-        
-        # Clear existing crew
-        crew_repository.delete_all_crew_from_flight(original_flight_id, original_airplane_id)
-    
-    # Assign new crew
     target_flight_id = new_flight_id if flight_id_changed else original_flight_id
     target_airplane_id = new_airplane_id if airplane_changed else original_airplane_id
     
-    for pilot_id in new_pilot_ids:
-        crew_repository.assign_pilot_to_flight(pilot_id, target_flight_id, target_airplane_id)
-    
-    for attendant_id in new_attendant_ids:
-        crew_repository.assign_attendant_to_flight(attendant_id, target_flight_id, target_airplane_id)
+    # Flight row, crew diff and audit row all go in one transaction
+    with db.transaction():
+        if flight_id_changed or airplane_changed:
+            # Complex case: new identifiers (orders/crew follow the flight to its new ID)
+            flight_repository.update_flight_with_new_ids(
+                original_flight_id, original_airplane_id,
+                new_flight_id, new_airplane_id,
+                updates
+            )
+        else:
+            # Simple case: just update the existing flight
+            flight_repository.update_flight_comprehensive(original_flight_id, original_airplane_id,
+                                                          updates)
+        
+        # Only the crew that actually changed gets written
+        crew_repository.replace_flight_crew(target_flight_id, new_pilot_ids, new_attendant_ids)
+        
+        # Log the edit
+        if manager_id:
+            log_manager_edit(manager_id, target_flight_id, target_airplane_id, 'comprehensive_edit')
     
-    # Log the edit
-    if manager_id:
-        log_manager_edit(manager_id, target_flight_id, target_airplane_id, 'comprehensive_edit')
+    # A renumbered flight leaves stale facts under its old number
+    report_fact_service.flight_changed(original_flight_id, target_flight_id)
@@ -0,0 +1,200 @@
+"""In-memory analytics snapshot behind the pivot report.
+
+Every few minutes the flight and revenue fact tables are streamed into column arrays
+(see app/utils/columnar.py) held by each web worker. Slicing revenue or occupancy by
+route, month, class, manufacturer... is then a NumPy filter + group-by over those arrays
+and never touches MySQL, so a new slice doesn't need a new SQL report.
+NumPy is only imported when the snapshot is built.
+"""
+import threading
+import time
+from datetime import datetime
+from app.repositories import report_fact_repository
+from app.utils import metrics
+from app.utils.chart_pool import in_render_process
+
+
+DEFAULT_REFRESH_SECONDS = 600
+
+# Pivot dimension -> (snapshot column, label). 'month' comes from the departure date.
+DIMENSIONS = {
+    'route': ('Route', 'Route'),
+    'origin': ('OriginPort', 'Origin'),
+    'destination': ('DestPort', 'Destination'),
+    'month': ('month', 'Month'),
+    'manufacturer': ('Manufacturer', 'Manufacturer'),
+    'airplane_size': ('AirplaneSize', 'Aircraft Size'),
+    'airplane': ('AirplaneId', 'Aircraft'),
+    'cabin_class': ('CabinClass', 'Cabin Class'),
+    'status': ('Status', 'Flight Status'),
+}
+
+# Pivot measure -> which snapshot table it reads and how a group's value is worked out
+MEASURES = {
+    'revenue': {'label': 'Revenue', 'table': 'revenue', 'sum': 'Revenue', 'type': 'currency'},
+    'occupancy': {'label': 'Occupancy %', 'table': 'flights', 'ratio': ('SoldSeats', 'TotalSeats'),
+                  'type': 'percent'},
+    'flights': {'label': 'Flights', 'table': 'flights', 'count': True, 'type': 'number'},
+    'sold_seats': {'label': 'Sold Seats', 'table': 'flights', 'sum': 'SoldSeats', 'type': 'number'},
+}
+
+# Snapshot tables: (row source, text columns, numeric columns)
+TABLES = {
+    'flights': (report_fact_repository.stream_flight_snapshot,
+                ('Route', 'OriginPort', 'DestPort', 'AirplaneId', 'Manufacturer', 'AirplaneSize', 'Status'),
+                ('SoldSeats', 'TotalSeats')),
+    'revenue': (report_fact_repository.stream_revenue_snapshot,
+                ('Route', 'OriginPort', 'DestPort', 'AirplaneId', 'Manufacturer', 'AirplaneSize', 'CabinClass'),
+                ('Revenue',)),
+}
+
+# Report filters (report_service.parse_filters) -> pivot dimension they pin
+FILTER_DIMENSIONS = {'origin': 'origin', 'destination': 'destination', 'airplane_id': 'airplane'}
+
+
+class Snapshot:
+    """The loaded tables plus when and how fast they were loaded."""
+
+    def __init__(self, tables, loaded_at, load_seconds):
+        self.tables = tables
+        self.loaded_at = loaded_at
+        self.load_seconds = load_seconds
+
+    def rows(self):
+        return {name: len(table) for name, table in self.tables.items()}
+
+
+_snapshot = None
+_load_lock = threading.Lock()
+_refresher = None
+# A snapshot older than this is reloaded on use - covers a refresher thread that didn't
+# survive a fork (gunicorn --preload) or died
+_stale_after = DEFAULT_REFRESH_SECONDS * 2
+
+
+def load_snapshot():
+    """Streams the fact tables into a new snapshot and swaps it in. Needs an app context."""
+    global _snapshot
+    from app.utils.columnar import TableBuilder
+
+    started = time.perf_counter()
+    tables = {}
+    for name, (source, dimensions, measures) in TABLES.items():
+        builder = TableBuilder(dimensions, measures, date_column='DepartureDate')
+        for row in source():
+            builder.add(row)
+        tables[name] = builder.build()
+    _snapshot = Snapshot(tables, datetime.now(), time.perf_counter() - started)
+    return _snapshot
+
+
+def _is_fresh(snapshot):
+    if snapshot is None:
+        return False
+    return not _stale_after or (datetime.now() - snapshot.loaded_at).total_seconds() < _stale_after
+
+
+def get_snapshot(refresh=False):
+    """The current snapshot, loading it first if there isn't a fresh one (or refresh=True)."""
+    fresh = _is_fresh(_snapshot)
+    metrics.cache_lookup('analytics_snapshot', fresh)
+    if not refresh and fresh:
+        return _snapshot
+    seen = _snapshot
+    with _load_lock:
+        # Another request may have reloaded it while we waited
+        if _snapshot is not seen and _is_fresh(_snapshot):
+            return _snapshot
+        return load_snapshot()
+
+
+def pivot(measure, rows, columns=None, filters=None, refresh=False):
+    """
+    Slices a measure by one dimension (rows) and optionally a second one (columns), under
+    the usual report filters. Returns row/column labels, the cells as {(row, column): value},
+    the overall value and how many snapshot rows matched. Raises ValueError for a
+    measure/dimension that doesn't exist or doesn't apply (e.g. occupancy by cabin class).
+    """
+    if measure not in MEASURES:
+        raise ValueError(f"Unknown measure '{measure}'")
+    spec = MEASURES[measure]
+    source_columns = TABLES[spec['table']][1]
+    # Every pivot has a row dimension - the cells below are keyed by it
+    if not rows:
+        raise ValueError("Pick a dimension for the rows")
+    for dimension in filter(None, (rows, columns)):
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension '{dimension}'")
+        column = DIMENSIONS[dimension][0]
+        if column != 'month' and column not in source_columns:
+            raise ValueError(f"{spec['label']} can't be split by {DIMENSIONS[dimension][1].lower()}")
+    if columns == rows:
+        columns = None
+
+    started = time.perf_counter()
+    snapshot = get_snapshot(refresh)
+    table = snapshot.tables[spec['table']]
+    filters = filters or {}
+    equals = {DIMENSIONS[dimension][0]: filters[field]
+              for field, dimension in FILTER_DIMENSIONS.items() if filters.get(field)}
+    mask = table.mask(filters.get('start'), filters.get('end'), equals)
+
+    sums = [name for name in (spec.get('sum'),) + tuple(spec.get('ratio', ())) if name]
+    by = [DIMENSIONS[dimension][0] for dimension in filter(None, (rows, columns))]
+    keys, counts, totals = table.group(by, sums, mask)
+    values = _measure_values(spec, counts, totals)
+    _, total_counts, grand_totals = table.group([], sums, mask)
+
+    cells = {}
+    for key, value in zip(keys, values):
+        cells[(key[0], key[1] if columns else spec['label'])] = value
+    return {
+        'row_labels': sorted({row for row, _ in cells}),
+        'column_labels': sorted({column for _, column in cells}),
+        'cells': cells,
+        'total': _measure_values(spec, total_counts, grand_totals)[0] if int(total_counts[0]) else None,
+        'matched_rows': int(mask.sum()),
+        'snapshot': snapshot,
+        'elapsed_ms': (time.perf_counter() - started) * 1000,
+    }
+
+
+def _measure_values(spec, counts, totals):
+    """Per-group measure values as plain floats."""
+    if spec.get('count'):
+        return [float(count) for count in counts]
+    if spec.get('ratio'):
+        numerator, denominator = (totals[name] for name in spec['ratio'])
+        return [float(n * 100.0 / d) if d else None for n, d in zip(numerator, denominator)]
+    return [float(value) for value in totals[spec['sum']]]
+
+
+def _refresh_forever(app, interval):
+    while True:
+        try:
+            with app.app_context():
+                with _load_lock:
+                    load_snapshot()
+        except Exception as err:
+            app.logger.warning(f"Analytics snapshot not refreshed: {err}")
+        time.sleep(interval)
+
+
+def init_app(app):
+    """
+    Starts the background refresh (every ANALYTICS_REFRESH_SECONDS; 0 loads lazily on
+    first use instead). Without NumPy the pivot report is just unavailable.
+    """
+    global _refresher, _stale_after
+    interval = app.config.get('ANALYTICS_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS)
+    _stale_after = interval * 2
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        app.logger.warning("NumPy isn't installed - the pivot report is disabled")
+        return
+    if interval > 0 and _refresher is None and not in_render_process():
+        _refresher = threading.Thread(target=_refresh_forever, args=(app, interval),
+                                      name='analytics-snapshot', daemon=True)
+        _refresher.start()
+
@@ -1,6 +1,11 @@
-"""Login and registration logic for customers and managers."""
+"""Login and registration logic for customers and managers.
+
+Password hashing goes through the bcrypt pool (app/utils/password_pool.py), which raises
+PasswordPoolBusy when too many sign-ins are already in flight.
+"""
+from flask import current_app
 from app.repositories import user_repository
-from app.utils.helpers import hash_password, check_password
+from app.utils.password_pool import password_pool
 
 
 def register_customer(email, password, first_name, last_name, phone=None, passport=None, date_of_birth=None):
@@ -9,7 +14,7 @@ def register_customer(email, password, first_name, last_name, phone=None, passpo
     if existing:
         raise ValueError('An account with this email already exists.')
     
-    password_hash = hash_password(password)
+    password_hash = password_pool.hash(password)
     
     user_repository.create_registered_customer(
         email=email.lower(),
@@ -31,9 +36,12 @@ def login_customer(email, password):
     if not customer:
         return None
     
-    if not check_password(password, customer['Password']):
+    if not password_pool.verify(password, customer['Password']):
         return None
     
+    _rehash_if_needed(password, customer['Password'],
+                      lambda new_hash: user_repository.update_customer_password(customer['UniqueMail'], new_hash))
+    
     return {
         'id': customer['UniqueMail'],
         'email': customer['UniqueMail'],
@@ -52,9 +60,12 @@ def login_manager(manager_id, password):
     if not manager:
         return None
     
-    if not check_password(password, manager['Password']):
+    if not password_pool.verify(password, manager['Password']):
         return None
     
+    _rehash_if_needed(password, manager['Password'],
+                      lambda new_hash: user_repository.update_manager_password(manager['ManagerId'], new_hash))
+    
     return {
         'id': manager['ManagerId'],
         'employee_code': manager['ManagerId'],
@@ -64,6 +75,19 @@ def login_manager(manager_id, password):
     }
 
 
+def _rehash_if_needed(password, password_hash, save):
+    """
+    Re-hashes a password made with a different bcrypt cost than BCRYPT_ROUNDS - login is
+    the only time we have the plain password. If it fails, the next login tries again.
+    """
+    if not password_pool.needs_rehash(password_hash):
+        return
+    try:
+        save(password_pool.hash(password))
+    except Exception as err:
+        current_app.logger.warning(f"Password hash not upgraded: {err}")
+
+
 def get_registered_customer_by_email(email):
     """Finds a registered customer by their email."""
     return user_repository.find_registered_customer_by_email(email.lower())
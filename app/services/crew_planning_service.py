@@ -0,0 +1,76 @@
+"""Automatic crew assignment for a planning horizon - loads everything once, solves in memory, writes in one go."""
+from datetime import datetime, timedelta
+from app import db
+from app.repositories import crew_repository
+from app.services import admin_service, schedule_service, report_fact_service
+from app.utils.crew_pairing import assign_crew
+from app.utils.scheduling import to_datetime
+
+
+DEFAULT_HORIZON_DAYS = 7
+
+
+def _load_flights(start, end):
+    """Flights in the horizon that are still short of crew, in the shape the solver wants."""
+    flights = []
+    for f in crew_repository.get_flights_needing_crew(start, end):
+        departure = to_datetime(f['DepartureDate'], f['DepartureHour'])
+        if departure < start or departure >= end:
+            continue
+        requirements = admin_service.get_crew_requirements('large' if f['BusinessSeats'] > 0 else 'small')
+        needs = {
+            'pilot': requirements['pilots'] - int(f['PilotCount'] or 0),
+            'attendant': requirements['attendants'] - int(f['AttendantCount'] or 0),
+        }
+        if needs['pilot'] <= 0 and needs['attendant'] <= 0:
+            continue
+        flights.append({
+            'flight_id': f['FlightId'],
+            'departure': departure,
+            'arrival': departure + timedelta(minutes=f['Duration'] or 0),
+            'origin': f['OriginPort'],
+            'dest': f['DestPort'],
+            'long_flight': admin_service.is_long_flight(f['Duration'] or 0),
+            'needs': needs,
+        })
+    return flights
+
+
+def plan_crew(start=None, days=DEFAULT_HORIZON_DAYS):
+    """
+    Works out crew for every under-staffed flight departing in [start, start + days).
+    Nothing is written - pass the result to apply_crew_plan.
+    """
+    start = start or datetime.now()
+    end = start + timedelta(days=days)
+
+    flights = _load_flights(start, end)
+    if not flights:
+        return {'assignments': [], 'unfilled': [], 'repositioned': 0, 'minutes': {}, 'flights': 0}
+
+    rosters = {
+        'pilot': {p['Id']: p for p in (crew_repository.get_all_pilots() or [])},
+        'attendant': {a['Id']: a for a in (crew_repository.get_all_flight_attendants() or [])},
+    }
+    timelines = schedule_service.build_crew_timelines(
+        start, end + timedelta(days=1), rosters['pilot'].values(), rosters['attendant'].values())
+
+    plan = assign_crew(flights, rosters, timelines,
+                       history_minutes=crew_repository.get_crew_flight_minutes(),
+                       turnaround_minutes=schedule_service.TURNAROUND_MINUTES)
+    plan['flights'] = len(flights)
+    return plan
+
+
+def apply_crew_plan(plan):
+    """Writes the planned assignments in a single transaction. Returns how many flights got crew."""
+    assignments = plan['assignments']
+    if not assignments:
+        return 0
+    with db.transaction():
+        crew_repository.assign_crew_bulk(
+            [(pid, a['flight_id']) for a in assignments for pid in a['pilot_ids']],
+            [(aid, a['flight_id']) for a in assignments for aid in a['attendant_ids']],
+        )
+    report_fact_service.flight_changed(*[a['flight_id'] for a in assignments])
+    return len(assignments)
@@ -0,0 +1,143 @@
+"""Fleet rotation planning - picks which plane flies each flight so every plane's legs actually connect."""
+from datetime import datetime, timedelta
+from app import db
+from app.repositories import flight_repository, aircraft_repository
+from app.services import admin_service, schedule_service, report_fact_service
+from app.utils.fleet_rotation import RotationPlan
+from app.utils.scheduling import to_datetime
+
+
+DEFAULT_HORIZON_DAYS = 7
+
+
+def _load_window(start, end, include_flight_id=None):
+    """Loads planes (with where they'll be at `start`) and the window's flights in solver shape."""
+    positions = flight_repository.get_airplane_positions_before(start)
+    airplanes = {}
+    for a in aircraft_repository.get_all_airplanes():
+        position = positions.get(a['AirplaneId'], {})
+        free_from = position.get('free_from')
+        airplanes[a['AirplaneId']] = {
+            'size': a['size'],
+            'location': position.get('location', aircraft_repository.HOME_BASE_AIRPORT),
+            'free_from': free_from if free_from and free_from > start else None,
+        }
+
+    flights, current = [], {}
+    for f in flight_repository.get_flights_for_rotation(start, end, include_flight_id):
+        departure = to_datetime(f['DepartureDate'], f['DepartureHour'])
+        if (departure < start or departure >= end) and f['FlightId'] != include_flight_id:
+            continue
+        flight = {
+            'flight_id': f['FlightId'],
+            'departure': departure,
+            'arrival': departure + timedelta(minutes=f['Duration'] or 0),
+            'origin': f['OriginPort'],
+            'dest': f['DestPort'],
+            'long_flight': admin_service.is_long_flight(f['Duration'] or 0),
+        }
+        # Crew requirements and prices were set for the current plane's size, so it keeps that size
+        if f['Airplanes_AirplaneId'] in airplanes:
+            flight['size'] = airplanes[f['Airplanes_AirplaneId']]['size']
+        # Sold seats are tied to the plane's seat map, so those flights keep their plane
+        if f['SoldSeats']:
+            flight['airplane_id'] = f['Airplanes_AirplaneId']
+        flights.append(flight)
+        current[f['FlightId']] = f['Airplanes_AirplaneId']
+    _pin_between_sold(flights, current)
+    return flights, airplanes, current
+
+
+def _pin_between_sold(flights, current):
+    """
+    A plane's legs between two of its sold flights stay on it too: they're what gets it from
+    one sold flight to the next, so its pinned legs remain one rotation.
+    """
+    by_plane = {}
+    for flight in sorted(flights, key=lambda f: f['departure']):
+        by_plane.setdefault(current[flight['flight_id']], []).append(flight)
+    for airplane_id, legs in by_plane.items():
+        sold = [i for i, flight in enumerate(legs) if flight.get('airplane_id')]
+        if len(sold) > 1:
+            for flight in legs[sold[0]:sold[-1] + 1]:
+                flight['airplane_id'] = airplane_id
+
+
+def _new_plan(airplanes):
+    return RotationPlan(airplanes, turnaround_minutes=schedule_service.TURNAROUND_MINUTES)
+
+
+def _changed(assignments, current):
+    return {flight_id: airplane_id for flight_id, airplane_id in assignments.items()
+            if airplane_id and current.get(flight_id) != airplane_id}
+
+
+def _end_of_window_conflicts(plan, end):
+    """Planes that finish the window somewhere other than where their next (unplanned) flight leaves from."""
+    next_origins = flight_repository.get_airplane_next_origins_after(end)
+    conflicts = []
+    for airplane_id, timeline in plan.timelines.items():
+        next_origin = next_origins.get(airplane_id)
+        location = timeline.location_at(datetime.max)
+        if next_origin and next_origin != location:
+            conflicts.append({'airplane_id': airplane_id, 'ends_at': location, 'next_leaves_from': next_origin})
+    return conflicts
+
+
+def plan_fleet(start=None, days=DEFAULT_HORIZON_DAYS):
+    """
+    Re-solves the tail assignment for every active flight in [start, start + days).
+    Nothing is written - pass the result to apply_fleet_plan.
+    """
+    start = start or datetime.now()
+    end = start + timedelta(days=days)
+    flights, airplanes, current = _load_window(start, end)
+
+    plan = _new_plan(airplanes)
+    result = plan.solve(flights)
+    return {
+        'changes': _changed(plan.assignments, current),
+        'unassigned': result['unassigned'],
+        'rotations': result['rotations'],
+        'flights': len(flights),
+        'conflicts': _end_of_window_conflicts(plan, end),
+    }
+
+
+def replan_after_change(flight_id, change, days=DEFAULT_HORIZON_DAYS):
+    """
+    Incremental version for a single 'added' or 'cancelled' flight: starts from the planes
+    flights have today and only moves what the change forces.
+    """
+    flight_row = flight_repository.get_flight_by_id(flight_id)
+    if not flight_row:
+        return {'changes': {}, 'unassigned': [], 'error': f"Flight {flight_id} not found"}
+
+    start = to_datetime(flight_row['DepartureDate'], '00:00')
+    end = start + timedelta(days=days)
+    flights, airplanes, current = _load_window(start, end, include_flight_id=flight_id)
+
+    plan = _new_plan(airplanes)
+    target = next(f for f in flights if f['flight_id'] == flight_id)
+    if change == 'added':
+        plan.load([f for f in flights if f['flight_id'] != flight_id], current)
+        changes = plan.add_flight(target)
+    else:
+        plan.load(flights, current)
+        changes = plan.cancel_flight(flight_id)
+
+    return {
+        'changes': _changed({fid: plan.assignments.get(fid) for fid in changes}, current),
+        'unassigned': plan.unassigned,
+    }
+
+
+def apply_fleet_plan(plan):
+    """Writes the plane changes in one transaction. Returns how many flights moved."""
+    changes = plan['changes']
+    if not changes:
+        return 0
+    with db.transaction():
+        flight_repository.update_flight_airplanes_bulk(changes)
+    report_fact_service.flight_changed(*changes)
+    return len(changes)
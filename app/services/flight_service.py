@@ -1,6 +1,8 @@
 """Everything related to finding flights, checking seats, and managing availability."""
+import asyncio
 from datetime import datetime, timedelta
 from app.repositories import flight_repository, aircraft_repository
+from app.utils import async_db
 
 
 MIN_LAYOVER_MINUTES = 60
@@ -41,12 +43,7 @@ def search_available_flights(departure_date=None, origin=None, destination=None,
     
     # Process direct flights
     for flight in direct_flights:
-        processed = _process_flight(flight)
-        processed['is_direct'] = True
-        processed['flights'] = [processed.copy()]
-        processed['total_duration'] = processed['Duration']
-        processed['stops'] = 0
-        results.append(processed)
+        results.append(_direct_result(_process_flight(flight)))
     
     # Search for indirect flights if origin and destination are provided
     if include_indirect and origin and destination:
@@ -63,18 +60,84 @@ def search_available_flights(departure_date=None, origin=None, destination=None,
     return results
 
 
+async def search_available_flights_async(departure_date=None, origin=None, destination=None, include_indirect=True):
+    """
+    search_available_flights for the async views - same results, but the direct and
+    first-leg searches, then every second-leg search, then every flight's seat counts
+    run concurrently instead of one after another.
+    """
+    want_indirect = include_indirect and origin and destination
+    searches = [async_db.run(flight_repository.search_flights, departure_date=departure_date,
+                             origin=origin, destination=destination, status='active')]
+    if want_indirect:
+        searches.append(async_db.run(flight_repository.search_flights, departure_date=departure_date,
+                                     origin=origin, status='active'))
+    direct_flights, *first_legs = await asyncio.gather(*searches)
+    
+    # Legs from the same connection city on the same day share one search
+    connections = list(_connection_searches(first_legs[0] if first_legs else [], destination))
+    second_leg_keys = list(dict.fromkeys((city, day) for _, _, city, day in connections))
+    second_leg_results = await asyncio.gather(*(
+        async_db.run(flight_repository.search_flights, departure_date=day, origin=city,
+                     destination=destination, status='active')
+        for city, day in second_leg_keys))
+    second_legs = dict(zip(second_leg_keys, second_leg_results))
+    
+    pairs = []
+    for first_leg, first_arrival, connection_city, day in connections:
+        for second_leg in second_legs[(connection_city, day)]:
+            layover_minutes = _layover_minutes(first_arrival, second_leg)
+            if layover_minutes is not None:
+                pairs.append((first_leg, second_leg, connection_city, layover_minutes))
+    
+    # Seat counts for every flight that shows up, each fetched once
+    flight_keys = list(dict.fromkeys(
+        (flight['FlightId'], flight['Airplanes_AirplaneId'])
+        for flight in list(direct_flights) + [leg for pair in pairs for leg in pair[:2]]))
+    availabilities = await asyncio.gather(*(
+        async_db.run(flight_repository.get_seat_availability, *key) for key in flight_keys))
+    availability = dict(zip(flight_keys, availabilities))
+    
+    def enrich(flight):
+        return _enrich_flight(flight, availability[(flight['FlightId'], flight['Airplanes_AirplaneId'])])
+    
+    results = [_direct_result(enrich(flight)) for flight in direct_flights]
+    for first_leg, second_leg, connection_city, layover_minutes in pairs:
+        processed_first = enrich(first_leg)
+        processed_second = enrich(second_leg)
+        if processed_first['total_available_seats'] == 0 or processed_second['total_available_seats'] == 0:
+            continue
+        results.append(_indirect_result(origin, destination, connection_city, layover_minutes,
+                                        processed_first, processed_second))
+    
+    results.sort(key=lambda x: (not x['is_direct'], x.get('total_duration', 0)))
+    return results
+
+
+def _direct_result(processed):
+    """Search result for a nonstop flight."""
+    processed['is_direct'] = True
+    processed['flights'] = [processed.copy()]
+    processed['total_duration'] = processed['Duration']
+    processed['stops'] = 0
+    return processed
+
+
 def _process_flight(flight):
     """
     Takes a raw flight from the DB and enriches it with seat info,
     calculates arrival time, etc. Returns a nicer dict to work with.
     """
-    flight = dict(flight)
-    
-    # Get seat availability
     availability = flight_repository.get_seat_availability(
         flight['FlightId'], 
         flight['Airplanes_AirplaneId']
     )
+    return _enrich_flight(flight, availability)
+
+
+def _enrich_flight(flight, availability):
+    """_process_flight with the seat availability already fetched."""
+    flight = dict(flight)
     flight['seat_availability'] = availability
     
     # Calculate total available seats
@@ -127,13 +190,45 @@ def _search_indirect_flights(departure_date, origin, destination):
         return []
     
     # For each first leg, find connecting flights to destination
+    for first_leg, first_arrival, connection_city, day in _connection_searches(first_leg_flights, destination):
+        second_leg_flights = flight_repository.search_flights(
+            departure_date=day,
+            origin=connection_city,
+            destination=destination,
+            status='active'
+        )
+        
+        for second_leg in second_leg_flights:
+            layover_minutes = _layover_minutes(first_arrival, second_leg)
+            if layover_minutes is None:
+                continue
+            
+            # Process both flights
+            processed_first = _process_flight(first_leg)
+            processed_second = _process_flight(second_leg)
+            
+            # Check both legs have available seats
+            if processed_first['total_available_seats'] == 0:
+                continue
+            if processed_second['total_available_seats'] == 0:
+                continue
+            
+            indirect_results.append(_indirect_result(
+                origin, destination, connection_city, layover_minutes, processed_first, processed_second))
+    
+    return indirect_results
+
+
+def _connection_searches(first_leg_flights, destination):
+    """
+    Yields (first_leg, first_arrival, connection_city, date) for every second-leg search
+    a connection needs - the landing day and the day after, at the city the first leg lands.
+    """
     for first_leg in first_leg_flights:
         # Skip if first leg already goes to destination (that's a direct flight)
         if first_leg['DestPort'] == destination:
             continue
         
-        connection_city = first_leg['DestPort']
-        
         # Calculate arrival time of first leg
         first_arrival = _calculate_arrival_datetime(
             first_leg['DepartureDate'],
@@ -144,83 +239,62 @@ def _search_indirect_flights(departure_date, origin, destination):
         if not first_arrival:
             continue
         
-        # Find second leg flights from connection city to destination
-        # Check same day and next day for connections
         for day_offset in range(2):  # Check departure day and next day
             check_date = first_arrival.date() + timedelta(days=day_offset)
-            
-            second_leg_flights = flight_repository.search_flights(
-                departure_date=check_date.strftime('%Y-%m-%d'),
-                origin=connection_city,
-                destination=destination,
-                status='active'
-            )
-            
-            for second_leg in second_leg_flights:
-                # Calculate departure time of second leg
-                second_departure = _parse_datetime(
-                    second_leg['DepartureDate'],
-                    second_leg['DepartureHour']
-                )
-                
-                if not second_departure:
-                    continue
-                
-                # Check layover time is acceptable
-                layover = second_departure - first_arrival
-                layover_minutes = layover.total_seconds() / 60
-                
-                if layover_minutes < MIN_LAYOVER_MINUTES:
-                    continue  # Not enough time to connect
-                    
-                if layover_minutes > MAX_LAYOVER_HOURS * 60:
-                    continue  # Too long of a layover
-                
-                # Process both flights
-                processed_first = _process_flight(first_leg)
-                processed_second = _process_flight(second_leg)
-                
-                # Check both legs have available seats
-                if processed_first['total_available_seats'] == 0:
-                    continue
-                if processed_second['total_available_seats'] == 0:
-                    continue
-                
-                # Calculate total duration including layover
-                total_duration = first_leg['Duration'] + int(layover_minutes) + second_leg['Duration']
-                
-                # Build the indirect flight result
-                indirect_result = {
-                    'is_direct': False,
-                    'stops': 1,
-                    'connection_city': connection_city,
-                    'layover_minutes': int(layover_minutes),
-                    'total_duration': total_duration,
-                    'flights': [processed_first, processed_second],
-                    # Summary fields from first leg
-                    'FlightId': f"{processed_first['FlightId']}+{processed_second['FlightId']}",
-                    'OriginPort': origin,
-                    'DestPort': destination,
-                    'DepartureDate': processed_first['DepartureDate'],
-                    'DepartureHour': processed_first['DepartureHour'],
-                    'ArrivalHour': processed_second.get('ArrivalHour'),
-                    # Combined pricing (sum of both legs, use min available class)
-                    'EconomyPrice': float(processed_first.get('EconomyPrice') or 0) + float(processed_second.get('EconomyPrice') or 0),
-                    'BusinessPrice': float(processed_first.get('BusinessPrice') or 0) + float(processed_second.get('BusinessPrice') or 0),
-                    # Use min available seats from either leg
-                    'total_available_seats': min(
-                        processed_first['total_available_seats'],
-                        processed_second['total_available_seats']
-                    ),
-                    'seat_availability': _combine_seat_availability(
-                        processed_first.get('seat_availability'),
-                        processed_second.get('seat_availability')
-                    )
-                }
-                
-                indirect_results.append(indirect_result)
+            yield first_leg, first_arrival, first_leg['DestPort'], check_date.strftime('%Y-%m-%d')
+
+
+def _layover_minutes(first_arrival, second_leg):
+    """Minutes between landing and the second leg leaving, or None if it's not a workable connection."""
+    second_departure = _parse_datetime(
+        second_leg['DepartureDate'],
+        second_leg['DepartureHour']
+    )
     
-    return indirect_results
+    if not second_departure:
+        return None
+    
+    layover_minutes = (second_departure - first_arrival).total_seconds() / 60
+    
+    if layover_minutes < MIN_LAYOVER_MINUTES:
+        return None  # Not enough time to connect
+    if layover_minutes > MAX_LAYOVER_HOURS * 60:
+        return None  # Too long of a layover
+    return layover_minutes
+
+
+def _indirect_result(origin, destination, connection_city, layover_minutes, processed_first, processed_second):
+    """Search result for a one-stop connection, built from its two processed legs."""
+    # Calculate total duration including layover
+    total_duration = processed_first['Duration'] + int(layover_minutes) + processed_second['Duration']
+    
+    return {
+        'is_direct': False,
+        'stops': 1,
+        'connection_city': connection_city,
+        'layover_minutes': int(layover_minutes),
+        'total_duration': total_duration,
+        'flights': [processed_first, processed_second],
+        # Summary fields from first leg
+        'FlightId': f"{processed_first['FlightId']}+{processed_second['FlightId']}",
+        'OriginPort': origin,
+        'DestPort': destination,
+        'DepartureDate': processed_first['DepartureDate'],
+        'DepartureHour': processed_first['DepartureHour'],
+        'ArrivalHour': processed_second.get('ArrivalHour'),
+        # Combined pricing (sum of both legs, use min available class)
+        'EconomyPrice': float(processed_first.get('EconomyPrice') or 0) + float(processed_second.get('EconomyPrice') or 0),
+        'BusinessPrice': float(processed_first.get('BusinessPrice') or 0) + float(processed_second.get('BusinessPrice') or 0),
+        # Use min available seats from either leg
+        'total_available_seats': min(
+            processed_first['total_available_seats'],
+            processed_second['total_available_seats']
+        ),
+        'seat_availability': _combine_seat_availability(
+            processed_first.get('seat_availability'),
+            processed_second.get('seat_availability')
+        )
+    }
 
 
 def _calculate_arrival_datetime(departure_date, departure_hour, duration_minutes):
@@ -276,34 +350,76 @@ def get_flight_details(flight_id, airplane_id):
     """Gets all the info about a flight - aircraft, pricing, seat availability."""
     flight = flight_repository.get_flight_by_id(flight_id, airplane_id)
     if flight:
-        flight = dict(flight)
-        flight['seat_availability'] = flight_repository.get_seat_availability(flight_id, airplane_id)
-        
-        # Calculate arrival time from departure + duration
-        departure_hour = flight.get('DepartureHour')
-        duration = flight.get('Duration', 0)
+        flight = _with_arrival_hour(flight, flight_repository.get_seat_availability(flight_id, airplane_id))
+    return flight
+
+
+async def get_flight_details_async(flight_id, airplane_id):
+    """get_flight_details with the flight and its seat counts fetched at the same time."""
+    if airplane_id:
+        flight, availability = await asyncio.gather(
+            async_db.run(flight_repository.get_flight_by_id, flight_id, airplane_id),
+            async_db.run(flight_repository.get_seat_availability, flight_id, airplane_id))
+    else:
+        # Seat counts need the airplane, so the flight comes first
+        flight = await async_db.run(flight_repository.get_flight_by_id, flight_id, None)
+        availability = flight and await async_db.run(
+            flight_repository.get_seat_availability, flight_id, flight['Airplanes_AirplaneId'])
+    return _with_arrival_hour(flight, availability) if flight else flight
+
+
+async def get_seat_page_async(flight_id, airplane_id):
+    """
+    (flight details, seat map) for the seat picker - the flight, its seat counts, the
+    airplane layout and the taken seats are four independent queries, run concurrently.
+    """
+    def seat_queries(airplane_id):
+        return (
+            async_db.run(flight_repository.get_seat_availability, flight_id, airplane_id),
+            async_db.run(aircraft_repository.get_airplane_by_id, airplane_id),
+            async_db.run(flight_repository.get_taken_seats, flight_id, airplane_id))
+    
+    if airplane_id:
+        flight, availability, airplane, taken_seats = await asyncio.gather(
+            async_db.run(flight_repository.get_flight_by_id, flight_id, airplane_id), *seat_queries(airplane_id))
+    else:
+        # The rest need the airplane, so the flight comes first
+        flight = await async_db.run(flight_repository.get_flight_by_id, flight_id, None)
+        if flight:
+            availability, airplane, taken_seats = await asyncio.gather(*seat_queries(flight['Airplanes_AirplaneId']))
+    if not flight:
+        return None, None
+    return _with_arrival_hour(flight, availability), _seat_map(airplane, taken_seats)
+
+
+def _with_arrival_hour(flight, availability):
+    """Flight row plus its seat counts and ArrivalHour, as get_flight_details returns it."""
+    flight = dict(flight)
+    flight['seat_availability'] = availability
+    
+    # Calculate arrival time from departure + duration
+    departure_hour = flight.get('DepartureHour')
+    duration = flight.get('Duration', 0)
+    
+    if departure_hour and duration:
+        # Handle timedelta or string departure hour
+        if hasattr(departure_hour, 'total_seconds'):
+            total_seconds = int(departure_hour.total_seconds())
+            hours = total_seconds // 3600
+            minutes = (total_seconds % 3600) // 60
+            departure_hour = f"{hours:02d}:{minutes:02d}"
+        elif isinstance(departure_hour, str) and len(departure_hour) > 5:
+            departure_hour = departure_hour[:5]  # Normalize HH:MM:SS to HH:MM
         
-        if departure_hour and duration:
-            from datetime import datetime, timedelta
-            
-            # Handle timedelta or string departure hour
-            if hasattr(departure_hour, 'total_seconds'):
-                total_seconds = int(departure_hour.total_seconds())
-                hours = total_seconds // 3600
-                minutes = (total_seconds % 3600) // 60
-                departure_hour = f"{hours:02d}:{minutes:02d}"
-            elif isinstance(departure_hour, str) and len(departure_hour) > 5:
-                departure_hour = departure_hour[:5]  # Normalize HH:MM:SS to HH:MM
-            
-            try:
-                dep_time = datetime.strptime(str(departure_hour), "%H:%M")
-                arrival_time = dep_time + timedelta(minutes=int(duration))
-                flight['ArrivalHour'] = arrival_time.strftime("%H:%M")
-            except (ValueError, TypeError):
-                flight['ArrivalHour'] = None
-        else:
+        try:
+            dep_time = datetime.strptime(str(departure_hour), "%H:%M")
+            arrival_time = dep_time + timedelta(minutes=int(duration))
+            flight['ArrivalHour'] = arrival_time.strftime("%H:%M")
+        except (ValueError, TypeError):
             flight['ArrivalHour'] = None
-            
+    else:
+        flight['ArrivalHour'] = None
+    
     return flight
 
 
@@ -416,6 +532,13 @@ def build_seat_map(flight_id, airplane_id, exclude_seats=None):
         return None
     
     taken_seats = flight_repository.get_taken_seats(flight_id, airplane_id)
+    return _seat_map(airplane, taken_seats, exclude_seats)
+
+
+def _seat_map(airplane, taken_seats, exclude_seats=None):
+    """The seat grid from an airplane's layout and the flight's taken seats."""
+    if not airplane:
+        return None
     
     # Build exclusion set from exclude_seats parameter
     exclude_set = set()
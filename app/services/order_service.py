@@ -1,8 +1,10 @@
 """Handles booking orders - creating them, canceling them, figuring out refunds."""
 from datetime import datetime, timedelta
 from decimal import Decimal
+from app import db
 from app.repositories import order_repository, flight_repository
-from app.services import auth_service
+from app.services import auth_service, report_fact_service
+from app.utils import metrics
 
 
 CANCELLATION_FEE_PERCENT = Decimal('0.05')
@@ -23,6 +25,7 @@ def create_order(flight_id, airplane_id, selected_seats, economy_price, business
     
     for seat in selected_seats:
         if (seat['row'], seat['seat']) in taken_set:
+            metrics.booking('seat_taken')
             raise ValueError(f"Seat {seat['row']}{seat['seat']} is no longer available.")
     
     # Calculate total (price will be derived dynamically from flight)
@@ -32,57 +35,63 @@ def create_order(flight_id, airplane_id, selected_seats, economy_price, business
         price = business_price if seat_class == 'business' else economy_price
         total += Decimal(str(price))
     
-    # Generate unique booking code
-    booking_code = order_repository.generate_booking_code()
-    
     # Handle guest customer
     actual_guest_email = None
     actual_registered_email = None
     
-    if registered_email:
-        actual_registered_email = registered_email.lower()
-    elif guest_email:
-        # Get or create guest customer
-        auth_service.get_or_create_guest_customer(
-            guest_email.lower(),
-            guest_first_name or 'Guest',
-            guest_last_name or 'User',
-            guest_phone
-        )
-        actual_guest_email = guest_email.lower()
-    
-    # Create order (no Class or Airplane_Id columns - derived from tickets and flight)
-    order_repository.create_order(
-        booking_code=booking_code,
-        flight_id=flight_id,
-        total_cost=total,
-        status='confirmed',
-        guest_email=actual_guest_email,
-        registered_email=actual_registered_email
-    )
-    
-    # Create tickets for each seat (no Price or Flight columns - derived dynamically)
-    # The repository will validate seat availability before each insert
+    # Guest, order, tickets and the full-flight status are one transaction: if a seat is
+    # snapped up mid-way the whole booking rolls back and nothing is left behind
     try:
-        for seat in selected_seats:
-            seat_class = seat.get('class', 'economy')
+        with db.transaction():
+            # Generate unique booking code (checked on the primary, not a lagging replica)
+            booking_code = order_repository.generate_booking_code()
+            
+            if registered_email:
+                actual_registered_email = registered_email.lower()
+            elif guest_email:
+                # Get or create guest customer
+                auth_service.get_or_create_guest_customer(
+                    guest_email.lower(),
+                    guest_first_name or 'Guest',
+                    guest_last_name or 'User',
+                    guest_phone
+                )
+                actual_guest_email = guest_email.lower()
             
-            order_repository.create_ticket(
-                order_code=booking_code,
-                row_num=seat['row'],
-                seat=seat['seat'],
-                seat_class=seat_class
+            # Create order (no Class or Airplane_Id columns - derived from tickets and flight)
+            order_repository.create_order(
+                booking_code=booking_code,
+                flight_id=flight_id,
+                total_cost=total,
+                status='confirmed',
+                guest_email=actual_guest_email,
+                registered_email=actual_registered_email
             )
+            
+            # Create tickets for each seat (no Price or Flight columns - derived dynamically)
+            # The repository will validate seat availability before each insert
+            for seat in selected_seats:
+                seat_class = seat.get('class', 'economy')
+                
+                order_repository.create_ticket(
+                    order_code=booking_code,
+                    row_num=seat['row'],
+                    seat=seat['seat'],
+                    seat_class=seat_class
+                )
+            
+            # Check if flight is now full
+            from app.services import flight_service
+            flight_service.check_flight_full(flight_id, airplane_id)
     except order_repository.SeatAlreadyTakenError as e:
-        # If a seat was taken between validation and insert, cancel the order
-        order_repository.update_order_status(booking_code, 'cancelled')
-        order_repository.delete_tickets_for_order(booking_code)
+        metrics.booking('seat_taken')
         raise ValueError(str(e))
+    except Exception:
+        metrics.booking('failed')
+        raise
     
-    # Check if flight is now full
-    from app.services import flight_service
-    flight_service.check_flight_full(flight_id, airplane_id)
-    
+    metrics.booking('confirmed')
+    report_fact_service.flight_changed(flight_id)
     return booking_code
 
 
@@ -184,16 +193,18 @@ def cancel_order(booking_code, email):
     original_cost = order['TotalCost']
     fee, refund = calculate_cancellation_fee(original_cost)
     
-    # Update order status and TotalCost to the fee (final paid amount / revenue)
-    order_repository.update_order_status(
-        booking_code, 
-        status='customer_canceled',
-        total_cost=float(fee)  # Store fee as the final paid amount (revenue)
-    )
-    
-    # Delete tickets (seats become available again)
-    order_repository.delete_tickets_for_order(booking_code)
+    with db.transaction():
+        # Update order status and TotalCost to the fee (final paid amount / revenue)
+        order_repository.update_order_status(
+            booking_code, 
+            status='customer_canceled',
+            total_cost=float(fee)  # Store fee as the final paid amount (revenue)
+        )
+        
+        # Delete tickets (seats become available again)
+        order_repository.delete_tickets_for_order(booking_code)
     
+    report_fact_service.flight_changed(order.get('Flights_FlightId'))
     return (original_cost, fee, refund)
 
 
@@ -253,21 +264,24 @@ def update_order_seats(booking_code, new_seats, flight):
             'class': seat_class
         })
     
-    # Delete old tickets
-    order_repository.delete_tickets_for_order(booking_code)
-    
-    # Create new tickets (price derived dynamically from flight)
-    # Seat validation will exclude the current order since old tickets are deleted
+    # Swapping the seats is all-or-nothing - a clash keeps the customer's old seats
     try:
-        for seat in seat_details:
-            order_repository.create_ticket(
-                order_code=booking_code,
-                row_num=seat['row'],
-                seat=seat['seat'],
-                seat_class=seat['class']
-            )
+        with db.transaction():
+            # Delete old tickets
+            order_repository.delete_tickets_for_order(booking_code)
+            
+            # Create new tickets (price derived dynamically from flight)
+            # Seat validation will exclude the current order since old tickets are deleted
+            for seat in seat_details:
+                order_repository.create_ticket(
+                    order_code=booking_code,
+                    row_num=seat['row'],
+                    seat=seat['seat'],
+                    seat_class=seat['class']
+                )
+            
+            # Update order total
+            order_repository.update_order_status(booking_code, status='confirmed', total_cost=new_total)
     except order_repository.SeatAlreadyTakenError as e:
         raise ValueError(str(e))
-    
-    # Update order total
-    order_repository.update_order_status(booking_code, status='confirmed', total_cost=new_total)
+    report_fact_service.flight_changed(flight_id)
@@ -0,0 +1,105 @@
+"""Keeps the report fact tables in step with bookings, cancellations and flight changes."""
+from datetime import timedelta
+from flask import current_app, has_app_context
+from app import db
+from app.repositories import report_fact_repository
+from app.utils import http_cache
+from app.utils.report_cache import report_cache
+
+
+BACKFILL_BATCH_DAYS = 31
+
+
+def flight_changed(*flight_ids):
+    """
+    Re-derives the fact rows for these flights after something about them changed
+    (booking, cancellation, status, crew, plane, schedule, flight number).
+    Call it after the change is committed. It's best-effort: if it fails the report is
+    just stale until the next change or a backfill, and the booking itself is untouched.
+    Also gives the flights' pages a new version, so browsers and the proxy refetch them.
+    """
+    flight_ids = sorted({flight_id for flight_id in flight_ids if flight_id})
+    if not flight_ids:
+        return False
+    http_cache.flight_changed(*flight_ids)
+    try:
+        # A savepoint if the caller is still inside its own transaction
+        with db.transaction():
+            report_fact_repository.rebuild_facts(flight_ids=flight_ids)
+    except Exception as err:
+        if has_app_context():
+            current_app.logger.warning(f"Report facts not refreshed for {', '.join(flight_ids)}: {err}")
+        return False
+    _invalidate_reports()
+    return True
+
+
+def _invalidate_reports():
+    """Cached report pages are out of date once the facts change."""
+    try:
+        report_cache.invalidate()
+    except OSError as err:
+        # They'll still expire on their TTL
+        if has_app_context():
+            current_app.logger.warning(f"Report cache not invalidated: {err}")
+
+
+def backfill(start=None, end=None, batch_days=BACKFILL_BATCH_DAYS):
+    """
+    Rebuilds the fact tables from scratch - for the first run after the migration or after
+    editing data by hand. With start/end only that departure-date range is rebuilt.
+    Goes a month at a time with a commit per batch so it never holds long locks.
+    Returns the number of batches written.
+    """
+    full_rebuild = start is None and end is None
+    bounds = report_fact_repository.get_departure_date_range()
+    start = start or bounds.get('first_date')
+    if end is None and bounds.get('last_date'):
+        end = bounds['last_date'] + timedelta(days=1)
+
+    if full_rebuild:
+        # Flights without a date don't belong to any batch - clear and rebuild them on their own
+        with db.transaction():
+            report_fact_repository.delete_facts()
+            undated = report_fact_repository.get_undated_flight_ids()
+            if undated:
+                report_fact_repository.rebuild_facts(flight_ids=undated)
+    if start is None or end is None:
+        _invalidate_reports()
+        return 0
+
+    batches = 0
+    batch_start = start
+    while batch_start < end:
+        batch_end = min(batch_start + timedelta(days=batch_days), end)
+        with db.transaction():
+            report_fact_repository.rebuild_facts(start=batch_start, end=batch_end)
+        batches += 1
+        batch_start = batch_end
+    _invalidate_reports()
+    return batches
+
+
+def add_crew_hours(crew, role):
+    """
+    Adds each candidate's flown hours from the crew-hours ledger (short_hours, long_hours,
+    total_hours) so the crew pickers can show who's been flying the most. One query for
+    the whole list; if the ledger can't be read the list is returned without hours.
+    """
+    if not crew:
+        return crew
+    try:
+        hours = report_fact_repository.get_crew_hours(role, [member['id'] for member in crew])
+    except Exception as err:
+        # Inside a caller's transaction() a rollback would doom its writes - the hours are optional
+        if not db.in_transaction():
+            db.rollback()
+        if has_app_context():
+            current_app.logger.warning(f"Crew hours unavailable: {err}")
+        return crew
+    for member in crew:
+        minutes = hours.get(str(member['id']), {'short_minutes': 0, 'long_minutes': 0})
+        member['short_hours'] = round(minutes['short_minutes'] / 60, 1)
+        member['long_hours'] = round(minutes['long_minutes'] / 60, 1)
+        member['total_hours'] = round(member['short_hours'] + member['long_hours'], 1)
+    return crew
@@ -1,64 +1,101 @@
-"""Runs the analytics reports and generates the charts for them."""
-from app.db import execute_query
+"""Runs the analytics reports and generates the charts for them.
+
+The numbers come from the fact tables (see report_fact_service), which are refreshed per
+flight as bookings and flight changes happen, so a report never re-joins the full history.
+Pages go through run_report, which serves repeat views from the report cache until the
+facts change.
+"""
+import calendar
+import inspect
+from datetime import datetime
+from app.repositories import report_fact_repository, flight_repository, aircraft_repository
+from app.services import analytics_service
 from app.utils import charts
-import os
-
-
-SQL_REPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'sql', 'reports')
-
-
-def _load_sql_file(filename):
-    """Reads a SQL file from the reports folder."""
-    filepath = os.path.join(SQL_REPORTS_DIR, filename)
-    with open(filepath, 'r') as f:
-        return f.read()
-
-
-def _execute_report_sql(sql):
-    """Runs a SQL query and gives back the results."""
-    return execute_query(sql)
-
-
-def get_average_occupancy():
-    """Generates the occupancy report showing how full our flights are."""
-    # Get per-flight occupancy data for the table
-    detail_sql = """
-        SELECT 
-            f.FlightId,
-            f.DepartureDate,
-            CONCAT(f.OriginPort, ' → ', f.DestPort) AS route,
-            a.Manufacturer,
-            COUNT(t.TicketId) AS sold_seats,
-            (
-                IFNULL(a.BusinessRows * a.BusinessCols, 0) +
-                IFNULL(a.CouchRows * a.CouchCols, 0)
-            ) AS total_seats,
-            ROUND(
-                COUNT(t.TicketId) * 100.0 / 
-                NULLIF(
-                    IFNULL(a.BusinessRows * a.BusinessCols, 0) +
-                    IFNULL(a.CouchRows * a.CouchCols, 0),
-                    0
-                ), 
-                1
-            ) AS occupancy_pct
-        FROM Flights f
-        JOIN Airplanes a ON f.Airplanes_AirplaneId = a.AirplaneId
-        LEFT JOIN orders o ON f.FlightId = o.Flights_FlightId AND o.Status = 'confirmed'
-        LEFT JOIN Tickets t ON o.UniqueOrderCode = t.orders_UniqueOrderCode
-        GROUP BY f.FlightId, f.Airplanes_AirplaneId, f.DepartureDate, f.OriginPort, f.DestPort, a.Manufacturer,
-                 a.BusinessRows, a.BusinessCols, a.CouchRows, a.CouchCols
-        ORDER BY f.DepartureDate DESC
+from app.utils.report_cache import report_cache
+
+
+DEFAULT_PAGE_SIZE = 50
+
+FILTER_FIELDS = ('start', 'end', 'origin', 'destination', 'airplane_id')
+
+
+def parse_filters(args):
     """
-    detail_data = _execute_report_sql(detail_sql) or []
+    Reads the report filters from a query string (start/end as YYYY-MM-DD, or YYYY-MM for
+    a whole month, origin, destination, airplane_id). Returns (filters, error) - a bad date
+    is dropped and reported.
+    """
+    filters, error = {}, None
+    for field in ('start', 'end'):
+        value = (args.get(field) or '').strip()
+        if not value:
+            continue
+        try:
+            filters[field] = _parse_period(value, month_end=(field == 'end'))
+        except ValueError:
+            error = f"Ignoring invalid {field} date '{value}' (expected YYYY-MM-DD or YYYY-MM)."
+    if filters.get('start') and filters.get('end') and filters['start'] > filters['end']:
+        error = 'The start date is after the end date.'
+    for field in ('origin', 'destination', 'airplane_id'):
+        value = (args.get(field) or '').strip()
+        if value:
+            filters[field] = value
+    return filters, error
+
+
+def _parse_period(value, month_end=False):
+    """A YYYY-MM-DD date, or the first (last, for month_end) day of a YYYY-MM month."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        month = datetime.strptime(value, '%Y-%m').date()
+        if month_end:
+            return month.replace(day=calendar.monthrange(month.year, month.month)[1])
+        return month
+
+
+def get_filter_options():
+    """Airports and planes for the filter dropdowns."""
+    return {
+        'airports': flight_repository.get_all_airports(),
+        'airplanes': aircraft_repository.get_all_airplanes(),
+    }
+
+
+def encode_cursor(row):
+    """Keyset cursor for the occupancy table: the last row's date and flight number."""
+    return f"{row['DepartureDate']:%Y-%m-%d}_{row['FlightId']}"
+
+
+def decode_cursor(cursor):
+    """(DepartureDate, FlightId) from encode_cursor, or None if it's missing or mangled."""
+    if not cursor:
+        return None
+    day, _, flight_id = cursor.partition('_')
+    try:
+        return datetime.strptime(day, '%Y-%m-%d').date(), flight_id
+    except ValueError:
+        return None
+
+
+def get_average_occupancy(filters=None, after=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Generates the occupancy report showing how full our flights are.
+    The table is paged newest-first; pass the previous page's `next_cursor` as `after`.
+    """
+    # One page of per-flight occupancy for the table (one extra row tells us if there's more)
+    rows = report_fact_repository.get_occupancy_page(filters, decode_cursor(after), page_size + 1) or []
+    detail_data = rows[:page_size]
+    next_cursor = encode_cursor(detail_data[-1]) if len(rows) > page_size else None
     
-    # Get overall average from the SQL file's query
-    avg_sql = _load_sql_file('avg_occupancy.sql')
-    avg_result = _execute_report_sql(avg_sql)
+    # Overall average across every matching flight, not just this page
+    avg_result = report_fact_repository.get_average_occupancy(filters)
     
     avg_occupancy = 0
+    flight_count = 0
     if avg_result and len(avg_result) > 0:
         avg_occupancy = float(avg_result[0].get('AverageOccupancyRate') or 0)
+        flight_count = int(avg_result[0].get('FlightCount') or 0)
     
     # Generate donut chart for average occupancy
     chart_img = None
@@ -72,15 +109,15 @@ def get_average_occupancy():
     
     return {
         'data': detail_data,
-        'summary': {'average_occupancy': avg_occupancy},
-        'chart': chart_img
+        'summary': {'average_occupancy': avg_occupancy, 'flight_count': flight_count},
+        'chart': chart_img,
+        'next_cursor': next_cursor
     }
 
 
-def get_revenue_by_aircraft():
+def get_revenue_by_aircraft(filters=None):
     """Breaks down revenue by aircraft type and cabin class."""
-    sql = _load_sql_file('revenue_by_aircraft.sql')
-    results = _execute_report_sql(sql) or []
+    results = report_fact_repository.get_revenue_by_aircraft(filters) or []
     
     # Calculate total revenue
     total_revenue = sum(float(r.get('TotalRevenue') or 0) for r in results)
@@ -131,10 +168,9 @@ def get_revenue_by_aircraft():
     }
 
 
-def get_flight_hours_per_employee():
+def get_flight_hours_per_employee(filters=None):
     """Shows how many hours each crew member has flown (short vs long flights)."""
-    sql = _load_sql_file('flight_hours_per_employee.sql')
-    results = _execute_report_sql(sql) or []
+    results = report_fact_repository.get_flight_hours_per_employee(filters) or []
     
     # Prepare data for stacked horizontal bar chart
     labels = []
@@ -174,37 +210,27 @@ def get_flight_hours_per_employee():
     }
 
 
-def get_monthly_cancellation_rate():
+def get_monthly_cancellation_rate(filters=None):
     """Tracks our cancellation rate month over month."""
-    sql = _load_sql_file('monthly_cancellation_rate.sql')
-    results = _execute_report_sql(sql) or []
+    results = report_fact_repository.get_monthly_cancellation_rate(filters) or []
     
-    # Prepare data for line chart
+    # Prepare data for line chart - rows are calendar months (first day), oldest first
     months = []
     rates = []
     
-    # Convert month numbers to readable format
-    month_names = ['', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                   'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    
     for row in results:
-        month_num = int(row.get('OrderMonth') or 0)
-        if 1 <= month_num <= 12:
-            months.append(month_names[month_num])
-        else:
-            months.append(f"Month {month_num}")
+        months.append(row['OrderMonth'].strftime('%b %Y'))
         rates.append(float(row.get('CancellationRatePercent') or 0))
     
     # Calculate average cancellation rate
     avg_rate = sum(rates) / len(rates) if rates else 0
     
-    # Generate line chart (reverse to show chronological order)
+    # Generate line chart
     chart_img = None
     if months:
-        # Reverse lists for chronological order (oldest first)
         chart_img = charts.create_line_chart(
-            labels=list(reversed(months)),
-            values=list(reversed(rates)),
+            labels=months,
+            values=rates,
             title='Monthly Cancellation Rate Trend',
             xlabel='Month',
             ylabel='Cancellation Rate (%)',
@@ -219,10 +245,9 @@ def get_monthly_cancellation_rate():
     }
 
 
-def get_monthly_aircraft_activity():
+def get_monthly_aircraft_activity(filters=None):
     """Shows how much each aircraft is being used (flights performed vs cancelled)."""
-    sql = _load_sql_file('monthly_aircraft_activity.sql')
-    results = _execute_report_sql(sql) or []
+    results = report_fact_repository.get_monthly_aircraft_activity(filters) or []
     
     # Prepare data for multi-bar chart
     # Group by aircraft, showing performed vs cancelled
@@ -265,3 +290,129 @@ def get_monthly_aircraft_activity():
         'summary': {'total_performed': total_performed, 'total_cancelled': total_cancelled},
         'chart': chart_img
     }
+
+
+def stream_report(report_id, filters=None):
+    """
+    Every row of a report's table as a generator, for the CSV/JSONL exports - no charts,
+    no paging. The rows are read lazily, so iterate it while the request is still open.
+    """
+    if report_id == 'occupancy':
+        return report_fact_repository.get_occupancy_page(filters, limit=None, stream=True)
+    readers = {
+        'revenue': report_fact_repository.get_revenue_by_aircraft,
+        'flight-hours': report_fact_repository.get_flight_hours_per_employee,
+        'cancellation-rate': report_fact_repository.get_monthly_cancellation_rate,
+        'aircraft-activity': report_fact_repository.get_monthly_aircraft_activity,
+    }
+    if report_id not in readers:
+        raise LookupError(report_id)
+    return readers[report_id](filters, stream=True)
+
+
+def get_pivot_report(filters=None, measure='revenue', rows='route', columns=None, refresh=False):
+    """
+    Ad-hoc slice of a measure by one or two dimensions, answered from the in-memory
+    analytics snapshot (no SQL). refresh=True reloads the snapshot first.
+    Raises ValueError for a bad measure/dimension and ImportError without NumPy.
+    """
+    result = analytics_service.pivot(measure, rows, columns, filters, refresh)
+    spec = analytics_service.MEASURES[measure]
+    row_label = analytics_service.DIMENSIONS[rows][1]
+    
+    table_columns = [{'key': '_row', 'label': row_label}]
+    table_columns += [{'key': label, 'label': label, 'type': spec['type']} for label in result['column_labels']]
+    data = []
+    for row in result['row_labels']:
+        values = {column: _pivot_value(result['cells'].get((row, column)), spec['type'])
+                  for column in result['column_labels']}
+        data.append({'_row': row, **values})
+    
+    # Chart: bars for a single series, grouped bars when there's a column dimension
+    chart_img = None
+    value_format = '${:,.0f}' if spec['type'] == 'currency' else '{:,.1f}'
+    chart_rows = result['row_labels'][:20]
+    if chart_rows and len(result['column_labels']) == 1:
+        column = result['column_labels'][0]
+        chart_img = charts.create_bar_chart(
+            labels=chart_rows,
+            values=[result['cells'].get((row, column)) or 0 for row in chart_rows],
+            title=f"{spec['label']} by {row_label}",
+            xlabel=row_label,
+            ylabel=spec['label'],
+            value_format=value_format
+        )
+    elif chart_rows:
+        groups = result['column_labels'][:8]
+        chart_img = charts.create_grouped_bar_chart(
+            categories=chart_rows,
+            groups=groups,
+            data={group: [result['cells'].get((row, group)) or 0 for row in chart_rows] for group in groups},
+            title=f"{spec['label']} by {row_label} and {analytics_service.DIMENSIONS[columns][1]}",
+            xlabel=row_label,
+            ylabel=spec['label'],
+            value_format=value_format
+        )
+    
+    return {
+        'data': data,
+        'columns': table_columns,
+        'summary': {
+            'total': result['total'],
+            'type': spec['type'],
+            'label': spec['label'],
+            'matched_rows': result['matched_rows'],
+            'elapsed_ms': result['elapsed_ms'],
+        },
+        'chart': chart_img,
+        'generated_at': result['snapshot'].loaded_at,
+    }
+
+
+def _pivot_value(value, value_type):
+    """Counts and seat totals show as whole numbers."""
+    if value is not None and value_type == 'number':
+        return int(round(value))
+    return value
+
+
+REPORTS = {
+    'occupancy': get_average_occupancy,
+    'revenue': get_revenue_by_aircraft,
+    'flight-hours': get_flight_hours_per_employee,
+    'cancellation-rate': get_monthly_cancellation_rate,
+    'aircraft-activity': get_monthly_aircraft_activity,
+}
+
+
+def _with_defaults(report, options):
+    """options plus the report's own defaults for the ones left out, so both spell the same cache key."""
+    defaults = {name: param.default for name, param in inspect.signature(report).parameters.items()
+                if name != 'filters' and param.default is not inspect.Parameter.empty}
+    return {**defaults, **options}
+
+
+def run_report(report_id, filters=None, refresh=False, **options):
+    """
+    Runs a report through the report cache. `options` are the report's extra arguments
+    (the occupancy page cursor and size); they're part of the cache key like the filters.
+    refresh=True skips the cached copy and replaces it.
+    """
+    report = REPORTS[report_id]
+    options = _with_defaults(report, options)
+    params = {'filters': filters or {}, **options}
+    
+    def compute():
+        return {**report(filters, **options), 'generated_at': datetime.now()}
+    
+    return report_cache.get_or_compute(report_id, params, compute, refresh)
+
+
+def default_reports(page_size=DEFAULT_PAGE_SIZE):
+    """
+    The unfiltered first page of every report - what the cache warm-up runs. Pass the
+    REPORT_PAGE_SIZE the pages use, or the warmed occupancy page is never the one asked for.
+    """
+    options = {'occupancy': {'after': None, 'page_size': page_size}}
+    return [lambda report_id=report_id: run_report(report_id, **options.get(report_id, {}))
+            for report_id in REPORTS]
@@ -0,0 +1,365 @@
+"""Bulk schedule import - turns a CSV/JSON timetable into flights with planes and crew assigned."""
+import csv
+import io
+import json
+import random
+import string
+from datetime import datetime, timedelta
+import mysql.connector
+from app import db
+from app.repositories import flight_repository, aircraft_repository, crew_repository
+from app.services import admin_service, report_fact_service
+from app.utils.scheduling import ResourceTimeline, to_datetime
+
+
+IMPORT_BATCH_SIZE = 200
+TURNAROUND_MINUTES = 0
+MAX_REPEAT_DAYS = 366  # longest repeat_until span one row may expand to
+
+WEEKDAY_NAMES = {'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6}
+
+
+def parse_schedule(content, file_format=None):
+    """
+    Reads a schedule file into a list of row dicts.
+    JSON can be a list of rows or {"flights": [...]}; CSV needs a header row.
+    Multi-value fields (pilot_ids, attendant_ids, weekdays) are ';' or ',' separated.
+    """
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+
+    if file_format is None:
+        file_format = 'json' if content.lstrip().startswith(('[', '{')) else 'csv'
+
+    if file_format == 'json':
+        data = json.loads(content)
+        rows = data.get('flights', []) if isinstance(data, dict) else data
+    else:
+        rows = list(csv.DictReader(io.StringIO(content)))
+
+    parsed = []
+    for line_no, row in enumerate(rows, start=1):
+        row = {k.strip().lower(): v for k, v in row.items() if k}
+        for key in ('pilot_ids', 'attendant_ids', 'weekdays'):
+            value = row.get(key)
+            if isinstance(value, str):
+                row[key] = [v.strip() for v in value.replace(';', ',').split(',') if v.strip()]
+        row['line'] = line_no
+        parsed.append(row)
+    return parsed
+
+
+def _parse_weekdays(values):
+    """Accepts ['Mon', 'Wed'] or [1, 3] (1 = Monday) and returns python weekday numbers."""
+    if values is None:
+        return set()
+    if not isinstance(values, (list, tuple)):
+        raise ValueError("weekdays must be a list of days")
+    weekdays = set()
+    for value in values:
+        value = str(value).strip().lower()
+        if value[:3] in WEEKDAY_NAMES:
+            weekdays.add(WEEKDAY_NAMES[value[:3]])
+        elif value.isdigit() and 1 <= int(value) <= 7:
+            weekdays.add(int(value) - 1)
+        else:
+            raise ValueError(f"Unknown weekday '{value}'")
+    return weekdays
+
+
+def expand_recurrences(rows, max_days=MAX_REPEAT_DAYS):
+    """Turns rows with repeat_until (+ optional weekdays) into one entry per flight date."""
+    entries = []
+    errors = []
+    for row in rows:
+        try:
+            start = datetime.strptime(str(row.get('departure_date', '')).strip(), '%Y-%m-%d').date()
+            departure_time = datetime.strptime(str(row.get('departure_time', '')).strip()[:5], '%H:%M').time()
+        except ValueError:
+            errors.append({'line': row['line'], 'error': 'departure_date/departure_time must be YYYY-MM-DD and HH:MM'})
+            continue
+
+        repeat_until = row.get('repeat_until')
+        if not repeat_until:
+            entries.append(dict(row, departure=datetime.combine(start, departure_time)))
+            continue
+
+        try:
+            end = datetime.strptime(str(repeat_until).strip(), '%Y-%m-%d').date()
+            weekdays = _parse_weekdays(row.get('weekdays')) or set(range(7))
+        except ValueError as e:
+            errors.append({'line': row['line'], 'error': str(e)})
+            continue
+
+        if row.get('flight_number'):
+            errors.append({'line': row['line'], 'error': 'flight_number cannot be fixed on a recurring row'})
+            continue
+        if (end - start).days > max_days:
+            errors.append({'line': row['line'], 'error': f'repeat_until can be at most {max_days} days after departure_date'})
+            continue
+
+        day = start
+        while day <= end:
+            if day.weekday() in weekdays:
+                entries.append(dict(row, departure=datetime.combine(day, departure_time)))
+            day += timedelta(days=1)
+    return entries, errors
+
+
+def build_crew_timelines(window_start, window_end, pilots, attendants):
+    """Loads crew locations + bookings around the window once. Returns {'pilot': {...}, 'attendant': {...}}."""
+    crew_locations = crew_repository.get_crew_locations_before(window_start)
+    crew = {
+        'pilot': {p['Id']: ResourceTimeline(crew_locations['pilot'].get(p['Id'], crew_repository.HOME_BASE_AIRPORT))
+                  for p in pilots},
+        'attendant': {a['Id']: ResourceTimeline(crew_locations['attendant'].get(a['Id'], crew_repository.HOME_BASE_AIRPORT))
+                      for a in attendants},
+    }
+
+    # Flights landing inside the window might have departed up to a day before it
+    load_from = window_start - timedelta(days=1)
+    for a in crew_repository.get_crew_assignments_in_window(load_from, window_end):
+        dep = to_datetime(a['DepartureDate'], a['DepartureHour'])
+        arr = dep + timedelta(minutes=a['Duration'] or 0)
+        timeline = crew[a['Role']].get(a['CrewId'])
+        if timeline and arr > window_start:
+            timeline.add(dep, arr, a['OriginPort'], a['DestPort'], a['FlightId'])
+
+    return crew
+
+
+def _build_timelines(window_start, window_end, airplanes, pilots, attendants):
+    """Loads the existing schedule around the window once and builds per-resource timelines."""
+    plane_locations = flight_repository.get_airplane_locations_before(window_start)
+    planes = {a['AirplaneId']: ResourceTimeline(plane_locations.get(a['AirplaneId'], aircraft_repository.HOME_BASE_AIRPORT))
+              for a in airplanes}
+
+    load_from = window_start - timedelta(days=1)
+    for f in flight_repository.get_flights_in_window(load_from, window_end):
+        dep = to_datetime(f['DepartureDate'], f['DepartureHour'])
+        arr = dep + timedelta(minutes=f['Duration'] or 0)
+        timeline = planes.get(f['Airplanes_AirplaneId'])
+        if timeline and arr > window_start:
+            timeline.add(dep, arr, f['OriginPort'], f['DestPort'], f['FlightId'])
+
+    return planes, build_crew_timelines(window_start, window_end, pilots, attendants)
+
+
+def _pick_crew(role, wanted_ids, count, timelines, roster, slot, for_long_flight, batch_minutes):
+    """Validates requested crew or picks the least-used free ones at the origin."""
+    dep, arr, origin, dest = slot
+
+    def eligible(crew_id):
+        member = roster.get(crew_id)
+        if not member:
+            return False
+        if for_long_flight and not member.get('LongFlightsTraining'):
+            return False
+        return timelines[crew_id].can_fly(dep, arr, origin, dest, TURNAROUND_MINUTES)
+
+    if wanted_ids:
+        if not isinstance(wanted_ids, (list, tuple)):
+            raise ValueError(f"{role}_ids must be a list of IDs")
+        # JSON files may give numbers - the roster is keyed by string IDs
+        wanted_ids = [str(c).strip() for c in wanted_ids]
+        if len(wanted_ids) != count:
+            raise ValueError(f"needs exactly {count} {role}s, got {len(wanted_ids)}")
+        bad = [c for c in wanted_ids if not eligible(c)]
+        if bad:
+            raise ValueError(f"{role}(s) {', '.join(bad)} not available at {origin} for this slot")
+        return list(wanted_ids)
+
+    candidates = sorted((c for c in roster if eligible(c)), key=lambda c: (batch_minutes.get(c, 0), c))
+    if len(candidates) < count:
+        raise ValueError(f"only {len(candidates)} {role}(s) free at {origin}, need {count}")
+    return candidates[:count]
+
+
+def _pick_airplane(wanted_id, airplanes, timelines, slot, for_long_flight):
+    """Validates the requested plane or picks a free one at the origin (small planes first for short flights)."""
+    dep, arr, origin, dest = slot
+
+    def eligible(airplane):
+        if for_long_flight and airplane['size'] != 'large':
+            return False
+        return timelines[airplane['AirplaneId']].can_fly(dep, arr, origin, dest, TURNAROUND_MINUTES)
+
+    if wanted_id:
+        wanted_id = str(wanted_id).strip()
+        airplane = airplanes.get(wanted_id)
+        if not airplane:
+            raise ValueError(f"unknown aircraft {wanted_id}")
+        if not eligible(airplane):
+            raise ValueError(f"aircraft {wanted_id} not available at {origin} for this slot")
+        return airplane
+
+    # Keep the big planes free for long flights whenever a small one will do
+    for airplane in sorted(airplanes.values(), key=lambda a: (a['size'] == 'large', a['AirplaneId'])):
+        if eligible(airplane):
+            return airplane
+    raise ValueError(f"no {'large ' if for_long_flight else ''}aircraft free at {origin}")
+
+
+def _generate_flight_ids(count, taken):
+    """Makes unique 6-char flight numbers, checking collisions with one query per round."""
+    result = []
+    while len(result) < count:
+        fresh = {''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+                 for _ in range(count - len(result))}
+        fresh -= taken
+        fresh -= flight_repository.get_existing_flight_ids(fresh)
+        taken |= fresh
+        result.extend(fresh)
+    return result
+
+
+def plan_schedule(rows, max_days=MAX_REPEAT_DAYS):
+    """
+    Validates and resources every flight in memory. Nothing is written.
+    Returns {'flights': [...], 'errors': [...]}.
+    """
+    entries, errors = expand_recurrences(rows, max_days=max_days)
+    if not entries:
+        return {'flights': [], 'errors': errors}
+
+    routes = {(r['origin'], r['destination']): r for r in flight_repository.get_all_routes()}
+    airplanes = {a['AirplaneId']: a for a in aircraft_repository.get_all_airplanes()}
+    pilots = {p['Id']: p for p in (crew_repository.get_all_pilots() or [])}
+    attendants = {a['Id']: a for a in (crew_repository.get_all_flight_attendants() or [])}
+
+    window_start = min(e['departure'] for e in entries)
+    window_end = max(e['departure'] for e in entries) + timedelta(days=2)
+    plane_timelines, crew_timelines = _build_timelines(
+        window_start, window_end, airplanes.values(), pilots.values(), attendants.values())
+
+    # Fixed flight numbers must be unique against the DB and within the file
+    fixed_ids = [str(e['flight_number']).upper().strip() for e in entries if e.get('flight_number')]
+    taken_ids = flight_repository.get_existing_flight_ids(fixed_ids)
+    seen_ids = set()
+
+    planned = []
+    batch_minutes = {}
+    for entry in sorted(entries, key=lambda e: e['departure']):
+        line = entry['line']
+        origin = str(entry.get('origin', '')).upper().strip()
+        destination = str(entry.get('destination', '')).upper().strip()
+        try:
+            route = routes.get((origin, destination))
+            if not route:
+                raise ValueError(f"no route {origin} → {destination}")
+
+            flight_id = str(entry.get('flight_number') or '').upper().strip() or None
+            if flight_id:
+                if len(flight_id) != 6 or not flight_id.isalnum():
+                    raise ValueError(f"flight number {flight_id} must be 6 letters/digits")
+                if flight_id in taken_ids or flight_id in seen_ids:
+                    raise ValueError(f"flight number {flight_id} already exists")
+
+            economy_price = float(entry.get('economy_price') or 0)
+            if economy_price <= 0:
+                raise ValueError("economy_price must be positive")
+
+            duration = route['duration_minutes']
+            dep = entry['departure']
+            arr = dep + timedelta(minutes=duration)
+            slot = (dep, arr, origin, destination)
+            long_flight = admin_service.is_long_flight(duration)
+
+            airplane = _pick_airplane(entry.get('aircraft_id'), airplanes, plane_timelines, slot, long_flight)
+            requirements = admin_service.get_crew_requirements(airplane['size'])
+
+            business_price = None
+            if airplane['size'] == 'large':
+                business_price = float(entry.get('business_price') or 0)
+                if business_price <= 0:
+                    raise ValueError("business_price must be positive for a large aircraft")
+
+            pilot_ids = _pick_crew('pilot', entry.get('pilot_ids'), requirements['pilots'],
+                                   crew_timelines['pilot'], pilots, slot, long_flight, batch_minutes)
+            attendant_ids = _pick_crew('attendant', entry.get('attendant_ids'), requirements['attendants'],
+                                       crew_timelines['attendant'], attendants, slot, long_flight, batch_minutes)
+        except (ValueError, TypeError) as e:
+            errors.append({'line': line, 'departure': entry['departure'], 'error': str(e)})
+            continue
+
+        # Book the resources so later rows in the file see them as busy
+        plane_timelines[airplane['AirplaneId']].add(dep, arr, origin, destination, flight_id)
+        for crew_id in pilot_ids:
+            crew_timelines['pilot'][crew_id].add(dep, arr, origin, destination, flight_id)
+            batch_minutes[crew_id] = batch_minutes.get(crew_id, 0) + duration
+        for crew_id in attendant_ids:
+            crew_timelines['attendant'][crew_id].add(dep, arr, origin, destination, flight_id)
+            batch_minutes[crew_id] = batch_minutes.get(crew_id, 0) + duration
+        if flight_id:
+            seen_ids.add(flight_id)
+
+        planned.append({
+            'line': line,
+            'flight_id': flight_id,
+            'airplane_id': airplane['AirplaneId'],
+            'origin_port': origin,
+            'dest_port': destination,
+            'departure': dep,
+            'departure_date': dep.strftime('%Y-%m-%d'),
+            'departure_hour': dep.strftime('%H:%M'),
+            'duration': duration,
+            'status': 'active',
+            'economy_price': economy_price,
+            'business_price': business_price,
+            'pilot_ids': pilot_ids,
+            'attendant_ids': attendant_ids,
+        })
+
+    # Fill in generated flight numbers last so we can check them all in one go
+    missing = [f for f in planned if not f['flight_id']]
+    for flight, flight_id in zip(missing, _generate_flight_ids(len(missing), taken_ids | seen_ids)):
+        flight['flight_id'] = flight_id
+
+    return {'flights': planned, 'errors': errors}
+
+
+def write_schedule(flights, manager_id=None, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Inserts planned flights + crew in one transaction, `batch_size` flights per statement -
+    if any batch fails nothing is written.
+    """
+    batches = [flights[start:start + batch_size] for start in range(0, len(flights), batch_size)]
+    with db.transaction():
+        for batch in batches:
+            flight_repository.create_flights_bulk(batch)
+            crew_repository.assign_crew_bulk(
+                [(pid, f['flight_id']) for f in batch for pid in f['pilot_ids']],
+                [(aid, f['flight_id']) for f in batch for aid in f['attendant_ids']],
+            )
+            if manager_id:
+                flight_repository.log_manager_edits_bulk(manager_id, [f['flight_id'] for f in batch])
+    report_fact_service.flight_changed(*[f['flight_id'] for f in flights])
+    return len(flights)
+
+
+def import_schedule(content, file_format=None, dry_run=True, manager_id=None, allow_partial=False,
+                    max_days=MAX_REPEAT_DAYS):
+    """
+    Full import: parse, plan in memory, then write (unless dry_run).
+    By default nothing is written if any row fails; pass allow_partial to write the good rows.
+    """
+    try:
+        rows = parse_schedule(content, file_format)
+    except (ValueError, csv.Error) as e:
+        return {'flights': [], 'errors': [{'line': None, 'error': f"Could not read file: {e}"}],
+                'created': 0, 'dry_run': dry_run}
+
+    report = plan_schedule(rows, max_days=max_days)
+    report['dry_run'] = dry_run
+    report['created'] = 0
+
+    if dry_run or not report['flights']:
+        return report
+    if report['errors'] and not allow_partial:
+        return report
+
+    try:
+        report['created'] = write_schedule(report['flights'], manager_id=manager_id)
+    except mysql.connector.Error as e:
+        report['errors'].append({'line': None, 'error': f"Nothing was written - the database refused the import: {e}"})
+    return report
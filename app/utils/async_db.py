@@ -0,0 +1,71 @@
+"""Runs app/db.py work from async views, several queries at once.
+
+mysql-connector is blocking, so `run` hands a repository call to a small thread pool and
+awaits it; views `asyncio.gather` the calls that don't depend on each other (direct and
+connecting legs, a flight and its seat counts) and wait for the slowest instead of the sum.
+Each call runs in its own app context, so it checks out its own pooled connection and
+gives it back when done, and it inherits the request's read-your-writes state and
+query log. At most ASYNC_DB_WORKERS calls run at once per web worker - keep that below
+DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW.
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, g, has_request_context
+
+from app import db
+
+
+DEFAULT_WORKERS = 8
+
+_workers = DEFAULT_WORKERS
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(_workers, 1), thread_name_prefix='async-db')
+        return _executor
+
+
+def _reset_after_fork():
+    # The parent's pool threads don't exist in a forked child - it starts its own on demand
+    global _executor, _lock
+    _executor = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _call_in_context(app, wrote, queries, fn, args, kwargs):
+    with app.app_context():
+        if wrote:
+            g.db_wrote = True
+        if queries is not None:
+            g.queries = queries
+        return fn(*args, **kwargs)
+
+
+async def run(fn, *args, **kwargs):
+    """Awaitable fn(*args, **kwargs) on the DB thread pool. Call it from inside a request."""
+    app = current_app._get_current_object()
+    wrote = has_request_context() and db._wrote_recently()
+    call = functools.partial(_call_in_context, app, wrote, g.get('queries'), fn, args, kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), call)
+
+
+def init_app(app):
+    """Sizes the pool from ASYNC_DB_WORKERS."""
+    global _workers, _executor
+    _workers = app.config.get('ASYNC_DB_WORKERS', DEFAULT_WORKERS)
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
@@ -0,0 +1,197 @@
+"""Content-addressed cache for rendered report charts.
+
+A chart's key is a hash of (chart type, input series, style), so the same data always
+maps to the same image and the key doubles as a strong ETag. Two tiers:
+an in-memory LRU per worker, and a directory on disk that every gunicorn worker shares.
+Images are stored as `<key>.<ext>` where ext is the image format (png or svg), and the
+render job that produced them as `<key>.json` so any worker can redraw an evicted chart.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from app.utils import metrics
+
+
+DEFAULT_MEMORY_ITEMS = 64
+DEFAULT_DISK_ITEMS = 2000
+PRUNE_EVERY = 50  # disk writes per worker between directory scans
+STALE_TMP_SECONDS = 3600  # a .tmp this old was left by a worker that died mid-write
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), 'flytau_charts')
+
+KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+EXTENSIONS = ('png', 'svg')
+JOB_EXTENSION = 'json'
+TMP_EXTENSION = 'tmp'
+
+
+def chart_key(kind, spec, style):
+    """Stable hash of the chart type, its inputs and the style it's drawn with."""
+    payload = json.dumps({'kind': kind, 'spec': spec, 'style': style},
+                         sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ChartCache:
+    """Memory LRU in front of a shared on-disk store of image bytes."""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, memory_items=DEFAULT_MEMORY_ITEMS,
+                 disk_items=DEFAULT_DISK_ITEMS):
+        self.configure(directory, memory_items, disk_items)
+
+    def configure(self, directory, memory_items, disk_items):
+        self.directory = directory
+        self.memory_items = memory_items
+        self.disk_items = disk_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def _remember(self, entry, data):
+        with self._lock:
+            self._memory[entry] = data
+            self._memory.move_to_end(entry)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def get(self, key, ext='png'):
+        """Image bytes for a key, or None. Disk hits get promoted into memory."""
+        if not KEY_PATTERN.match(key or '') or ext not in EXTENSIONS:
+            return None
+        entry = (key, ext)
+        with self._lock:
+            data = self._memory.get(entry)
+            if data is not None:
+                self._memory.move_to_end(entry)
+        metrics.cache_lookup('charts_memory', data is not None)
+        if data is not None:
+            return data
+
+        path = self._path(key, ext)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # keeps pruning roughly least-recently-used
+        except OSError:
+            metrics.cache_lookup('charts_disk', False)
+            return None
+        metrics.cache_lookup('charts_disk', True)
+        self._remember(entry, data)
+        return data
+
+    def has(self, key, ext='png'):
+        with self._lock:
+            if (key, ext) in self._memory:
+                return True
+        return os.path.exists(self._path(key, ext))
+
+    def put(self, key, data, ext='png'):
+        """Stores in both tiers."""
+        self._remember((key, ext), data)
+        path = self._path(key, ext)
+        if os.path.exists(path):
+            return
+        if self._write(path, data):
+            self._maybe_prune()
+
+    def _write(self, path, data):
+        """Atomic write via rename so other workers never see half a file."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=f'.{TMP_EXTENSION}')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            # Disk tier is best-effort - the memory copy still serves this worker
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        return True
+
+    def put_job(self, key, job):
+        """Saves what's needed to (re)draw a chart, for whichever worker gets asked for it."""
+        path = self._path(key, JOB_EXTENSION)
+        if not os.path.exists(path):
+            self._write(path, json.dumps(job, default=str).encode('utf-8'))
+
+    def get_job(self, key):
+        if not KEY_PATTERN.match(key or ''):
+            return None
+        path = self._path(key, JOB_EXTENSION)
+        try:
+            with open(path, 'rb') as f:
+                job = json.loads(f.read())
+            os.utime(path)  # jobs for charts still being asked for are pruned last too
+        except (OSError, ValueError):
+            return None
+        return job
+
+    def get_or_render(self, key, render, ext='png'):
+        """Returns cached bytes for key, calling render() only on a miss."""
+        data = self.get(key, ext)
+        if data is None:
+            data = render()
+            self.put(key, data, ext)
+        return data
+
+    def _maybe_prune(self):
+        """Scanning the directory costs a stat per file, so only every PRUNE_EVERY-th write does it."""
+        with self._lock:
+            due = self._writes % PRUNE_EVERY == 0
+            self._writes += 1
+        if due:
+            self._prune()
+
+    def _prune(self):
+        """
+        Drops the oldest files once the shared directory grows past disk_items (give or take
+        a few PRUNE_EVERY's), plus any .tmp a crashed write left behind.
+        """
+        stale_before = time.time() - STALE_TMP_SECONDS
+        entries, stale = [], []
+        try:
+            for entry in os.scandir(self.directory):
+                ext = entry.name.rsplit('.', 1)[-1]
+                if ext not in EXTENSIONS + (JOB_EXTENSION, TMP_EXTENSION):
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue  # removed by another worker since the scan
+                if ext != TMP_EXTENSION:
+                    entries.append((mtime, entry.path))
+                elif mtime < stale_before:
+                    stale.append(entry.path)
+        except OSError:
+            return
+        entries.sort()
+        for path in stale + [path for _, path in entries[:max(len(entries) - self.disk_items, 0)]]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # another worker got there first
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+
+chart_cache = ChartCache()
+
+
+def init_app(app):
+    """Points the shared cache at the configured directory and sizes."""
+    chart_cache.configure(
+        app.config.get('CHART_CACHE_DIR', DEFAULT_DIRECTORY),
+        app.config.get('CHART_CACHE_MEMORY_ITEMS', DEFAULT_MEMORY_ITEMS),
+        app.config.get('CHART_CACHE_DISK_ITEMS', DEFAULT_DISK_ITEMS),
+    )
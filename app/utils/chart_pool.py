@@ -0,0 +1,231 @@
+"""Renders report charts in a small process pool so request threads never draw them.
+
+Report pages submit a chart and get its URL straight away; the image endpoint then waits
+briefly for the result (or tells the browser to poll). Every submitted job is also written
+next to the cache as `<key>.json`, so whichever gunicorn worker gets the image request
+can render it - not just the one that served the page.
+
+Pool processes come from a forkserver (spawn where there's none), never a plain fork: by
+the time a web worker needs the pool it runs DB, session and report threads, and a fork
+copies their locks in whatever state they're in. Those start methods import the main
+script again in each pool process (before the pool initializer runs), so `python run.py`
+builds the app there too - in_render_process() lets init code skip its background work
+(this pool included) there.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from app.utils.chart_cache import chart_cache
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_RENDER_TIMEOUT = 30  # seconds before a stuck job is given up on
+
+
+_render_process = False
+
+
+def in_render_process():
+    """True inside a chart pool process - nothing there should start pools or background threads."""
+    # _inheriting is multiprocessing's own bootstrap flag, set while the child re-imports the main script
+    return _render_process or getattr(multiprocessing.current_process(), '_inheriting', False)
+
+
+def _context():
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    if context.get_start_method() == 'forkserver':
+        # Imported once in the fork server, so every pool process starts with the renderers loaded
+        context.set_forkserver_preload(['app.utils.charts'])
+    return context
+
+
+def _warm_up():
+    """Pool process initializer - marks the process and pays the renderer import cost up front."""
+    global _render_process
+    from app.utils import charts
+    _render_process = True
+    charts.preload_renderers()
+
+
+def _ping():
+    return os.getpid()
+
+
+def _render(job):
+    from app.utils import charts
+    return charts.render_job(job)
+
+
+class ChartPool:
+    """Bounded ProcessPoolExecutor plus a table of in-flight chart renders."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE,
+                 render_timeout=DEFAULT_RENDER_TIMEOUT):
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.configure(workers, queue_size, render_timeout)
+
+    def configure(self, workers, queue_size, render_timeout):
+        self.shutdown()
+        self.workers = workers
+        self.queue_size = queue_size
+        self.render_timeout = render_timeout
+        # Caps renders queued + running in this web worker; past that, clients poll
+        self._slots = threading.BoundedSemaphore(max(queue_size, 1))
+
+    @property
+    def enabled(self):
+        return self.workers > 0
+
+    def start(self):
+        """Spawns and warms every pool process so the first report doesn't pay for it."""
+        if not self.enabled:
+            return
+        executor = self._get_executor()
+        for future in [executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._pending.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_context(),
+                                                     initializer=_warm_up)
+            return self._executor
+
+    def _reset_after_fork(self):
+        # A forked child can't use the parent's executor threads - it starts its own on demand
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(self.queue_size, 1))
+
+    def submit(self, key, ext, job):
+        """
+        Queues a render unless it's already cached or in flight. Without a pool the chart
+        is drawn inline. Returns False if the queue is full (the image endpoint retries later).
+        """
+        chart_cache.put_job(key, job)
+        return self._enqueue(key, ext, job)[0]
+
+    def _enqueue(self, key, ext, job):
+        """(accepted, future) - future is None when the chart is already drawn."""
+        if chart_cache.has(key, ext):
+            return True, None
+        if not self.enabled:
+            chart_cache.put(key, _render(job), ext)
+            return True, None
+
+        entry = (key, ext)
+        with self._lock:
+            pending = self._pending.get(entry)
+        if pending is not None:
+            return True, pending[0]
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            return False, None
+
+        try:
+            future = self._get_executor().submit(_render, job)
+        except BrokenProcessPool:
+            # A pool process died (OOM etc.) - start a fresh pool and try once more
+            with self._lock:
+                self._executor = None
+            try:
+                future = self._get_executor().submit(_render, job)
+            except Exception:
+                slots.release()
+                raise
+        except Exception:
+            slots.release()
+            raise
+
+        with self._lock:
+            self._pending[entry] = (future, time.monotonic())
+        future.add_done_callback(lambda f: self._finished(entry, f, slots))
+        return True, future
+
+    def _finished(self, entry, future, slots):
+        with self._lock:
+            current = self._pending.get(entry)
+            if current and current[0] is future:
+                del self._pending[entry]
+        slots.release()
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error("Chart render failed for %s.%s: %s", entry[0], entry[1], error)
+            return
+        chart_cache.put(entry[0], future.result(), entry[1])
+
+    def result(self, key, ext, wait):
+        """
+        Image bytes for a chart, waiting up to `wait` seconds for an in-flight render.
+        Returns None if it isn't ready yet; raises LookupError for a chart nobody asked for
+        and TimeoutError once a render has been stuck past render_timeout.
+        """
+        data = chart_cache.get(key, ext)
+        if data is not None:
+            return data
+
+        with self._lock:
+            pending = self._pending.get((key, ext))
+        if pending is None:
+            job = chart_cache.get_job(key)
+            if job is None:
+                raise LookupError(key)
+            # Submitted by another worker (or it was evicted) - render it here
+            accepted, future = self._enqueue(key, ext, job)
+            if not accepted:
+                return None
+            if future is None:
+                return chart_cache.get(key, ext)
+        else:
+            future, submitted_at = pending
+            if time.monotonic() - submitted_at > self.render_timeout:
+                future.cancel()
+                with self._lock:
+                    if self._pending.get((key, ext)) is pending:
+                        del self._pending[(key, ext)]
+                raise TimeoutError(f"Chart {key} took longer than {self.render_timeout}s to render")
+        try:
+            return future.result(timeout=wait)
+        except FutureTimeout:
+            return None
+
+
+chart_pool = ChartPool()
+os.register_at_fork(after_in_child=chart_pool._reset_after_fork)
+
+
+def init_app(app):
+    """Sizes the pool from config and warms it (CHART_POOL_WORKERS=0 renders inline instead)."""
+    chart_pool.configure(
+        0 if in_render_process() else app.config.get('CHART_POOL_WORKERS', DEFAULT_WORKERS),
+        app.config.get('CHART_POOL_QUEUE_SIZE', DEFAULT_QUEUE_SIZE),
+        app.config.get('CHART_RENDER_TIMEOUT', DEFAULT_RENDER_TIMEOUT),
+    )
+    if app.config.get('CHART_POOL_WARM', True):
+        try:
+            chart_pool.start()
+        except Exception as err:
+            # Charts still work - they'll just render inline if the pool can't come up
+            app.logger.warning(f"Chart render pool unavailable, rendering inline: {err}")
+            chart_pool.configure(0, chart_pool.queue_size, chart_pool.render_timeout)
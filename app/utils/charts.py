@@ -1,11 +1,16 @@
-"""Chart generation for reports - creates PNG images with our brand colors."""
-import io
-import base64
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend for server-side rendering
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-from typing import List, Dict, Optional, Tuple
+"""Chart generation for reports - renders our brand-coloured charts and hands back cached image URLs.
+
+The drawing itself lives in a renderer module: svg_charts (plain Python, the default) or
+png_charts (matplotlib, only imported if a PNG is asked for). Pick one per call with
+`renderer='svg'|'png'` or app-wide with the CHART_RENDERER setting. Cache misses are drawn
+in the chart process pool, so the create_* functions return the URL without waiting.
+"""
+import importlib
+from decimal import Decimal
+from typing import List, Dict
+from flask import current_app, has_app_context, url_for
+from app.utils.chart_cache import chart_key
+from app.utils.chart_pool import chart_pool
 
 # FLYTAU Brand Colors
 BRAND_COLORS = {
@@ -33,82 +38,109 @@ CHART_PALETTE = [
     '#00b894',  # Teal
 ]
 
+PNG_DPI = 120
+
+DEFAULT_RENDERER = 'svg'
+
+# renderer name -> (module that draws it, file extension / image format)
+RENDERERS = {
+    'svg': ('app.utils.svg_charts', 'svg'),
+    'png': ('app.utils.png_charts', 'png'),
+}
+
+CHART_KINDS = ('donut', 'bar', 'grouped_bar', 'stacked_bar', 'line', 'multi_bar')
+
+
+def _renderer_name(renderer: str = None) -> str:
+    name = renderer
+    if name is None and has_app_context():
+        name = current_app.config.get('CHART_RENDERER')
+    name = name or DEFAULT_RENDERER
+    if name not in RENDERERS:
+        raise ValueError(f"Unknown chart renderer '{name}' (expected one of: {', '.join(RENDERERS)})")
+    return name
+
+
+def chart_url(key: str, ext: str) -> str:
+    """URL the report pages use to load a cached chart."""
+    return url_for('report_chart', key=key, ext=ext)
+
 
-def _fig_to_base64(fig: plt.Figure) -> str:
-    """Turns a matplotlib figure into a base64 string we can embed in HTML."""
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', dpi=120, bbox_inches='tight', 
-                facecolor='white', edgecolor='none')
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-    buf.close()
-    plt.close(fig)
-    return f"data:image/png;base64,{img_base64}"
-
-
-def _apply_brand_style(ax: plt.Axes, title: str = None):
-    """Makes the chart look consistent with our brand styling."""
-    ax.set_facecolor('white')
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.spines['left'].set_color(BRAND_COLORS['light_gray'])
-    ax.spines['bottom'].set_color(BRAND_COLORS['light_gray'])
-    ax.tick_params(colors=BRAND_COLORS['gray'], labelsize=9)
-    if title:
-        ax.set_title(title, fontsize=12, fontweight='bold', 
-                     color=BRAND_COLORS['primary'], pad=15)
-
-
-def create_donut_chart(value: float, max_value: float = 100, 
-                       title: str = None, label: str = None) -> str:
+def preload_renderers():
+    """Imports every renderer that's installed (matplotlib is optional)."""
+    for module_name, _ in RENDERERS.values():
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            pass
+
+
+def render_job(job: dict) -> bytes:
+    """Draws one chart job ({'renderer', 'kind', 'spec'}) - runs in a chart pool process."""
+    if job['renderer'] not in RENDERERS or job['kind'] not in CHART_KINDS:
+        raise ValueError(f"Unknown chart job: {job['renderer']}/{job['kind']}")
+    module = importlib.import_module(RENDERERS[job['renderer']][0])
+    data = getattr(module, f"create_{job['kind']}_chart")(**job['spec'])
+    return data.encode('utf-8') if isinstance(data, str) else data
+
+
+def _plain(value):
+    """
+    Chart inputs as plain JSON types. Report rows carry Decimals (MySQL) and NumPy
+    numbers (pivot), which the job file would otherwise turn into strings.
+    """
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, 'tolist'):
+        # NumPy scalars and arrays, without importing NumPy
+        return _plain(value.tolist())
+    return value
+
+
+def _chart(kind: str, renderer: str, **spec) -> str:
+    """Queues the chart for drawing unless it's cached already. Returns its image URL."""
+    spec = _plain(spec)
+    name = _renderer_name(renderer)
+    ext = RENDERERS[name][1]
+    # Anything that changes how a chart looks has to be in the key so old images stop matching.
+    # Series order decides colours, so dicts are hashed as ordered pairs.
+    style = {'colors': BRAND_COLORS, 'palette': CHART_PALETTE, 'renderer': name, 'dpi': PNG_DPI}
+    key = chart_key(kind, {k: list(v.items()) if isinstance(v, dict) else v for k, v in spec.items()}, style)
+
+    chart_pool.submit(key, ext, {'renderer': name, 'kind': kind, 'spec': spec})
+    return chart_url(key, ext)
+
+
+def create_donut_chart(value: float, max_value: float = 100,
+                       title: str = None, label: str = None, renderer: str = None) -> str:
     """
     Create a donut/gauge chart showing a single percentage value.
-    
+
     Args:
         value: The value to display (0-100 for percentage)
         max_value: Maximum value (default 100)
         title: Chart title
         label: Label for the center value
-    
+        renderer: 'svg' or 'png' (defaults to the CHART_RENDERER setting)
+
     Returns:
-        Base64-encoded PNG image string
+        URL of the cached chart image
     """
-    fig, ax = plt.subplots(figsize=(4, 4))
-    
-    # Calculate percentages
-    pct = min(value / max_value * 100, 100) if max_value > 0 else 0
-    remaining = 100 - pct
-    
-    # Create donut
-    colors = [BRAND_COLORS['primary'], BRAND_COLORS['light_gray']]
-    wedges, _ = ax.pie([pct, remaining], colors=colors, startangle=90,
-                       wedgeprops=dict(width=0.4, edgecolor='white'))
-    
-    # Center text
-    center_text = f"{value:.1f}%"
-    ax.text(0, 0.05, center_text, ha='center', va='center', 
-            fontsize=24, fontweight='bold', color=BRAND_COLORS['primary'])
-    if label:
-        ax.text(0, -0.2, label, ha='center', va='center', 
-                fontsize=10, color=BRAND_COLORS['gray'])
-    
-    if title:
-        ax.set_title(title, fontsize=12, fontweight='bold', 
-                     color=BRAND_COLORS['primary'], pad=10)
-    
-    ax.set_aspect('equal')
-    fig.tight_layout()
-    
-    return _fig_to_base64(fig)
-
-
-def create_bar_chart(labels: List[str], values: List[float], 
-                     title: str = None, xlabel: str = None, 
+    return _chart('donut', renderer, value=value, max_value=max_value, title=title, label=label)
+
+
+def create_bar_chart(labels: List[str], values: List[float],
+                     title: str = None, xlabel: str = None,
                      ylabel: str = None, horizontal: bool = False,
-                     color: str = None, value_format: str = '{:.1f}') -> str:
+                     color: str = None, value_format: str = '{:.1f}',
+                     renderer: str = None) -> str:
     """
     Create a simple bar chart.
-    
+
     Args:
         labels: Bar labels
         values: Bar values
@@ -118,56 +150,22 @@ def create_bar_chart(labels: List[str], values: List[float],
         horizontal: If True, create horizontal bar chart
         color: Bar color (uses brand primary if not specified)
         value_format: Format string for value labels
-    
+        renderer: 'svg' or 'png' (defaults to the CHART_RENDERER setting)
+
     Returns:
-        Base64-encoded PNG image string
+        URL of the cached chart image
     """
-    fig, ax = plt.subplots(figsize=(8, max(4, len(labels) * 0.4) if horizontal else 5))
-    
-    bar_color = color or BRAND_COLORS['primary']
-    
-    if horizontal:
-        y_pos = range(len(labels))
-        bars = ax.barh(y_pos, values, color=bar_color, edgecolor='white', height=0.6)
-        ax.set_yticks(y_pos)
-        ax.set_yticklabels(labels)
-        ax.invert_yaxis()
-        
-        # Value labels
-        for bar, val in zip(bars, values):
-            ax.text(bar.get_width() + max(values) * 0.02, bar.get_y() + bar.get_height()/2,
-                    value_format.format(val), va='center', fontsize=9, 
-                    color=BRAND_COLORS['gray'])
-    else:
-        x_pos = range(len(labels))
-        bars = ax.bar(x_pos, values, color=bar_color, edgecolor='white', width=0.6)
-        ax.set_xticks(x_pos)
-        ax.set_xticklabels(labels, rotation=45, ha='right')
-        
-        # Value labels
-        for bar, val in zip(bars, values):
-            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height(),
-                    value_format.format(val), ha='center', va='bottom', 
-                    fontsize=9, color=BRAND_COLORS['gray'])
-    
-    if xlabel:
-        ax.set_xlabel(xlabel, fontsize=10, color=BRAND_COLORS['gray'])
-    if ylabel:
-        ax.set_ylabel(ylabel, fontsize=10, color=BRAND_COLORS['gray'])
-    
-    _apply_brand_style(ax, title)
-    fig.tight_layout()
-    
-    return _fig_to_base64(fig)
+    return _chart('bar', renderer, labels=labels, values=values, title=title, xlabel=xlabel,
+                  ylabel=ylabel, horizontal=horizontal, color=color, value_format=value_format)
 
 
 def create_grouped_bar_chart(categories: List[str], groups: List[str],
                              data: Dict[str, List[float]], title: str = None,
                              xlabel: str = None, ylabel: str = None,
-                             value_format: str = '${:,.0f}') -> str:
+                             value_format: str = '${:,.0f}', renderer: str = None) -> str:
     """
     Create a grouped bar chart for comparing multiple series.
-    
+
     Args:
         categories: Category labels (x-axis groups)
         groups: Group names (legend items)
@@ -176,43 +174,22 @@ def create_grouped_bar_chart(categories: List[str], groups: List[str],
         xlabel: X-axis label
         ylabel: Y-axis label
         value_format: Format string for value labels
-    
+        renderer: 'svg' or 'png' (defaults to the CHART_RENDERER setting)
+
     Returns:
-        Base64-encoded PNG image string
+        URL of the cached chart image
     """
-    fig, ax = plt.subplots(figsize=(max(8, len(categories) * 1.5), 5))
-    
-    x = range(len(categories))
-    n_groups = len(groups)
-    width = 0.8 / n_groups
-    
-    for i, (group_name, group_values) in enumerate(data.items()):
-        offset = (i - n_groups/2 + 0.5) * width
-        bars = ax.bar([xi + offset for xi in x], group_values, width,
-                      label=group_name, color=CHART_PALETTE[i % len(CHART_PALETTE)],
-                      edgecolor='white')
-    
-    ax.set_xticks(x)
-    ax.set_xticklabels(categories, rotation=45, ha='right')
-    ax.legend(loc='upper right', frameon=False)
-    
-    if xlabel:
-        ax.set_xlabel(xlabel, fontsize=10, color=BRAND_COLORS['gray'])
-    if ylabel:
-        ax.set_ylabel(ylabel, fontsize=10, color=BRAND_COLORS['gray'])
-    
-    _apply_brand_style(ax, title)
-    fig.tight_layout()
-    
-    return _fig_to_base64(fig)
+    return _chart('grouped_bar', renderer, categories=categories, groups=groups, data=data,
+                  title=title, xlabel=xlabel, ylabel=ylabel, value_format=value_format)
 
 
 def create_stacked_bar_chart(labels: List[str], data: Dict[str, List[float]],
-                             title: str = None, xlabel: str = None, 
-                             ylabel: str = None, horizontal: bool = True) -> str:
+                             title: str = None, xlabel: str = None,
+                             ylabel: str = None, horizontal: bool = True,
+                             renderer: str = None) -> str:
     """
     Create a stacked bar chart.
-    
+
     Args:
         labels: Bar labels
         data: Dict mapping stack names to their values
@@ -220,61 +197,22 @@ def create_stacked_bar_chart(labels: List[str], data: Dict[str, List[float]],
         xlabel: X-axis label
         ylabel: Y-axis label
         horizontal: If True, create horizontal stacked bar chart
-    
+        renderer: 'svg' or 'png' (defaults to the CHART_RENDERER setting)
+
     Returns:
-        Base64-encoded PNG image string
+        URL of the cached chart image
     """
-    fig, ax = plt.subplots(figsize=(10, max(4, len(labels) * 0.5)) if horizontal else (8, 5))
-    
-    stack_names = list(data.keys())
-    n_bars = len(labels)
-    
-    if horizontal:
-        y_pos = range(n_bars)
-        left = [0] * n_bars
-        
-        for i, (stack_name, values) in enumerate(data.items()):
-            color = CHART_PALETTE[i % len(CHART_PALETTE)]
-            ax.barh(y_pos, values, left=left, label=stack_name, 
-                    color=color, edgecolor='white', height=0.6)
-            left = [l + v for l, v in zip(left, values)]
-        
-        ax.set_yticks(y_pos)
-        ax.set_yticklabels(labels)
-        ax.invert_yaxis()
-    else:
-        x_pos = range(n_bars)
-        bottom = [0] * n_bars
-        
-        for i, (stack_name, values) in enumerate(data.items()):
-            color = CHART_PALETTE[i % len(CHART_PALETTE)]
-            ax.bar(x_pos, values, bottom=bottom, label=stack_name,
-                   color=color, edgecolor='white', width=0.6)
-            bottom = [b + v for b, v in zip(bottom, values)]
-        
-        ax.set_xticks(x_pos)
-        ax.set_xticklabels(labels, rotation=45, ha='right')
-    
-    ax.legend(loc='upper right', frameon=False)
-    
-    if xlabel:
-        ax.set_xlabel(xlabel, fontsize=10, color=BRAND_COLORS['gray'])
-    if ylabel:
-        ax.set_ylabel(ylabel, fontsize=10, color=BRAND_COLORS['gray'])
-    
-    _apply_brand_style(ax, title)
-    fig.tight_layout()
-    
-    return _fig_to_base64(fig)
+    return _chart('stacked_bar', renderer, labels=labels, data=data, title=title,
+                  xlabel=xlabel, ylabel=ylabel, horizontal=horizontal)
 
 
 def create_line_chart(labels: List[str], values: List[float],
-                      title: str = None, xlabel: str = None, 
+                      title: str = None, xlabel: str = None,
                       ylabel: str = None, fill: bool = True,
-                      marker: bool = True) -> str:
+                      marker: bool = True, renderer: str = None) -> str:
     """
     Create a line chart for trend data.
-    
+
     Args:
         labels: X-axis labels (e.g., months)
         values: Y-axis values
@@ -283,63 +221,23 @@ def create_line_chart(labels: List[str], values: List[float],
         ylabel: Y-axis label
         fill: If True, fill area under the line
         marker: If True, show data point markers
-    
+        renderer: 'svg' or 'png' (defaults to the CHART_RENDERER setting)
+
     Returns:
-        Base64-encoded PNG image string
+        URL of the cached chart image
     """
-    fig, ax = plt.subplots(figsize=(10, 5))
-    
-    x = range(len(labels))
-    
-    # Plot line
-    line_kwargs = {
-        'color': BRAND_COLORS['primary'],
-        'linewidth': 2.5,
-        'marker': 'o' if marker else None,
-        'markersize': 8,
-        'markerfacecolor': 'white',
-        'markeredgecolor': BRAND_COLORS['primary'],
-        'markeredgewidth': 2,
-    }
-    ax.plot(x, values, **line_kwargs)
-    
-    # Fill area under line
-    if fill:
-        ax.fill_between(x, values, alpha=0.15, color=BRAND_COLORS['primary'])
-    
-    # Value labels on markers
-    if marker:
-        for xi, val in zip(x, values):
-            ax.annotate(f'{val:.1f}%', (xi, val), textcoords="offset points",
-                        xytext=(0, 10), ha='center', fontsize=9, 
-                        color=BRAND_COLORS['gray'])
-    
-    ax.set_xticks(x)
-    ax.set_xticklabels(labels, rotation=45, ha='right')
-    ax.set_ylim(bottom=0)
-    
-    if xlabel:
-        ax.set_xlabel(xlabel, fontsize=10, color=BRAND_COLORS['gray'])
-    if ylabel:
-        ax.set_ylabel(ylabel, fontsize=10, color=BRAND_COLORS['gray'])
-    
-    # Grid
-    ax.yaxis.grid(True, linestyle='--', alpha=0.3, color=BRAND_COLORS['light_gray'])
-    
-    _apply_brand_style(ax, title)
-    fig.tight_layout()
-    
-    return _fig_to_base64(fig)
-
-
-def create_multi_bar_chart(categories: List[str], 
+    return _chart('line', renderer, labels=labels, values=values, title=title,
+                  xlabel=xlabel, ylabel=ylabel, fill=fill, marker=marker)
+
+
+def create_multi_bar_chart(categories: List[str],
                            series1_label: str, series1_values: List[float],
                            series2_label: str, series2_values: List[float],
-                           title: str = None, xlabel: str = None, 
-                           ylabel: str = None) -> str:
+                           title: str = None, xlabel: str = None,
+                           ylabel: str = None, renderer: str = None) -> str:
     """
     Create a chart with two bar series side by side.
-    
+
     Args:
         categories: Category labels
         series1_label: Label for first series
@@ -349,31 +247,12 @@ def create_multi_bar_chart(categories: List[str],
         title: Chart title
         xlabel: X-axis label
         ylabel: Y-axis label
-    
+        renderer: 'svg' or 'png' (defaults to the CHART_RENDERER setting)
+
     Returns:
-        Base64-encoded PNG image string
+        URL of the cached chart image
     """
-    fig, ax = plt.subplots(figsize=(max(8, len(categories) * 1.2), 5))
-    
-    x = range(len(categories))
-    width = 0.35
-    
-    bars1 = ax.bar([xi - width/2 for xi in x], series1_values, width,
-                   label=series1_label, color=BRAND_COLORS['primary'], edgecolor='white')
-    bars2 = ax.bar([xi + width/2 for xi in x], series2_values, width,
-                   label=series2_label, color=BRAND_COLORS['danger'], edgecolor='white')
-    
-    ax.set_xticks(x)
-    ax.set_xticklabels(categories, rotation=45, ha='right')
-    ax.tick_params(axis='x', pad=10)  # Add gap between labels and bars
-    ax.legend(loc='upper right', frameon=False)
-    
-    if xlabel:
-        ax.set_xlabel(xlabel, fontsize=10, color=BRAND_COLORS['gray'])
-    if ylabel:
-        ax.set_ylabel(ylabel, fontsize=10, color=BRAND_COLORS['gray'])
-    
-    _apply_brand_style(ax, title)
-    fig.tight_layout()
-    
-    return _fig_to_base64(fig)
+    return _chart('multi_bar', renderer, categories=categories,
+                  series1_label=series1_label, series1_values=series1_values,
+                  series2_label=series2_label, series2_values=series2_values,
+                  title=title, xlabel=xlabel, ylabel=ylabel)
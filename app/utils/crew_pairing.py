@@ -0,0 +1,176 @@
+"""
+Crew pairing solver - staffs a batch of flights in one chronological sweep.
+
+Pure in-memory (no DB) so it can be benchmarked and reused. Hard rules: no
+overlapping flights, crew must be at the origin when the flight leaves, and
+long flights only get LongFlightsTraining crew. Soft goals: avoid leaving crew
+somewhere they'd have to be flown back from, and spread hours evenly.
+"""
+import heapq
+from collections import Counter, defaultdict
+from datetime import datetime
+
+
+ROLES = ('pilot', 'attendant')
+
+# How many flight-minutes one repositioning is "worth" when scoring candidates
+REPOSITION_PENALTY_MINUTES = 8 * 60
+
+
+class CrewPool:
+    """
+    Who is idle at which airport, advanced through time by arrival/departure events.
+    The timelines stay the source of truth - the pool just keeps the candidate lists short.
+    """
+
+    def __init__(self, roster, timelines, start):
+        self.roster = roster
+        self.timelines = timelines
+        self.home = {}
+        self.idle = defaultdict(set)
+        self.inbound = defaultdict(int)
+        self._events = []
+        self._seq = 0
+
+        for crew_id, timeline in timelines.items():
+            if crew_id not in roster:
+                continue
+            location = timeline.location_at(start)
+            self.home[crew_id] = location
+            self.idle[location].add(crew_id)
+            # Existing bookings still to come move people around as well
+            for dep, arr, origin, dest, _ in timeline.segments:
+                if arr > start:
+                    if dep >= start:
+                        self._push(dep, crew_id, origin, None)
+                    self._push(arr, crew_id, None, dest)
+
+    def _push(self, at, crew_id, leaves, arrives):
+        self._seq += 1
+        if arrives:
+            self.inbound[arrives] += 1
+        heapq.heappush(self._events, (at, self._seq, crew_id, leaves, arrives))
+
+    def advance(self, to_time):
+        """Applies every event up to (and including) to_time."""
+        events = self._events
+        while events and events[0][0] <= to_time:
+            _, _, crew_id, leaves, arrives = heapq.heappop(events)
+            if leaves:
+                self.idle[leaves].discard(crew_id)
+            if arrives:
+                self.idle[arrives].add(crew_id)
+                self.inbound[arrives] -= 1
+
+    def book(self, crew_id, dep, arr, origin, dest, flight_id):
+        """Puts someone on a flight: off the origin list now, onto the destination list when they land."""
+        self.timelines[crew_id].add(dep, arr, origin, dest, flight_id)
+        self.idle[origin].discard(crew_id)
+        self._push(arr, crew_id, None, dest)
+
+    def stranded(self):
+        """Crew who end the horizon away from where they started - each one is a repositioning."""
+        return [crew_id for crew_id, home in self.home.items()
+                if self.timelines[crew_id].location_at(datetime.max) != home]
+
+
+def _would_strand(pool, crew_id, arr, dest):
+    """True if flying to dest leaves this person away from home with no later booking out of there."""
+    if dest == pool.home[crew_id]:
+        return False
+    return pool.timelines[crew_id].next_origin_after(arr) != dest
+
+
+def _pick(pool, flight, count, minutes, remaining_demand, turnaround_minutes):
+    """Cheapest `count` eligible crew at the origin, or None if there aren't enough."""
+    dep, arr = flight['departure'], flight['arrival']
+    origin, dest = flight['origin'], flight['dest']
+
+    # Extra people at dest are only a problem once it has enough crew for what's left to fly out of it
+    dest_covered = len(pool.idle[dest]) + pool.inbound[dest] >= remaining_demand[dest]
+
+    scored = []
+    for crew_id in pool.idle.get(origin, ()):
+        if flight['long_flight'] and not pool.roster[crew_id].get('LongFlightsTraining'):
+            continue
+        score = minutes.get(crew_id, 0)
+        if dest_covered and _would_strand(pool, crew_id, arr, dest):
+            score += REPOSITION_PENALTY_MINUTES
+        scored.append((score, crew_id))
+
+    # Check the expensive timeline rules lazily, cheapest candidates first
+    chosen = []
+    heapq.heapify(scored)
+    while scored and len(chosen) < count:
+        _, crew_id = heapq.heappop(scored)
+        if pool.timelines[crew_id].can_fly(dep, arr, origin, dest, turnaround_minutes):
+            chosen.append(crew_id)
+    return chosen if len(chosen) == count else None
+
+
+def assign_crew(flights, rosters, timelines, history_minutes=None, turnaround_minutes=0):
+    """
+    Staffs flights in departure order. A flight gets all its missing crew or none.
+
+    flights: dicts with flight_id, departure, arrival, origin, dest, long_flight and
+             needs = {'pilot': n, 'attendant': m}
+    rosters: {'pilot': {id: row}, 'attendant': {id: row}}
+    timelines: {'pilot': {id: ResourceTimeline}, 'attendant': {...}} - updated in place
+    history_minutes: {'pilot': {id: minutes}, ...} already flown, used for balancing
+    """
+    history_minutes = history_minutes or {}
+    if not flights:
+        return {'assignments': [], 'unfilled': [], 'repositioned': 0, 'minutes': {}}
+    flights = sorted(flights, key=lambda f: (f['departure'], f['flight_id']))
+    start = flights[0]['departure']
+
+    pools = {role: CrewPool(rosters.get(role, {}), timelines.get(role, {}), start) for role in ROLES}
+    minutes = {role: dict(history_minutes.get(role, {})) for role in ROLES}
+    # Seats still to be filled out of each airport, so we know where extra crew is useful
+    remaining_demand = {role: Counter() for role in ROLES}
+    for flight in flights:
+        for role in ROLES:
+            remaining_demand[role][flight['origin']] += max(flight['needs'].get(role, 0), 0)
+
+    assignments = []
+    unfilled = []
+    for flight in flights:
+        picks = {}
+        failed = False
+        for role in ROLES:
+            pool = pools[role]
+            pool.advance(flight['departure'])
+            count = max(flight['needs'].get(role, 0), 0)
+            remaining_demand[role][flight['origin']] -= count
+            if failed or not count:
+                picks[role] = []
+                continue
+            picks[role] = _pick(pool, flight, count, minutes[role], remaining_demand[role], turnaround_minutes)
+            if picks[role] is None:
+                failed = True
+                unfilled.append({
+                    'flight_id': flight['flight_id'],
+                    'departure': flight['departure'],
+                    'error': f"not enough {role}s available at {flight['origin']} (need {count})",
+                })
+
+        if failed:
+            continue
+        duration = int((flight['arrival'] - flight['departure']).total_seconds() // 60)
+        for role, chosen in picks.items():
+            for crew_id in chosen:
+                pools[role].book(crew_id, flight['departure'], flight['arrival'],
+                                 flight['origin'], flight['dest'], flight['flight_id'])
+                minutes[role][crew_id] = minutes[role].get(crew_id, 0) + duration
+        assignments.append({
+            'flight_id': flight['flight_id'],
+            'pilot_ids': picks['pilot'],
+            'attendant_ids': picks['attendant'],
+        })
+
+    return {
+        'assignments': assignments,
+        'unfilled': unfilled,
+        'repositioned': sum(len(pool.stranded()) for pool in pools.values()),
+        'minutes': minutes,
+    }
@@ -0,0 +1,257 @@
+"""MySQL connection pool used by app/db.py.
+
+mysql-connector's own pool fails straight away when every connection is checked out and
+can't be created at all while MySQL is down. This one:
+  - blocks a checkout for up to `timeout` seconds waiting for a connection to come back,
+  - opens up to `max_overflow` extra connections under load (closed again when returned),
+  - pings an idle connection before handing it out and replaces it once it's older than
+    `recycle` seconds (RDS / wait_timeout drop idle sockets), and
+  - opens connections lazily, so it exists even if the database doesn't yet.
+Each connection also carries a small cache of server-side prepared statements
+(StatementCache) that lives as long as the socket does.
+"""
+import os
+import threading
+import time
+from collections import deque, OrderedDict
+
+import mysql.connector
+from mysql.connector import errors
+
+from app.utils import metrics
+
+
+DEFAULT_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 5
+DEFAULT_TIMEOUT = 10  # seconds a checkout waits for a free connection
+DEFAULT_RECYCLE = 1800  # seconds before a connection is replaced
+DEFAULT_STATEMENT_CACHE_SIZE = 64  # prepared statements kept per connection
+
+
+class PoolTimeout(errors.PoolError):
+    """No connection came free within the checkout timeout."""
+
+
+class StatementCache:
+    """
+    Prepared cursors for one connection, keyed by SQL text. The statement is parsed by
+    MySQL once; later executions only send the parameters. Least recently used ones are
+    closed past `size` (the server caps prepared statements per instance).
+    """
+
+    def __init__(self, size=DEFAULT_STATEMENT_CACHE_SIZE, on_prepare=None):
+        self.size = size
+        self._cursors = OrderedDict()
+        self._on_prepare = on_prepare
+
+    def __len__(self):
+        return len(self._cursors)
+
+    def cursor(self, connection, query):
+        """
+        (cursor, sql) for this query. Execute the returned sql, not your own copy: a prepared
+        cursor only skips re-preparing when it gets the very same string object again, and
+        SQL built per call (`sql += ...`) is equal to the cached key but not identical to it.
+        """
+        entry = self._cursors.get(query)
+        metrics.cache_lookup('prepared_statements', entry is not None)
+        if entry is not None:
+            self._cursors.move_to_end(query)
+            return entry
+        entry = (connection.cursor(prepared=True), query)
+        self._cursors[query] = entry
+        if self._on_prepare:
+            self._on_prepare()
+        while len(self._cursors) > self.size:
+            _, (evicted, _) = self._cursors.popitem(last=False)
+            _close_quietly(evicted)
+        return entry
+
+    def discard(self, query):
+        """Drops a statement after an error - it's prepared again next time."""
+        entry = self._cursors.pop(query, None)
+        if entry is not None:
+            _close_quietly(entry[0])
+
+
+class PooledConnection:
+    """
+    A checked-out connection. Behaves like the mysql-connector connection it wraps;
+    close() hands it back to the pool instead of closing the socket.
+    `statements` is the connection's prepared statement cache.
+    """
+
+    def __init__(self, pool, connection, created_at, statements):
+        self._pool = pool
+        self._connection = connection
+        self._created_at = created_at
+        self.statements = statements
+
+    def __getattr__(self, name):
+        if self._connection is None:
+            raise errors.OperationalError("Connection already returned to the pool")
+        return getattr(self._connection, name)
+
+    def close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            self._pool._release(connection, self._created_at, self.statements)
+
+
+class ConnectionPool:
+    """Thread-safe pool of MySQL connections with blocking checkout and bounded overflow."""
+
+    def __init__(self, connect_args, size=DEFAULT_SIZE, max_overflow=DEFAULT_MAX_OVERFLOW,
+                 timeout=DEFAULT_TIMEOUT, recycle=DEFAULT_RECYCLE, pre_ping=True,
+                 statement_cache_size=DEFAULT_STATEMENT_CACHE_SIZE):
+        self.connect_args = dict(connect_args)
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.statement_cache_size = statement_cache_size
+        self._idle = deque()  # (connection, created_at, statements), most recently returned last
+        self._cond = threading.Condition()
+        self._open = 0
+        self._checked_out = 0
+        self._waiting = 0
+        self._pid = os.getpid()
+        self._counters = {'connects': 0, 'waits': 0, 'timeouts': 0, 'recycled': 0, 'invalidated': 0,
+                          'prepares': 0}
+
+    def _connect(self):
+        connection = mysql.connector.connect(**self.connect_args)
+        self._count('connects')
+        statements = StatementCache(self.statement_cache_size, lambda: self._count('prepares'))
+        return connection, time.monotonic(), statements
+
+    def _check_fork(self):
+        """Sockets opened before a fork belong to the parent - drop them, don't close them."""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle.clear()
+            self._open = self._checked_out = 0
+
+    def get_connection(self):
+        """Checks out a connection, waiting up to `timeout` seconds when the pool is exhausted."""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            self._check_fork()
+            waited = False
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    entry = None
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    raise PoolTimeout(f"No database connection free after {self.timeout}s "
+                                      f"({self._open} open)")
+                if not waited:
+                    self._counters['waits'] += 1
+                    waited = True
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._checked_out += 1
+
+        # Connecting and pinging happen outside the lock
+        try:
+            connection, created_at, statements = self._validate(entry) if entry else self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, connection, created_at, statements)
+
+    def _validate(self, entry):
+        """Returns a usable connection for an idle entry - the same one, or a fresh replacement."""
+        connection, created_at, _ = entry
+        if self.recycle and time.monotonic() - created_at > self.recycle:
+            self._count('recycled')
+            _close_quietly(connection)
+            return self._connect()
+        if self.pre_ping:
+            try:
+                connection.ping(reconnect=False)
+            except errors.Error:
+                self._count('invalidated')
+                _close_quietly(connection)
+                return self._connect()
+        return entry
+
+    def _count(self, counter):
+        with self._cond:
+            self._counters[counter] += 1
+
+    def _release(self, connection, created_at, statements):
+        """Puts a connection back; overflow connections (and broken ones) are closed instead."""
+        try:
+            # Leave nothing behind for the next borrower: unread rows or an open transaction
+            if connection.unread_result:
+                connection.consume_results()
+            connection.rollback()
+            reusable = True
+        except errors.Error:
+            reusable = False
+        with self._cond:
+            if os.getpid() != self._pid:
+                return
+            self._checked_out -= 1
+            # An overflow connection is still worth keeping if someone is waiting for one
+            if reusable and (len(self._idle) + self._checked_out < self.size or self._waiting):
+                self._idle.append((connection, created_at, statements))
+                connection = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+        if connection is not None:
+            _close_quietly(connection)
+
+    def prefill(self, count=None):
+        """Opens connections up front (the whole pool by default). Raises if MySQL is down."""
+        count = self.size if count is None else count
+        connections = []
+        try:
+            for _ in range(count):
+                connections.append(self.get_connection())
+        finally:
+            for connection in connections:
+                connection.close()
+
+    def stats(self):
+        """Snapshot of what the pool is doing, for the pool status page and logs."""
+        with self._cond:
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'idle': len(self._idle),
+                'checked_out': self._checked_out,
+                'overflow': max(self._open - self.size, 0),
+                **self._counters,
+            }
+
+    def dispose(self):
+        """Closes every idle connection; checked-out ones close when they're returned."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+        for connection, _, _ in idle:
+            _close_quietly(connection)
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
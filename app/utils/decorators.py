@@ -1,5 +1,6 @@
 """Decorators for protecting routes based on who's logged in."""
 from functools import wraps
+from inspect import iscoroutinefunction
 from flask import session, redirect, url_for, flash, abort
 
 
@@ -55,13 +56,23 @@ def customer_required(f):
 
 
 def customer_or_guest(f):
-    """Open to customers and guests, but managers are blocked from booking."""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
+    """Open to customers and guests, but managers are blocked from booking. Works on async views too."""
+    def blocked():
         if session.get('role') == 'manager':
             flash('Managers are not allowed to purchase tickets.', 'error')
             return redirect(url_for('admin_dashboard'))
-        return f(*args, **kwargs)
+        return None
+    
+    if iscoroutinefunction(f):
+        # Flask only awaits views it can see are coroutine functions, so the wrapper has to be one
+        @wraps(f)
+        async def async_decorated_function(*args, **kwargs):
+            return blocked() or await f(*args, **kwargs)
+        return async_decorated_function
+    
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        return blocked() or f(*args, **kwargs)
     return decorated_function
 
 
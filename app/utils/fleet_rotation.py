@@ -0,0 +1,494 @@
+"""
+Aircraft rotation (tail assignment) - decides which plane flies which flight across a window.
+
+Two matching passes, no DB:
+  1. Chain flights into rotations with a minimum path cover (Hopcroft-Karp on
+     "flight A can be followed by flight B" - B leaves from where A lands, after A lands).
+  2. Match the rotations to planes by where each plane is parked and when it's free.
+     Rotations with a long flight only match big planes.
+A flight with a `size` only ever moves to a plane of that size - its crew and prices were
+set for it - and a plane's pinned legs always stay in one rotation.
+
+RotationPlan keeps the result around so a single added/cancelled flight can be
+patched in without re-solving the whole window.
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from app.utils.scheduling import ResourceTimeline
+
+
+# Longest a plane may sit on the ground between two legs of the same rotation
+MAX_GROUND_MINUTES = 24 * 60
+
+
+def hopcroft_karp(adjacency, right_count, match_left=None):
+    """
+    Maximum bipartite matching. adjacency[u] lists the right vertices left vertex u can take.
+    match_left can seed a partial matching (e.g. from a greedy pass). Returns match_left.
+    """
+    left_count = len(adjacency)
+    match_left = list(match_left) if match_left else [-1] * left_count
+    match_right = [-1] * right_count
+    for u, v in enumerate(match_left):
+        if v != -1:
+            match_right[v] = u
+
+    unreached = left_count + 1
+    while True:
+        # BFS: layer the graph from every free left vertex
+        dist = [unreached] * left_count
+        queue = deque()
+        for u in range(left_count):
+            if match_left[u] == -1:
+                dist[u] = 0
+                queue.append(u)
+        found_free = False
+        while queue:
+            u = queue.popleft()
+            for v in adjacency[u]:
+                w = match_right[v]
+                if w == -1:
+                    found_free = True
+                elif dist[w] == unreached:
+                    dist[w] = dist[u] + 1
+                    queue.append(w)
+        if not found_free:
+            return match_left
+
+        # DFS (iterative - chains can be thousands of flights deep) along the layers
+        next_edge = [0] * left_count
+        for root in range(left_count):
+            if match_left[root] != -1:
+                continue
+            stack, path = [root], []
+            while stack:
+                u = stack[-1]
+                edges = adjacency[u]
+                descended = False
+                while next_edge[u] < len(edges):
+                    v = edges[next_edge[u]]
+                    next_edge[u] += 1
+                    w = match_right[v]
+                    if w == -1:
+                        path.append(v)
+                        for left, right in zip(stack, path):
+                            match_left[left] = right
+                            match_right[right] = left
+                        stack = []
+                        descended = True
+                        break
+                    if dist[w] == dist[u] + 1:
+                        path.append(v)
+                        stack.append(w)
+                        descended = True
+                        break
+                if not descended:
+                    dist[u] = unreached
+                    stack.pop()
+                    if path:
+                        path.pop()
+
+
+def size_fits(flight, plane):
+    """The plane is the flight's size class (if it has one) and big enough for a long flight."""
+    if flight.get('size') and plane['size'] != flight['size']:
+        return False
+    return not flight['long_flight'] or plane['size'] == 'large'
+
+
+def _can_share_plane(a, b, airplanes):
+    """
+    Flights pinned to different planes, of different size classes, or a long flight and one
+    pinned to a small plane, can't share a rotation.
+    """
+    if a.get('size') and b.get('size') and a['size'] != b['size']:
+        return False
+    pin = a.get('airplane_id') or b.get('airplane_id')
+    if not pin:
+        return True
+    if a.get('airplane_id') and b.get('airplane_id') and a['airplane_id'] != b['airplane_id']:
+        return False
+    if a['long_flight'] or b['long_flight']:
+        return pin in airplanes and airplanes[pin]['size'] == 'large'
+    return True
+
+
+def build_chains(flights, airplanes, turnaround_minutes=0, max_ground_minutes=MAX_GROUND_MINUTES,
+                 preferred_next=None):
+    """
+    Splits flights into the fewest location/time-continuous rotations.
+    flights must be sorted by departure. Returns lists of indices into flights.
+    preferred_next (index -> index) seeds the matching so a re-plan keeps existing links where it can.
+    """
+    departures = defaultdict(list)
+    for idx, flight in enumerate(flights):
+        departures[flight['origin']].append((flight['departure'], idx))
+
+    turnaround = timedelta(minutes=turnaround_minutes)
+    max_ground = timedelta(minutes=max_ground_minutes)
+    adjacency = []
+    for flight in flights:
+        options = departures.get(flight['dest'], [])
+        lo = bisect_left(options, (flight['arrival'] + turnaround, -1))
+        hi = bisect_right(options, (flight['arrival'] + max_ground, len(flights)))
+        successors = [j for _, j in options[lo:hi] if _can_share_plane(flight, flights[j], airplanes)]
+        # Same-length legs first, so short rotations don't drag a big plane along for one long leg
+        successors.sort(key=lambda j: flights[j]['long_flight'] != flight['long_flight'])
+        adjacency.append(successors)
+    _link_pinned_legs(flights, adjacency)
+
+    # Warm start: keep previous links, then greedy (earliest onward leg); Hopcroft-Karp only has to fix it up
+    match_left = [-1] * len(flights)
+    taken = set()
+    for u, v in (preferred_next or {}).items():
+        if v not in taken and v in adjacency[u]:
+            match_left[u] = v
+            taken.add(v)
+    for u, successors in enumerate(adjacency):
+        if match_left[u] != -1:
+            continue
+        for v in successors:
+            if v not in taken:
+                match_left[u] = v
+                taken.add(v)
+                break
+    match_left = hopcroft_karp(adjacency, len(flights), match_left)
+
+    has_predecessor = set(v for v in match_left if v != -1)
+    chains = []
+    for head in range(len(flights)):
+        if head in has_predecessor:
+            continue
+        chain, u = [], head
+        while u != -1:
+            chain.append(u)
+            u = match_left[u]
+        chains.extend(_split_by_pins(chain, flights))
+    return chains
+
+
+def _link_pinned_legs(flights, adjacency):
+    """
+    Consecutive pinned legs of one plane are linked directly, so the matching can't route
+    them into two rotations (one of which would then have no plane). Legs that don't connect
+    are left alone - the schedule is already broken there.
+    """
+    pinned = defaultdict(list)
+    for idx, flight in enumerate(flights):
+        if flight.get('airplane_id'):
+            pinned[flight['airplane_id']].append(idx)
+    forced = {}
+    for legs in pinned.values():
+        for u, v in zip(legs, legs[1:]):
+            if v in adjacency[u]:
+                forced[u] = v
+    if not forced:
+        return
+    targets = set(forced.values())
+    for u in range(len(adjacency)):
+        adjacency[u] = [forced[u]] if u in forced else [v for v in adjacency[u] if v not in targets]
+
+
+def _split_by_pins(chain, flights):
+    """Cuts a rotation wherever it would need two different pinned planes."""
+    pieces, current, pinned = [], [], None
+    for idx in chain:
+        airplane_id = flights[idx].get('airplane_id')
+        if airplane_id:
+            if pinned and airplane_id != pinned:
+                pieces.append(current)
+                current = []
+            pinned = airplane_id
+        current.append(idx)
+    pieces.append(current)
+    return pieces
+
+
+def _plane_can_take(plane, chain, flights, turnaround):
+    first = flights[chain[0]]
+    if plane['location'] != first['origin']:
+        return False
+    if plane.get('free_from') and plane['free_from'] + turnaround > first['departure']:
+        return False
+    return True
+
+
+def assign_chains(chains, flights, airplanes, turnaround_minutes=0, preferred_planes=None):
+    """
+    Matches rotations to planes. Pinned rotations go first, then ones with a long flight
+    (big planes only), then the rest - small planes preferred. Returns (chain -> plane, unmatched chains).
+    preferred_planes (chain -> plane) seeds the matching so a re-plan keeps tails where it can.
+    """
+    turnaround = timedelta(minutes=turnaround_minutes)
+    plane_ids = sorted(airplanes, key=lambda p: (airplanes[p]['size'] == 'large', p))
+    free_planes = set(plane_ids)
+
+    def pinned_plane(chain):
+        return next((flights[i]['airplane_id'] for i in chain if flights[i].get('airplane_id')), None)
+
+    def needs_large(chain):
+        return any(flights[i]['long_flight'] for i in chain)
+
+    def plane_fits(p, chain):
+        return all(size_fits(flights[i], airplanes[p]) for i in chain)
+
+    pinned, long_haul, rest = [], [], []
+    for c, chain in enumerate(chains):
+        if pinned_plane(chain):
+            pinned.append(c)
+        elif needs_large(chain):
+            long_haul.append(c)
+        else:
+            rest.append(c)
+
+    matched = {}
+    for group in (pinned, long_haul, rest):
+        if not group:
+            continue
+        candidates = [p for p in plane_ids if p in free_planes]
+        right_index = {p: i for i, p in enumerate(candidates)}
+        adjacency = []
+        for c in group:
+            chain = chains[c]
+            want = pinned_plane(chain)
+            adjacency.append([
+                right_index[p] for p in candidates
+                if (not want or p == want)
+                and plane_fits(p, chain)
+                and _plane_can_take(airplanes[p], chain, flights, turnaround)
+            ])
+        seed, used = [], set()
+        for c, options in zip(group, adjacency):
+            right = right_index.get((preferred_planes or {}).get(c), -1)
+            seed.append(right if right in options and right not in used else -1)
+            used.add(seed[-1])
+        match_left = hopcroft_karp(adjacency, len(candidates), seed)
+        for c, right in zip(group, match_left):
+            if right != -1:
+                matched[c] = candidates[right]
+                free_planes.discard(candidates[right])
+
+    unmatched = [c for c in range(len(chains)) if c not in matched]
+    return matched, unmatched
+
+
+def plan_rotations(flights, airplanes, turnaround_minutes=0, max_ground_minutes=MAX_GROUND_MINUTES,
+                   previous_assignments=None):
+    """
+    Full tail assignment for a window.
+
+    flights: dicts with flight_id, departure, arrival, origin, dest, long_flight, an
+             optional size ('large'/'small') it must keep and an optional airplane_id that
+             pins the flight to its current plane
+    airplanes: {id: {'size': 'large'|'small', 'location': airport, 'free_from': datetime or None}}
+    previous_assignments: {flight_id: airplane_id} from an earlier plan - kept where still valid
+    Returns {'assignments': {flight_id: airplane_id}, 'unassigned': [...], 'rotations': n}.
+    """
+    pending = sorted(flights, key=lambda f: (f['departure'], f['flight_id']))
+    previous_assignments = previous_assignments or {}
+    free_planes = dict(airplanes)
+    assignments = {}
+    unassigned = []
+    rotations = 0
+
+    # A rotation nobody can start is dropped one leg at a time (its first leg is the one with
+    # no plane), and whatever is left gets another go with the planes that are still free
+    while pending:
+        # Consecutive legs that shared a plane before are the links we'd like to keep
+        preferred_next, last_leg = {}, {}
+        for idx, flight in enumerate(pending):
+            airplane_id = previous_assignments.get(flight['flight_id'])
+            if airplane_id:
+                if airplane_id in last_leg:
+                    preferred_next[last_leg[airplane_id]] = idx
+                last_leg[airplane_id] = idx
+
+        chains = build_chains(pending, airplanes, turnaround_minutes, max_ground_minutes, preferred_next)
+        preferred_planes = {c: previous_assignments.get(pending[chain[0]]['flight_id'])
+                            for c, chain in enumerate(chains)}
+        matched, unmatched = assign_chains(chains, pending, free_planes, turnaround_minutes, preferred_planes)
+
+        for c, airplane_id in matched.items():
+            free_planes.pop(airplane_id)
+            for idx in chains[c]:
+                assignments[pending[idx]['flight_id']] = airplane_id
+        rotations += len(matched)
+
+        leftover = []
+        for c in unmatched:
+            first = pending[chains[c][0]]
+            unassigned.append({
+                'flight_id': first['flight_id'],
+                'departure': first['departure'],
+                'error': f"no {'large ' if first['long_flight'] else ''}aircraft free at {first['origin']} "
+                         f"by {first['departure']:%Y-%m-%d %H:%M}",
+            })
+            leftover.extend(pending[i] for i in chains[c][1:])
+        if not free_planes:
+            unassigned.extend({'flight_id': f['flight_id'], 'departure': f['departure'],
+                               'error': 'no aircraft left'} for f in leftover)
+            break
+        pending = sorted(leftover, key=lambda f: (f['departure'], f['flight_id']))
+
+    return {'assignments': assignments, 'unassigned': unassigned, 'rotations': rotations}
+
+
+class RotationPlan:
+    """
+    A solved window kept in memory as one timeline per plane, so adding or cancelling
+    a flight only touches the planes involved (falling back to re-solving from that point on).
+    """
+
+    def __init__(self, airplanes, turnaround_minutes=0, max_ground_minutes=MAX_GROUND_MINUTES):
+        self.airplanes = airplanes
+        self.turnaround_minutes = turnaround_minutes
+        self.max_ground_minutes = max_ground_minutes
+        self.flights = {}
+        self.assignments = {}
+        self.unassigned = []
+        self.timelines = {p: self._fresh_timeline(state) for p, state in airplanes.items()}
+
+    @staticmethod
+    def _fresh_timeline(state):
+        timeline = ResourceTimeline(state['location'])
+        if state.get('free_from'):
+            # Still flying in when the window opens - block it until it lands
+            timeline.add(datetime.min, state['free_from'], state['location'], state['location'], None)
+        return timeline
+
+    def _book(self, flight, airplane_id):
+        self.assignments[flight['flight_id']] = airplane_id
+        self.timelines[airplane_id].add(flight['departure'], flight['arrival'],
+                                        flight['origin'], flight['dest'], flight['flight_id'])
+
+    def solve(self, flights):
+        """Plans the whole window from scratch."""
+        for flight in flights:
+            self.flights[flight['flight_id']] = flight
+        result = plan_rotations(list(self.flights.values()), self.airplanes,
+                                self.turnaround_minutes, self.max_ground_minutes)
+        self.assignments = {}
+        self.timelines = {p: self._fresh_timeline(state) for p, state in self.airplanes.items()}
+        for flight_id, airplane_id in result['assignments'].items():
+            self._book(self.flights[flight_id], airplane_id)
+        self.unassigned = result['unassigned']
+        return result
+
+    def load(self, flights, assignments):
+        """Takes an existing schedule as-is (e.g. from the DB) instead of solving it."""
+        for flight in flights:
+            self.flights[flight['flight_id']] = flight
+            if assignments.get(flight['flight_id']) in self.timelines:
+                self._book(flight, assignments[flight['flight_id']])
+
+    def _fits(self, airplane_id, flight):
+        if not size_fits(flight, self.airplanes[airplane_id]):
+            return False
+        return self.timelines[airplane_id].can_fly(flight['departure'], flight['arrival'], flight['origin'],
+                                                  flight['dest'], self.turnaround_minutes)
+
+    def add_flight(self, flight):
+        """Slots a new flight into an existing rotation if one fits, otherwise re-solves from its departure."""
+        self.flights[flight['flight_id']] = flight
+        candidates = [flight['airplane_id']] if flight.get('airplane_id') else \
+            sorted(self.airplanes, key=lambda p: (self.airplanes[p]['size'] == 'large', p))
+        for airplane_id in candidates:
+            if self._fits(airplane_id, flight):
+                self._book(flight, airplane_id)
+                return {flight['flight_id']: airplane_id}
+        return self.replan_from(flight['departure'])
+
+    def cancel_flight(self, flight_id):
+        """Drops a flight. If its plane's later legs no longer connect, tries a tail swap, then a re-solve."""
+        flight = self.flights.pop(flight_id, None)
+        airplane_id = self.assignments.pop(flight_id, None)
+        self.unassigned = [u for u in self.unassigned if u['flight_id'] != flight_id]
+        if not flight or not airplane_id:
+            return {}
+        timeline = self.timelines[airplane_id]
+        timeline.remove(flight_id)
+
+        next_origin = timeline.next_origin_after(flight['departure'])
+        if next_origin is None or next_origin == timeline.location_at(flight['departure']):
+            return {}
+        changes = self._swap_tails(airplane_id, flight['departure'])
+        if changes is not None:
+            return changes
+        return self.replan_from(flight['departure'])
+
+    def _suffix(self, airplane_id, at):
+        segments = self.timelines[airplane_id].segments
+        return segments[bisect_left(segments, (at,)):]
+
+    def _suffix_movable(self, suffix, to_airplane):
+        for segment in suffix:
+            flight = self.flights[segment[4]]
+            if flight.get('airplane_id'):
+                return False
+            if not size_fits(flight, self.airplanes[to_airplane]):
+                return False
+        return True
+
+    def _swap_tails(self, airplane_id, at):
+        """Finds another plane whose remaining legs line up with ours and swaps from `at` onwards."""
+        turnaround = timedelta(minutes=self.turnaround_minutes)
+        ours = self._suffix(airplane_id, at)
+        our_before = self.timelines[airplane_id].segments[:len(self.timelines[airplane_id].segments) - len(ours)]
+        our_location = our_before[-1][3] if our_before else self.timelines[airplane_id].home_location
+        our_free = our_before[-1][1] if our_before else datetime.min
+
+        for other_id, other_timeline in self.timelines.items():
+            if other_id == airplane_id:
+                continue
+            theirs = self._suffix(other_id, at)
+            before = other_timeline.segments[:len(other_timeline.segments) - len(theirs)]
+            other_location = before[-1][3] if before else other_timeline.home_location
+            other_free = before[-1][1] if before else datetime.min
+
+            if ours and (other_location != ours[0][2] or other_free + turnaround > ours[0][0]):
+                continue
+            if theirs and (theirs[0][2] != our_location or our_free + turnaround > theirs[0][0]):
+                continue
+            if not (self._suffix_movable(ours, other_id) and self._suffix_movable(theirs, airplane_id)):
+                continue
+
+            changes = {}
+            for segment in ours:
+                self.timelines[airplane_id].remove(segment[4])
+            for segment in theirs:
+                other_timeline.remove(segment[4])
+            for segment in ours:
+                self._book(self.flights[segment[4]], other_id)
+                changes[segment[4]] = other_id
+            for segment in theirs:
+                self._book(self.flights[segment[4]], airplane_id)
+                changes[segment[4]] = airplane_id
+            return changes
+        return None
+
+    def replan_from(self, at):
+        """Re-solves every flight departing at/after `at` (and anything still unassigned); earlier legs stay put."""
+        at = min([at] + [u['departure'] for u in self.unassigned if u['flight_id'] in self.flights])
+        later = [f for f in self.flights.values() if f['departure'] >= at]
+        later_ids = {f['flight_id'] for f in later}
+
+        states = {}
+        for airplane_id, timeline in self.timelines.items():
+            earlier = [s for s in timeline.segments if s[4] not in later_ids]
+            if earlier:
+                states[airplane_id] = dict(self.airplanes[airplane_id],
+                                           location=earlier[-1][3], free_from=earlier[-1][1])
+            else:
+                states[airplane_id] = dict(self.airplanes[airplane_id])
+            timeline.segments = earlier
+
+        before = {f['flight_id']: self.assignments.pop(f['flight_id'], None) for f in later}
+        result = plan_rotations(later, states, self.turnaround_minutes, self.max_ground_minutes, before)
+        for flight_id, airplane_id in result['assignments'].items():
+            self._book(self.flights[flight_id], airplane_id)
+
+        unassigned_ids = {u['flight_id'] for u in result['unassigned']}
+        self.unassigned = [u for u in self.unassigned if u['flight_id'] not in later_ids] + result['unassigned']
+        return {flight_id: self.assignments.get(flight_id) for flight_id, old in before.items()
+                if self.assignments.get(flight_id) != old or flight_id in unassigned_ids}
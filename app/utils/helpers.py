@@ -4,9 +4,9 @@ import random
 import string
 
 
-def hash_password(password):
-    """Securely hashes a password using bcrypt."""
-    salt = bcrypt.gensalt(rounds=12)
+def hash_password(password, rounds=12):
+    """Securely hashes a password using bcrypt (each extra round doubles the work)."""
+    salt = bcrypt.gensalt(rounds=rounds)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
@@ -19,6 +19,14 @@ def check_password(password, password_hash):
         return False
 
 
+def password_cost(password_hash):
+    """The bcrypt cost (rounds) a hash was made with, or None if it isn't a bcrypt hash."""
+    parts = (password_hash or '').split('$')  # $2b$12$<salt+hash>
+    if len(parts) == 4 and parts[1] in ('2a', '2b', '2y') and parts[2].isdigit():
+        return int(parts[2])
+    return None
+
+
 def generate_booking_code(length=8):
     """Generates a random booking code (avoids confusing characters like 0/O, 1/I)."""
     chars = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'  # no confusing chars (0,O,I,1)
@@ -0,0 +1,174 @@
+"""HTTP conditional caching for pages that only change when their data does.
+
+Flight details and the seat picker depend on one flight, the home page and search form on
+the airport list. Each of those has a version in CacheVersions (a 'scope', see
+app/repositories/cache_version_repository.py): flight_changed() bumps a flight's on every
+booking, cancellation, status change or edit, and `flask --app run bump-reference-version`
+bumps the reference data's. A page's ETag is built from its version, so a conditional GET
+only costs one primary-key lookup (on the primary, so replica lag can't hide a change)
+and gets a 304 without the page's own queries.
+
+Anonymous visitors with an empty session get `public, s-maxage=...` so a reverse proxy can
+answer for a few seconds (flight pages) or minutes (reference pages) without asking us;
+browsers always revalidate. Logged-in and mid-checkout pages are `private, no-cache`.
+"""
+import hashlib
+import os
+from datetime import date, datetime, time, timezone
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from flask import current_app, has_app_context, make_response, request, session
+from werkzeug.http import is_resource_modified
+
+from app import db
+from app.repositories import cache_version_repository
+
+
+REFERENCE = 'reference'
+DEFAULT_FLIGHT_SECONDS = 10
+DEFAULT_REFERENCE_SECONDS = 300
+
+_settings = {'enabled': False, 'build': ''}
+
+
+def flight_scope(flight_id):
+    return f'flight:{flight_id}'
+
+
+def bump(*scopes):
+    """
+    New versions for these scopes, so every cached page built from them is refetched.
+    Call it after the change is committed (or inside its transaction). Best-effort like the
+    report facts: if it fails the pages stay cached until the next change or midnight.
+    """
+    scopes = sorted(set(scopes))
+    if not scopes:
+        return False
+    try:
+        with db.transaction():
+            cache_version_repository.bump_versions(scopes)
+    except Exception as err:
+        if has_app_context():
+            current_app.logger.warning(f"Page versions not bumped for {', '.join(scopes)}: {err}")
+        return False
+    return True
+
+
+def flight_changed(*flight_ids):
+    return bump(*[flight_scope(flight_id) for flight_id in flight_ids if flight_id])
+
+
+def reference_changed():
+    return bump(REFERENCE)
+
+
+def _cacheable():
+    # A pending flash message is part of the page and gets used up by showing it
+    return _settings['enabled'] and request.method in ('GET', 'HEAD') and '_flashes' not in session
+
+
+def _validators(scope):
+    """(etag, last_modified) for a page built from this scope - one query."""
+    row = cache_version_repository.get_version(scope)
+    parts = [f"{scope}={row['Version'] if row else 0}"]
+    # The same data still renders differently for another viewer (nav bar, manager view),
+    # another query string, another day (the date pickers start at today) or another release
+    today = date.today()
+    parts += [str(session.get('user_id', '')), session.get('role', ''), request.full_path,
+              today.isoformat(), _settings['build']]
+    etag = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:20]
+
+    changed = [datetime.combine(today, time()).astimezone(timezone.utc)]
+    if row and row['UpdatedAt']:
+        changed.append(row['UpdatedAt'].replace(tzinfo=timezone.utc))
+    return etag, max(changed)
+
+
+def _set_headers(response, etag, last_modified, shared_seconds):
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    if session:
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    else:
+        response.cache_control.public = True
+        response.cache_control.max_age = 0
+        response.cache_control.s_maxage = shared_seconds
+    response.vary.add('Cookie')
+    return response
+
+
+def _begin(scope, shared_seconds):
+    """(validators or None, 304 response or None) before the view runs."""
+    if not _cacheable():
+        return None, None
+    try:
+        validators = _validators(scope)
+    except Exception as err:
+        # No versions (DB trouble, migration not run yet) - just build the page
+        current_app.logger.warning(f"Page version not loaded for {scope}: {err}")
+        return None, None
+    if is_resource_modified(request.environ, etag=validators[0], last_modified=validators[1]):
+        return validators, None
+    return validators, _set_headers(current_app.response_class(status=304), *validators, shared_seconds)
+
+
+def _finish(rv, validators, shared_seconds):
+    response = make_response(rv)
+    if validators is not None and response.status_code == 200:
+        _set_headers(response, *validators, shared_seconds)
+    return response
+
+
+def _versioned(f, scope_for, shared_seconds_key, default_seconds):
+    """Wraps a view whose page only changes with the scope scope_for(**view_args) returns."""
+    def begin(kwargs):
+        shared_seconds = current_app.config.get(shared_seconds_key, default_seconds)
+        validators, not_modified = _begin(scope_for(**kwargs), shared_seconds)
+        return validators, not_modified, shared_seconds
+
+    if iscoroutinefunction(f):
+        # Flask only awaits views it can see are coroutine functions, so the wrapper has to be one
+        @wraps(f)
+        async def async_decorated_function(*args, **kwargs):
+            validators, not_modified, shared_seconds = begin(kwargs)
+            if not_modified is not None:
+                return not_modified
+            return _finish(await f(*args, **kwargs), validators, shared_seconds)
+        return async_decorated_function
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        validators, not_modified, shared_seconds = begin(kwargs)
+        if not_modified is not None:
+            return not_modified
+        return _finish(f(*args, **kwargs), validators, shared_seconds)
+    return decorated_function
+
+
+def flight_page(f):
+    """For /flights/<flight_id> views: cached until that flight changes."""
+    return _versioned(f, lambda flight_id, **_: flight_scope(flight_id),
+                      'HTTP_CACHE_FLIGHT_SECONDS', DEFAULT_FLIGHT_SECONDS)
+
+
+def reference_page(f):
+    """For pages built from the airport list: cached until the reference data changes."""
+    return _versioned(f, lambda **_: REFERENCE, 'HTTP_CACHE_REFERENCE_SECONDS', DEFAULT_REFERENCE_SECONDS)
+
+
+def _template_stamp(app):
+    """Newest template mtime - a deploy that changes a template changes every ETag."""
+    folder = os.path.join(app.root_path, app.template_folder or 'templates')
+    newest = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            newest = max(newest, os.path.getmtime(os.path.join(root, name)))
+    return str(int(newest))
+
+
+def init_app(app):
+    """Turns conditional caching on (HTTP_CACHE_ENABLED) and picks the release part of the ETags."""
+    _settings['enabled'] = app.config.get('HTTP_CACHE_ENABLED', True)
+    _settings['build'] = app.config.get('HTTP_CACHE_BUILD') or _template_stamp(app)
@@ -0,0 +1,133 @@
+"""Prometheus metrics for the app.
+
+Request latency per endpoint, DB pool waits and usage, booking outcomes and cache
+hit/miss counts, served in Prometheus text format at /metrics. Under gunicorn every
+worker writes its numbers to files in PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py sets it
+up) and a scrape adds them all up, so it doesn't matter which worker answers.
+Without prometheus_client installed the recording functions do nothing.
+"""
+import hmac
+import os
+import time
+
+from flask import g, request
+
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+                                   generate_latest, multiprocess, REGISTRY)
+except ImportError:
+    CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+    Counter = None
+
+
+SKIPPED_ENDPOINTS = ('static', 'metrics_endpoint')
+
+_enabled = False
+_token = ''
+
+if Counter is not None:
+    REQUEST_SECONDS = Histogram(
+        'flytau_request_duration_seconds', 'Time to serve a request, by Flask endpoint',
+        ['endpoint', 'method'],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+    REQUESTS = Counter('flytau_requests', 'Requests served, by endpoint and status', ['endpoint', 'method', 'status'])
+    POOL_WAIT_SECONDS = Histogram(
+        'flytau_db_pool_wait_seconds', 'Time a request waited to check out a DB connection', ['pool'],
+        buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10))
+    POOL_TIMEOUTS = Counter('flytau_db_pool_timeouts', 'Checkouts that gave up waiting for a connection', ['pool'])
+    # livesum: added up over the workers that are still running
+    POOL_IN_USE = Gauge('flytau_db_pool_in_use', 'DB connections checked out', ['pool'], multiprocess_mode='livesum')
+    POOL_OPEN = Gauge('flytau_db_pool_open', 'DB connections open', ['pool'], multiprocess_mode='livesum')
+    BOOKINGS = Counter('flytau_bookings', 'Booking attempts by outcome (confirmed, seat_taken, failed)', ['outcome'])
+    PASSWORD_REJECTED = Counter('flytau_password_pool_rejected', 'Logins/registrations turned away by the bcrypt pool')
+    CACHE_LOOKUPS = Counter('flytau_cache_lookups', 'Cache lookups by cache and result (hit, miss)', ['cache', 'result'])
+
+
+def available():
+    return Counter is not None
+
+
+def pool_checkout(pool, wait_seconds, stats):
+    """A connection was checked out after waiting `wait_seconds`; stats is pool.stats()."""
+    if _enabled:
+        POOL_WAIT_SECONDS.labels(pool).observe(wait_seconds)
+        pool_state(pool, stats)
+
+
+def pool_state(pool, stats):
+    if _enabled:
+        POOL_IN_USE.labels(pool).set(stats['checked_out'])
+        POOL_OPEN.labels(pool).set(stats['open'])
+
+
+def pool_timeout(pool):
+    if _enabled:
+        POOL_TIMEOUTS.labels(pool).inc()
+
+
+def booking(outcome):
+    if _enabled:
+        BOOKINGS.labels(outcome).inc()
+
+
+def password_rejected():
+    if _enabled:
+        PASSWORD_REJECTED.inc()
+
+
+def cache_lookup(cache, hit):
+    if _enabled:
+        CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def scrape_allowed():
+    """
+    With METRICS_TOKEN set a scrape needs `Authorization: Bearer <token>`. Without one only
+    a direct local connection gets in - not requests that came through the nginx proxy.
+    """
+    if _token:
+        header = request.headers.get('Authorization', '')
+        return hmac.compare_digest(header.encode(), f'Bearer {_token}'.encode())
+    return request.remote_addr in ('127.0.0.1', '::1') and 'X-Forwarded-For' not in request.headers
+
+
+def render():
+    """(body, content type) for a scrape - every worker's numbers when running multiprocess."""
+    if not available():
+        return '# prometheus_client is not installed\n', CONTENT_TYPE_LATEST
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def init_app(app):
+    """Times every request once METRICS_ENABLED is on and prometheus_client is around."""
+    global _enabled, _token
+    _token = app.config.get('METRICS_TOKEN', '')
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    if not available():
+        app.logger.warning("prometheus_client isn't installed - /metrics is empty")
+        return
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+    _enabled = True
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is None or request.endpoint in SKIPPED_ENDPOINTS:
+            return response
+        # Unmatched URLs share one label so random 404s can't create new series
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_SECONDS.labels(endpoint, request.method).observe(time.perf_counter() - started)
+        REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+        return response
@@ -0,0 +1,103 @@
+"""Runs bcrypt hashing and checks in a small bounded thread pool.
+
+bcrypt is slow on purpose (~250 ms at cost 12) and releases the GIL while it works, so a
+thread pool gets real parallelism. The pool is what keeps a burst of logins from eating
+every CPU and request thread that bookings need: at most `workers` hashes run at once per
+web worker, `queue_size` more may wait, and past that a login waits up to
+`admission_timeout` seconds for a slot before it's turned away with PasswordPoolBusy.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils import metrics
+from app.utils.helpers import check_password, hash_password, password_cost
+
+
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_ADMISSION_TIMEOUT = 2  # seconds a login waits for a free slot
+DEFAULT_ROUNDS = 12
+
+
+class PasswordPoolBusy(Exception):
+    """Too many password hashes in flight - the user should try again in a moment."""
+
+
+class PasswordPool:
+    """Bounded ThreadPoolExecutor for bcrypt, with admission control in front of it."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE,
+                 admission_timeout=DEFAULT_ADMISSION_TIMEOUT, rounds=DEFAULT_ROUNDS):
+        self._executor = None
+        self._lock = threading.Lock()
+        self.configure(workers, queue_size, admission_timeout, rounds)
+
+    def configure(self, workers, queue_size, admission_timeout, rounds):
+        self.shutdown()
+        self.workers = workers
+        self.queue_size = queue_size
+        self.admission_timeout = admission_timeout
+        self.rounds = rounds
+        # Running + waiting hashes allowed in this web worker
+        self._slots = threading.BoundedSemaphore(max(workers + queue_size, 1))
+
+    @property
+    def enabled(self):
+        return self.workers > 0
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+            return self._executor
+
+    def _reset_after_fork(self):
+        # The parent's pool threads don't exist in a forked child - it starts its own on demand
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(self.workers + self.queue_size, 1))
+
+    def _run(self, fn, *args):
+        slots = self._slots
+        if not slots.acquire(timeout=self.admission_timeout):
+            metrics.password_rejected()
+            raise PasswordPoolBusy("Too many sign-ins at once")
+        try:
+            if not self.enabled:
+                return fn(*args)
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            slots.release()
+
+    def hash(self, password):
+        """bcrypt hash at the configured cost."""
+        return self._run(hash_password, password, self.rounds)
+
+    def verify(self, password, password_hash):
+        return self._run(check_password, password, password_hash)
+
+    def needs_rehash(self, password_hash):
+        """True when a stored hash was made with a different cost than the configured one."""
+        cost = password_cost(password_hash)
+        return cost is not None and cost != self.rounds
+
+
+password_pool = PasswordPool()
+os.register_at_fork(after_in_child=password_pool._reset_after_fork)
+
+
+def init_app(app):
+    """Sizes the pool and sets the bcrypt cost from config (0 workers hashes inline, still bounded)."""
+    password_pool.configure(
+        app.config.get('PASSWORD_HASH_WORKERS', DEFAULT_WORKERS),
+        app.config.get('PASSWORD_HASH_QUEUE_SIZE', DEFAULT_QUEUE_SIZE),
+        app.config.get('PASSWORD_HASH_ADMISSION_TIMEOUT', DEFAULT_ADMISSION_TIMEOUT),
+        app.config.get('BCRYPT_ROUNDS', DEFAULT_ROUNDS),
+    )
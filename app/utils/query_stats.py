@@ -0,0 +1,130 @@
+"""Per-request SQL instrumentation.
+
+app/db.py reports every statement it runs here. For each request we keep the query count,
+total DB time and the slowest statements, and group statements by shape (the SQL with
+its literals and parameter lists collapsed) so a loop issuing the same query per row -
+an N+1 - stands out. The numbers go out in a Server-Timing header (managers, or in debug)
+and the last few requests are kept per worker for the manager query panel.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from flask import g, has_app_context, request, session
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_QUERY_MS = 200
+DEFAULT_N_PLUS_ONE = 5  # same shape this many times in one request gets flagged
+DEFAULT_HISTORY = 50
+SLOWEST_KEPT = 5
+
+_WHITESPACE = re.compile(r'\s+')
+_STRINGS = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_VALUE_LISTS = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_ROW_LISTS = re.compile(r'(\(\?\+\))(?:\s*,\s*\(\?\+\))+')
+
+
+def statement_shape(sql):
+    """The SQL with literals and IN/VALUES lists collapsed - same shape, same query."""
+    shape = _WHITESPACE.sub(' ', sql).strip()
+    shape = _STRINGS.sub('?', shape)
+    shape = _NUMBERS.sub('?', shape)
+    shape = _VALUE_LISTS.sub('(?+)', shape).replace('%s', '?')
+    return _ROW_LISTS.sub(r'\1, ...', shape)
+
+
+class RequestQueries:
+    """What one request asked the database."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes = Counter()
+        self.slowest = []  # (ms, shape), longest first
+        self._lock = threading.Lock()  # async views record from several threads (app/utils/async_db.py)
+
+    def record(self, sql, elapsed_ms):
+        shape = statement_shape(sql)
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.shapes[shape] += 1
+            if len(self.slowest) < SLOWEST_KEPT or elapsed_ms > self.slowest[-1][0]:
+                self.slowest.append((elapsed_ms, shape))
+                self.slowest.sort(key=lambda item: item[0], reverse=True)
+                del self.slowest[SLOWEST_KEPT:]
+        return shape
+
+    def repeated(self, threshold):
+        """Shapes run at least `threshold` times - likely N+1 loops."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+_history = deque(maxlen=DEFAULT_HISTORY)
+_history_lock = threading.Lock()
+_settings = {'slow_ms': DEFAULT_SLOW_QUERY_MS, 'n_plus_one': DEFAULT_N_PLUS_ONE}
+
+
+def record(sql, started):
+    """Called by app/db.py after each statement with its perf_counter() start time."""
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    queries = g.get('queries') if has_app_context() else None
+    shape = queries.record(sql, elapsed_ms) if queries is not None else None
+    if elapsed_ms >= _settings['slow_ms']:
+        logger.warning("Slow query (%.0f ms): %s", elapsed_ms, shape or statement_shape(sql))
+
+
+def recent():
+    """Summaries of this worker's last requests, newest first."""
+    with _history_lock:
+        return list(reversed(_history))
+
+
+def _summary(queries, response):
+    return {
+        'at': time.strftime('%H:%M:%S'),
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'status': response.status_code,
+        'request_ms': (time.perf_counter() - queries.started) * 1000,
+        'count': queries.count,
+        'db_ms': queries.total_ms,
+        'slowest': queries.slowest,
+        'repeated': queries.repeated(_settings['n_plus_one']),
+    }
+
+
+def init_app(app):
+    """Starts a query log for each request and reports it when the response goes out."""
+    global _history
+    if not app.config.get('QUERY_STATS_ENABLED', True):
+        return
+    _settings['slow_ms'] = app.config.get('SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS)
+    _settings['n_plus_one'] = app.config.get('N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE)
+    _history = deque(maxlen=app.config.get('QUERY_STATS_HISTORY', DEFAULT_HISTORY))
+
+    @app.before_request
+    def start_query_log():
+        g.queries = RequestQueries()
+
+    @app.after_request
+    def report_queries(response):
+        queries = g.pop('queries', None)
+        if queries is None or request.endpoint in ('static', 'admin_query_stats'):
+            return response
+        summary = _summary(queries, response)
+        for shape, count in summary['repeated']:
+            logger.warning("Possible N+1 on %s: %d x %s", summary['path'], count, shape)
+        with _history_lock:
+            _history.append(summary)
+        # Timing details are for managers (and local debugging), not every visitor
+        if app.debug or session.get('role') == 'manager':
+            response.headers.add('Server-Timing', f'db;dur={summary["db_ms"]:.1f};desc="{summary["count"]} queries"')
+            response.headers.add('Server-Timing', f'app;dur={summary["request_ms"]:.1f}')
+        return response
@@ -0,0 +1,161 @@
+"""Result cache for the analytics reports.
+
+Each web worker keeps finished report results (rows, summary, chart URL) in a small LRU,
+keyed by report and parameters (filters, page). Entries go stale two ways:
+  - the data changed - every fact-table refresh calls invalidate(), which writes a new
+    token to a generation file that all gunicorn workers on the box read, and
+  - the TTL ran out, as a backstop for changes made behind the app's back.
+The generation file lives in a local directory, so invalidation is per host: with several
+app servers, the others only see a change once their TTL runs out (keep REPORT_CACHE_TTL
+as stale as a report may be, or point REPORT_CACHE_DIR at a shared mount).
+At startup a background thread fills the cache with the unfiltered reports.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from app.utils import metrics
+from app.utils.chart_pool import in_render_process
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300  # seconds
+DEFAULT_MAX_ITEMS = 128
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), 'flytau_reports')
+GENERATION_FILE = 'generation'
+
+
+def report_key(report_id, params):
+    """Stable key for a report run with these parameters."""
+    return report_id, json.dumps(params, sort_keys=True, default=str, separators=(',', ':'))
+
+
+class ReportCache:
+    """Per-worker LRU of report results, checked against a shared generation token."""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, ttl=DEFAULT_TTL, max_items=DEFAULT_MAX_ITEMS):
+        self.configure(directory, ttl, max_items)
+
+    def configure(self, directory, ttl, max_items):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_items = max_items
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_items > 0
+
+    def _generation_path(self):
+        return os.path.join(self.directory, GENERATION_FILE)
+
+    def generation(self):
+        """Current data generation - changes every time a report's inputs change."""
+        try:
+            with open(self._generation_path()) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return ''
+
+    def invalidate(self):
+        """Marks every cached report (in every worker) as stale."""
+        # A fresh random token rather than a counter, so two workers bumping at once can't
+        # both write the same value and leave an entry looking current
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.generation-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(uuid.uuid4().hex)
+            os.replace(tmp_path, self._generation_path())
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, report_id, params):
+        """Cached result or None if missing, expired or from an older generation."""
+        key = report_key(report_id, params)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        generation, expires_at, result = entry
+        if time.monotonic() >= expires_at or generation != self.generation():
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return result
+
+    def put(self, report_id, params, result, generation):
+        """Stores a result computed against `generation` (read before running the report)."""
+        key = report_key(report_id, params)
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, report_id, params, compute, refresh=False):
+        """
+        Cached result for the report, running compute() on a miss. refresh=True always
+        recomputes (the managers' "refresh now") and stores the fresh result.
+        """
+        if not self.enabled:
+            return compute()
+        if not refresh:
+            result = self.get(report_id, params)
+            metrics.cache_lookup('reports', result is not None)
+            if result is not None:
+                return result
+        # Read the generation first: if the data changes while we compute, the entry
+        # is already stale when it lands instead of serving old numbers until the TTL
+        generation = self.generation()
+        result = compute()
+        self.put(report_id, params, result, generation)
+        return result
+
+
+report_cache = ReportCache()
+
+
+def warm_up(app, reports):
+    """Runs the given report callables once in the background to fill the cache."""
+    def run():
+        # url_for (chart URLs) needs a request context, even a fake one
+        with app.app_context(), app.test_request_context():
+            for report in reports:
+                try:
+                    report()
+                except Exception as err:
+                    logger.warning("Report cache warm-up stopped: %s", err)
+                    return
+
+    thread = threading.Thread(target=run, name='report-cache-warm-up', daemon=True)
+    thread.start()
+    return thread
+
+
+def init_app(app):
+    """Sizes the cache from config and (unless REPORT_CACHE_WARM is off) pre-warms it."""
+    report_cache.configure(
+        app.config.get('REPORT_CACHE_DIR', DEFAULT_DIRECTORY),
+        app.config.get('REPORT_CACHE_TTL', DEFAULT_TTL),
+        app.config.get('REPORT_CACHE_MAX_ITEMS', DEFAULT_MAX_ITEMS),
+    )
+    if report_cache.enabled and app.config.get('REPORT_CACHE_WARM', True) and not in_render_process():
+        from app.services import report_service
+        page_size = app.config.get('REPORT_PAGE_SIZE', report_service.DEFAULT_PAGE_SIZE)
+        warm_up(app, report_service.default_reports(page_size))
@@ -0,0 +1,63 @@
+"""Turns report rows into CSV / JSON Lines chunks for the streaming exports."""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+# Rows per chunk handed to the response - big enough to avoid a write per row,
+# small enough that memory doesn't grow with the report
+CHUNK_ROWS = 200
+
+
+def _plain(value, column_type=None):
+    """Dates as ISO strings (YYYY-MM for month buckets) and decimals as numbers."""
+    if column_type == 'month' and isinstance(value, date):
+        return value.strftime('%Y-%m')
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _csv_chunks(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column['label'] for column in columns])
+    count = 0
+    for row in rows:
+        writer.writerow([_plain(row.get(column['key']), column.get('type')) for column in columns])
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _jsonl_chunks(columns, rows):
+    lines = []
+    for row in rows:
+        record = {column['key']: _plain(row.get(column['key']), column.get('type')) for column in columns}
+        lines.append(json.dumps(record, ensure_ascii=False))
+        if len(lines) == CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def export_chunks(file_format, columns, rows):
+    """Generator of text chunks for `rows` in the given format ('csv' or 'jsonl')."""
+    if file_format == 'csv':
+        return _csv_chunks(columns, rows)
+    if file_format == 'jsonl':
+        return _jsonl_chunks(columns, rows)
+    raise ValueError(f"Unknown export format '{file_format}'")
@@ -0,0 +1,74 @@
+"""In-memory timelines for planes and crew - lets us check conflicts without hitting the DB per flight."""
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+
+
+def to_datetime(departure_date, departure_hour):
+    """Combines a DB date + hour (str, timedelta or time) into a datetime."""
+    if isinstance(departure_date, str):
+        departure_date = datetime.strptime(departure_date, '%Y-%m-%d').date()
+
+    if hasattr(departure_hour, 'total_seconds'):
+        total_seconds = int(departure_hour.total_seconds())
+        hours, minutes = total_seconds // 3600, (total_seconds % 3600) // 60
+    elif isinstance(departure_hour, str) and departure_hour:
+        parts = departure_hour.split(':')
+        hours, minutes = int(parts[0]), int(parts[1]) if len(parts) > 1 else 0
+    elif departure_hour is not None and hasattr(departure_hour, 'hour'):
+        hours, minutes = departure_hour.hour, departure_hour.minute
+    else:
+        hours, minutes = 0, 0
+
+    return datetime.combine(departure_date, datetime.min.time().replace(hour=hours, minute=minutes))
+
+
+class ResourceTimeline:
+    """
+    The flights one plane or crew member is booked on, kept sorted by departure.
+    Each segment is (departure, arrival, origin, destination, flight_id).
+    """
+
+    def __init__(self, home_location):
+        self.home_location = home_location
+        self.segments = []
+
+    def add(self, departure, arrival, origin, destination, flight_id=None):
+        insort(self.segments, (departure, arrival, origin, destination, flight_id))
+
+    def remove(self, flight_id):
+        self.segments = [s for s in self.segments if s[4] != flight_id]
+
+    def is_free(self, departure, arrival):
+        """True if nothing overlaps [departure, arrival)."""
+        idx = bisect_left(self.segments, (arrival,))
+        if idx == 0:
+            return True
+        # Segments never overlap each other, so the one departing last before our
+        # arrival is also the one landing last - it's the only one worth checking
+        return self.segments[idx - 1][1] <= departure
+
+    def location_at(self, at_datetime):
+        """Where the resource is at a given time (destination of the last landed flight)."""
+        idx = bisect_right(self.segments, (at_datetime, datetime.max))
+        for seg in reversed(self.segments[:idx]):
+            if seg[1] <= at_datetime:
+                return seg[3]
+        return self.home_location
+
+    def next_origin_after(self, at_datetime):
+        """Origin of the next flight departing at/after the given time, or None."""
+        idx = bisect_left(self.segments, (at_datetime,))
+        if idx < len(self.segments):
+            return self.segments[idx][2]
+        return None
+
+    def can_fly(self, departure, arrival, origin, destination, turnaround_minutes=0):
+        """Free for the slot, sitting at the origin, and the next flight leaves from where we land."""
+        padded_departure = departure - timedelta(minutes=turnaround_minutes)
+        padded_arrival = arrival + timedelta(minutes=turnaround_minutes)
+        if not self.is_free(padded_departure, padded_arrival):
+            return False
+        if self.location_at(departure) != origin:
+            return False
+        next_origin = self.next_origin_after(arrival)
+        return next_origin is None or next_origin == destination
@@ -0,0 +1,202 @@
+"""Session storage: signed cookie when the session is small, the WebSessions table when it isn't.
+
+SESSION_BACKEND picks where session data lives:
+  - 'cookie': Flask's signed cookie, nothing stored on the server
+  - 'sql': always in WebSessions; the cookie only carries the (signed) session id
+  - 'hybrid' (default): in the cookie while it fits in SESSION_COOKIE_MAX_BYTES, moved to
+    WebSessions when it grows past that (the add-flight wizard) and back once it shrinks
+Stored sessions are only rewritten when they change - an unchanged one just gets its
+expiry pushed out once it's past half its lifetime - and expired rows are deleted in
+batches by a background thread (or `flask --app run prune-sessions`).
+"""
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask.sessions import SecureCookieSession, SecureCookieSessionInterface
+
+from app.repositories import session_repository
+from app.utils.chart_pool import in_render_process
+
+
+BACKENDS = ('cookie', 'sql', 'hybrid')
+DEFAULT_COOKIE_MAX_BYTES = 3000  # browsers drop cookies over ~4 KB, and the other cookie attributes count too
+DEFAULT_CLEANUP_SECONDS = 900
+DEFAULT_CLEANUP_BATCH = 500
+SID_KEY = '_sid'  # the only key in the cookie of a server-side session
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class HybridSession(SecureCookieSession):
+    """A session plus where it's stored: `sid` is its WebSessions row (None = cookie only)."""
+
+    def __init__(self, initial=None, sid=None, expires_at=None):
+        super().__init__(initial)
+        self.sid = sid
+        self.expires_at = expires_at
+        # Logging in (or out) gets a fresh session id - see save_session
+        self.loaded_user_id = dict.get(self, 'user_id')
+
+
+class HybridSessionInterface(SecureCookieSessionInterface):
+    session_class = HybridSession
+
+    def __init__(self, backend='hybrid', cookie_max_bytes=DEFAULT_COOKIE_MAX_BYTES):
+        if backend not in BACKENDS:
+            raise ValueError(f"SESSION_BACKEND must be one of {', '.join(BACKENDS)}, not '{backend}'")
+        self.backend = backend
+        self.cookie_max_bytes = cookie_max_bytes
+
+    def _permanent(self, app, session):
+        # SESSION_PERMANENT makes every session permanent without writing `_permanent` into each one
+        return session.permanent or app.config.get('SESSION_PERMANENT', True)
+
+    def get_expiration_time(self, app, session):
+        if self._permanent(app, session):
+            return datetime.now(timezone.utc) + app.permanent_session_lifetime
+        return None
+
+    def should_set_cookie(self, app, session):
+        return session.modified or (self._permanent(app, session) and app.config['SESSION_REFRESH_EACH_REQUEST'])
+
+    def open_session(self, app, request):
+        session = super().open_session(app, request)
+        if session is None:
+            return None
+        sid = dict.get(session, SID_KEY)
+        if sid is None:
+            return session
+        if self.backend == 'cookie':
+            return self.session_class()
+        try:
+            row = session_repository.get_session(sid, _utcnow())
+        except Exception as err:
+            app.logger.warning(f"Session {sid[:8]}... not loaded: {err}")
+            return self.session_class()
+        if row is None:
+            return self.session_class()  # expired or pruned
+        data = row['Data']
+        data = data if isinstance(data, str) else bytes(data).decode('utf-8')
+        return self.session_class(self.serializer.loads(data), sid=sid, expires_at=row['ExpiresAt'])
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified:
+                self._delete(app, session)
+                response.delete_cookie(name, domain=domain, path=path, secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+                response.vary.add('Cookie')
+            return
+
+        if session.modified:
+            value = self._store(app, session, dict(session))
+            if value is None:
+                return
+        else:
+            if session.sid is not None:
+                self._touch(app, session)
+            if not self.should_set_cookie(app, session):
+                return
+            value = self._cookie_value(app, {SID_KEY: session.sid} if session.sid else dict(session))
+
+        response.set_cookie(name, value, expires=self.get_expiration_time(app, session),
+                            httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                            secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app))
+        response.vary.add('Cookie')
+
+    def _cookie_value(self, app, data):
+        return self.get_signing_serializer(app).dumps(data)
+
+    def _store(self, app, session, data):
+        """Saves changed session data where it belongs; returns the cookie value."""
+        if session.sid is not None and dict.get(session, 'user_id') != session.loaded_user_id:
+            self._delete(app, session)
+        if self.backend != 'sql':
+            value = self._cookie_value(app, data)
+            if self.backend == 'cookie' or len(value) <= self.cookie_max_bytes:
+                self._delete(app, session)
+                return value
+
+        sid = session.sid or secrets.token_urlsafe(32)
+        expires_at = _utcnow() + app.permanent_session_lifetime
+        try:
+            session_repository.save_session(sid, self.serializer.dumps(data).encode('utf-8'), expires_at)
+        except Exception as err:
+            app.logger.error(f"Session not saved: {err}")
+            return None
+        session.sid, session.expires_at = sid, expires_at
+        return self._cookie_value(app, {SID_KEY: sid})
+
+    def _touch(self, app, session):
+        """Unchanged stored session: push its expiry out, but only once it's used up half its lifetime."""
+        lifetime = app.permanent_session_lifetime
+        if session.expires_at is not None and session.expires_at - _utcnow() > lifetime / 2:
+            return
+        expires_at = _utcnow() + lifetime
+        try:
+            session_repository.touch_session(session.sid, expires_at)
+            session.expires_at = expires_at
+        except Exception as err:
+            app.logger.warning(f"Session expiry not extended: {err}")
+
+    def _delete(self, app, session):
+        if session.sid is None:
+            return
+        try:
+            session_repository.delete_session(session.sid)
+        except Exception as err:
+            app.logger.warning(f"Old session row not deleted: {err}")
+        session.sid = session.expires_at = None
+
+
+def prune_expired(batch_size=DEFAULT_CLEANUP_BATCH):
+    """Deletes expired WebSessions rows a batch at a time. Needs an app context. Returns the count."""
+    deleted = 0
+    now = _utcnow()
+    while True:
+        count = session_repository.delete_expired_sessions(now, batch_size) or 0
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def _prune_forever(app, interval, batch_size):
+    while True:
+        time.sleep(interval)
+        try:
+            with app.app_context():
+                deleted = prune_expired(batch_size)
+            if deleted:
+                app.logger.info(f"Pruned {deleted} expired session(s)")
+        except Exception as err:
+            app.logger.warning(f"Expired sessions not pruned: {err}")
+
+
+_pruner = None
+
+
+def init_app(app):
+    """Installs the session interface and (for 'sql'/'hybrid') the expired-session pruner."""
+    global _pruner
+    backend = app.config.get('SESSION_BACKEND', 'hybrid')
+    app.session_interface = HybridSessionInterface(
+        backend, app.config.get('SESSION_COOKIE_MAX_BYTES', DEFAULT_COOKIE_MAX_BYTES))
+    interval = app.config.get('SESSION_CLEANUP_SECONDS', DEFAULT_CLEANUP_SECONDS)
+    if backend != 'cookie' and interval > 0 and _pruner is None and not in_render_process():
+        _pruner = threading.Thread(
+            target=_prune_forever,
+            args=(app, interval, app.config.get('SESSION_CLEANUP_BATCH', DEFAULT_CLEANUP_BATCH)),
+            name='session-pruner', daemon=True)
+        _pruner.start()
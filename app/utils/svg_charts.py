@@ -0,0 +1,312 @@
+"""Plain-Python SVG renderer for report charts - same charts as png_charts, no matplotlib.
+
+Each create_* function mirrors the one in charts.py and returns the SVG markup as a string.
+Text widths are estimated from character counts, which is close enough for axis labels.
+"""
+import math
+from typing import List, Dict
+from xml.sax.saxutils import escape, quoteattr
+from app.utils.charts import BRAND_COLORS, CHART_PALETTE
+
+
+FONT_FAMILY = 'Helvetica, Arial, sans-serif'
+CHAR_WIDTH = 0.6  # average glyph width as a fraction of the font size
+
+
+def _text_width(text, size):
+    return len(str(text)) * size * CHAR_WIDTH
+
+
+def _fmt(number):
+    """Trims the float noise so coordinates stay short."""
+    return f"{number:.1f}".rstrip('0').rstrip('.')
+
+
+def _text(x, y, text, size=9, color=None, anchor='middle', weight=None, rotate=None, baseline=None):
+    attrs = [f'x="{_fmt(x)}"', f'y="{_fmt(y)}"', f'font-size="{size}"',
+             f'fill="{color or BRAND_COLORS["gray"]}"', f'text-anchor="{anchor}"']
+    if weight:
+        attrs.append(f'font-weight="{weight}"')
+    if baseline:
+        attrs.append(f'dominant-baseline="{baseline}"')
+    if rotate:
+        attrs.append(f'transform="rotate({rotate} {_fmt(x)} {_fmt(y)})"')
+    return f"<text {' '.join(attrs)}>{escape(str(text))}</text>"
+
+
+def _rect(x, y, width, height, color):
+    return (f'<rect x="{_fmt(x)}" y="{_fmt(y)}" width="{_fmt(max(width, 0))}" '
+            f'height="{_fmt(max(height, 0))}" fill="{color}" stroke="white"/>')
+
+
+def _line(x1, y1, x2, y2, color=None, dashed=False, width=1):
+    dash = ' stroke-dasharray="4 3" stroke-opacity="0.6"' if dashed else ''
+    return (f'<line x1="{_fmt(x1)}" y1="{_fmt(y1)}" x2="{_fmt(x2)}" y2="{_fmt(y2)}" '
+            f'stroke="{color or BRAND_COLORS["light_gray"]}" stroke-width="{width}"{dash}/>')
+
+
+def _document(width, height, parts, title=None):
+    label = f" aria-label={quoteattr(title)}" if title else ''
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{_fmt(width)}" height="{_fmt(height)}" '
+            f'viewBox="0 0 {_fmt(width)} {_fmt(height)}" font-family="{FONT_FAMILY}" role="img"{label}>'
+            f'<rect width="100%" height="100%" fill="white"/>'
+            + ''.join(parts) + '</svg>')
+
+
+def _nice_ticks(max_value, count=5):
+    """Round tick values from 0 up to just past max_value (1-2-2.5-5 steps)."""
+    if max_value <= 0:
+        return [0, 1]
+    raw_step = max_value / count
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw_step)
+    steps = math.ceil(max_value / step - 1e-9)
+    return [i * step for i in range(steps + 1)]
+
+
+def _tick_label(value):
+    return f"{value:,.0f}" if value == int(value) else f"{value:,.1f}"
+
+
+def _legend(parts, names, colors, right, top):
+    """Swatches + names in a column in the top-right corner (matches matplotlib's upper right)."""
+    left = right - max(_text_width(name, 9) for name in names) - 18
+    for i, (name, color) in enumerate(zip(names, colors)):
+        y = top + i * 16
+        parts.append(_rect(left, y, 10, 10, color))
+        parts.append(_text(left + 14, y + 9, name, anchor='start'))
+
+
+def _title(parts, width, title):
+    if title:
+        parts.append(_text(width / 2, 24, title, size=12, color=BRAND_COLORS['primary'], weight='bold'))
+
+
+def _axis_labels(parts, plot, xlabel, ylabel, xlabel_y):
+    x0, y0, x1, y1 = plot
+    if xlabel:
+        parts.append(_text((x0 + x1) / 2, xlabel_y, xlabel, size=10))
+    if ylabel:
+        parts.append(_text(14, (y0 + y1) / 2, ylabel, size=10, rotate=-90, baseline='middle'))
+
+
+def _category_chart(categories, series, title=None, xlabel=None, ylabel=None,
+                    horizontal=False, stacked=False, value_format=None, legend=True,
+                    width=None, height=None, bar_span=0.8):
+    """
+    Shared layout for every bar chart. `series` is a list of (name, values, color);
+    value labels are only drawn when value_format is given (single-series bars).
+    """
+    categories = [str(c) for c in categories]
+    n = max(len(categories), 1)
+    if stacked:
+        totals = [sum(values[i] for _, values, _ in series) for i in range(len(categories))]
+    else:
+        totals = [v for _, values, _ in series for v in values]
+    max_value = max(totals, default=0)
+    # Leave room past the longest bar for its value label
+    ticks = _nice_ticks(max_value * (1.08 if value_format else 1.0))
+    top_value = ticks[-1]
+
+    parts = []
+    top = 40 if title else 16
+    if horizontal:
+        width = width or 800
+        height = height or max(400, 48 * n + top + 60)
+        left = 24 + max((_text_width(c, 9) for c in categories), default=0) + (18 if ylabel else 0)
+        plot = (left, top, width - 24, height - 44 - (16 if xlabel else 0))
+    else:
+        width = width or max(800, 96 * n)
+        height = height or 500
+        label_drop = max((_text_width(c, 9) for c in categories), default=0) * 0.72
+        left = 56 + (18 if ylabel else 0)
+        plot = (left, top, width - 24, height - 24 - label_drop - (18 if xlabel else 0))
+    x0, y0, x1, y1 = plot
+
+    _title(parts, width, title)
+
+    def scale(value):
+        span = (x1 - x0) if horizontal else (y1 - y0)
+        return max(value, 0) / top_value * span if top_value else 0
+
+    # Value axis ticks
+    for tick in ticks:
+        if horizontal:
+            x = x0 + scale(tick)
+            parts.append(_line(x, y1, x, y1 + 4))
+            parts.append(_text(x, y1 + 16, _tick_label(tick)))
+        else:
+            y = y1 - scale(tick)
+            parts.append(_line(x0 - 4, y, x0, y))
+            parts.append(_text(x0 - 7, y, _tick_label(tick), anchor='end', baseline='middle'))
+
+    slot = ((y1 - y0) if horizontal else (x1 - x0)) / n
+    lanes = 1 if stacked else len(series)
+    thickness = slot * bar_span / lanes
+
+    for i, category in enumerate(categories):
+        start = (y0 if horizontal else x0) + slot * i + slot * (1 - bar_span) / 2
+        base = 0
+        for lane, (_, values, color) in enumerate(series):
+            value = values[i] if i < len(values) else 0
+            offset = start + (0 if stacked else lane * thickness)
+            length = scale(value)
+            if horizontal:
+                parts.append(_rect(x0 + base, offset, length, thickness, color))
+                if value_format:
+                    parts.append(_text(x0 + base + length + 6, offset + thickness / 2, value_format.format(value),
+                                       anchor='start', baseline='middle'))
+            else:
+                parts.append(_rect(offset, y1 - base - length, thickness, length, color))
+                if value_format:
+                    parts.append(_text(offset + thickness / 2, y1 - base - length - 4, value_format.format(value)))
+            if stacked:
+                base += length
+
+        center = (y0 if horizontal else x0) + slot * (i + 0.5)
+        if horizontal:
+            parts.append(_text(x0 - 7, center, category, anchor='end', baseline='middle'))
+        else:
+            parts.append(_text(center, y1 + 14, category, anchor='end', rotate=-45))
+
+    # Left and bottom spines only, like _apply_brand_style
+    parts.append(_line(x0, y0, x0, y1))
+    parts.append(_line(x0, y1, x1, y1))
+
+    if legend and len(series) > 1:
+        _legend(parts, [name for name, _, _ in series], [color for _, _, color in series], x1, y0 + 4)
+
+    _axis_labels(parts, plot, xlabel, ylabel, height - 8)
+    return _document(width, height, parts, title)
+
+
+def create_donut_chart(value: float, max_value: float = 100,
+                       title: str = None, label: str = None) -> str:
+    """Single-percentage gauge: a filled arc over a light grey ring, value in the middle."""
+    size = 400
+    top = 40 if title else 0
+    cx, cy = size / 2, top + (size - top) / 2
+    outer = (size - top) / 2 - 24
+    ring = outer * 0.4
+    radius = outer - ring / 2
+
+    pct = min(value / max_value * 100, 100) if max_value > 0 else 0
+    parts = []
+    _title(parts, size, title)
+    parts.append(f'<circle cx="{_fmt(cx)}" cy="{_fmt(cy)}" r="{_fmt(radius)}" fill="none" '
+                 f'stroke="{BRAND_COLORS["light_gray"]}" stroke-width="{_fmt(ring)}"/>')
+    if pct >= 100:
+        parts.append(f'<circle cx="{_fmt(cx)}" cy="{_fmt(cy)}" r="{_fmt(radius)}" fill="none" '
+                     f'stroke="{BRAND_COLORS["primary"]}" stroke-width="{_fmt(ring)}"/>')
+    elif pct > 0:
+        # Starts at 12 o'clock and runs counter-clockwise, same as matplotlib's startangle=90
+        angle = pct / 100 * 2 * math.pi
+        end_x = cx - radius * math.sin(angle)
+        end_y = cy - radius * math.cos(angle)
+        large_arc = 1 if pct > 50 else 0
+        parts.append(f'<path d="M {_fmt(cx)} {_fmt(cy - radius)} A {_fmt(radius)} {_fmt(radius)} 0 '
+                     f'{large_arc} 0 {_fmt(end_x)} {_fmt(end_y)}" fill="none" '
+                     f'stroke="{BRAND_COLORS["primary"]}" stroke-width="{_fmt(ring)}"/>')
+
+    parts.append(_text(cx, cy - 4, f"{value:.1f}%", size=24, color=BRAND_COLORS['primary'],
+                       weight='bold', baseline='middle'))
+    if label:
+        parts.append(_text(cx, cy + 24, label, size=10))
+    return _document(size, size, parts, title)
+
+
+def create_bar_chart(labels: List[str], values: List[float],
+                     title: str = None, xlabel: str = None,
+                     ylabel: str = None, horizontal: bool = False,
+                     color: str = None, value_format: str = '{:.1f}') -> str:
+    """Single-series bars with the value printed at the end of each bar."""
+    return _category_chart(labels, [('', values, color or BRAND_COLORS['primary'])], title, xlabel, ylabel,
+                           horizontal=horizontal, value_format=value_format, bar_span=0.6)
+
+
+def create_grouped_bar_chart(categories: List[str], groups: List[str],
+                             data: Dict[str, List[float]], title: str = None,
+                             xlabel: str = None, ylabel: str = None,
+                             value_format: str = '${:,.0f}') -> str:
+    """One bar per group inside each category, coloured from CHART_PALETTE."""
+    series = [(name, values, CHART_PALETTE[i % len(CHART_PALETTE)])
+              for i, (name, values) in enumerate(data.items())]
+    return _category_chart(categories, series, title, xlabel, ylabel,
+                           width=max(800, 150 * len(categories)))
+
+
+def create_stacked_bar_chart(labels: List[str], data: Dict[str, List[float]],
+                             title: str = None, xlabel: str = None,
+                             ylabel: str = None, horizontal: bool = True) -> str:
+    """Stacks each series on the previous one, horizontal by default."""
+    series = [(name, values, CHART_PALETTE[i % len(CHART_PALETTE)])
+              for i, (name, values) in enumerate(data.items())]
+    return _category_chart(labels, series, title, xlabel, ylabel, horizontal=horizontal,
+                           stacked=True, bar_span=0.6, width=1000 if horizontal else 800)
+
+
+def create_line_chart(labels: List[str], values: List[float],
+                      title: str = None, xlabel: str = None,
+                      ylabel: str = None, fill: bool = True,
+                      marker: bool = True) -> str:
+    """Trend line with an optional shaded area and labelled markers."""
+    width, height = 1000, 500
+    labels = [str(label) for label in labels]
+    top = 40 if title else 16
+    label_drop = max((_text_width(label, 9) for label in labels), default=0) * 0.72
+    x0 = 56 + (18 if ylabel else 0)
+    x1 = width - 24
+    y0 = top + (16 if marker else 0)
+    y1 = height - 24 - label_drop - (18 if xlabel else 0)
+
+    ticks = _nice_ticks(max(values, default=0))
+    top_value = ticks[-1]
+    n = len(values)
+    # matplotlib pads the x range by 5% on each side
+    pad = (x1 - x0) * 0.05
+    step = (x1 - x0 - 2 * pad) / (n - 1) if n > 1 else 0
+
+    def point(i, value):
+        x = x0 + pad + step * i if n > 1 else (x0 + x1) / 2
+        return x, y1 - max(value, 0) / top_value * (y1 - y0)
+
+    points = [point(i, v) for i, v in enumerate(values)]
+    parts = []
+    _title(parts, width, title)
+
+    for tick in ticks:
+        y = y1 - tick / top_value * (y1 - y0)
+        parts.append(_line(x0, y, x1, y, dashed=True))
+        parts.append(_text(x0 - 7, y, _tick_label(tick), anchor='end', baseline='middle'))
+
+    coords = ' '.join(f"{_fmt(x)},{_fmt(y)}" for x, y in points)
+    if fill and points:
+        area = f"{_fmt(points[0][0])},{_fmt(y1)} {coords} {_fmt(points[-1][0])},{_fmt(y1)}"
+        parts.append(f'<polygon points="{area}" fill="{BRAND_COLORS["primary"]}" fill-opacity="0.15"/>')
+    if points:
+        parts.append(f'<polyline points="{coords}" fill="none" stroke="{BRAND_COLORS["primary"]}" '
+                     f'stroke-width="2.5" stroke-linejoin="round"/>')
+
+    for (x, y), value, label in zip(points, values, labels):
+        if marker:
+            parts.append(f'<circle cx="{_fmt(x)}" cy="{_fmt(y)}" r="4.5" fill="white" '
+                         f'stroke="{BRAND_COLORS["primary"]}" stroke-width="2"/>')
+            parts.append(_text(x, y - 10, f"{value:.1f}%"))
+        parts.append(_text(x, y1 + 14, label, anchor='end', rotate=-45))
+
+    parts.append(_line(x0, y0, x0, y1))
+    parts.append(_line(x0, y1, x1, y1))
+    _axis_labels(parts, (x0, y0, x1, y1), xlabel, ylabel, height - 8)
+    return _document(width, height, parts, title)
+
+
+def create_multi_bar_chart(categories: List[str],
+                           series1_label: str, series1_values: List[float],
+                           series2_label: str, series2_values: List[float],
+                           title: str = None, xlabel: str = None,
+                           ylabel: str = None) -> str:
+    """Two series side by side - brand primary vs danger red."""
+    series = [(series1_label, series1_values, BRAND_COLORS['primary']),
+              (series2_label, series2_values, BRAND_COLORS['danger'])]
+    return _category_chart(categories, series, title, xlabel, ylabel, bar_span=0.7,
+                           width=max(800, 120 * len(categories)))
@@ -10,27 +10,24 @@ Run locally with:
 
 Or for production with gunicorn:
     gunicorn -w 4 -b 0.0.0.0:5001 "application:application"
+
+Or as ASGI under uvicorn workers (see asgi.py):
+    gunicorn -k uvicorn.workers.UvicornWorker -w 4 -b 0.0.0.0:5001 asgi:app
 """
 
 import os
 from datetime import timedelta
 from flask import Flask
-from flask_session import Session
 
 from app.config import Config
 from app import db
+from app.utils import chart_cache, chart_pool, report_cache, query_stats, metrics, sessions, password_pool, async_db, http_cache
 from app.routes import register_routes
+from app.services import analytics_service
+from app.cli import register_cli
 from app import register_error_handlers
 
 
-# ---------------------------------------------------------------------------
-# Flask-Session filesystem directory setup
-# ---------------------------------------------------------------------------
-session_dir = os.path.join(os.getcwd(), "flask_session_data")
-if not os.path.exists(session_dir):
-    os.makedirs(session_dir)
-
-
 # ---------------------------------------------------------------------------
 # Create and configure the Flask application
 # ---------------------------------------------------------------------------
@@ -39,25 +36,51 @@ application = Flask(__name__,
                     static_folder='app/static')
 application.config.from_object(Config)
 
-# Flask-Session filesystem backend configuration
+# Session cookie settings (where the data lives is SESSION_BACKEND, see app/utils/sessions.py)
 application.config.update(
-    SESSION_TYPE="filesystem",
-    SESSION_FILE_DIR=session_dir,
     SESSION_PERMANENT=True,
     PERMANENT_SESSION_LIFETIME=timedelta(minutes=30),
     SESSION_REFRESH_EACH_REQUEST=True,
     SESSION_COOKIE_SECURE=False  # Set to True if using HTTPS
 )
 
-# Initialize Flask-Session
-Session(application)
-
 # Initialize database connection pool
 db.init_app(application)
 
+# Signed-cookie / WebSessions session storage (needs the database for big sessions)
+sessions.init_app(application)
+
+# bcrypt cost and the bounded hashing pool logins go through
+password_pool.init_app(application)
+
+# Thread pool the async views run their queries on
+async_db.init_app(application)
+
+# Point the report chart cache at its shared directory and warm the chart render pool
+chart_cache.init_app(application)
+chart_pool.init_app(application)
+
+# Count queries per request (Server-Timing header, N+1 warnings, manager query panel)
+query_stats.init_app(application)
+
+# Prometheus metrics (request latency, pool usage, bookings, cache hit rates) at /metrics
+metrics.init_app(application)
+
+# ETag / 304 handling for flight, seat-map and reference pages
+http_cache.init_app(application)
+
 # Register all routes
 register_routes(application)
 
+# Size the report result cache and warm it in the background (needs the routes for chart URLs)
+report_cache.init_app(application)
+
+# Keep the pivot report's in-memory analytics snapshot refreshed
+analytics_service.init_app(application)
+
+# Register CLI commands (flask --app application <command>)
+register_cli(application)
+
 # Register error handlers
 register_error_handlers(application)
 
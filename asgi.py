@@ -0,0 +1,17 @@
+"""
+FLYTAU ASGI entry point - the same app as application.py, for an ASGI server.
+
+    gunicorn -k uvicorn.workers.UvicornWorker -w 4 -b 0.0.0.0:5001 asgi:app
+    (or for a quick local run: uvicorn asgi:app --port 5001)
+
+Flask is a WSGI app, so asgiref's adapter runs each request on a worker thread while the
+uvicorn event loop keeps accepting connections - a slow request no longer blocks the
+worker the way it does with gunicorn's sync workers. The async views then run their
+independent queries at the same time (app/utils/async_db.py).
+"""
+from asgiref.wsgi import WsgiToAsgi
+
+from application import application
+
+
+app = WsgiToAsgi(application)
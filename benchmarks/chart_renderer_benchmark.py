@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the report chart renderers (app/utils/svg_charts.py vs app/utils/png_charts.py).
+Renders the five report charts with report-sized data straight through each renderer
+(no cache) and measures import cost, render time and memory - no DB needed.
+
+Run from the project root:
+    python benchmarks/chart_renderer_benchmark.py [--repeat 20]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RENDERER_MODULES = {'svg': 'app.utils.svg_charts', 'png': 'app.utils.png_charts'}
+
+# Run in a fresh interpreter so each renderer's import cost is measured on its own
+IMPORT_PROBE = """
+import importlib, json, resource, sys, time
+sys.path.insert(0, {root!r})
+import app.utils.charts  # shared by both renderers, not what we're measuring
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+importlib.import_module({module!r})
+print(json.dumps({{'seconds': time.perf_counter() - start,
+                  'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before}}))
+"""
+
+
+def build_specs(seed=7):
+    """The same five charts the report pages draw, with plausible sizes."""
+    rng = random.Random(seed)
+    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+    planes = [f"PL{i:03d}" for i in range(12)]
+    crew = [f"Crew Member {i} (pilot)" for i in range(15)]
+    return [
+        ('donut', {'value': 73.4, 'max_value': 100, 'title': 'Average Flight Occupancy',
+                   'label': 'of seats filled'}),
+        ('grouped_bar', {'categories': ['Airbus', 'Boeing', 'Dassault'], 'groups': ['Business', 'Economy'],
+                         'data': {'Business': [rng.uniform(1e4, 9e4) for _ in range(3)],
+                                  'Economy': [rng.uniform(1e4, 9e4) for _ in range(3)]},
+                         'title': 'Revenue by Manufacturer and Cabin Class', 'xlabel': 'Manufacturer',
+                         'ylabel': 'Revenue ($)', 'value_format': '${:,.0f}'}),
+        ('stacked_bar', {'labels': crew,
+                         'data': {'Short Flights (≤6h)': [rng.uniform(0, 200) for _ in crew],
+                                  'Long Flights (>6h)': [rng.uniform(0, 300) for _ in crew]},
+                         'title': 'Flight Hours per Employee', 'xlabel': 'Hours', 'ylabel': 'Employee',
+                         'horizontal': True}),
+        ('line', {'labels': months, 'values': [rng.uniform(0, 15) for _ in months],
+                  'title': 'Monthly Cancellation Rate Trend', 'xlabel': 'Month',
+                  'ylabel': 'Cancellation Rate (%)', 'fill': True, 'marker': True}),
+        ('multi_bar', {'categories': planes,
+                       'series1_label': 'Flights Performed', 'series1_values': [rng.randint(0, 60) for _ in planes],
+                       'series2_label': 'Flights Cancelled', 'series2_values': [rng.randint(0, 6) for _ in planes],
+                       'title': 'Aircraft Activity Summary', 'xlabel': 'Aircraft', 'ylabel': 'Number of Flights'}),
+    ]
+
+
+def measure_import(module):
+    probe = IMPORT_PROBE.format(root=ROOT, module=module)
+    result = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_render(module, specs, repeat):
+    """Average ms per chart, output bytes per page of five charts, and peak Python allocations."""
+    renderers = [(getattr(module, f"create_{kind}_chart"), spec) for kind, spec in specs]
+    for render, spec in renderers:  # warm-up (font caches etc.)
+        render(**spec)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for render, spec in renderers:
+            render(**spec)
+    per_chart_ms = (time.perf_counter() - start) * 1000 / (repeat * len(renderers))
+
+    tracemalloc.start()
+    size = sum(len(render(**spec)) for render, spec in renderers)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return per_chart_ms, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    specs = build_specs()
+    print(f"{'renderer':<9}{'import s':>10}{'import RSS':>12}{'ms/chart':>10}{'page bytes':>12}{'peak alloc':>12}")
+    for name, module_name in RENDERER_MODULES.items():
+        imported = measure_import(module_name)
+        if imported is None:
+            print(f"{name:<9}  skipped - {module_name} can't be imported here (is matplotlib installed?)")
+            continue
+        module = __import__(module_name, fromlist=['create_donut_chart'])
+        per_chart_ms, size, peak = measure_render(module, specs, args.repeat)
+        print(f"{name:<9}{imported['seconds']:>10.3f}{imported['rss_kb'] / 1024:>10.1f}MB"
+              f"{per_chart_ms:>10.2f}{size:>12,}{peak / 1024:>10.0f}KB")
+
+
+if __name__ == '__main__':
+    main()
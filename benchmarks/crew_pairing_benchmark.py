@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the crew pairing solver (app/utils/crew_pairing.py).
+Builds a synthetic hub-and-spoke week out of TLV and times assign_crew on it - no DB needed.
+
+Run from the project root:
+    python benchmarks/crew_pairing_benchmark.py [--round-trips 1500] [--pilots 500] [--attendants 1100]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.crew_pairing import assign_crew  # noqa: E402
+from app.utils.scheduling import ResourceTimeline  # noqa: E402
+
+HUB = 'TLV'
+LONG_FLIGHT_THRESHOLD_MINUTES = 360
+TURNAROUND_MINUTES = 60
+
+
+def build_week(round_trips, seed):
+    """Round trips out of the hub spread over 7 days, ~20% of them long-haul."""
+    rng = random.Random(seed)
+    spokes = [f"A{i:02d}" for i in range(30)]
+    durations = {s: rng.choice([90, 150, 240, 300, 420, 660] if i % 5 == 0 else [60, 90, 150, 210, 270])
+                 for i, s in enumerate(spokes)}
+    start = datetime(2026, 3, 2)
+
+    flights = []
+    for n in range(round_trips):
+        spoke = rng.choice(spokes)
+        duration = durations[spoke]
+        long_flight = duration > LONG_FLIGHT_THRESHOLD_MINUTES
+        needs = {'pilot': 3, 'attendant': 6} if long_flight or rng.random() < 0.3 else {'pilot': 2, 'attendant': 3}
+        out_dep = start + timedelta(days=rng.randrange(7), minutes=rng.randrange(0, 20 * 60, 5))
+        back_dep = out_dep + timedelta(minutes=duration + TURNAROUND_MINUTES + rng.randrange(0, 240, 15))
+        for leg, (dep, origin, dest) in enumerate(((out_dep, HUB, spoke), (back_dep, spoke, HUB))):
+            flights.append({
+                'flight_id': f"F{n:05d}{leg}",
+                'departure': dep,
+                'arrival': dep + timedelta(minutes=duration),
+                'origin': origin,
+                'dest': dest,
+                'long_flight': long_flight,
+                'needs': dict(needs),
+            })
+    return flights
+
+
+def build_crew(count, prefix, certified_share, seed):
+    rng = random.Random(seed)
+    roster = {f"{prefix}{i:04d}": {'LongFlightsTraining': rng.random() < certified_share} for i in range(count)}
+    history = {crew_id: rng.randrange(0, 600 * 60, 60) for crew_id in roster}
+    return roster, history
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--round-trips', type=int, default=1500)
+    parser.add_argument('--pilots', type=int, default=500)
+    parser.add_argument('--attendants', type=int, default=1100)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    flights = build_week(args.round_trips, args.seed)
+    pilots, pilot_history = build_crew(args.pilots, 'P', 0.5, args.seed + 1)
+    attendants, attendant_history = build_crew(args.attendants, 'C', 0.5, args.seed + 2)
+    rosters = {'pilot': pilots, 'attendant': attendants}
+    timelines = {role: {crew_id: ResourceTimeline(HUB) for crew_id in roster} for role, roster in rosters.items()}
+    history = {'pilot': pilot_history, 'attendant': attendant_history}
+
+    started = time.perf_counter()
+    plan = assign_crew(flights, rosters, timelines, history_minutes=history, turnaround_minutes=TURNAROUND_MINUTES)
+    elapsed = time.perf_counter() - started
+
+    seats = sum(f['needs']['pilot'] + f['needs']['attendant'] for f in flights)
+    print(f"flights:        {len(flights)} ({seats} crew seats)")
+    print(f"crew:           {len(pilots)} pilots, {len(attendants)} attendants")
+    print(f"solve time:     {elapsed:.2f}s ({elapsed / len(flights) * 1000:.2f} ms/flight)")
+    print(f"staffed:        {len(plan['assignments'])}/{len(flights)}")
+    print(f"repositionings: {plan['repositioned']}")
+    for role, before in history.items():
+        added = [plan['minutes'][role][c] - before[c] for c in before]
+        worked = [m for m in added if m]
+        if worked:
+            print(f"{role + ' hours:':<16}mean {statistics.mean(worked) / 60:.1f}h, "
+                  f"stdev {statistics.pstdev(worked) / 60:.1f}h over {len(worked)} people")
+
+
+if __name__ == '__main__':
+    main()
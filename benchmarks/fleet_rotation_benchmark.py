@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the tail assignment planner (app/utils/fleet_rotation.py).
+Uses the same synthetic hub-and-spoke week as the crew benchmark and times a full
+solve plus a batch of incremental add/cancel updates - no DB needed.
+
+Run from the project root:
+    python benchmarks/fleet_rotation_benchmark.py [--round-trips 1500] [--planes 160]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.fleet_rotation import RotationPlan  # noqa: E402
+from crew_pairing_benchmark import HUB, TURNAROUND_MINUTES, build_week  # noqa: E402
+
+
+def build_fleet(count, large_share, seed):
+    rng = random.Random(seed)
+    return {f"PL{i:03d}": {'size': 'large' if rng.random() < large_share else 'small', 'location': HUB,
+                           'free_from': None}
+            for i in range(count)}
+
+
+def check(plan):
+    """Counts legs that don't start where (or after) the plane's previous leg ended."""
+    broken = 0
+    for airplane_id, timeline in plan.timelines.items():
+        previous = None
+        for segment in timeline.segments:
+            if segment[4] is None:
+                continue
+            flight = plan.flights[segment[4]]
+            if flight['long_flight'] and plan.airplanes[airplane_id]['size'] != 'large':
+                broken += 1
+            if previous and (previous[3] != segment[2] or previous[1] > segment[0]):
+                broken += 1
+            previous = segment
+    return broken
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--round-trips', type=int, default=1500)
+    parser.add_argument('--planes', type=int, default=160)
+    parser.add_argument('--updates', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    flights = build_week(args.round_trips, args.seed)
+    airplanes = build_fleet(args.planes, 0.4, args.seed + 3)
+    plan = RotationPlan(airplanes, turnaround_minutes=TURNAROUND_MINUTES)
+
+    started = time.perf_counter()
+    result = plan.solve(flights)
+    elapsed = time.perf_counter() - started
+    print(f"flights:         {len(flights)} on {len(airplanes)} planes")
+    print(f"full solve:      {elapsed:.2f}s")
+    print(f"assigned:        {len(result['assignments'])}/{len(flights)} in {result['rotations']} rotations")
+
+    # Updates come in round trips (both legs), like a real schedule change
+    rng = random.Random(args.seed + 4)
+    trips = sorted({flight_id[:-1] for flight_id in plan.assignments})
+    picked = rng.sample(trips, args.updates // 2)
+    cancelled = picked[:len(picked) // 2]
+    extra = []
+    for trip in picked[len(picked) // 2:]:
+        for leg in '01':
+            flight = plan.flights[trip + leg]
+            extra.append(dict(flight, flight_id='X' + trip[1:] + leg,
+                              departure=flight['departure'] + timedelta(hours=3),
+                              arrival=flight['arrival'] + timedelta(hours=3)))
+
+    retailed = set()
+    started = time.perf_counter()
+    for trip in cancelled:
+        for leg in '01':
+            retailed.update(plan.cancel_flight(trip + leg))
+    for flight in extra:
+        retailed.update(plan.add_flight(flight))
+    elapsed = time.perf_counter() - started
+    print(f"updates:         {args.updates} legs in {elapsed:.2f}s ({elapsed / args.updates * 1000:.1f} ms each, "
+          f"{len(retailed)} flight(s) re-tailed)")
+    print(f"still unassigned:{len(plan.unassigned):>5}")
+    print(f"rule violations: {check(plan)}")
+
+
+if __name__ == '__main__':
+    main()
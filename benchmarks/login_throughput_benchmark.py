@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark for password hashing (app/utils/password_pool.py) - no DB needed.
+
+Two parts:
+  - cost: time for one bcrypt check at a few cost factors (BCRYPT_ROUNDS).
+  - burst: `--logins` concurrent login threads (like a gunicorn gthread worker's request
+    threads) check passwords while a "booking" thread keeps doing small units of work.
+    Once with every login hashing inline, once through the bounded pool. Reports logins/s,
+    how many were turned away, and the booking latency while the burst is on.
+
+Run from the project root:
+    python benchmarks/login_throughput_benchmark.py [--rounds 12] [--logins 32] [--workers 2]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.utils.helpers import check_password, hash_password  # noqa: E402
+from app.utils.password_pool import PasswordPool, PasswordPoolBusy  # noqa: E402
+
+PASSWORD = 'correct horse battery staple'
+
+
+def bench_cost(costs):
+    print(f"{'rounds':<8}{'ms/check':>10}")
+    for rounds in costs:
+        stored = hash_password(PASSWORD, rounds)
+        start = time.perf_counter()
+        repeat = max(1, 2 ** (12 - rounds))
+        for _ in range(repeat):
+            check_password(PASSWORD, stored)
+        print(f"{rounds:<8}{(time.perf_counter() - start) * 1000 / repeat:>10.1f}")
+
+
+def booking_work():
+    """Stand-in for a booking request's own CPU work (~1 ms of Python)."""
+    total = 0
+    for i in range(20000):
+        total += i * i
+    return total
+
+
+def run_burst(verify, logins, attempts):
+    """(logins/s, rejected, booking latencies in ms) for one burst."""
+    stop = threading.Event()
+    latencies = []
+
+    def booker():
+        while not stop.is_set():
+            start = time.perf_counter()
+            booking_work()
+            latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.005)
+
+    done = [0]
+    rejected = [0]
+    lock = threading.Lock()
+
+    def login():
+        for _ in range(attempts):
+            try:
+                verify()
+                with lock:
+                    done[0] += 1
+            except PasswordPoolBusy:
+                with lock:
+                    rejected[0] += 1
+
+    booking_thread = threading.Thread(target=booker)
+    booking_thread.start()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=login) for _ in range(logins)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    booking_thread.join()
+    return done[0] / elapsed, rejected[0], latencies
+
+
+def bench_burst(rounds, logins, attempts, workers, queue_size, admission_timeout):
+    stored = hash_password(PASSWORD, rounds)
+    pool = PasswordPool(workers, queue_size, admission_timeout, rounds)
+    modes = {
+        'inline': lambda: check_password(PASSWORD, stored),
+        f'pool ({workers}+{queue_size})': lambda: pool.verify(PASSWORD, stored),
+    }
+    print(f"\n{logins} concurrent logins x {attempts} at cost {rounds}, {os.cpu_count()} CPU(s)")
+    print(f"{'mode':<16}{'logins/s':>10}{'rejected':>10}{'booking p50 ms':>16}{'booking p99 ms':>16}")
+    for name, verify in modes.items():
+        rate, rejected, latencies = run_burst(verify, logins, attempts)
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0
+        p50 = statistics.median(latencies) if latencies else 0
+        print(f"{name:<16}{rate:>10.1f}{rejected:>10}{p50:>16.2f}{p99:>16.2f}")
+    pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--logins', type=int, default=32)
+    parser.add_argument('--attempts', type=int, default=2, help='Logins per thread.')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--queue-size', type=int, default=8)
+    parser.add_argument('--admission-timeout', type=float, default=2)
+    args = parser.parse_args()
+
+    bench_cost([10, 11, 12])
+    bench_burst(args.rounds, args.logins, args.attempts, args.workers, args.queue_size, args.admission_timeout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the execute_query fast path (app/db.py): prepared statements and row factories.
+
+Two parts:
+  - rows: builds rows shaped like get_flight_by_id's as dicts, tuples and namedtuples
+    (no DB needed) - time per row and memory per 10k rows.
+  - lookups: runs the hot single-row lookups against the configured MySQL (.env) with
+    the plain text protocol vs. a cached prepared statement. Skipped if MySQL isn't up.
+
+Run from the project root:
+    python benchmarks/query_path_benchmark.py [--rows 100000] [--lookups 2000]
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FLIGHT_COLUMNS = ('FlightId', 'Airplanes_AirplaneId', 'Status', 'EconomyPrice', 'BusinessPrice', 'Duration',
+                  'DepartureDate', 'DepartureHour', 'OriginPort', 'DestPort', 'Manufacturer',
+                  'CouchRows', 'CouchCols', 'BusinessRows', 'BusinessCols', 'PurchaseDate')
+
+LOOKUPS = {
+    'flight by id': ("""
+        SELECT f.FlightId, f.Airplanes_AirplaneId, f.Status,
+               f.EconomyPrice, f.BusinessPrice, f.Duration,
+               f.DepartureDate, f.DepartureHour, f.OriginPort, f.DestPort,
+               a.Manufacturer, a.CouchRows, a.CouchCols,
+               a.BusinessRows, a.BusinessCols, a.PurchaseDate
+        FROM Flights f
+        JOIN Airplanes a ON f.Airplanes_AirplaneId = a.AirplaneId
+        WHERE f.FlightId = %s
+    """, 'flight'),
+    'airplane by id': ("""
+        SELECT AirplaneId, PurchaseDate, Manufacturer,
+               CouchRows, CouchCols, BusinessRows, BusinessCols
+        FROM Airplanes
+        WHERE AirplaneId = %s
+    """, 'airplane'),
+    'seat taken': ("""
+        SELECT 1
+        FROM Tickets t
+        JOIN orders o ON t.orders_UniqueOrderCode = o.UniqueOrderCode
+        WHERE o.Flights_FlightId = %s
+          AND t.RowNum = %s
+          AND t.Seat = %s
+          AND o.Status != 'cancelled'
+    """, 'seat'),
+}
+
+
+def sample_row(i):
+    return (f"FT{i:04d}", 'A1', 'active', Decimal('120.00'), Decimal('480.00'), 240,
+            datetime.date(2026, 1, 1) + datetime.timedelta(days=i % 365), datetime.timedelta(hours=9),
+            'TLV', 'ATH', 'Boeing', 30, 6, 5, 4, datetime.date(2015, 3, 1))
+
+
+def bench_rows(count):
+    from app import db
+
+    raw = [sample_row(i) for i in range(count)]
+    print(f"Materialising {count:,} rows of {len(FLIGHT_COLUMNS)} columns")
+    print(f"{'factory':<12}{'ns/row':>10}{'KB/10k rows':>14}")
+    for name, factory in (('dict', db.dict_rows), ('namedtuple', db.namedtuple_rows), ('tuple', db.tuple_rows)):
+        make_row = factory(FLIGHT_COLUMNS)
+        start = time.perf_counter()
+        rows = [make_row(row) for row in raw] if make_row else list(raw)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        kept = [make_row(row) for row in raw[:10000]] if make_row else list(raw[:10000])
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del rows, kept
+        print(f"{name:<12}{elapsed * 1e9 / count:>10.0f}{size / 1024:>14.0f}")
+
+
+def lookup_params(db):
+    """Real keys to look up, so the lookups hit rows."""
+    flight = db.execute_query("SELECT FlightId, Airplanes_AirplaneId FROM Flights LIMIT 1", fetch_one=True)
+    if not flight:
+        return None
+    return {'flight': (flight['FlightId'],), 'airplane': (flight['Airplanes_AirplaneId'],),
+            'seat': (flight['FlightId'], 1, 'A')}
+
+
+def bench_lookups(count):
+    from app import create_app, db
+
+    app = create_app()
+    with app.app_context():
+        if not db.is_db_available():
+            print("\nLookups skipped - MySQL isn't reachable with the .env settings")
+            return
+        params = lookup_params(db)
+        if params is None:
+            print("\nLookups skipped - no flights in the database (load sql/01_seed_fixed.sql)")
+            return
+        print(f"\n{count:,} lookups each against {app.config['DB_HOST']}")
+        print(f"{'query':<16}{'text us':>10}{'prepared us':>13}{'+tuples us':>12}")
+        for name, (sql, key) in LOOKUPS.items():
+            timings = []
+            for options in ({}, {'prepared': True}, {'prepared': True, 'row_factory': db.tuple_rows}):
+                db.execute_query(sql, params[key], fetch_one=True, **options)  # warm-up / prepare
+                start = time.perf_counter()
+                for _ in range(count):
+                    db.execute_query(sql, params[key], fetch_one=True, **options)
+                timings.append((time.perf_counter() - start) * 1e6 / count)
+            print(f"{name:<16}{timings[0]:>10.1f}{timings[1]:>13.1f}{timings[2]:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    bench_rows(args.rows)
+    bench_lookups(args.lookups)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""Gunicorn settings, picked up automatically from the project root.
+
+Only sets up the Prometheus multiprocess directory (see app/utils/metrics.py): every
+worker writes its metrics there and /metrics adds them up. The directory is emptied
+when gunicorn starts, and a worker's live gauges are dropped when it exits.
+"""
+import os
+import shutil
+import tempfile
+
+# Has to be in the environment before the workers import prometheus_client
+multiproc_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                                      os.path.join(tempfile.gettempdir(), 'flytau_metrics'))
+
+
+def on_starting(server):
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -150,7 +150,7 @@ CREATE TABLE IF NOT EXISTS `flytau`.`orders` (
     FOREIGN KEY (`Flights_FlightId`)
     REFERENCES `flytau`.`Flights` (`FlightId`)
     ON DELETE NO ACTION
-    ON UPDATE NO ACTION)
+    ON UPDATE CASCADE)
 ENGINE = InnoDB;
 
 
@@ -228,7 +228,7 @@ CREATE TABLE IF NOT EXISTS `flytau`.`Managers_edits_Flights` (
     FOREIGN KEY (`Flights_FlightId`)
     REFERENCES `flytau`.`Flights` (`FlightId`)
     ON DELETE NO ACTION
-    ON UPDATE NO ACTION)
+    ON UPDATE CASCADE)
 ENGINE = InnoDB;
 
 
@@ -267,7 +267,7 @@ CREATE TABLE IF NOT EXISTS `flytau`.`Pilot_has_Flights` (
     FOREIGN KEY (`Flights_FlightId`)
     REFERENCES `flytau`.`Flights` (`FlightId`)
     ON DELETE NO ACTION
-    ON UPDATE NO ACTION)
+    ON UPDATE CASCADE)
 ENGINE = InnoDB;
 
 
@@ -289,10 +289,75 @@ CREATE TABLE IF NOT EXISTS `flytau`.`FlightAttendant_has_Flights` (
     FOREIGN KEY (`Flights_FlightId`)
     REFERENCES `flytau`.`Flights` (`FlightId`)
     ON DELETE NO ACTION
-    ON UPDATE NO ACTION)
+    ON UPDATE CASCADE)
 ENGINE = InnoDB;
 
 
+-- -----------------------------------------------------
+-- Report fact tables (one row per flight, kept up to date by report_fact_service)
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `flytau`.`FactFlights` (
+  `FlightId` VARCHAR(45) NOT NULL,
+  `DepartureDate` DATE NULL,
+  `DepartureMonth` DATE GENERATED ALWAYS AS (`DepartureDate` - INTERVAL (DAYOFMONTH(`DepartureDate`) - 1) DAY) STORED,
+  `OriginPort` VARCHAR(45) NOT NULL,
+  `DestPort` VARCHAR(45) NOT NULL,
+  `AirplaneId` VARCHAR(45) NOT NULL,
+  `Manufacturer` VARCHAR(45) NULL,
+  `AirplaneSize` VARCHAR(10) NOT NULL,
+  `Status` VARCHAR(45) NULL,
+  `Duration` INT NULL,
+  `SoldSeats` INT NOT NULL DEFAULT 0,
+  `TotalSeats` INT NOT NULL DEFAULT 0,
+  `OrdersTotal` INT NOT NULL DEFAULT 0,
+  `OrdersCancelled` INT NOT NULL DEFAULT 0,
+  `UpdatedAt` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`FlightId`),
+  INDEX `idx_FactFlights_DepartureDate` (`DepartureDate` ASC) VISIBLE,
+  INDEX `idx_FactFlights_Airplane_Date` (`AirplaneId` ASC, `DepartureDate` ASC) VISIBLE,
+  INDEX `idx_FactFlights_Route_Date` (`OriginPort` ASC, `DestPort` ASC, `DepartureDate` ASC) VISIBLE,
+  INDEX `idx_FactFlights_Month` (`DepartureMonth` ASC) VISIBLE,
+  INDEX `idx_FactFlights_Airplane_Month_Route` (`AirplaneId` ASC, `DepartureMonth` ASC, `OriginPort` ASC, `DestPort` ASC) VISIBLE)
+ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS `flytau`.`FactFlightRevenue` (
+  `FlightId` VARCHAR(45) NOT NULL,
+  `CabinClass` VARCHAR(45) NOT NULL,
+  `DepartureDate` DATE NULL,
+  `AirplaneSize` VARCHAR(10) NOT NULL,
+  `Manufacturer` VARCHAR(45) NULL,
+  `Revenue` DECIMAL(12,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`FlightId`, `CabinClass`),
+  INDEX `idx_FactFlightRevenue_DepartureDate` (`DepartureDate` ASC) VISIBLE)
+ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS `flytau`.`FactCrewHours` (
+  `FlightId` VARCHAR(45) NOT NULL,
+  `Role` VARCHAR(20) NOT NULL,
+  `EmployeeId` VARCHAR(45) NOT NULL,
+  `DepartureDate` DATE NULL,
+  `FlightClass` ENUM('short', 'long') NOT NULL,
+  `Minutes` INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (`FlightId`, `Role`, `EmployeeId`),
+  INDEX `idx_FactCrewHours_Employee` (`Role` ASC, `EmployeeId` ASC, `FlightClass` ASC, `Minutes` ASC) VISIBLE,
+  INDEX `idx_FactCrewHours_DepartureDate` (`DepartureDate` ASC) VISIBLE)
+ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS `flytau`.`WebSessions` (
+  `SessionId` VARCHAR(64) NOT NULL,
+  `Data` MEDIUMBLOB NOT NULL,
+  `ExpiresAt` DATETIME NOT NULL,
+  PRIMARY KEY (`SessionId`),
+  INDEX `idx_WebSessions_ExpiresAt` (`ExpiresAt` ASC) VISIBLE)
+ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS `flytau`.`CacheVersions` (
+  `Scope` VARCHAR(64) NOT NULL,
+  `Version` BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  `UpdatedAt` DATETIME NOT NULL,
+  PRIMARY KEY (`Scope`))
+ENGINE = InnoDB;
+
 SET SQL_MODE=@OLD_SQL_MODE;
 SET FOREIGN_KEY_CHECKS=@OLD_FOREIGN_KEY_CHECKS;
 SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS;
\ No newline at end of file
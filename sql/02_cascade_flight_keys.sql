@@ -0,0 +1,40 @@
+-- Migration: let a flight number change cascade to everything that points at it
+-- Run once on databases created before this change:
+--   mysql -u root -p flytau < sql/02_cascade_flight_keys.sql
+--
+-- With these in place flight_repository.update_flight_with_new_ids re-keys a flight
+-- with a single UPDATE on Flights (orders, crew and the edit log follow automatically).
+
+USE `flytau`;
+
+ALTER TABLE `orders`
+  DROP FOREIGN KEY `fk_orders_Flights1`,
+  ADD CONSTRAINT `fk_orders_Flights1`
+    FOREIGN KEY (`Flights_FlightId`)
+    REFERENCES `Flights` (`FlightId`)
+    ON DELETE NO ACTION
+    ON UPDATE CASCADE;
+
+ALTER TABLE `Managers_edits_Flights`
+  DROP FOREIGN KEY `fk_Managers_has_Flights_Flights1`,
+  ADD CONSTRAINT `fk_Managers_has_Flights_Flights1`
+    FOREIGN KEY (`Flights_FlightId`)
+    REFERENCES `Flights` (`FlightId`)
+    ON DELETE NO ACTION
+    ON UPDATE CASCADE;
+
+ALTER TABLE `Pilot_has_Flights`
+  DROP FOREIGN KEY `fk_Pilot_has_Flights_Flights1`,
+  ADD CONSTRAINT `fk_Pilot_has_Flights_Flights1`
+    FOREIGN KEY (`Flights_FlightId`)
+    REFERENCES `Flights` (`FlightId`)
+    ON DELETE NO ACTION
+    ON UPDATE CASCADE;
+
+ALTER TABLE `FlightAttendant_has_Flights`
+  DROP FOREIGN KEY `fk_FlightAttendant_has_Flights_Flights1`,
+  ADD CONSTRAINT `fk_FlightAttendant_has_Flights_Flights1`
+    FOREIGN KEY (`Flights_FlightId`)
+    REFERENCES `Flights` (`FlightId`)
+    ON DELETE NO ACTION
+    ON UPDATE CASCADE;
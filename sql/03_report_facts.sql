@@ -0,0 +1,56 @@
+-- Migration: fact tables behind the analytics reports
+-- Run once on databases created before this change, then fill them:
+--   mysql -u root -p flytau < sql/03_report_facts.sql
+--   flask --app run backfill-report-facts
+--
+-- Each table has one row per flight (per cabin class / crew member). Bookings,
+-- cancellations and flight edits refresh just the affected flight's rows, so the
+-- reports aggregate these small tables instead of re-joining orders and tickets.
+
+USE `flytau`;
+
+-- -----------------------------------------------------
+-- Report fact tables (one row per flight, kept up to date by report_fact_service)
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `FactFlights` (
+  `FlightId` VARCHAR(45) NOT NULL,
+  `DepartureDate` DATE NULL,
+  `OriginPort` VARCHAR(45) NOT NULL,
+  `DestPort` VARCHAR(45) NOT NULL,
+  `AirplaneId` VARCHAR(45) NOT NULL,
+  `Manufacturer` VARCHAR(45) NULL,
+  `AirplaneSize` VARCHAR(10) NOT NULL,
+  `Status` VARCHAR(45) NULL,
+  `Duration` INT NULL,
+  `SoldSeats` INT NOT NULL DEFAULT 0,
+  `TotalSeats` INT NOT NULL DEFAULT 0,
+  `OrdersTotal` INT NOT NULL DEFAULT 0,
+  `OrdersCancelled` INT NOT NULL DEFAULT 0,
+  `UpdatedAt` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`FlightId`),
+  INDEX `idx_FactFlights_DepartureDate` (`DepartureDate` ASC) VISIBLE,
+  INDEX `idx_FactFlights_Airplane_Date` (`AirplaneId` ASC, `DepartureDate` ASC) VISIBLE)
+ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS `FactFlightRevenue` (
+  `FlightId` VARCHAR(45) NOT NULL,
+  `CabinClass` VARCHAR(45) NOT NULL,
+  `DepartureDate` DATE NULL,
+  `AirplaneSize` VARCHAR(10) NOT NULL,
+  `Manufacturer` VARCHAR(45) NULL,
+  `Revenue` DECIMAL(12,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`FlightId`, `CabinClass`),
+  INDEX `idx_FactFlightRevenue_DepartureDate` (`DepartureDate` ASC) VISIBLE)
+ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS `FactCrewHours` (
+  `FlightId` VARCHAR(45) NOT NULL,
+  `Role` VARCHAR(20) NOT NULL,
+  `EmployeeId` VARCHAR(45) NOT NULL,
+  `DepartureDate` DATE NULL,
+  `ShortHours` DECIMAL(8,2) NOT NULL DEFAULT 0,
+  `LongHours` DECIMAL(8,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`FlightId`, `Role`, `EmployeeId`),
+  INDEX `idx_FactCrewHours_Employee` (`Role` ASC, `EmployeeId` ASC) VISIBLE,
+  INDEX `idx_FactCrewHours_DepartureDate` (`DepartureDate` ASC) VISIBLE)
+ENGINE = InnoDB;
@@ -0,0 +1,12 @@
+-- Migration: indexes behind the report filters (date range, route, aircraft)
+-- Run once on databases created before this change:
+--   mysql -u root -p flytau < sql/04_report_filter_indexes.sql
+--
+-- Date filters already use idx_FactFlights_DepartureDate (which also carries the
+-- FlightId primary key, so the occupancy table's keyset pages read it in order), and
+-- aircraft filters use idx_FactFlights_Airplane_Date. This adds the route equivalent.
+
+USE `flytau`;
+
+ALTER TABLE `FactFlights`
+  ADD INDEX `idx_FactFlights_Route_Date` (`OriginPort` ASC, `DestPort` ASC, `DepartureDate` ASC) VISIBLE;
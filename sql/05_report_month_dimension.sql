@@ -0,0 +1,16 @@
+-- Migration: calendar-month bucket on FactFlights for the monthly reports
+-- Run once on databases created before this change:
+--   mysql -u root -p flytau < sql/05_report_month_dimension.sql
+--
+-- DepartureMonth is the first day of the departure's month (2026-03-17 -> 2026-03-01),
+-- so the monthly reports group by year+month on a stored, indexed column instead of
+-- MONTH(DepartureDate) - which merged March 2025 with March 2026 and hid the index.
+
+USE `flytau`;
+
+ALTER TABLE `FactFlights`
+  ADD COLUMN `DepartureMonth` DATE
+    GENERATED ALWAYS AS (`DepartureDate` - INTERVAL (DAYOFMONTH(`DepartureDate`) - 1) DAY) STORED
+    AFTER `DepartureDate`,
+  ADD INDEX `idx_FactFlights_Month` (`DepartureMonth` ASC) VISIBLE,
+  ADD INDEX `idx_FactFlights_Airplane_Month_Route` (`AirplaneId` ASC, `DepartureMonth` ASC, `OriginPort` ASC, `DestPort` ASC) VISIBLE;
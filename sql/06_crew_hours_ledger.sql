@@ -0,0 +1,25 @@
+-- Migration: turn FactCrewHours into a crew-hours ledger (minutes per flight class)
+-- Run once on databases created before this change, then refill it:
+--   mysql -u root -p flytau < sql/06_crew_hours_ledger.sql
+--   flask --app run backfill-report-facts
+--
+-- One row per crew member per active/done flight with the flight's class ('short' is
+-- up to 6 hours, 'long' is longer) and its length in whole minutes. Creating, editing,
+-- cancelling or completing a flight rewrites just that flight's rows. The flight-hours
+-- report and the crew pickers in the add-flight wizard sum it in a single pass.
+
+USE `flytau`;
+
+DROP TABLE IF EXISTS `FactCrewHours`;
+
+CREATE TABLE IF NOT EXISTS `FactCrewHours` (
+  `FlightId` VARCHAR(45) NOT NULL,
+  `Role` VARCHAR(20) NOT NULL,
+  `EmployeeId` VARCHAR(45) NOT NULL,
+  `DepartureDate` DATE NULL,
+  `FlightClass` ENUM('short', 'long') NOT NULL,
+  `Minutes` INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (`FlightId`, `Role`, `EmployeeId`),
+  INDEX `idx_FactCrewHours_Employee` (`Role` ASC, `EmployeeId` ASC, `FlightClass` ASC, `Minutes` ASC) VISIBLE,
+  INDEX `idx_FactCrewHours_DepartureDate` (`DepartureDate` ASC) VISIBLE)
+ENGINE = InnoDB;
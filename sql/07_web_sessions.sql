@@ -0,0 +1,17 @@
+-- Migration: server-side sessions (app/utils/sessions.py)
+-- Run once on databases created before this change:
+--   mysql -u root -p flytau < sql/07_web_sessions.sql
+--
+-- Sessions that outgrow the signed cookie (SESSION_BACKEND=hybrid, the default) or all of
+-- them (SESSION_BACKEND=sql) are stored here as tagged JSON. The cookie only carries the
+-- signed SessionId. Expired rows are deleted in batches by ExpiresAt.
+
+USE `flytau`;
+
+CREATE TABLE IF NOT EXISTS `WebSessions` (
+  `SessionId` VARCHAR(64) NOT NULL,
+  `Data` MEDIUMBLOB NOT NULL,
+  `ExpiresAt` DATETIME NOT NULL,
+  PRIMARY KEY (`SessionId`),
+  INDEX `idx_WebSessions_ExpiresAt` (`ExpiresAt` ASC) VISIBLE)
+ENGINE = InnoDB;
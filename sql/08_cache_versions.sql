@@ -0,0 +1,17 @@
+-- Migration: versions behind the HTTP caching of flight and reference pages (app/utils/http_cache.py)
+-- Run once on databases created before this change:
+--   mysql -u root -p flytau < sql/08_cache_versions.sql
+--
+-- One row per scope: 'flight:<FlightId>' is bumped on every booking, cancellation, status
+-- change or edit of that flight, 'reference' by `flask --app run bump-reference-version`
+-- after the airports or routes are reloaded. Pages send the version as their ETag and
+-- UpdatedAt (UTC) as Last-Modified.
+
+USE `flytau`;
+
+CREATE TABLE IF NOT EXISTS `CacheVersions` (
+  `Scope` VARCHAR(64) NOT NULL,
+  `Version` BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  `UpdatedAt` DATETIME NOT NULL,
+  PRIMARY KEY (`Scope`))
+ENGINE = InnoDB;
@@ -1,27 +1,36 @@
 -- Monthly Activity Summary per Airplane
-SELECT 
-    MainStats.AirplaneId,
-    MainStats.FlightMonth,
-    MainStats.FlightsPerformed,
-    MainStats.FlightsCancelled,
+-- One row per airplane and calendar month (year + month). The dominant route is picked
+-- in the same pass with ROW_NUMBER() instead of a correlated subquery per row.
+-- Set @from / @to to limit the period (range on DepartureDate, end exclusive).
+SET @from = NULL, @to = NULL;  -- e.g. '2026-01-01', '2027-01-01'
+
+WITH RouteLegs AS (
+    -- Flights per airplane, month and route, with the routes ranked inside each month
+    SELECT
+        f.Airplanes_AirplaneId AS AirplaneId,
+        DATE_FORMAT(f.DepartureDate, '%Y-%m') AS FlightMonth,
+        CONCAT(f.OriginPort, '-', f.DestPort) AS Route,
+        SUM(CASE WHEN f.Status = 'active' THEN 1 ELSE 0 END) AS Performed,
+        SUM(CASE WHEN f.Status = 'cancelled' THEN 1 ELSE 0 END) AS Cancelled,
+        ROW_NUMBER() OVER (
+            PARTITION BY f.Airplanes_AirplaneId, DATE_FORMAT(f.DepartureDate, '%Y-%m')
+            ORDER BY COUNT(*) DESC, f.OriginPort, f.DestPort
+        ) AS RouteRank
+    FROM Flights f
+    WHERE f.DepartureDate IS NOT NULL
+      AND (@from IS NULL OR f.DepartureDate >= @from)
+      AND (@to IS NULL OR f.DepartureDate < @to)
+    GROUP BY f.Airplanes_AirplaneId, FlightMonth, f.OriginPort, f.DestPort
+)
+SELECT
+    AirplaneId,
+    FlightMonth,
+    SUM(Performed) AS FlightsPerformed,
+    SUM(Cancelled) AS FlightsCancelled,
     -- Utilization percentage: (Performed Flights / 30 Days) * 100
-    ROUND((MainStats.FlightsPerformed / 30.0) * 100, 2) AS UtilizationRatePercent,
+    ROUND((SUM(Performed) / 30.0) * 100, 2) AS UtilizationRatePercent,
     -- Dominant Route
-    (SELECT CONCAT(f3.OriginPort, '-', f3.DestPort)
-     FROM Flights f3
-     WHERE f3.Airplanes_AirplaneId = MainStats.AirplaneId 
-       AND MONTH(f3.DepartureDate) = MainStats.FlightMonth
-     GROUP BY f3.OriginPort, f3.DestPort
-     ORDER BY COUNT(*) DESC
-     LIMIT 1) AS DominantRoute
-FROM (
-    -- Sub-query to count Performed and Cancelled flights
-    SELECT 
-        a.AirplaneId,
-        MONTH(f.DepartureDate) AS FlightMonth,
-        SUM(CASE WHEN f.Status = 'active' THEN 1 ELSE 0 END) AS FlightsPerformed,
-        SUM(CASE WHEN f.Status = 'cancelled' THEN 1 ELSE 0 END) AS FlightsCancelled
-    FROM Airplanes a
-    JOIN Flights f ON a.AirplaneId = f.Airplanes_AirplaneId
-    GROUP BY a.AirplaneId, MONTH(f.DepartureDate)
-) AS MainStats;
\ No newline at end of file
+    MAX(CASE WHEN RouteRank = 1 THEN Route END) AS DominantRoute
+FROM RouteLegs
+GROUP BY AirplaneId, FlightMonth
+ORDER BY AirplaneId, FlightMonth;
@@ -1,22 +1,17 @@
 -- Monthly purchase cancellation rate
--- Only shows the month and the final calculated percentage
-SELECT 
-    TotalData.OrderMonth,
-    ROUND((IFNULL(CancelledData.CancelledCount, 0) * 100.0) / TotalData.TotalCount, 2) AS CancellationRatePercent
-FROM (
-    -- Sub-query: Count total orders per month
-    SELECT MONTH(DepartureDate) AS OrderMonth, COUNT(*) AS TotalCount
-    FROM orders o
-    JOIN Flights f ON o.Flights_FlightId = f.FlightId
-    GROUP BY MONTH(DepartureDate)
-) AS TotalData
-LEFT JOIN (
-    -- Sub-query: Count only cancelled orders per month
-    -- Matches 'customer_canceled' or 'system_canceled' statuses
-    SELECT MONTH(DepartureDate) AS OrderMonth, COUNT(*) AS CancelledCount
-    FROM orders o
-    JOIN Flights f ON o.Flights_FlightId = f.FlightId
-    WHERE o.Status IN ('customer_canceled', 'system_canceled')
-    GROUP BY MONTH(DepartureDate)
-) AS CancelledData ON TotalData.OrderMonth = CancelledData.OrderMonth
-ORDER BY TotalData.OrderMonth;
\ No newline at end of file
+-- One row per calendar month (year + month), so March 2025 and March 2026 stay apart.
+-- Set @from / @to to limit the period; the range is on the bare DepartureDate column
+-- so MySQL can use its index instead of scanning every flight.
+SET @from = NULL, @to = NULL;  -- e.g. '2026-01-01', '2027-01-01' (end exclusive)
+
+SELECT
+    DATE_FORMAT(f.DepartureDate, '%Y-%m') AS OrderMonth,
+    ROUND(SUM(o.Status IN ('customer_canceled', 'system_canceled')) * 100.0 / COUNT(*), 2)
+        AS CancellationRatePercent
+FROM orders o
+JOIN Flights f ON o.Flights_FlightId = f.FlightId
+WHERE f.DepartureDate IS NOT NULL
+  AND (@from IS NULL OR f.DepartureDate >= @from)
+  AND (@to IS NULL OR f.DepartureDate < @to)
+GROUP BY OrderMonth
+ORDER BY OrderMonth;
@@ -0,0 +1,34 @@
+"""Tests for the pivot report's argument checks (app/services/analytics_service.py) - rejected before any data is loaded."""
+import pytest
+
+from app.services import analytics_service, report_service
+
+
+@pytest.fixture(autouse=True)
+def no_snapshot(monkeypatch):
+    def get_snapshot(refresh=False):
+        raise AssertionError('a bad pivot must be rejected before the snapshot is used')
+
+    monkeypatch.setattr(analytics_service, 'get_snapshot', get_snapshot)
+
+
+@pytest.mark.parametrize('rows', ['', None])
+def test_pivot_needs_a_row_dimension(rows):
+    with pytest.raises(ValueError, match='rows'):
+        analytics_service.pivot('revenue', rows, 'month')
+
+
+def test_pivot_rejects_unknown_row_dimension():
+    with pytest.raises(ValueError, match="Unknown dimension 'nope'"):
+        analytics_service.pivot('revenue', 'nope')
+
+
+def test_pivot_rejects_unknown_measure():
+    with pytest.raises(ValueError, match="Unknown measure"):
+        analytics_service.pivot('profit', 'route')
+
+
+@pytest.mark.parametrize('rows', ['', 'nope'])
+def test_pivot_report_raises_value_error_not_key_error(rows):
+    with pytest.raises(ValueError):
+        report_service.get_pivot_report({}, 'revenue', rows)
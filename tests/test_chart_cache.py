@@ -0,0 +1,79 @@
+"""Tests for the chart cache and chart jobs (app/utils/chart_cache.py, app/utils/charts.py)."""
+import os
+import time
+from decimal import Decimal
+
+from app.utils import chart_cache as chart_cache_module, charts
+from app.utils.chart_cache import ChartCache, chart_key
+
+
+def test_directory_is_scanned_once_per_prune_interval(tmp_path, monkeypatch):
+    cache = ChartCache(str(tmp_path), memory_items=4, disk_items=1000)
+    scans = []
+    monkeypatch.setattr(cache, '_prune', lambda: scans.append(1))
+    for i in range(chart_cache_module.PRUNE_EVERY * 2 + 1):
+        cache.put(chart_key('bar', {'i': i}, {}), b'img', 'svg')
+    assert len(scans) == 3
+
+
+def test_prune_keeps_the_newest_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(chart_cache_module, 'PRUNE_EVERY', 1)
+    cache = ChartCache(str(tmp_path), memory_items=4, disk_items=3)
+    for i in range(5):
+        cache.put(chart_key('bar', {'i': i}, {}), b'img', 'svg')
+    assert len(list(tmp_path.glob('*.svg'))) == 3
+
+
+def test_chart_job_keeps_decimals_as_numbers(app, monkeypatch):
+    jobs = []
+    monkeypatch.setattr(charts.chart_pool, 'submit', lambda key, ext, job: jobs.append(job))
+    with app.test_request_context():
+        charts.create_bar_chart(['A', 'B'], [Decimal('12.50'), Decimal('3')], renderer='svg')
+    values = jobs[0]['spec']['values']
+    assert values == [12.5, 3.0]
+    assert all(type(v) is float for v in values)
+
+
+def test_prune_survives_files_vanishing_mid_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr(chart_cache_module, 'PRUNE_EVERY', 1)
+    cache = ChartCache(str(tmp_path), memory_items=4, disk_items=1)
+    real_scandir = chart_cache_module.os.scandir
+
+    def scandir_then_lose_a_file(path):
+        entries = list(real_scandir(path))
+        os.remove(entries[0].path)  # another worker pruned it
+        return iter(entries)
+
+    cache.put(chart_key('bar', {'i': 0}, {}), b'img', 'svg')
+    cache.put(chart_key('bar', {'i': 1}, {}), b'img', 'svg')
+    monkeypatch.setattr(chart_cache_module.os, 'scandir', scandir_then_lose_a_file)
+    cache.put(chart_key('bar', {'i': 2}, {}), b'img', 'svg')
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.svg')]) == 1
+
+
+def test_prune_removes_stale_temp_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(chart_cache_module, 'PRUNE_EVERY', 1)
+    cache = ChartCache(str(tmp_path), memory_items=4, disk_items=10)
+    stale, fresh = tmp_path / 'dead.tmp', tmp_path / 'writing.tmp'
+    stale.write_bytes(b'half')
+    fresh.write_bytes(b'half')
+    old = time.time() - chart_cache_module.STALE_TMP_SECONDS - 60
+    os.utime(stale, (old, old))
+    cache.put(chart_key('bar', {}, {}), b'img', 'svg')
+    assert not stale.exists()
+    assert fresh.exists()
+
+
+def test_reading_a_job_keeps_it_from_being_pruned_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(chart_cache_module, 'PRUNE_EVERY', 1)
+    cache = ChartCache(str(tmp_path), memory_items=4, disk_items=2)
+    hot, cold = chart_key('bar', {'i': 'hot'}, {}), chart_key('bar', {'i': 'cold'}, {})
+    cache.put_job(hot, {'kind': 'bar'})
+    cache.put_job(cold, {'kind': 'bar'})
+    old = time.time() - 60
+    os.utime(tmp_path / f'{hot}.json', (old - 10, old - 10))
+    os.utime(tmp_path / f'{cold}.json', (old, old))
+    assert cache.get_job(hot) == {'kind': 'bar'}
+    cache.put(chart_key('bar', {'i': 'new'}, {}), b'img', 'svg')
+    assert cache.get_job(hot) is not None
+    assert cache.get_job(cold) is None
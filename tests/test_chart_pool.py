@@ -0,0 +1,29 @@
+"""Tests for how the chart pool tells render processes apart (app/utils/chart_pool.py)."""
+import multiprocessing
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.utils import chart_pool as chart_pool_module
+from app.utils.chart_pool import chart_pool, in_render_process
+
+
+def test_uvicorn_worker_is_not_a_render_process(monkeypatch):
+    # uvicorn --workers/--reload children are named SpawnProcess-N too
+    monkeypatch.setattr(multiprocessing.current_process(), 'name', 'SpawnProcess-1')
+    app = create_app(TestingConfig)
+    assert not in_render_process()
+    assert db.close_db in app.teardown_appcontext_funcs
+
+
+def test_render_process_gets_no_pool_of_its_own(app, monkeypatch):
+    monkeypatch.setattr(chart_pool_module, '_render_process', True)
+    app.config.update(CHART_POOL_WORKERS=2, CHART_POOL_WARM=False)
+    chart_pool_module.init_app(app)
+    assert in_render_process()
+    assert chart_pool.workers == 0
+
+
+def test_main_script_reimport_counts_as_a_render_process(monkeypatch):
+    # Pool processes build the app again before the initializer marks them
+    monkeypatch.setattr(multiprocessing.current_process(), '_inheriting', True, raising=False)
+    assert in_render_process()
@@ -0,0 +1,95 @@
+"""Tests for the crew pairing solver (app/utils/crew_pairing.py) - no DB needed."""
+from datetime import datetime, timedelta
+
+from app.utils.crew_pairing import assign_crew
+from app.utils.scheduling import ResourceTimeline
+
+
+DAY = datetime(2026, 11, 1)
+
+
+def flight(flight_id, origin, dest, hour, hours=2, pilots=1, attendants=0, long_flight=False):
+    departure = DAY + timedelta(hours=hour)
+    return {'flight_id': flight_id, 'origin': origin, 'dest': dest, 'departure': departure,
+            'arrival': departure + timedelta(hours=hours), 'long_flight': long_flight,
+            'needs': {'pilot': pilots, 'attendant': attendants}}
+
+
+def crew(pilots=(), attendants=(), trained=()):
+    """rosters + timelines for {id: home airport} pilots and attendants."""
+    rosters = {'pilot': {}, 'attendant': {}}
+    timelines = {'pilot': {}, 'attendant': {}}
+    for role, members in (('pilot', pilots), ('attendant', attendants)):
+        for crew_id, home in dict(members).items():
+            rosters[role][crew_id] = {'Id': crew_id, 'LongFlightsTraining': crew_id in trained}
+            timelines[role][crew_id] = ResourceTimeline(home)
+    return rosters, timelines
+
+
+def by_flight(result):
+    return {a['flight_id']: a for a in result['assignments']}
+
+
+def test_no_flights():
+    assert assign_crew([], *crew())['assignments'] == []
+
+
+def test_crew_must_be_at_the_origin():
+    rosters, timelines = crew(pilots={'P1': 'ATH', 'P2': 'TLV'})
+    result = assign_crew([flight('F1', 'TLV', 'ATH', 6)], rosters, timelines)
+    assert by_flight(result)['F1']['pilot_ids'] == ['P2']
+
+
+def test_no_overlapping_flights():
+    rosters, timelines = crew(pilots={'P1': 'TLV'})
+    result = assign_crew([flight('F1', 'TLV', 'ATH', 6), flight('F2', 'TLV', 'ROM', 7)], rosters, timelines)
+    assert list(by_flight(result)) == ['F1']
+    assert result['unfilled'][0]['flight_id'] == 'F2'
+    assert 'not enough pilots' in result['unfilled'][0]['error']
+
+
+def test_crew_follow_their_flights():
+    rosters, timelines = crew(pilots={'P1': 'TLV'})
+    result = assign_crew([flight('F1', 'TLV', 'ATH', 6), flight('F2', 'ATH', 'TLV', 10)], rosters, timelines)
+    assert by_flight(result)['F2']['pilot_ids'] == ['P1']
+    assert result['repositioned'] == 0
+    # The timelines are updated in place
+    assert [s[4] for s in timelines['pilot']['P1'].segments] == ['F1', 'F2']
+
+
+def test_turnaround_is_respected():
+    rosters, timelines = crew(pilots={'P1': 'TLV'})
+    flights = [flight('F1', 'TLV', 'ATH', 6), flight('F2', 'ATH', 'TLV', 8, hours=2)]
+    assert len(assign_crew(flights, rosters, timelines, turnaround_minutes=30)['assignments']) == 1
+
+
+def test_long_flights_need_trained_crew():
+    rosters, timelines = crew(pilots={'P1': 'TLV', 'P2': 'TLV'}, trained={'P2'})
+    result = assign_crew([flight('F1', 'TLV', 'JFK', 6, hours=12, long_flight=True)], rosters, timelines)
+    assert by_flight(result)['F1']['pilot_ids'] == ['P2']
+
+
+def test_a_flight_gets_all_its_crew_or_none():
+    rosters, timelines = crew(pilots={'P1': 'TLV', 'P2': 'TLV'}, attendants={'A1': 'TLV'})
+    result = assign_crew([flight('F1', 'TLV', 'ATH', 6, pilots=2, attendants=2)], rosters, timelines)
+    assert result['assignments'] == []
+    assert 'attendants' in result['unfilled'][0]['error']
+    assert all(not t.segments for t in timelines['pilot'].values())
+
+
+def test_hours_are_balanced_with_history():
+    rosters, timelines = crew(pilots={'P1': 'TLV', 'P2': 'TLV'})
+    history = {'pilot': {'P1': 600}}
+    result = assign_crew([flight('F1', 'TLV', 'ATH', 6)], rosters, timelines, history_minutes=history)
+    assert by_flight(result)['F1']['pilot_ids'] == ['P2']
+    assert result['minutes']['pilot'] == {'P1': 600, 'P2': 120}
+
+
+def test_avoids_stranding_crew_away_from_home():
+    # P1 has flown more, but is already booked back from ATH - sending P2 would strand them there
+    rosters, timelines = crew(pilots={'P1': 'TLV', 'P2': 'TLV'})
+    timelines['pilot']['P1'].add(DAY + timedelta(hours=12), DAY + timedelta(hours=14), 'ATH', 'TLV', 'BACK')
+    history = {'pilot': {'P1': 200}}
+    result = assign_crew([flight('F1', 'TLV', 'ATH', 6)], rosters, timelines, history_minutes=history)
+    assert by_flight(result)['F1']['pilot_ids'] == ['P1']
+    assert result['repositioned'] == 0
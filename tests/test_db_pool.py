@@ -0,0 +1,191 @@
+"""Tests for the connection pool and prepared statement cache (app/utils/db_pool.py) - MySQL is faked."""
+import threading
+import time
+
+import mysql.connector
+import pytest
+
+from app import db
+from app.repositories import order_repository
+from app.utils.db_pool import ConnectionPool, PoolTimeout, StatementCache
+
+
+class FakePreparedCursor:
+    """Re-prepares the way MySQLCursorPrepared does: whenever the SQL isn't the same object as last time."""
+
+    def __init__(self, server):
+        self.server = server
+        self._executed = None
+        self.with_rows = True
+        self.column_names = ('1',)
+
+    def execute(self, operation, params=()):
+        if operation is not self._executed:
+            self._executed = operation
+            self.server['prepares'] += 1
+        self.server['executions'] += 1
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.server = {'prepares': 0, 'executions': 0}
+        self.statements = StatementCache()
+
+    def cursor(self, prepared=False, dictionary=False):
+        assert prepared
+        return FakePreparedCursor(self.server)
+
+
+def test_seat_check_is_prepared_once_per_variant(app, monkeypatch):
+    conn = FakeConnection()
+    monkeypatch.setattr(db, '_connection_for', lambda query, commit=False, primary=False: conn)
+    with app.app_context():
+        for _ in range(5):
+            assert not order_repository.is_seat_taken_for_flight('FL0001', 3, 'A')
+        assert conn.server['prepares'] == 1
+        for _ in range(5):
+            order_repository.is_seat_taken_for_flight('FL0001', 3, 'A', exclude_order_code='ABC123')
+    assert conn.server['prepares'] == 2
+    assert conn.server['executions'] == 10
+
+
+def test_statement_cache_runs_the_cached_sql_object(app, monkeypatch):
+    # SQL built per call is equal to the cached key but a new object - the cache hands back its own
+    conn = FakeConnection()
+    monkeypatch.setattr(db, '_connection_for', lambda query, commit=False, primary=False: conn)
+    with app.app_context():
+        for _ in range(3):
+            sql = "SELECT 1 FROM orders WHERE UniqueOrderCode = %s"
+            sql += " AND Status != 'cancelled'"
+            db.execute_query(sql, ('ABC123',), fetch_one=True, prepared=True, row_factory=db.tuple_rows)
+    assert conn.server['prepares'] == 1
+    assert len(conn.statements) == 1
+
+
+class FakeMySQL:
+    """Stands in for mysql.connector.connect - hands out numbered connections and can go down."""
+
+    def __init__(self):
+        self.opened = []
+        self.down = False
+
+    def connect(self, **kwargs):
+        if self.down:
+            raise mysql.connector.errors.InterfaceError('MySQL is down')
+        connection = FakeServerConnection(len(self.opened) + 1)
+        self.opened.append(connection)
+        return connection
+
+
+class FakeServerConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.alive = True
+        self.unread_result = False
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise mysql.connector.errors.OperationalError('gone away')
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeMySQL()
+    monkeypatch.setattr(mysql.connector, 'connect', fake.connect)
+    return fake
+
+
+def test_checkout_reuses_returned_connections(server):
+    pool = ConnectionPool({}, size=2, max_overflow=0)
+    first = pool.get_connection()
+    number = first.number
+    first.close()
+    again = pool.get_connection()
+    assert again.number == number
+    assert len(server.opened) == 1
+    assert pool.stats()['checked_out'] == 1
+    # Returned connections are rolled back for the next borrower
+    assert server.opened[0].rollbacks == 1
+
+
+def test_returned_wrapper_cannot_be_used(server):
+    pool = ConnectionPool({}, size=1, max_overflow=0)
+    conn = pool.get_connection()
+    conn.close()
+    with pytest.raises(mysql.connector.errors.OperationalError):
+        conn.ping()
+
+
+def test_overflow_connections_are_closed_when_returned(server):
+    pool = ConnectionPool({}, size=1, max_overflow=1)
+    base, extra = pool.get_connection(), pool.get_connection()
+    assert pool.stats()['overflow'] == 1
+    extra.close()
+    base.close()
+    stats = pool.stats()
+    assert stats['open'] == 1 and stats['idle'] == 1
+    assert [c.closed for c in server.opened] == [False, True]
+
+
+def test_exhausted_pool_times_out(server):
+    pool = ConnectionPool({}, size=1, max_overflow=0, timeout=0.05)
+    held = pool.get_connection()
+    with pytest.raises(PoolTimeout):
+        pool.get_connection()
+    assert pool.stats()['timeouts'] == 1
+    held.close()
+
+
+def test_waiting_checkout_gets_the_returned_connection(server):
+    pool = ConnectionPool({}, size=1, max_overflow=0, timeout=5)
+    held = pool.get_connection()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.get_connection()))
+    waiter.start()
+    time.sleep(0.05)
+    held.close()
+    waiter.join(2)
+    assert got and got[0].number == 1
+    assert pool.stats()['waits'] == 1
+
+
+def test_old_connections_are_recycled(server):
+    pool = ConnectionPool({}, size=1, max_overflow=0, recycle=0.01)
+    pool.get_connection().close()
+    time.sleep(0.02)
+    conn = pool.get_connection()
+    assert conn.number == 2
+    assert server.opened[0].closed
+    assert pool.stats()['recycled'] == 1
+
+
+def test_dead_idle_connections_are_replaced(server):
+    pool = ConnectionPool({}, size=1, max_overflow=0)
+    pool.get_connection().close()
+    server.opened[0].alive = False
+    assert pool.get_connection().number == 2
+    assert pool.stats()['invalidated'] == 1
+
+
+def test_failed_connect_gives_the_slot_back(server):
+    pool = ConnectionPool({}, size=1, max_overflow=0, timeout=0.05)
+    server.down = True
+    with pytest.raises(mysql.connector.errors.InterfaceError):
+        pool.get_connection()
+    assert pool.stats()['open'] == 0
+    server.down = False
+    assert pool.get_connection().number == 1
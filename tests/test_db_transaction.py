@@ -0,0 +1,130 @@
+"""Tests for db.transaction() nesting, savepoints and rollback-only (app/db.py) - the connection is faked."""
+import mysql.connector
+import pytest
+from flask import g
+
+from app import db
+from app.repositories import report_fact_repository
+from app.services import report_fact_service
+
+
+class FakeCursor:
+    def __init__(self, log, fail_on):
+        self.log = log
+        self.fail_on = fail_on
+
+    def execute(self, sql, params=()):
+        if sql in self.fail_on:
+            raise mysql.connector.errors.DatabaseError(f'{sql} failed')
+        self.log.append(sql)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Logs the transaction statements it's sent instead of running them."""
+
+    def __init__(self):
+        self.log = []
+        self.fail_on = set()
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.log, self.fail_on)
+
+    def commit(self):
+        self.log.append('COMMIT')
+
+    def rollback(self):
+        self.log.append('ROLLBACK')
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def conn(app):
+    with app.app_context():
+        g.db = FakeConnection()
+        yield g.db
+        g.pop('db')
+
+
+def test_single_block_commits_once(conn):
+    with db.transaction():
+        db.commit()  # deferred to the end of the block
+        assert db.in_transaction()
+    assert not db.in_transaction()
+    assert conn.log == ['COMMIT']
+
+
+def test_error_rolls_the_whole_block_back(conn):
+    with pytest.raises(ValueError):
+        with db.transaction():
+            raise ValueError('sold out')
+    assert conn.log == ['ROLLBACK']
+    assert not db.in_transaction()
+
+
+def test_nested_block_is_a_savepoint(conn):
+    with db.transaction():
+        with db.transaction():
+            with db.transaction():
+                pass
+    assert conn.log == ['SAVEPOINT flytau_sp_1', 'SAVEPOINT flytau_sp_2',
+                        'RELEASE SAVEPOINT flytau_sp_2', 'RELEASE SAVEPOINT flytau_sp_1', 'COMMIT']
+
+
+def test_caught_inner_failure_only_undoes_the_savepoint(conn):
+    with db.transaction():
+        try:
+            with db.transaction():
+                raise ValueError('seat taken')
+        except ValueError:
+            pass
+    assert conn.log == ['SAVEPOINT flytau_sp_1', 'ROLLBACK TO SAVEPOINT flytau_sp_1', 'COMMIT']
+
+
+def test_inner_failure_that_escapes_rolls_everything_back(conn):
+    with pytest.raises(ValueError):
+        with db.transaction():
+            with db.transaction():
+                raise ValueError('seat taken')
+    assert conn.log == ['SAVEPOINT flytau_sp_1', 'ROLLBACK TO SAVEPOINT flytau_sp_1', 'ROLLBACK']
+
+
+def test_rollback_inside_a_block_makes_it_rollback_only(conn):
+    with pytest.raises(db.TransactionRolledBack):
+        with db.transaction():
+            with db.transaction():
+                db.rollback()
+    assert conn.log == ['SAVEPOINT flytau_sp_1', 'RELEASE SAVEPOINT flytau_sp_1', 'ROLLBACK']
+    # The next unit of work starts clean
+    conn.log.clear()
+    with db.transaction():
+        pass
+    assert conn.log == ['COMMIT']
+
+
+def test_lost_savepoint_makes_the_outer_block_rollback_only(conn):
+    # After a deadlock MySQL has already rolled back everything, savepoints included
+    conn.fail_on.add('ROLLBACK TO SAVEPOINT flytau_sp_1')
+    with pytest.raises(db.TransactionRolledBack):
+        with db.transaction():
+            try:
+                with db.transaction():
+                    raise mysql.connector.errors.DatabaseError('Deadlock found')
+            except mysql.connector.Error:
+                pass
+    assert conn.log == ['SAVEPOINT flytau_sp_1', 'ROLLBACK']
+
+
+def test_crew_hours_failure_does_not_doom_the_callers_block(conn, monkeypatch):
+    def unreadable(role, ids):
+        raise mysql.connector.errors.ProgrammingError('no ledger')
+
+    monkeypatch.setattr(report_fact_repository, 'get_crew_hours', unreadable)
+    with db.transaction():
+        crew = report_fact_service.add_crew_hours([{'id': 'P1'}], 'Pilot')
+    assert crew == [{'id': 'P1'}]
+    assert conn.log == ['COMMIT']
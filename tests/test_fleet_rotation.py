@@ -0,0 +1,110 @@
+"""Tests for the tail assignment planner (app/utils/fleet_rotation.py) - no DB needed."""
+from datetime import datetime, timedelta
+
+from app.services.fleet_planning_service import _pin_between_sold
+from app.utils.fleet_rotation import RotationPlan, assign_chains, build_chains, plan_rotations
+
+
+DAY = datetime(2026, 11, 1)
+
+
+def flight(flight_id, origin, dest, hour, hours=2, long_flight=False, **extra):
+    departure = DAY + timedelta(hours=hour)
+    return dict(flight_id=flight_id, origin=origin, dest=dest, departure=departure,
+                arrival=departure + timedelta(hours=hours), long_flight=long_flight, **extra)
+
+
+def plane(size='small', location='TLV', free_from=None):
+    return {'size': size, 'location': location, 'free_from': free_from}
+
+
+def chain_ids(chains, flights):
+    return sorted([flights[i]['flight_id'] for i in chain] for chain in chains)
+
+
+def test_build_chains_links_connecting_legs():
+    flights = [flight('F1', 'TLV', 'ATH', 6), flight('F2', 'TLV', 'ROM', 7),
+               flight('F3', 'ATH', 'TLV', 10), flight('F4', 'ROM', 'TLV', 11)]
+    chains = build_chains(flights, {}, turnaround_minutes=60)
+    assert chain_ids(chains, flights) == [['F1', 'F3'], ['F2', 'F4']]
+
+
+def test_build_chains_respects_turnaround():
+    flights = [flight('F1', 'TLV', 'ATH', 6), flight('F2', 'ATH', 'TLV', 8, hours=2)]
+    assert len(build_chains(flights, {}, turnaround_minutes=60)) == 2
+    assert len(build_chains(flights, {}, turnaround_minutes=0)) == 1
+
+
+def test_build_chains_keeps_size_classes_apart():
+    flights = [flight('F1', 'TLV', 'ATH', 6, size='small'), flight('F2', 'ATH', 'TLV', 10, size='large')]
+    assert len(build_chains(flights, {}, turnaround_minutes=60)) == 2
+
+
+def test_build_chains_keeps_pinned_legs_of_one_plane_together():
+    # Without the forced link the matching may chain P1 -> U1 -> U2 and leave P2 on its own,
+    # splitting plane A's sold legs over two rotations
+    flights = [flight('P1', 'TLV', 'ATH', 0, airplane_id='A'),
+               flight('U1', 'ATH', 'TLV', 3),
+               flight('P2', 'ATH', 'TLV', 4, airplane_id='A'),
+               flight('U2', 'TLV', 'ROM', 7)]
+    airplanes = {'A': plane()}
+    chains = build_chains(flights, airplanes, turnaround_minutes=30)
+    with_p1 = next(c for c in chains if 0 in c)
+    assert 2 in with_p1
+
+
+def test_assign_chains_matches_location_and_pins():
+    flights = [flight('F1', 'TLV', 'ATH', 6), flight('F2', 'ATH', 'TLV', 10, airplane_id='B')]
+    airplanes = {'A': plane(location='TLV'), 'B': plane(location='ATH')}
+    chains = [[0], [1]]
+    matched, unmatched = assign_chains(chains, flights, airplanes)
+    assert matched == {0: 'A', 1: 'B'}
+    assert unmatched == []
+
+
+def test_assign_chains_long_flight_needs_large_plane():
+    flights = [flight('F1', 'TLV', 'JFK', 6, hours=12, long_flight=True)]
+    matched, unmatched = assign_chains([[0]], flights, {'S': plane('small')})
+    assert matched == {} and unmatched == [0]
+    matched, _ = assign_chains([[0]], flights, {'S': plane('small'), 'L': plane('large')})
+    assert matched == {0: 'L'}
+
+
+def test_assign_chains_keeps_size_class():
+    # An unsold small-plane flight must not move to the free large plane
+    flights = [flight('F1', 'TLV', 'ATH', 6, size='small')]
+    matched, unmatched = assign_chains([[0]], flights, {'L': plane('large')})
+    assert matched == {} and unmatched == [0]
+
+
+def test_plan_rotations_never_changes_size():
+    flights = [flight('F1', 'TLV', 'ATH', 6, size='small'), flight('F2', 'TLV', 'ROM', 6, size='large')]
+    airplanes = {'S': plane('small'), 'L': plane('large')}
+    result = plan_rotations(flights, airplanes, turnaround_minutes=60)
+    assert result['assignments'] == {'F1': 'S', 'F2': 'L'}
+
+
+def test_plan_rotations_pinned_plane_keeps_all_its_sold_legs():
+    flights = [flight('P1', 'TLV', 'ATH', 0, airplane_id='A'),
+               flight('U1', 'ATH', 'TLV', 3),
+               flight('P2', 'ATH', 'TLV', 4, airplane_id='A'),
+               flight('U2', 'TLV', 'ROM', 7)]
+    airplanes = {'A': plane(), 'B': plane(location='ATH')}
+    result = plan_rotations(flights, airplanes, turnaround_minutes=30)
+    assert result['assignments']['P1'] == 'A'
+    assert result['assignments']['P2'] == 'A'
+    assert not [u for u in result['unassigned'] if u['flight_id'] in ('P1', 'P2')]
+
+
+def test_rotation_plan_add_flight_stays_in_size_class():
+    plan = RotationPlan({'S': plane('small'), 'L': plane('large')}, turnaround_minutes=60)
+    plan.solve([])
+    assert plan.add_flight(flight('F1', 'TLV', 'ATH', 6, size='large')) == {'F1': 'L'}
+
+
+def test_pin_between_sold_pins_the_legs_in_between():
+    flights = [flight('P1', 'TLV', 'ATH', 0, airplane_id='A'), flight('U1', 'ATH', 'ROM', 3),
+               flight('P2', 'ROM', 'TLV', 6, airplane_id='A'), flight('U2', 'TLV', 'ATH', 9)]
+    current = {'P1': 'A', 'U1': 'A', 'P2': 'A', 'U2': 'A'}
+    _pin_between_sold(flights, current)
+    assert [f.get('airplane_id') for f in flights] == ['A', 'A', 'A', None]
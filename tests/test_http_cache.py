@@ -0,0 +1,103 @@
+"""Tests for conditional GETs (app/utils/http_cache.py) - the version table is faked."""
+from datetime import datetime
+
+import pytest
+
+from app.repositories import cache_version_repository
+from app.utils import http_cache
+
+
+@pytest.fixture
+def state(app, monkeypatch):
+    """The fake CacheVersions table ({scope: version}), the lookups made and how often the view ran."""
+    state = {'versions': {}, 'lookups': [], 'renders': 0}
+
+    def get_version(scope):
+        state['lookups'].append(scope)
+        if scope not in state['versions']:
+            return None
+        return {'Version': state['versions'][scope], 'UpdatedAt': datetime(2030, 1, 1, 12, 0)}
+
+    monkeypatch.setattr(cache_version_repository, 'get_version', get_version)
+
+    @app.route('/test/flights/<flight_id>')
+    @http_cache.flight_page
+    def cached_flight(flight_id):
+        state['renders'] += 1
+        return f'flight {flight_id}'
+
+    return state
+
+
+def test_first_visit_gets_validators(client, state):
+    response = client.get('/test/flights/FL0001')
+    assert response.status_code == 200
+    assert response.headers['ETag'].startswith('W/"')
+    assert response.headers['Last-Modified']
+    assert 'public' in response.headers['Cache-Control']
+    assert 's-maxage=10' in response.headers['Cache-Control']
+    assert 'Cookie' in response.headers['Vary']
+
+
+def test_matching_etag_gets_304_without_rendering(client, state):
+    etag = client.get('/test/flights/FL0001').headers['ETag']
+    response = client.get('/test/flights/FL0001', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert state['renders'] == 1
+    assert state['lookups'] == ['flight:FL0001', 'flight:FL0001']
+
+
+def test_flight_change_gives_a_new_etag(client, state):
+    etag = client.get('/test/flights/FL0001').headers['ETag']
+    state['versions']['flight:FL0001'] = 1
+    response = client.get('/test/flights/FL0001', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_other_flights_keep_their_etag(client, state):
+    etag = client.get('/test/flights/FL0001').headers['ETag']
+    state['versions']['flight:FL0002'] = 1
+    response = client.get('/test/flights/FL0001', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+def test_logged_in_pages_are_private_per_user(client, state):
+    anonymous = client.get('/test/flights/FL0001').headers['ETag']
+    with client.session_transaction() as sess:
+        sess['user_id'] = 'a@example.com'
+        sess['role'] = 'customer'
+    response = client.get('/test/flights/FL0001')
+    assert 'private' in response.headers['Cache-Control']
+    assert 'no-cache' in response.headers['Cache-Control']
+    assert response.headers['ETag'] != anonymous
+
+
+def test_pending_flash_skips_caching(client, state):
+    with client.session_transaction() as sess:
+        sess['_flashes'] = [('error', 'Flight not found')]
+    response = client.get('/test/flights/FL0001')
+    assert 'ETag' not in response.headers
+    assert state['lookups'] == []
+
+
+def test_version_lookup_failure_still_serves_the_page(client, state, monkeypatch):
+    def broken(scope):
+        raise RuntimeError('CacheVersions missing')
+
+    monkeypatch.setattr(cache_version_repository, 'get_version', broken)
+    response = client.get('/test/flights/FL0001')
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+
+
+def test_version_lookup_is_one_prepared_query_on_the_primary(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cache_version_repository, 'execute_query',
+                        lambda sql, params, **kwargs: calls.append((sql, params, kwargs)))
+    cache_version_repository.get_version('flight:FL0001')
+    cache_version_repository.get_version('reference')
+    assert calls[0][0] is calls[1][0]
+    assert calls[0][1] == ('flight:FL0001',)
+    assert calls[0][2]['primary'] and calls[0][2]['prepared']
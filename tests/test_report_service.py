@@ -0,0 +1,41 @@
+"""Tests for running reports through the report cache (app/services/report_service.py) - no DB needed."""
+import pytest
+
+from app.services import report_service
+from app.utils.report_cache import report_cache
+
+
+@pytest.fixture
+def occupancy_runs(tmp_path, monkeypatch):
+    """Counts real runs of a fake occupancy report with the real one's signature."""
+    runs = []
+
+    def occupancy(filters=None, after=None, page_size=report_service.DEFAULT_PAGE_SIZE):
+        runs.append((after, page_size))
+        return {'data': [], 'summary': {}}
+
+    monkeypatch.setitem(report_service.REPORTS, 'occupancy', occupancy)
+    saved = (report_cache.directory, report_cache.ttl, report_cache.max_items)
+    report_cache.configure(str(tmp_path), 300, 16)
+    yield runs
+    report_cache.configure(*saved)
+
+
+def test_warm_up_fills_the_key_the_occupancy_page_reads(occupancy_runs):
+    warm = dict(zip(report_service.REPORTS, report_service.default_reports(page_size=25)))
+    warm['occupancy']()
+    # What report_routes.report_occupancy passes for the first unfiltered page
+    report_service.run_report('occupancy', {}, refresh=False, after=None, page_size=25)
+    assert occupancy_runs == [(None, 25)]
+
+
+def test_left_out_options_share_the_key_with_their_defaults(occupancy_runs):
+    report_service.run_report('occupancy')
+    report_service.run_report('occupancy', None, after=None, page_size=report_service.DEFAULT_PAGE_SIZE)
+    assert len(occupancy_runs) == 1
+
+
+def test_other_pages_are_cached_separately(occupancy_runs):
+    report_service.run_report('occupancy', after=None, page_size=25)
+    report_service.run_report('occupancy', after='FL0100', page_size=25)
+    assert occupancy_runs == [(None, 25), ('FL0100', 25)]
@@ -0,0 +1,125 @@
+"""Tests for the bulk schedule import (app/services/schedule_service.py) - repositories are faked, no DB needed."""
+import io
+from contextlib import contextmanager
+
+import mysql.connector
+import pytest
+
+from app import db
+from app.repositories import aircraft_repository, crew_repository, flight_repository
+from app.services import report_fact_service, schedule_service
+
+
+PILOTS = [{'Id': f'P{i}', 'LongFlightsTraining': 1} for i in range(1, 5)]
+ATTENDANTS = [{'Id': f'A{i}', 'LongFlightsTraining': 1} for i in range(1, 7)]
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Fakes the reads plan_schedule makes and records what write_schedule would write."""
+    written = {'transactions': 0, 'flights': [], 'changed': []}
+
+    @contextmanager
+    def transaction():
+        written['transactions'] += 1
+        yield
+
+    monkeypatch.setattr(db, 'transaction', transaction)
+    monkeypatch.setattr(flight_repository, 'get_all_routes',
+                        lambda: [{'origin': 'TLV', 'destination': 'ATH', 'duration_minutes': 120},
+                                 {'origin': 'ATH', 'destination': 'TLV', 'duration_minutes': 120}])
+    monkeypatch.setattr(aircraft_repository, 'get_all_airplanes',
+                        lambda: [{'AirplaneId': 'S1', 'size': 'small'}])
+    monkeypatch.setattr(crew_repository, 'get_all_pilots', lambda: PILOTS)
+    monkeypatch.setattr(crew_repository, 'get_all_flight_attendants', lambda: ATTENDANTS)
+    monkeypatch.setattr(flight_repository, 'get_airplane_locations_before', lambda start: {})
+    monkeypatch.setattr(flight_repository, 'get_flights_in_window', lambda start, end: [])
+    monkeypatch.setattr(crew_repository, 'get_crew_locations_before',
+                        lambda start: {'pilot': {}, 'attendant': {}})
+    monkeypatch.setattr(crew_repository, 'get_crew_assignments_in_window', lambda start, end: [])
+    monkeypatch.setattr(flight_repository, 'get_existing_flight_ids', lambda ids: set())
+    monkeypatch.setattr(flight_repository, 'create_flights_bulk', written['flights'].extend)
+    monkeypatch.setattr(crew_repository, 'assign_crew_bulk', lambda pilots, attendants: None)
+    monkeypatch.setattr(flight_repository, 'log_manager_edits_bulk', lambda manager_id, ids: None)
+    monkeypatch.setattr(report_fact_service, 'flight_changed', lambda *ids: written['changed'].extend(ids))
+    return written
+
+
+def row(line, day, **extra):
+    return dict(dict(line=line, origin='TLV', destination='ATH', departure_date=f'2026-11-{day:02d}',
+                     departure_time='08:00', economy_price='100'), **extra)
+
+
+def test_plan_schedule_picks_plane_and_crew(fake_db):
+    report = schedule_service.plan_schedule([row(1, 1)])
+    assert report['errors'] == []
+    flight = report['flights'][0]
+    assert flight['airplane_id'] == 'S1'
+    assert len(flight['pilot_ids']) == 2 and len(flight['attendant_ids']) == 3
+
+
+def test_plan_schedule_accepts_numeric_crew_ids(fake_db, monkeypatch):
+    # JSON timetables can give crew IDs as numbers
+    monkeypatch.setattr(crew_repository, 'get_all_pilots', lambda: [{'Id': '1'}, {'Id': '2'}])
+    report = schedule_service.plan_schedule([row(1, 1, pilot_ids=[1, 2])])
+    assert report['errors'] == []
+    assert report['flights'][0]['pilot_ids'] == ['1', '2']
+
+
+def test_plan_schedule_reports_unknown_numeric_crew_ids(fake_db):
+    report = schedule_service.plan_schedule([row(1, 1, pilot_ids=[7, 8])])
+    assert report['flights'] == []
+    assert 'pilot(s) 7, 8 not available' in report['errors'][0]['error']
+
+
+def test_plan_schedule_rejects_crew_ids_that_are_not_a_list(fake_db):
+    report = schedule_service.plan_schedule([row(1, 1, pilot_ids=12)])
+    assert report['errors'][0]['error'] == 'pilot_ids must be a list of IDs'
+
+
+def test_write_schedule_uses_one_transaction_for_every_batch(fake_db):
+    # Out and back every day, so the plane and crew are where the next leg starts
+    rows = [row(line, line, **({'origin': 'ATH', 'destination': 'TLV'} if line % 2 == 0 else {}))
+            for line in range(1, 6)]
+    report = schedule_service.plan_schedule(rows)
+    assert report['errors'] == []
+    assert schedule_service.write_schedule(report['flights'], manager_id='M1', batch_size=2) == 5
+    assert fake_db['transactions'] == 1
+    assert len(fake_db['flights']) == 5
+    assert sorted(fake_db['changed']) == sorted(f['flight_id'] for f in report['flights'])
+
+
+def test_import_schedule_reports_a_refused_write(fake_db, monkeypatch):
+    def refuse(batch):
+        raise mysql.connector.IntegrityError('duplicate flight')
+
+    monkeypatch.setattr(flight_repository, 'create_flights_bulk', refuse)
+    content = b'origin,destination,departure_date,departure_time,economy_price\nTLV,ATH,2026-11-01,08:00,100\n'
+    report = schedule_service.import_schedule(content, dry_run=False)
+    assert report['created'] == 0
+    assert report['errors'][-1]['error'].startswith('Nothing was written')
+    assert fake_db['changed'] == []
+
+
+def test_import_route_refuses_large_uploads(app, client):
+    app.config['SCHEDULE_IMPORT_MAX_BYTES'] = 10
+    with client.session_transaction() as sess:
+        sess['user_id'] = 'M1'
+        sess['role'] = 'manager'
+    response = client.post('/admin/flights/import',
+                           data={'schedule_file': (io.BytesIO(b'x' * 100), 'big.csv')})
+    assert response.status_code == 200
+    assert b'too large' in response.data
+
+
+def test_repeat_until_is_capped(fake_db):
+    entries, errors = schedule_service.expand_recurrences(
+        [row(1, 1, repeat_until='2126-11-01'), row(2, 1, repeat_until='2026-11-03')], max_days=30)
+    assert [e['line'] for e in entries] == [2, 2, 2]
+    assert errors[0]['line'] == 1 and 'at most 30 days' in errors[0]['error']
+
+
+def test_weekdays_must_be_a_list(fake_db):
+    entries, errors = schedule_service.expand_recurrences([row(1, 1, repeat_until='2026-11-08', weekdays=3)])
+    assert entries == []
+    assert errors == [{'line': 1, 'error': 'weekdays must be a list of days'}]
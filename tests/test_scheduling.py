@@ -0,0 +1,59 @@
+"""Tests for the plane/crew timelines the schedule planners share (app/utils/scheduling.py)."""
+from datetime import date, datetime, time, timedelta
+
+from app.utils.scheduling import ResourceTimeline, to_datetime
+
+
+DAY = datetime(2026, 11, 1)
+
+
+def at(hour):
+    return DAY + timedelta(hours=hour)
+
+
+def timeline(*segments, home='TLV'):
+    result = ResourceTimeline(home)
+    for dep, arr, origin, dest, flight_id in segments:
+        result.add(at(dep), at(arr), origin, dest, flight_id)
+    return result
+
+
+def test_to_datetime_accepts_db_hour_types():
+    expected = datetime(2026, 11, 1, 8, 30)
+    assert to_datetime('2026-11-01', '08:30') == expected
+    assert to_datetime(date(2026, 11, 1), timedelta(hours=8, minutes=30)) == expected
+    assert to_datetime(date(2026, 11, 1), time(8, 30)) == expected
+
+
+def test_is_free_checks_overlaps():
+    busy = timeline((6, 8, 'TLV', 'ATH', 'F1'))
+    assert not busy.is_free(at(7), at(9))
+    assert busy.is_free(at(8), at(10))
+    assert busy.is_free(at(4), at(6))
+
+
+def test_location_follows_landed_flights():
+    plane = timeline((6, 8, 'TLV', 'ATH', 'F1'))
+    assert plane.location_at(at(5)) == 'TLV'
+    assert plane.location_at(at(7)) == 'TLV'  # still in the air
+    assert plane.location_at(at(8)) == 'ATH'
+
+
+def test_can_fly_needs_origin_and_onward_connection():
+    plane = timeline((6, 8, 'TLV', 'ATH', 'F1'), (14, 16, 'ATH', 'TLV', 'F2'))
+    assert plane.can_fly(at(9), at(11), 'ATH', 'ROM') is False  # F2 leaves from ATH, not ROM
+    assert plane.can_fly(at(9), at(11), 'ATH', 'ATH') is True
+    assert plane.can_fly(at(9), at(11), 'TLV', 'ATH') is False  # the plane is in ATH
+
+
+def test_can_fly_pads_with_turnaround():
+    plane = timeline((6, 8, 'TLV', 'ATH', 'F1'))
+    assert plane.can_fly(at(8), at(10), 'ATH', 'TLV', turnaround_minutes=0)
+    assert not plane.can_fly(at(8), at(10), 'ATH', 'TLV', turnaround_minutes=30)
+
+
+def test_remove_frees_the_slot():
+    plane = timeline((6, 8, 'TLV', 'ATH', 'F1'))
+    plane.remove('F1')
+    assert plane.is_free(at(6), at(8))
+    assert plane.location_at(at(9)) == 'TLV'
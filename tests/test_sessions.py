@@ -0,0 +1,138 @@
+"""Tests for the cookie/SQL hybrid session store (app/utils/sessions.py) - WebSessions is faked."""
+import random
+import string
+
+import pytest
+from flask import session
+
+from app.repositories import session_repository
+from app.utils.sessions import SID_KEY, HybridSessionInterface
+
+
+def filler(size):
+    # The signed cookie is compressed, so repeated characters would never outgrow it
+    return ''.join(random.Random(size).choices(string.ascii_letters, k=size))
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """The fake WebSessions table: {session_id: (data, expires_at)}."""
+    rows = {}
+
+    def get_session(session_id, now):
+        if session_id not in rows or rows[session_id][1] <= now:
+            return None
+        return {'Data': rows[session_id][0], 'ExpiresAt': rows[session_id][1]}
+
+    monkeypatch.setattr(session_repository, 'get_session', get_session)
+    monkeypatch.setattr(session_repository, 'save_session',
+                        lambda session_id, data, expires_at: rows.__setitem__(session_id, (data, expires_at)))
+    monkeypatch.setattr(session_repository, 'touch_session',
+                        lambda session_id, expires_at: rows.__setitem__(session_id, (rows[session_id][0], expires_at)))
+    monkeypatch.setattr(session_repository, 'delete_session', lambda session_id: rows.pop(session_id, None))
+    return rows
+
+
+def make_client(app, backend):
+    app.session_interface = HybridSessionInterface(backend, cookie_max_bytes=300)
+
+    @app.route('/test/session/cart/<int:size>')
+    def fill_cart(size):
+        session['cart'] = filler(size)
+        return 'ok'
+
+    @app.route('/test/session/login/<user_id>')
+    def log_in(user_id):
+        session['user_id'] = user_id
+        return 'ok'
+
+    @app.route('/test/session/logout')
+    def log_out():
+        session.clear()
+        return 'ok'
+
+    @app.route('/test/session')
+    def show():
+        return {key: value for key, value in session.items()}
+
+    return app.test_client()
+
+
+def cookie(client, app):
+    value = client.get_cookie(app.config.get('SESSION_COOKIE_NAME', 'session'))
+    return app.session_interface.get_signing_serializer(app).loads(value.value) if value else None
+
+
+@pytest.fixture
+def hybrid(app, store):
+    return make_client(app, 'hybrid')
+
+
+def test_small_session_stays_in_the_cookie(app, hybrid, store):
+    hybrid.get('/test/session/cart/10')
+    assert cookie(hybrid, app) == {'cart': filler(10)}
+    assert store == {}
+
+
+def test_big_session_moves_to_the_table(app, hybrid, store):
+    hybrid.get('/test/session/cart/1000')
+    assert list(cookie(hybrid, app)) == [SID_KEY]
+    assert list(store) == [cookie(hybrid, app)[SID_KEY]]
+    assert hybrid.get('/test/session').json == {'cart': filler(1000)}
+
+
+def test_shrunk_session_moves_back_to_the_cookie(app, hybrid, store):
+    hybrid.get('/test/session/cart/1000')
+    hybrid.get('/test/session/cart/10')
+    assert cookie(hybrid, app) == {'cart': filler(10)}
+    assert store == {}
+
+
+def test_unchanged_stored_session_is_not_rewritten(app, hybrid, store):
+    hybrid.get('/test/session/cart/1000')
+    before = dict(store)
+    hybrid.get('/test/session')
+    assert store == before
+
+
+def test_logging_in_gets_a_new_session_id(app, hybrid, store):
+    hybrid.get('/test/session/cart/1000')
+    anonymous_sid = cookie(hybrid, app)[SID_KEY]
+    hybrid.get('/test/session/login/a@example.com')
+    sid = cookie(hybrid, app)[SID_KEY]
+    assert sid != anonymous_sid
+    assert list(store) == [sid]
+    assert hybrid.get('/test/session').json['user_id'] == 'a@example.com'
+
+
+def test_logging_out_deletes_the_stored_session(app, hybrid, store):
+    hybrid.get('/test/session/cart/1000')
+    hybrid.get('/test/session/logout')
+    assert store == {}
+    assert cookie(hybrid, app) is None
+
+
+def test_expired_stored_session_starts_empty(app, hybrid, store):
+    hybrid.get('/test/session/cart/1000')
+    sid = cookie(hybrid, app)[SID_KEY]
+    store[sid] = (store[sid][0], store[sid][1].replace(year=2000))
+    assert hybrid.get('/test/session').json == {}
+
+
+def test_sql_backend_stores_even_small_sessions(app, store):
+    client = make_client(app, 'sql')
+    client.get('/test/session/cart/10')
+    assert list(cookie(client, app)) == [SID_KEY]
+    assert len(store) == 1
+
+
+def test_cookie_backend_never_touches_the_table(app, store):
+    client = make_client(app, 'cookie')
+    client.get('/test/session/cart/1000')
+    assert cookie(client, app) == {'cart': filler(1000)}
+    assert store == {}
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        HybridSessionInterface('redis')